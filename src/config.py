@@ -43,6 +43,39 @@ AI_REASONING_EFFORT = 'medium'   # Level effort: 'xhigh', 'high', 'medium', 'low
 AI_REASONING_EXCLUDE = False     # True = reasoning tidak ditampilkan di response
 AI_LOG_REASONING = True          # Catat proses reasoning ke log? (True/False)
 
+# Streaming Response (keputusan diambil begitu objek JSON tertutup, sisa stream dibaca di background)
+AI_STREAMING_ENABLED = False     # Disarankan True untuk model dengan reasoning panjang
+AI_STREAM_DRAIN_TIMEOUT = 30     # Batas waktu baca sisa stream (reasoning/penutup) di background (detik)
+
+# Router Model Cadangan (failover / hedged request untuk keputusan trading)
+AI_ROUTER_MODE = 'hedged'        # 'failover' = cadangan dipakai saat primary error | 'hedged' = cadangan paralel jika primary > p90
+AI_ROUTER_BACKUPS = [            # Endpoint cadangan urut prioritas (primary = AI_MODEL_NAME @ AI_BASE_URL)
+    # {'model': 'meta-llama/llama-4-maverick'},                                   # base_url & api key default
+    # {'model': 'gpt-4o-mini', 'base_url': 'https://api.openai.com/v1', 'api_key_env': 'OPENAI_API_KEY'},
+]
+AI_ROUTER_TIMEOUT = 60           # Timeout per request model (detik, 0 = tanpa batas)
+AI_ROUTER_DEADLINE = 90          # Batas total satu keputusan lintas semua model (detik) -> WAIT
+AI_ROUTER_HEDGE_DEFAULT_MS = 15000   # Delay hedge sebelum sample latency cukup
+AI_ROUTER_HEDGE_MIN_SAMPLES = 5      # Minimal sample latency sebelum pakai p90
+AI_ROUTER_HEDGE_MIN_MS = 2000        # Batas bawah delay hedge (hindari dobel request terus)
+AI_ROUTER_HEDGE_MAX_MS = 30000       # Batas atas delay hedge
+AI_ROUTER_HEDGE_MAX_INFLIGHT = 2     # Maks request paralel per keputusan
+AI_ROUTER_BREAKER_FAILURES = 3       # Kegagalan beruntun sebelum model dilewati (circuit open)
+AI_ROUTER_BREAKER_COOLDOWN = 120     # Lama circuit open sebelum dicoba lagi (detik)
+
+# Ledger Telemetri AI (token, latency, biaya & outcome per request -> AI_LEDGER_FILENAME)
+AI_LEDGER_ENABLED = True
+AI_MODEL_PRICING = {                 # USD per 1 juta token (input, output). Dipakai jika provider tidak kirim usage.cost
+    'arcee-ai/trinity-large-preview:free': (0.0, 0.0),
+    # 'meta-llama/llama-4-maverick': (input, output),  # isi sesuai harga di halaman model OpenRouter
+}
+
+# Prompt Compiler (instruksi statis sebagai system message + data ringkas format tabel)
+AI_PROMPT_COMPACT = True             # False = prompt legacy (satu pesan teks panjang)
+AI_PROMPT_CACHE_CONTROL = False      # True = tandai system message dengan cache_control (Anthropic/Gemini via OpenRouter)
+AI_PROMPT_TOKEN_BUDGET = 6000        # Maks token prompt (system + data), ~2x prompt normal: hanya outlier dipangkas. 0 = tanpa batas
+AI_PROMPT_REQUIRED_PRIORITY = 80     # Section dengan prioritas >= ini tidak pernah dipangkas
+
 # Identitas Bot
 AI_APP_URL = "https://github.com/KaleksananBarqi/Bot-Trading-Easy-Peasy"
 AI_APP_TITLE = "Bot Trading Easy Peasy"
@@ -52,6 +85,8 @@ ENABLE_SENTIMENT_ANALYSIS = True          # Aktifkan analisa sentimen berita?
 AI_SENTIMENT_MODEL = 'arcee-ai/trinity-large-preview:free' # Model ekonomis untuk baca berita
 SENTIMENT_ANALYSIS_INTERVAL = '1h'         # Seberapa sering cek sentimen
 SENTIMENT_UPDATE_INTERVAL = '1h'           # Interval update data raw sentimen
+NEWS_POLL_INTERVAL = '5m'                  # Poll RSS (conditional GET, feed tak berubah = 304 tanpa parse) di antara update
+SENTIMENT_PERSIST_ENABLED = True           # Simpan F&G, headline & hasil analisa ke SENTIMENT_STATE_FILENAME (dipakai ulang saat restart)
 SENTIMENT_PROVIDER = 'RSS_Feed'  # Sumber: 'RSS_Feed'
 
 # Analisa Visual (Chart Pattern)
@@ -64,6 +99,62 @@ AI_VISION_MAX_TOKENS = 300            # Naikkan untuk mencegah output terpotong
 PATTERN_MAX_RETRIES = 2               # Berapa kali retry jika output tidak valid
 PATTERN_MIN_ANALYSIS_LENGTH = 50      # Minimal panjang karakter output yang dianggap valid
 PATTERN_REQUIRED_KEYWORDS = ['BULLISH', 'BEARISH', 'NEUTRAL']  # Minimal satu harus ada
+PATTERN_PRERENDER_MAX_AGE = 300       # Chart hasil pre-render (saat candle close) dipakai maks N detik
+CHART_RENDER_WORKERS = 2              # Process pool render chart (bebas GIL). 0 = render di thread
+CHART_CACHE_MAX_ENTRIES = 64          # Maks chart pre-render (symbol, candle_ts) di memori (LRU)
+CHART_ARCHIVE_ENABLED = False         # Simpan salinan PNG + raw_stats ke CHART_ARCHIVE_DIR (audit / replay)
+
+# Batch Vision (chart beberapa kandidat digabung jadi satu gambar grid, satu request)
+PATTERN_BATCH_ENABLED = False         # True = kandidat yang datang bersamaan dianalisa dalam satu grid
+PATTERN_BATCH_MAX_PANELS = 4          # Maks chart per grid (request langsung dikirim jika penuh)
+PATTERN_BATCH_WINDOW = 0.5            # Tunggu N detik mengumpulkan kandidat sebelum grid dikirim
+PATTERN_BATCH_COLUMNS = 2             # Jumlah kolom grid
+PATTERN_BATCH_PANEL_WIDTH = 512       # Lebar tiap panel (px)
+PATTERN_BATCH_IMAGE_DETAIL = 'high'   # 'low' memperkecil grid ke 512px (terlalu kecil untuk >1 panel)
+
+# Deteksi Pattern Lokal (numpy, tanpa AI) - Vision hanya dipanggil jika hasilnya tidak konklusif
+PATTERN_DETECT_ENABLED = True
+PATTERN_VISION_ALWAYS = False         # True = Vision tetap dipanggil walau detektor lokal konklusif
+PATTERN_DETECT_LOOKBACK = 60          # Jumlah candle setup yang diperiksa (sama dengan chart Vision)
+PATTERN_DETECT_MIN_CONFIDENCE = 0.6   # Confidence minimal (0-1) agar hasil lokal dianggap konklusif
+PATTERN_DETECT_PIVOT_WINDOW = 3       # Swing high/low = ekstrem di jendela +-N candle
+PATTERN_DETECT_RECENT_BARS = 10       # Swing terakhir (divergence / double) maks N candle yang lalu
+PATTERN_FLAG_POLE_BARS = 8            # Panjang pole flag/pennant (candle)
+PATTERN_FLAG_BARS = 12                # Panjang konsolidasi flag/pennant (candle)
+PATTERN_FLAG_POLE_MIN_ATR = 3.0       # Pole minimal N x ATR
+PATTERN_DOUBLE_TOLERANCE_PCT = 0.5    # Selisih maks dua puncak / lembah double top/bottom (%)
+PATTERN_DOUBLE_MIN_SEPARATION = 5     # Jarak minimal dua puncak / lembah (candle)
+PATTERN_DOUBLE_MIN_DEPTH_ATR = 1.0    # Kedalaman neckline minimal N x ATR
+PATTERN_VOLUME_CLIMAX_MULT = 3.0      # Volume >= N x median = climax
+
+# Worker Pool Analisa AI (Vision + Logic paralel untuk beberapa koin)
+AI_WORKER_CONCURRENCY = 3             # Jumlah koin yang dianalisa AI bersamaan (1 = serial)
+AI_PROVIDER_RATE_LIMITS = {           # Maks request per menit per provider (prefix model OpenRouter, 0 = tanpa limit)
+    'default': 20,
+    'meta-llama': 20,
+    'arcee-ai': 20,
+}
+
+# Cache Keputusan AI (skip panggilan model jika state pasar ter-bucket tidak berubah)
+AI_DECISION_CACHE_ENABLED = True
+AI_DECISION_CACHE_TTL = 3600               # Keputusan cache kadaluarsa setelah N detik
+AI_DECISION_CACHE_MAX_SIZE = 256           # Maks entry (LRU)
+AI_DECISION_CACHE_RSI_BUCKET = 5           # RSI 45-49.9 dianggap sama (Stoch pakai 2x)
+AI_DECISION_CACHE_SENTIMENT_BUCKET = 10    # Skor sentimen & F&G per 10 poin
+AI_DECISION_CACHE_IMBALANCE_BUCKET = 20    # Imbalance order book per 20%
+
+# Pre-Screening Lokal (ranking kandidat sebelum masuk antrian AI)
+PRESCREEN_WEIGHTS = {                 # Bobot komponen skor 0-100
+    'trend': 0.30,                    # Keselarasan harga vs EMA, trend major & BTC
+    'rsi': 0.20,                      # Jarak RSI dari 50
+    'wick': 0.20,                     # Kekuatan wick rejection
+    'orderbook': 0.15,                # Besar imbalance order book
+    'pivot': 0.15,                    # Kedekatan harga ke S1/R1
+}
+PRESCREEN_MIN_SCORE = 0               # Skor di bawah ini tidak dikirim ke AI (0 = semua kandidat lolos)
+PRESCREEN_PIVOT_RANGE_PCT = 2.0       # Jarak ke S1/R1 (%) yang masih dianggap "dekat"
+PRESCREEN_WICK_STRENGTH_MAX = 4.0     # Strength wick >= ini = skor penuh
+PRESCREEN_IMBALANCE_MAX_PCT = 40.0    # Imbalance >= ini = skor penuh
 
 # Data OnChain
 ONCHAIN_PROVIDER = 'DefiLlama'   # Sumber data OnChain
@@ -96,7 +187,13 @@ TRAP_SAFETY_SL = 2.0             # Jarak Safety SL khusus setup Liquidity Hunt
 WHALE_THRESHOLD_USDT = 1000000   # Transaksi > $1 Juta ditandai sebagai Whale
 WHALE_HISTORY_LIMIT = 10         # Cek 10 transaksi terakhir
 STABLECOIN_INFLOW_THRESHOLD_PERCENT = 0.05
+STABLECOIN_INFLOW_WINDOWS = [1, 7, 30]       # Window inflow (hari) dari history cache
+STABLECOIN_REVALIDATE_INTERVAL = '4h'        # Data harian: dalam interval ini refresh = baca cache (tanpa request)
+STABLECOIN_HISTORY_MAX_DAYS = 400            # Maks titik harian di cache
+STABLECOIN_MERGE_OVERLAP_DAYS = 2            # Titik terakhir yang ditimpa saat merge (DefiLlama revisi hari berjalan)
 WHALE_DEDUP_WINDOW_SECONDS = 5   # Window deduplikasi transaksi whale (detik)
+WHALE_FLOW_WINDOWS = ['5m', '1h', '4h']  # Window agregat net buy/sell whale per simbol
+WHALE_WINDOW_MAX_EVENTS = 5000   # Maks transaksi per window (batas memori saat market ramai)
 
 # Mekanisme Pendinginan (Anti-FOMO/Anti-Revenge)
 COOLDOWN_IF_PROFIT = 3600        # Jeda trading di koin ini jika PROFIT (detik)
@@ -179,6 +276,8 @@ DEFAULT_CORRELATION_HIGH = 0.99
 # 5. 🎯 EKSEKUSI ORDER (TRIGGER RULES)
 # ==============================================================================
 ENABLE_MARKET_ORDERS = False      # Izinkan Market Order (False = Limit Only)
+ENTRY_FAST_PATH = True            # Kirim order dulu: sizing & leverage paralel, notifikasi Telegram di background
+ENTRY_LATENCY_BUDGET_MS = 1500    # Warning jika sinyal diterima -> order terkirim melebihi budget ini (ms)
 LIMIT_ORDER_EXPIRY_SECONDS = 7200 # Hapus Limit Order jika tak terisi dalam 2 jam
 
 # Trailing Stop Loss (TSL)
@@ -190,6 +289,7 @@ TRAILING_ACTIVATION_THRESHOLD = 0.80  # Aktif saat harga jalan 80% ke TP (Softwa
 TRAILING_CALLBACK_RATE = 0.001       # Jarak trail
 TRAILING_MIN_PROFIT_LOCK = 0.005      # Kunci minimal profit 0.5% (Software Mode Only)
 TRAILING_SL_UPDATE_COOLDOWN = 3       # Interval update ke exchange
+TRAILING_PERSIST_INTERVAL = 10        # Batch simpan watermark trailing ke tracker file (detik)
 
 # Native Trailing Stop Limits (Binance Futures)
 NATIVE_TRAILING_MIN_RATE = 0.1       # Minimal 0.1%
@@ -199,6 +299,15 @@ NATIVE_TRAILING_MAX_RATE = 5.0       # Maksimal 5.0%
 ORDER_SLTP_RETRIES = 3           # Retry pasang SL/TP max 3 kali
 ORDER_SLTP_RETRY_DELAY = 2       # Jeda retry (detik)
 
+# Amend SL (Trailing Software)
+SL_AMEND_MODE = 'replace'        # 'replace' = pasang SL baru dulu, lalu cancel SL lama | 'edit' = editOrder (jika exchange support modify untuk stop order)
+SL_AMEND_RETRY_DELAY = 0.3       # Jeda retry cancel SL lama by id (detik), jumlah retry = ORDER_SLTP_RETRIES
+
+# Order State Index (Event-Sourced dari ORDER_TRADE_UPDATE)
+ORDER_CLIENT_ID_PREFIX = 'EP'    # Prefix clientOrderId deterministik (maks 36 karakter total)
+ORDER_RECONCILE_INTERVAL = 300   # Polling fetch_open_orders hanya sebagai safety net (detik)
+ORDER_INDEX_MAX_TERMINAL = 500   # Jumlah order final (FILLED/CANCELED/EXPIRED) yang disimpan di RAM
+
 
 # ==============================================================================
 # 6. ⚙️ PENGATURAN SISTEM INFRASTRUKTUR (JARANG DIUBAH)
@@ -210,6 +319,10 @@ PAKAI_DEMO = True               # False = Real Money, True = Testnet
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_FILENAME = os.path.join(BASE_DIR, 'bot_trading.log')
 TRACKER_FILENAME = os.path.join(BASE_DIR, 'safety_tracker.json')
+AI_LEDGER_FILENAME = os.path.join(BASE_DIR, 'ai_ledger.jsonl')
+SENTIMENT_STATE_FILENAME = os.path.join(BASE_DIR, 'sentiment_state.json')
+STABLECOIN_HISTORY_FILENAME = os.path.join(BASE_DIR, 'stablecoin_history.json')
+CHART_ARCHIVE_DIR = os.path.join(BASE_DIR, 'chart_archive')
 
 # Database (MongoDB)
 MONGO_URI = os.getenv("MONGO_URI")
@@ -239,10 +352,27 @@ CONCURRENCY_LIMIT = 20           # Max thread worker
 LOOP_SLEEP_DELAY = 1             # Sleep main loop (detik)
 ERROR_SLEEP_DELAY = 5            # Sleep on error (detik)
 SAFETY_MONITOR_INTERVAL = 60     # Sleep interval safety monitor loop (detik)
+TRACE_REPORT_INTERVAL = 3600     # Interval log laporan latency order p50/p95/p99 (detik)
 API_REQUEST_TIMEOUT = 10         # Timeout request (detik)
 API_RECV_WINDOW = 10000          # RecvWindow Binance (ms)
 LOOP_SKIP_DELAY = 2              # Delay skip coin
 
+# HTTP Connection Pool (client keep-alive bersama: AI, Vision, Sentiment, On-Chain, Telegram)
+HTTP_POOL_MAX_CONNECTIONS = 50   # Total koneksi per pool
+HTTP_POOL_MAX_KEEPALIVE = 20     # Koneksi idle yang tetap dibuka (httpx)
+HTTP_POOL_LIMIT_PER_HOST = 10    # Maks koneksi paralel per host (aiohttp)
+HTTP_POOL_KEEPALIVE_EXPIRY = 60  # Koneksi idle ditutup setelah N detik
+HTTP_POOL_CONNECT_TIMEOUT = 5    # Timeout connect (detik)
+HTTP_POOL_HTTP2 = False          # HTTP/2 untuk httpx (butuh package 'h2')
+
+# Telegram Dispatcher (notifikasi dikirim dari background queue)
+TELEGRAM_QUEUE_MAXSIZE = 200     # Maks pesan antri (penuh -> pesan baru dibuang)
+TELEGRAM_MIN_INTERVAL = 1.0      # Jeda minimal antar pesan per chat (detik)
+TELEGRAM_MAX_PER_MINUTE = 20     # Limit Telegram untuk group/channel
+TELEGRAM_MAX_RETRIES = 4         # Retry untuk 429 / 5xx / error jaringan
+TELEGRAM_RETRY_BASE_DELAY = 1.0  # Backoff awal (detik), dobel tiap retry
+TELEGRAM_RETRY_MAX_DELAY = 30    # Backoff maksimal (detik)
+
 # External Info / News Sources
 CMC_FNG_URL = "https://pro-api.coinmarketcap.com/v3/fear-and-greed/latest"
 DEFILLAMA_STABLECOIN_URL = "https://stablecoins.llama.fi/stablecoincharts/all"
@@ -252,6 +382,10 @@ WS_KEEP_ALIVE_INTERVAL = 1800
 
 NEWS_MAX_PER_SOURCE = 15
 NEWS_MAX_TOTAL = 200
+NEWS_STORE_MAX_ITEMS = 1000        # Maks headline unik yang disimpan (dedup hash judul)
+NEWS_PARSE_WORKERS = 2             # Process pool parse RSS (bebas GIL). 0 = parse di thread
+NEWS_PARSER_FAST = True            # Parser ringan ElementTree untuk RSS/Atom well-formed, feedparser jika gagal
+NEWS_SLOW_PARSE_MS = 250           # Feed dengan rata-rata parse > N ms di-demote (dilewati saat poll cepat)
 NEWS_RETENTION_LIMIT = 15
 NEWS_MAX_AGE_HOURS = 24
 NEWS_COIN_SPECIFIC_MIN = 6
@@ -435,6 +569,24 @@ Analyze this {timeframe} chart for {symbol}. {raw_info}
 Determine the overall bias (BULLISH/BEARISH/NEUTRAL). Keep it concise (max 3-4 sentences).
 """
 
+PROMPT_PATTERN_BATCH = """
+This image is a grid of {count} {timeframe} charts. Each panel is labelled with its number and symbol in the top-left corner
+(price candles on top, volume in the middle, MACD at the bottom of each panel).
+
+PANELS (exact numbers for the latest candle):
+{panels}
+
+For EACH panel, analyze independently:
+1. VISUAL PATTERNS: Identify Chart Patterns (e.g. Head & Shoulders, Flags, Wedges, Double Top/Bottom).
+2. MACD DIVERGENCE: Look for divergences between Price and MACD Histogram/Lines.
+   - BULLISH DIVERGENCE: Price makes Lower Low, MACD makes Higher Low -> Signal Reversal UP.
+   - BEARISH DIVERGENCE: Price makes Higher High, MACD makes Lower High -> Signal Reversal DOWN.
+Determine the overall bias (BULLISH/BEARISH/NEUTRAL) per panel. Keep each analysis concise (max 3-4 sentences, end with a period).
+
+OUTPUT FORMAT (JSON ONLY):
+{{"panels": [{{"panel": 1, "symbol": "SYMBOL", "analysis": "..."}}]}}
+"""
+
 PROMPT_SENTIMENT_ANALYSIS = """
 ROLE: You are an expert Crypto Narrative Analyst & Risk Manager.
 
@@ -2,18 +2,20 @@
 
 
 import asyncio
-
+import functools
 import time
 import html
 from datetime import datetime
 import ccxt.async_support as ccxt
 import config
 from src.utils.helper import (
-    logger, kirim_tele, kirim_tele_sync, parse_timeframe_to_seconds, 
+    logger, kirim_tele, kirim_tele_sync, fire_and_forget, parse_timeframe_to_seconds, 
     get_next_rounded_time, get_coin_leverage, convert_timestamp_to_wib_str
 )
-from src.utils.prompt_builder import build_market_prompt, build_sentiment_prompt
+from src.utils.prompt_builder import build_market_prompt, build_market_features, build_sentiment_prompt
+from src.utils.prompt_compiler import PromptCompiler
 from src.utils.calc import calculate_trade_scenarios, calculate_dual_scenarios, calculate_profit_loss_estimation
+from src.utils import tracing, http_pool, notifier, ai_pool, ai_ledger, prescreen, news_feed, chart_renderer, metrics
 
 # MODULE IMPORTS
 from src.modules.market_data import MarketDataManager
@@ -23,6 +25,7 @@ from src.modules.ai_brain import AIBrain
 from src.modules.executor import OrderExecutor
 from src.modules.pattern_recognizer import PatternRecognizer
 from src.modules.journal import TradeJournal
+from src.modules.context_builder import MarketContextBuilder
 from src.modules.executor_impl.order_callbacks import OrderUpdateHandler
 
 # GLOBAL INSTANCES
@@ -88,6 +91,10 @@ async def activate_native_trailing_delayed(executor_instance, symbol, side, qty,
 
 pattern_recognizer = None
 journal = None
+context_builder = None
+prompt_compiler = None
+category_gate = ai_pool.CategoryGate()
+score_board = prescreen.ScoreBoard()
 
 
 async def run_sentiment_analysis():
@@ -111,8 +118,9 @@ async def run_sentiment_analysis():
         result = await ai_brain.analyze_sentiment(prompt)
         
         if result:
-            # Save Analysis to Cache
+            # Save Analysis to Cache (+ disk, dipakai ulang saat restart)
             sentiment.save_analysis(result)
+            await sentiment.persist()
 
             # Kirim ke Telegram Channel Sentiment
             mood = result.get('overall_sentiment', 'UNKNOWN')
@@ -160,6 +168,7 @@ async def safety_monitor_loop(executor: OrderExecutor) -> None:
         executor: Instance OrderExecutor untuk operasi trading
     """
     logger.info("🛡️ Safety Monitor Started")
+    last_trace_report = time.time()
     while True:
         try:
             # 1. Sync & Cleanup Pending Orders
@@ -186,6 +195,29 @@ async def safety_monitor_loop(executor: OrderExecutor) -> None:
                         })
                         await executor.save_tracker()
 
+            # 3. Flush trailing SL pending (coalesced) & persist watermark
+            await executor.flush_trailing()
+
+            # 4. Laporan latency lifecycle order (p50/p95/p99 per tahap)
+            if time.time() - last_trace_report >= config.TRACE_REPORT_INTERVAL:
+                last_trace_report = time.time()
+                report = tracing.format_report()
+                if report:
+                    logger.info(f"⏱️ Order Latency Report:\n{report}")
+                logger.info(f"🔌 HTTP Pool Reuse: {http_pool.reuse_stats()}")
+                if ai_brain:
+                    logger.info(f"♻️ AI Decision Cache: {ai_brain.cache_stats()}")
+                    if ai_brain.router:
+                        logger.info(f"🔀 AI Router Health: {ai_brain.router.health()}")
+                ledger_report = ai_ledger.format_report()
+                if ledger_report:
+                    logger.info(f"🧾 AI Usage Ledger:\n{ledger_report}")
+                # Histogram & counter lain (SL amend, Telegram drop, Vision skip, context build);
+                # latency trace sudah dilaporkan di atas
+                metrics_report = metrics.format_report(exclude=('trace_',))
+                if metrics_report:
+                    logger.info(f"📊 Metrics Report:\n{metrics_report}")
+
             # Sleep agak lama karena load utama sudah di WebSocket
             await asyncio.sleep(config.SAFETY_MONITOR_INTERVAL)
 
@@ -262,7 +294,7 @@ def _run_periodic_updates(scheduler_state):
     Extracted from main loop scheduler block.
     
     Args:
-        scheduler_state: dict dengan keys 'next_sentiment_update' dan 'next_sentiment_analysis'
+        scheduler_state: dict dengan keys 'next_sentiment_update', 'next_news_poll' dan 'next_sentiment_analysis'
     """
     current_time = time.time()
 
@@ -274,10 +306,16 @@ def _run_periodic_updates(scheduler_state):
             asyncio.create_task(onchain.fetch_stablecoin_inflows())
             
             scheduler_state['next_sentiment_update'] = get_next_rounded_time(config.SENTIMENT_UPDATE_INTERVAL)
+            scheduler_state['next_news_poll'] = get_next_rounded_time(config.NEWS_POLL_INTERVAL)
             logger.info(f"✅ Data Refreshed. Next: {convert_timestamp_to_wib_str(scheduler_state['next_sentiment_update'])}")
         except Exception as e:
              logger.error(f"❌ Failed to refresh data: {e}")
 
+    # A2. NEWS POLL (RSS conditional GET, lebih sering dari data refresh)
+    elif current_time >= scheduler_state['next_news_poll']:
+        fire_and_forget(sentiment.poll_news())
+        scheduler_state['next_news_poll'] = get_next_rounded_time(config.NEWS_POLL_INTERVAL)
+
     # B. AI SENTIMENT ANALYSIS (Report Generation)
     if config.ENABLE_SENTIMENT_ANALYSIS and current_time >= scheduler_state['next_sentiment_analysis']:
          logger.info("🧠 Running Scheduled Sentiment Analysis (AI)...")
@@ -369,7 +407,8 @@ async def _apply_traditional_filters(symbol, tech_data, coin_cfg):
 
 
 async def _prepare_and_execute_trade(symbol, side, tech_data, coin_cfg, ai_decision, 
-                                      dual_scenarios, btc_corr, show_btc_context, prompt, reason):
+                                      dual_scenarios, btc_corr, show_btc_context, prompt, reason,
+                                      trace=None, signal_ts=None):
     """
     Build order parameters, kirim notifikasi Telegram, dan eksekusi entry.
     Extracted from main loop execution block.
@@ -385,13 +424,22 @@ async def _prepare_and_execute_trade(symbol, side, tech_data, coin_cfg, ai_decis
         show_btc_context: Apakah menampilkan konteks BTC
         prompt: Prompt AI yang dikirim
         reason: Alasan keputusan AI (sudah di-escape)
+        trace: TradeTrace dari analisa AI (latency per tahap), diteruskan ke executor
+        signal_ts: Timestamp candle yang dianalisa (seed clientOrderId deterministik)
     """
     strategy_mode = ai_decision.get('selected_strategy', 'STANDARD')
     confidence = ai_decision.get('confidence', 0)
     lev = coin_cfg.get('leverage', config.DEFAULT_LEVERAGE)
+    started = time.perf_counter()
     
-    # Dynamic Sizing
-    dynamic_amt = await executor.calculate_dynamic_amount_usdt(symbol, lev)
+    # Dynamic Sizing (Fast Path: paralel dengan set leverage/margin)
+    if config.ENTRY_FAST_PATH:
+        dynamic_amt, _ = await asyncio.gather(
+            executor.calculate_dynamic_amount_usdt(symbol, lev),
+            executor.prepare_symbol(symbol, lev)
+        )
+    else:
+        dynamic_amt = await executor.calculate_dynamic_amount_usdt(symbol, lev)
     if dynamic_amt:
         amt = dynamic_amt
         logger.info(f"💰 Dynamic Size: ${amt:.2f} (Risk {config.RISK_PERCENT_PER_TRADE}%)")
@@ -501,7 +549,8 @@ async def _prepare_and_execute_trade(symbol, side, tech_data, coin_cfg, ai_decis
            f"• Final analyze & execution by {config.AI_MODEL_NAME}")
     
     logger.info(f"📤 Sending Tele Message:\n{msg}")
-    await kirim_tele(msg)
+    if not config.ENTRY_FAST_PATH:
+        await kirim_tele(msg)
     
     atr_val = tech_data.get('atr', 0)
     
@@ -549,16 +598,169 @@ async def _prepare_and_execute_trade(symbol, side, tech_data, coin_cfg, ai_decis
         ai_prompt=prompt,
         ai_reason=reason,
         technical_data=technical_snapshot,
-        config_snapshot=config_snapshot
+        config_snapshot=config_snapshot,
+        trace=trace,
+        signal_ts=signal_ts
     )
 
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > config.ENTRY_LATENCY_BUDGET_MS:
+        logger.warning(f"🐢 Entry latency budget exceeded {symbol}: {elapsed_ms:.0f}ms > {config.ENTRY_LATENCY_BUDGET_MS}ms")
+
+    # Fast Path: notifikasi sinyal dikirim setelah order terkirim (Telegram lambat tidak menunda entry)
+    if config.ENTRY_FAST_PATH:
+        fire_and_forget(kirim_tele(msg))
+
+
+async def _run_ai_pipeline(job, analyzed_candle_ts):
+    """
+    Pipeline AI untuk satu simbol (Vision -> Order Book -> Prompt -> Logic AI -> Eksekusi).
+    Dijalankan oleh worker AnalysisPool (urut skor pre-screen), beberapa simbol bisa berjalan bersamaan.
+    Slot kategori (category_gate) dipesan saat job mulai dan dilepas setelah selesai.
+    """
+    symbol = job['symbol']
+    coin_cfg = job['coin_cfg']
+    tech_data = job['tech_data']
+    btc_corr = job['btc_corr']
+    show_btc_context = job['show_btc_context']
+
+    # Kondisi bisa berubah selama job menunggu di antrian
+    if _check_trade_exclusions(symbol, coin_cfg):
+        return
+
+    # Reservasi slot kategori selama analisa paralel (open + sedang dianalisa <= limit)
+    category = coin_cfg.get('category', 'UNKNOWN')
+    open_count = executor.get_open_positions_count_by_category(category)
+    if not category_gate.try_reserve(symbol, category, open_count):
+        logger.info(f"⏸️ Category {category} penuh (open + analisa berjalan). Skip {symbol}")
+        return
+
+    ledger_token = None
+    try:
+        logger.info(f"🤖 Asking AI: {symbol} (Score: {job.get('score', 0):.0f}, Corr: {btc_corr:.2f}, Candle: {job['candle_ts']}) ...")
+        trace = tracing.TradeTrace(symbol).mark(tracing.STAGE_ANALYSIS_START)
+        # Semua panggilan AI job ini (Vision + Logic) tercatat di ledger dengan trace_id yang sama
+        ledger_token = ai_ledger.bind(symbol, trace.trace_id)
+
+        # Context: Vision (chart sudah di-render saat candle close), Sentimen, On-Chain.
+        # Order book dari pre-screen dipakai ulang (tidak di-fetch dua kali per kandidat)
+        ctx = await context_builder.build(symbol, order_book=tech_data.get('order_book'))
+        pattern_ctx = ctx['pattern']
+        sentiment_data = ctx['sentiment_data']
+        onchain_data = ctx['onchain_data']
+        sentiment_analysis = ctx['sentiment_analysis']
+
+        if not pattern_ctx.get('is_valid', True):
+            logger.warning(f"⚠️ Skipping {symbol} - Pattern analysis invalid/truncated")
+            return
+
+        # Order Book Depth Analysis
+        tech_data['order_book'] = ctx['order_book']
+        tech_data['btc_correlation'] = btc_corr
+
+        # Calculate Trade Scenarios BEFORE AI Call
+        current_price = tech_data['price']
+        dual_scenarios = calculate_dual_scenarios(
+            price=current_price,
+            atr=tech_data.get('atr', 0)
+        )
+
+        prompt_args = (symbol, tech_data, sentiment_data, onchain_data, pattern_ctx, dual_scenarios)
+        prompt_kwargs = {'show_btc_context': show_btc_context, 'sentiment_analysis': sentiment_analysis}
+        if prompt_compiler:
+            # System message statis + data ringkas; `prompt` (teks data) untuk log & journal
+            compiled = prompt_compiler.compile(*prompt_args, **prompt_kwargs)
+            if compiled is None:
+                return
+            prompt, ai_input = compiled.text, compiled.messages
+            trimmed = f", trimmed: {', '.join(compiled.trimmed)}" if compiled.trimmed else ""
+            logger.info(f"📝 AI PROMPT INPUT for {symbol} ({compiled.total_tokens} tok{trimmed}):\n{prompt}")
+        else:
+            prompt = ai_input = build_market_prompt(*prompt_args, **prompt_kwargs)
+            logger.info(f"📝 AI PROMPT INPUT for {symbol}:\n{prompt}")
+
+        # Fitur ter-bucket untuk cache keputusan AI
+        features = build_market_features(
+            symbol,
+            tech_data,
+            sentiment_data,
+            pattern_ctx,
+            show_btc_context=show_btc_context,
+            sentiment_analysis=sentiment_analysis
+        )
+
+        trace.mark(tracing.STAGE_AI_REQUEST)
+        ai_decision = await ai_brain.analyze_market(ai_input, features=features)
+        trace.mark(tracing.STAGE_AI_RESPONSE)
+
+        # Update Candle ID Tracker
+        analyzed_candle_ts[symbol] = job['candle_ts']
+
+        decision = ai_decision.get('decision', 'WAIT').upper()
+        confidence = ai_decision.get('confidence', 0)
+        reason = html.escape(str(ai_decision.get('reason', '')))
+
+        # --- STEP E: EXECUTION ---
+        if decision in ['BUY', 'SELL', 'LONG', 'SHORT']:
+            side = 'buy' if decision in ['BUY', 'LONG'] else 'sell'
+
+            if confidence >= config.AI_CONFIDENCE_THRESHOLD:
+                await _prepare_and_execute_trade(
+                    symbol=symbol,
+                    side=side,
+                    tech_data=tech_data,
+                    coin_cfg=coin_cfg,
+                    ai_decision=ai_decision,
+                    dual_scenarios=dual_scenarios,
+                    btc_corr=btc_corr,
+                    show_btc_context=show_btc_context,
+                    prompt=prompt,
+                    reason=reason,
+                    trace=trace,
+                    signal_ts=job['candle_ts']
+                )
+            else:
+                logger.info(f"🛑 AI Vote Low Confidence: {confidence}% (Need {config.AI_CONFIDENCE_THRESHOLD}%)")
+    finally:
+        if ledger_token is not None:
+            ai_ledger.unbind(ledger_token)
+        category_gate.release(symbol)
+
 
 # ============================================================================
 # MAIN FUNCTION (Orchestrator - Reduced Complexity)
 # ============================================================================
 
+async def _preload_sentiment():
+    """
+    Restore state sentimen dari disk. Hasil yang masih fresh dipakai ulang dan refresh
+    berjalan di background, sehingga restart tidak menunggu fetch RSS & AI call.
+    Tanpa state / analisa sudah basi -> fetch & analisa awal (blocking) seperti biasa.
+    """
+    if sentiment.restore() and sentiment.analysis_is_fresh():
+        logger.info("♻️ Sentiment analysis restored from disk (still fresh). Refresh in background.")
+        if not sentiment.data_is_fresh():
+            fire_and_forget(sentiment.update_all())
+        return
+
+    if not (sentiment.data_is_fresh() and sentiment.raw_news):
+        await sentiment.update_all()  # Initial Fetch Headline & F&G
+
+    # Initial AI Analysis (Blocking)
+    logger.info("🧠 Performing Initial AI Sentiment Analysis...")
+    await run_sentiment_analysis()
+
+
+async def _shutdown():
+    """Bersihkan resource saat bot berhenti (Ctrl+C / crash): buffer ledger, worker pool & koneksi HTTP."""
+    ai_ledger.flush()
+    news_feed.shutdown()
+    chart_renderer.shutdown()
+    await http_pool.close_all()
+
+
 async def main():
-    global market_data, sentiment, onchain, ai_brain, executor, pattern_recognizer, journal
+    global market_data, sentiment, onchain, ai_brain, executor, pattern_recognizer, journal, context_builder, prompt_compiler
     
     # Track AI Query Timestamp (Candle ID)
     analyzed_candle_ts = {}
@@ -568,6 +770,7 @@ async def main():
     # Scheduler State
     scheduler_state = {
         'next_sentiment_update': get_next_rounded_time(config.SENTIMENT_UPDATE_INTERVAL),
+        'next_news_poll': get_next_rounded_time(config.NEWS_POLL_INTERVAL),
         'next_sentiment_analysis': get_next_rounded_time(config.SENTIMENT_ANALYSIS_INTERVAL),
     }
     
@@ -576,145 +779,108 @@ async def main():
 
     # 1. INITIALIZATION
     exchange = _initialize_exchange()
+    notifier.dispatcher.start()  # Telegram dikirim dari background queue
     await kirim_tele("🤖 <b>BOT TRADING STARTED</b>\nAI-Hybrid System Online.", alert=True)
 
     # 2. SETUP MODULES
     market_data, sentiment, onchain, ai_brain, executor, pattern_recognizer, journal = _initialize_modules(exchange)
+    context_builder = MarketContextBuilder(market_data, pattern_recognizer, sentiment, onchain)
+    market_data.on_candle_close = context_builder.on_candle_close  # Render chart dimulai saat candle close
+    market_data.on_candle_open = context_builder.on_candle_open    # ... dan saat candle setup baru dibuka
+    if config.AI_PROMPT_COMPACT:
+        prompt_compiler = PromptCompiler()  # Instruksi statis dirender sekali (system message, cacheable)
+        logger.info(f"🧾 Prompt Compiler aktif: system {prompt_compiler.static_tokens} tok, budget {prompt_compiler.budget} tok")
 
     # 3. PRELOAD DATA
     await market_data.initialize_data()
-    await sentiment.update_all()  # Initial Fetch Headline & F&G
-
-    # Initial AI Analysis (Blocking)
-    logger.info("🧠 Performing Initial AI Sentiment Analysis...")
-    await run_sentiment_analysis()
+    await _preload_sentiment()
     
     # 4. START BACKGROUND TASKS
     order_handler = OrderUpdateHandler(executor, journal)
     asyncio.create_task(market_data.start_stream(account_update_cb, order_handler.order_update_cb, whale_handler))
     asyncio.create_task(safety_monitor_loop(executor))
+    analysis_pool = ai_pool.AnalysisPool(functools.partial(_run_ai_pipeline, analyzed_candle_ts=analyzed_candle_ts))
+    analysis_pool.start()
 
     logger.info("🚀 MAIN LOOP RUNNING...")
 
     # 5. MAIN TRADING LOOP
     ticker_idx = 0
-    while True:
-        try:
-            # --- STEP 0: PERIODIC UPDATE SCHEDULER ---
-            _run_periodic_updates(scheduler_state)
-
-            # Round Robin Scan (One coin per loop)
-            coin_cfg = config.DAFTAR_KOIN[ticker_idx]
-            symbol = coin_cfg['symbol']
-            ticker_idx = (ticker_idx + 1) % len(config.DAFTAR_KOIN)
+    try:
+        while True:
+            try:
+                # --- STEP 0: PERIODIC UPDATE SCHEDULER ---
+                _run_periodic_updates(scheduler_state)
+
+                # Round Robin Scan (One coin per loop)
+                coin_cfg = config.DAFTAR_KOIN[ticker_idx]
+                symbol = coin_cfg['symbol']
+                ticker_idx = (ticker_idx + 1) % len(config.DAFTAR_KOIN)
             
-            # --- STEP A: COLLECT DATA ---
-            tech_data = await market_data.get_technical_data(symbol)
-            if not tech_data:
-                logger.warning(f"⚠️ No tech data or insufficient history for {symbol}")
-                await asyncio.sleep(config.LOOP_SKIP_DELAY)
-                continue
-
-            sentiment_data = sentiment.get_latest(symbol=symbol)
-            onchain_data = onchain.get_latest(symbol=symbol)
-
-            # --- STEP B: CHECK EXCLUSION ---
-            if _check_trade_exclusions(symbol, coin_cfg):
-                await asyncio.sleep(config.LOOP_SLEEP_DELAY)
-                continue
+                # --- STEP A: COLLECT DATA ---
+                tech_data = await market_data.get_technical_data(symbol)
+                if not tech_data:
+                    logger.warning(f"⚠️ No tech data or insufficient history for {symbol}")
+                    await asyncio.sleep(config.LOOP_SKIP_DELAY)
+                    continue
+
+                # --- STEP B: CHECK EXCLUSION ---
+                if _check_trade_exclusions(symbol, coin_cfg):
+                    await asyncio.sleep(config.LOOP_SLEEP_DELAY)
+                    continue
             
-            # --- STEP C: TRADITIONAL FILTER ---
-            is_interesting, btc_corr, show_btc_context = await _apply_traditional_filters(symbol, tech_data, coin_cfg)
+                # --- STEP C: TRADITIONAL FILTER ---
+                # (order book dari cache WS diambil bersamaan, dipakai pre-screen)
+                (is_interesting, btc_corr, show_btc_context), ob_depth = await asyncio.gather(
+                    _apply_traditional_filters(symbol, tech_data, coin_cfg),
+                    market_data.get_order_book_depth(symbol)
+                )
             
-            if not is_interesting:
-                await asyncio.sleep(config.LOOP_SKIP_DELAY)
-                continue
+                if not is_interesting:
+                    await asyncio.sleep(config.LOOP_SKIP_DELAY)
+                    continue
 
-            # Strategy Selection is now handled by AI
-            tech_data['strategy_mode'] = 'AI_DECISION'
+                # Strategy Selection is now handled by AI
+                tech_data['strategy_mode'] = 'AI_DECISION'
 
-            # --- STEP D: AI ANALYSIS ---
-            # Candle-Based Throttling
-            current_candle_ts = tech_data.get('candle_timestamp', 0)
-            last_analyzed_ts = analyzed_candle_ts.get(symbol, 0)
+                # --- STEP D: AI ANALYSIS ---
+                # Candle-Based Throttling
+                current_candle_ts = tech_data.get('candle_timestamp', 0)
+                last_analyzed_ts = analyzed_candle_ts.get(symbol, 0)
             
-            if current_candle_ts <= last_analyzed_ts:
+                if current_candle_ts <= last_analyzed_ts or analysis_pool.is_busy(symbol):
+                    await asyncio.sleep(config.LOOP_SLEEP_DELAY)
+                    continue
+
+                # Pre-screen lokal: skor kandidat menentukan urutan antrian AI
+                tech_data['order_book'] = ob_depth or {}
+                score, components = prescreen.score_candidate(tech_data, show_btc_context)
+                distribution = score_board.record(current_candle_ts, symbol, score, components)
+                if distribution:
+                    logger.info(f"📊 Prescreen Score Distribution: {distribution}")
+                if score < config.PRESCREEN_MIN_SCORE:
+                    logger.info(f"📉 Prescreen score {symbol} {score:.0f} < {config.PRESCREEN_MIN_SCORE}. Skip AI.")
+                    analyzed_candle_ts[symbol] = current_candle_ts
+                    await asyncio.sleep(config.LOOP_SLEEP_DELAY)
+                    continue
+
+                # Antrikan ke worker pool (skor tertinggi dianalisa duluan)
+                await analysis_pool.submit(symbol, {
+                    'symbol': symbol,
+                    'coin_cfg': coin_cfg,
+                    'tech_data': tech_data,
+                    'btc_corr': btc_corr,
+                    'show_btc_context': show_btc_context,
+                    'candle_ts': current_candle_ts,
+                    'score': score,
+                }, priority=score)
                 await asyncio.sleep(config.LOOP_SLEEP_DELAY)
-                continue
-
-            logger.info(f"🤖 Asking AI: {symbol} (Corr: {btc_corr:.2f}, Candle: {current_candle_ts}) ...")
-            
-            # Pattern Recognition (Vision)
-            pattern_ctx = await pattern_recognizer.analyze_pattern(symbol)
-            
-            if not pattern_ctx.get('is_valid', True):
-                logger.warning(f"⚠️ Skipping {symbol} - Pattern analysis invalid/truncated")
-                await asyncio.sleep(config.LOOP_SKIP_DELAY)
-                continue
-            
-            # Order Book Depth Analysis
-            ob_depth = await market_data.get_order_book_depth(symbol)
-            tech_data['order_book'] = ob_depth
-            tech_data['btc_correlation'] = btc_corr
-            
-            # Calculate Trade Scenarios BEFORE AI Call
-            current_price = tech_data['price']
-            dual_scenarios = calculate_dual_scenarios(
-                price=current_price,
-                atr=tech_data.get('atr', 0)
-            )
-
-            # Get Cached Sentiment Analysis
-            sentiment_analysis = sentiment.get_analysis()
-
-            prompt = build_market_prompt(
-                symbol, 
-                tech_data, 
-                sentiment_data, 
-                onchain_data, 
-                pattern_ctx, 
-                dual_scenarios, 
-                show_btc_context=show_btc_context,
-                sentiment_analysis=sentiment_analysis
-            )
-            
-            logger.info(f"📝 AI PROMPT INPUT for {symbol}:\n{prompt}")
-
-            ai_decision = await ai_brain.analyze_market(prompt)
-            
-            # Update Candle ID Tracker
-            analyzed_candle_ts[symbol] = current_candle_ts
-            
-            decision = ai_decision.get('decision', 'WAIT').upper()
-            confidence = ai_decision.get('confidence', 0)
-            reason = html.escape(str(ai_decision.get('reason', '')))
-
-            # --- STEP E: EXECUTION ---
-            if decision in ['BUY', 'SELL', 'LONG', 'SHORT']:
-                side = 'buy' if decision in ['BUY', 'LONG'] else 'sell'
-                
-                if confidence >= config.AI_CONFIDENCE_THRESHOLD:
-                    await _prepare_and_execute_trade(
-                        symbol=symbol,
-                        side=side,
-                        tech_data=tech_data,
-                        coin_cfg=coin_cfg,
-                        ai_decision=ai_decision,
-                        dual_scenarios=dual_scenarios,
-                        btc_corr=btc_corr,
-                        show_btc_context=show_btc_context,
-                        prompt=prompt,
-                        reason=reason
-                    )
-                else:
-                    logger.info(f"🛑 AI Vote Low Confidence: {confidence}% (Need {config.AI_CONFIDENCE_THRESHOLD}%)")
-
-            # Rate Limit Protection
-            await asyncio.sleep(config.ERROR_SLEEP_DELAY) 
 
-        except Exception as e:
-            logger.error(f"Main Loop Error: {e}")
-            await asyncio.sleep(config.ERROR_SLEEP_DELAY)
+            except Exception as e:
+                logger.error(f"Main Loop Error: {e}")
+                await asyncio.sleep(config.ERROR_SLEEP_DELAY)
+    finally:
+        await _shutdown()
 
 if __name__ == "__main__":
     try:
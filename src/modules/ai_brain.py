@@ -1,27 +1,93 @@
 
 from openai import AsyncOpenAI
+import asyncio
 import json
+import os
+import hashlib
+import itertools
+import time
+from collections import OrderedDict
 import config
-from src.utils.helper import logger
+from src.utils.helper import logger, fire_and_forget
+from src.utils.json_stream import IncrementalJSONExtractor
+from src.utils import http_pool, ai_pool, ai_router, ai_ledger, metrics
 import re
 
 class AIBrain:
     def __init__(self):
         if config.AI_API_KEY:
-            import httpx
             self.client = AsyncOpenAI(
                 base_url=config.AI_BASE_URL,
                 api_key=config.AI_API_KEY,
-                http_client=httpx.AsyncClient()
+                http_client=http_pool.get_httpx_client('ai')
             )
             self.model_name = config.AI_MODEL_NAME
             logger.info(f"🧠 AI Brain Initialized: {self.model_name} via OpenRouter")
             if getattr(config, 'AI_REASONING_ENABLED', False):
                 logger.info(f"🧠 Reasoning Feature ENABLED (Effort: {config.AI_REASONING_EFFORT})")
+            self.router = self._build_router()
         else:
             self.client = None
+            self.router = None
             logger.warning("⚠️ AI_API_KEY not found. AI Brain is disabled.")
 
+        # Decision Cache: feature_hash -> (timestamp, decision) (LRU + TTL)
+        self.decision_cache = OrderedDict()
+
+    def _build_router(self):
+        """
+        Endpoint primary (AI_MODEL_NAME, client default) + cadangan dari AI_ROUTER_BACKUPS.
+        Cadangan di base_url & key yang sama memakai client default (client=None).
+        """
+        endpoints = [ai_router.Endpoint(self.model_name, config.AI_BASE_URL)]
+        for spec in getattr(config, 'AI_ROUTER_BACKUPS', []):
+            base_url = spec.get('base_url') or config.AI_BASE_URL
+            api_key = os.getenv(spec['api_key_env']) if spec.get('api_key_env') else config.AI_API_KEY
+            if not api_key:
+                logger.warning(f"⚠️ AI backup {spec['model']} dilewati: API key ({spec.get('api_key_env')}) tidak ada")
+                continue
+            client = None
+            if base_url != config.AI_BASE_URL or api_key != config.AI_API_KEY:
+                client = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=http_pool.get_httpx_client('ai'))
+            endpoints.append(ai_router.Endpoint(spec['model'], base_url, client))
+        if len(endpoints) > 1:
+            logger.info(f"🔀 AI Router ({config.AI_ROUTER_MODE}): " + " -> ".join(ep.model for ep in endpoints))
+        return ai_router.ProviderRouter(endpoints, acquire=ai_pool.acquire)
+
+    @staticmethod
+    def feature_hash(features):
+        """Hash kanonik dari fitur ter-bucket (urutan key tidak berpengaruh)."""
+        canonical = json.dumps(features, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key):
+        entry = self.decision_cache.get(key)
+        if entry is None:
+            return None
+        ts, decision = entry
+        if time.time() - ts > config.AI_DECISION_CACHE_TTL:
+            del self.decision_cache[key]
+            return None
+        self.decision_cache.move_to_end(key)
+        return decision
+
+    def _cache_put(self, key, decision):
+        self.decision_cache[key] = (time.time(), dict(decision))
+        self.decision_cache.move_to_end(key)
+        while len(self.decision_cache) > config.AI_DECISION_CACHE_MAX_SIZE:
+            self.decision_cache.popitem(last=False)
+
+    def cache_stats(self):
+        hits = metrics.counter('ai_decision_cache_hit').value
+        misses = metrics.counter('ai_decision_cache_miss').value
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else None,
+            'size': len(self.decision_cache),
+        }
+
     def _build_reasoning_config(self):
         """
         Build reasoning configuration berdasarkan config.
@@ -39,75 +105,250 @@ class AIBrain:
         }
         return reasoning_config
 
-    async def analyze_market(self, prompt_text):
+    async def analyze_market(self, prompt_text, features=None):
         """
         Send prompt to AI and parse JSON response.
+        Jika `features` (hasil build_market_features) diberikan dan state pasar ter-bucket
+        sama dengan panggilan sebelumnya (masih dalam TTL), keputusan lama dipakai ulang
+        tanpa memanggil model.
+        Request dikirim lewat ai_router (failover / hedged ke model cadangan), dibatasi
+        AI_ROUTER_DEADLINE; jika semua model gagal -> WAIT.
         """
         if not self.client:
             return {"decision": "WAIT", "confidence": 0, "reason": "AI Key Missing"}
 
+        cache_key = None
+        if features and config.AI_DECISION_CACHE_ENABLED:
+            cache_key = self.feature_hash(features)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                metrics.counter('ai_decision_cache_hit').inc()
+                logger.info(f"♻️ AI Decision Cache HIT {features.get('symbol', '')}: {cached.get('decision')} ({cached.get('confidence')}%)")
+                return dict(cached, cached=True)
+            metrics.counter('ai_decision_cache_miss').inc()
+
+        attempts = itertools.count()
         try:
-            # Generate Content
-            completion = await self.client.chat.completions.create(
+            endpoint, (decision_json, raw_text) = await self.router.call(
+                lambda ep: self._request_decision(ep, prompt_text, next(attempts))
+            )
+            if endpoint is not self.router.endpoints[0]:
+                logger.info(f"🔀 Keputusan dari model cadangan: {endpoint.model}")
+            
+            # Standardize Output
+            if "decision" not in decision_json: decision_json["decision"] = "WAIT"
+            if "confidence" not in decision_json: decision_json["confidence"] = 0
+            
+            # Log full response dengan indentasi agar rapi
+            logger.info(f"🧠 FULL AI RESPONSE:\n{json.dumps(decision_json, indent=2, ensure_ascii=False)}")
+            if cache_key:
+                self._cache_put(cache_key, decision_json)
+            return decision_json
+
+        except Exception as e:
+            logger.error(f"❌ AI Analysis Failed: {e}")
+            return {"decision": "WAIT", "confidence": 0, "reason": "AI Error"}
+
+    async def _request_decision(self, endpoint, prompt_text, attempt=0):
+        """
+        Satu request keputusan ke endpoint router. Return (decision_json, raw_text); raise jika gagal / JSON tidak valid.
+        Token, latency & outcome dicatat ke ai_ledger (attempt = request ke-berapa dalam keputusan ini).
+        """
+        client = endpoint.client or self.client
+        model = endpoint.model  # Slot rate limit sudah diambil router (sebelum timeout berjalan)
+        if getattr(config, 'AI_STREAMING_ENABLED', False):
+            return await self._stream_decision(prompt_text, client, model, attempt)
+
+        started = time.perf_counter()
+        completion, decision_json, error = None, None, None
+        try:
+            completion = await client.chat.completions.create(
                 extra_headers={
                     "HTTP-Referer": config.AI_APP_URL, 
                     "X-Title": config.AI_APP_TITLE, 
                 },
                 extra_body=self._build_reasoning_config(),
-                model=self.model_name,
-                messages=[ 
-                    {
-                        "role": "user",
-                        "content": prompt_text
-                    }
-                ],
+                model=model,
+                messages=self._as_messages(prompt_text),
                 temperature=config.AI_TEMPERATURE
             )
 
             # [LOGGING REASONING]
             if getattr(config, 'AI_LOG_REASONING', False):
                 try:
-                    msg_obj = completion.choices[0].message
-                    # Coba berbagai kemungkinan field reasoning (tergantung SDK & Provider)
-                    r_content = getattr(msg_obj, 'reasoning', None)
-                    if not r_content: r_content = getattr(msg_obj, 'reasoning_content', None) 
-                    if not r_content: # Cek di model_dump/extra jika pakai pydantic model underlying
-                        model_extra = getattr(msg_obj, 'model_extra', {}) or {}
-                        r_content = model_extra.get('reasoning') or model_extra.get('reasoning_content')
-                    
+                    r_content = self._extract_reasoning(completion.choices[0].message)
                     if r_content:
                         logger.info(f"🧠💭 [AI REASONING START]\n{r_content}\n🧠💭 [AI REASONING END]")
                 except Exception as e_reason:
                     logger.warning(f"⚠️ Failed to extract/log reasoning: {e_reason}")
-            
-            # Text Cleaning (Robust Regex)
+
             raw_text = completion.choices[0].message.content
-            
-            # Cari substring yang diawali '{' dan diakhiri '}'
-            match = re.search(r"\{.*\}", raw_text, re.DOTALL)
-            
-            if match:
-                cleaned_text = match.group(0)
-                # Parse JSON
-                decision_json = json.loads(cleaned_text)
-            else:
-                # Fallback simple clean if regex fails (though unlikely if JSON exists)
-                cleaned_text = raw_text.replace('```json', '').replace('```', '').strip()
-                decision_json = json.loads(cleaned_text)
-            
-            # Standardize Output
-            if "decision" not in decision_json: decision_json["decision"] = "WAIT"
-            if "confidence" not in decision_json: decision_json["confidence"] = 0
-            
-            # Log full response dengan indentasi agar rapi
-            logger.info(f"🧠 FULL AI RESPONSE:\n{json.dumps(decision_json, indent=2, ensure_ascii=False)}")
-            return decision_json
+            try:
+                decision_json = self._parse_json_text(raw_text)
+            except Exception:
+                raw_text_snippet = raw_text[:200] if raw_text else "None"
+                logger.error(f"❌ AI JSON invalid ({model}). Raw Text snippet: {raw_text_snippet}...")
+                raise
+            return decision_json, raw_text
+        except BaseException as e:  # Termasuk CancelledError (kalah hedge) - token tetap terpakai
+            error = e
+            raise
+        finally:
+            ai_ledger.record(
+                'decision', model, usage=getattr(completion, 'usage', None), started=started,
+                retries=attempt, outcome=decision_json, error=error, prompt=self._flatten_prompt(prompt_text)
+            )
+
+    @staticmethod
+    def _as_messages(prompt):
+        """Prompt teks tunggal (legacy) -> satu pesan user; list messages (PromptCompiler) dikirim apa adanya."""
+        if isinstance(prompt, list):
+            return prompt
+        return [{"role": "user", "content": prompt}]
+
+    @staticmethod
+    def _flatten_prompt(prompt):
+        """Gabungkan isi semua messages (termasuk content berbentuk list part) untuk atribusi section di ledger."""
+        if not isinstance(prompt, list):
+            return prompt
+        parts = []
+        for message in prompt:
+            content = message.get('content')
+            if isinstance(content, list):
+                parts.extend(part.get('text', '') for part in content if isinstance(part, dict))
+            elif content:
+                parts.append(content)
+        return "\n".join(parts)
 
+    @staticmethod
+    def _parse_json_text(raw_text):
+        """Text Cleaning (Robust Regex): ambil substring yang diawali '{' dan diakhiri '}' lalu parse JSON."""
+        match = re.search(r"\{.*\}", raw_text, re.DOTALL)
+        
+        if match:
+            cleaned_text = match.group(0)
+        else:
+            # Fallback simple clean if regex fails (though unlikely if JSON exists)
+            cleaned_text = raw_text.replace('```json', '').replace('```', '').strip()
+        return json.loads(cleaned_text)
+
+    @staticmethod
+    def _extract_reasoning(msg_obj):
+        """Coba berbagai kemungkinan field reasoning (tergantung SDK & Provider). Berlaku untuk message maupun delta stream."""
+        r_content = getattr(msg_obj, 'reasoning', None)
+        if not r_content: r_content = getattr(msg_obj, 'reasoning_content', None) 
+        if not r_content: # Cek di model_dump/extra jika pakai pydantic model underlying
+            model_extra = getattr(msg_obj, 'model_extra', {}) or {}
+            r_content = model_extra.get('reasoning') or model_extra.get('reasoning_content')
+        return r_content
+
+    async def _stream_decision(self, prompt_text, client=None, model=None, attempt=0):
+        """
+        Streaming mode: token dikonsumsi saat datang dan JSON di-parse secara incremental.
+        Return (decision_json, raw_text) segera setelah objek JSON berisi 'decision' & 'confidence'
+        tertutup. Sisa stream dibaca dan reasoning di-log di background.
+        """
+        started = time.perf_counter()
+        client = client or self.client
+        model = model or self.model_name
+        meta = {'usage': None}  # Usage dikirim di chunk terakhir (stream_options.include_usage)
+        ledger_row = {'kind': 'decision', 'model': model, 'retries': attempt, 'prompt': self._flatten_prompt(prompt_text)}
+        try:
+            stream = await client.chat.completions.create(
+                extra_headers={
+                    "HTTP-Referer": config.AI_APP_URL, 
+                    "X-Title": config.AI_APP_TITLE, 
+                },
+                extra_body=self._build_reasoning_config(),
+                model=model,
+                messages=self._as_messages(prompt_text),
+                temperature=config.AI_TEMPERATURE,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
         except Exception as e:
-            # Safe raw_text access for logging
-            raw_text_snippet = raw_text[:200] if 'raw_text' in locals() and raw_text else "None"
-            logger.error(f"❌ AI Analysis Failed: {e}. Raw Text snippet: {raw_text_snippet}...")
-            return {"decision": "WAIT", "confidence": 0, "reason": "AI Error"}
+            ai_ledger.record(started=started, error=e, **ledger_row)
+            raise
+
+        extractor = IncrementalJSONExtractor(required=('decision', 'confidence'))
+        reasoning_parts, content_parts = [], []
+        chunks = stream.__aiter__()
+        finished = False
+        try:
+            while not extractor.done:
+                chunk = await chunks.__anext__()
+                self._collect_chunk(chunk, reasoning_parts, content_parts, extractor, meta)
+        except StopAsyncIteration:
+            finished = True
+        except BaseException as e:
+            # Kalah hedge / deadline router / koneksi putus -> tutup koneksi stream
+            await self._close_stream(stream)
+            ai_ledger.record(usage=meta['usage'], started=started, error=e, **ledger_row)
+            raise
+
+        decision_ms = (time.perf_counter() - started) * 1000
+        metrics.histogram('ai_time_to_decision_ms').observe(decision_ms)
+
+        raw_text = ''.join(content_parts)
+        decision_json, error = None, None
+        if extractor.done:
+            metrics.counter('ai_stream_early_decision').inc()
+            decision_json = extractor.result
+        else:
+            # Stream selesai tanpa objek lengkap -> parse seluruh teks seperti mode biasa
+            try:
+                decision_json = self._parse_json_text(raw_text)
+            except Exception as e:
+                error = e
+
+        ledger_row.update(latency_ms=round(decision_ms, 1), outcome=decision_json, error=error)
+        fire_and_forget(self._finish_stream(stream, chunks, reasoning_parts, finished, meta, ledger_row, started))
+        if error is not None:
+            raise error
+        return decision_json, raw_text
+
+    def _collect_chunk(self, chunk, reasoning_parts, content_parts, extractor=None, meta=None):
+        if meta is not None and getattr(chunk, 'usage', None) is not None:
+            meta['usage'] = chunk.usage
+        if not chunk.choices:
+            return
+        delta = chunk.choices[0].delta
+        r_content = self._extract_reasoning(delta)
+        if r_content:
+            reasoning_parts.append(r_content)
+        if delta.content:
+            content_parts.append(delta.content)
+            if extractor is not None:
+                extractor.feed(delta.content)
+
+    @staticmethod
+    async def _close_stream(stream):
+        close = getattr(stream, 'close', None)
+        if close:
+            try:
+                await close()
+            except Exception:
+                pass
+
+    async def _finish_stream(self, stream, chunks, reasoning_parts, finished, meta=None, ledger_row=None, started=None):
+        """Background: habiskan sisa stream (maks AI_STREAM_DRAIN_TIMEOUT), tutup koneksi, log reasoning & ledger."""
+        if not finished:
+            async def drain():
+                async for chunk in chunks:
+                    self._collect_chunk(chunk, reasoning_parts, [], meta=meta)
+            try:
+                await asyncio.wait_for(drain(), config.AI_STREAM_DRAIN_TIMEOUT)
+            except Exception as e:
+                logger.debug(f"AI stream drain stopped: {e}")
+            finally:
+                await self._close_stream(stream)
+
+        if getattr(config, 'AI_LOG_REASONING', False) and reasoning_parts:
+            logger.info(f"🧠💭 [AI REASONING START]\n{''.join(reasoning_parts)}\n🧠💭 [AI REASONING END]")
+
+        if ledger_row:
+            stream_total_ms = round((time.perf_counter() - started) * 1000, 1) if started else 0
+            ai_ledger.record(usage=(meta or {}).get('usage'), stream_total_ms=stream_total_ms, **ledger_row)
 
     async def analyze_sentiment(self, prompt_text):
         """
@@ -120,7 +361,10 @@ class AIBrain:
         # Tentukan Model: Gunakan config khusus jika ada, jika tidak fallback ke default model
         target_model = getattr(config, 'AI_SENTIMENT_MODEL', self.model_name)
         
+        started, completion, decision_json = None, None, None
         try:
+            await ai_pool.acquire(target_model)
+            started = time.perf_counter()
             completion = await self.client.chat.completions.create(
                 extra_headers={
                     "HTTP-Referer": config.AI_APP_URL, 
@@ -144,8 +388,12 @@ class AIBrain:
                 decision_json = json.loads(cleaned_text)
                 
             logger.info(f"🧠 Sentiment Analysis Done via {target_model}")
+            ai_ledger.record('sentiment', target_model, usage=completion.usage, started=started, outcome=decision_json, symbol='MARKET')
             return decision_json
 
         except Exception as e:
             logger.error(f"❌ Sentiment Analysis Failed: {e}")
+            if started:
+                ai_ledger.record('sentiment', target_model, usage=getattr(completion, 'usage', None),
+                                 started=started, error=e, symbol='MARKET')
             return None
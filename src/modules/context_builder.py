@@ -0,0 +1,94 @@
+import asyncio
+import time
+from contextlib import contextmanager
+
+import config
+from src.utils.helper import logger
+from src.utils import metrics
+
+
+class MarketContextBuilder:
+    """
+    Kumpulkan konteks per simbol sebelum panggilan AI: pattern Vision & order book depth
+    secara paralel (asyncio.gather), sentimen, on-chain, dan hasil analisa sentimen langsung
+    dari cache in-memory (getter sinkron). Order book yang sudah diambil main loop untuk
+    pre-screen dipakai ulang. Durasi tiap sumber dicatat ke histogram `context_<sumber>_ms`.
+
+    Render chart dimulai lebih awal lewat on_candle_open / on_candle_close (hook
+    MarketDataManager) untuk semua koin, sehingga saat simbol lolos filter chart
+    (beserta raw_stats) biasanya sudah ada di cache PatternRecognizer.
+    """
+
+    def __init__(self, market_data, pattern_recognizer, sentiment, onchain):
+        self.market_data = market_data
+        self.pattern_recognizer = pattern_recognizer
+        self.sentiment = sentiment
+        self.onchain = onchain
+        self._symbols = {c['symbol'] for c in config.DAFTAR_KOIN}
+
+    def _prerender(self, symbol):
+        if symbol not in self._symbols:
+            return
+        if config.USE_PATTERN_RECOGNITION and self.pattern_recognizer and self.pattern_recognizer.client:
+            self.pattern_recognizer.prerender_chart(symbol)
+
+    def on_candle_open(self, symbol, interval):
+        """Candle setup baru -> render chart untuk candle_ts baru (key cache analisa Vision berganti)."""
+        if interval == config.TIMEFRAME_SETUP:
+            self._prerender(symbol)
+
+    def on_candle_close(self, symbol, interval):
+        """Candle eksekusi close -> refresh render chart setup (candle setup berjalan) di background."""
+        if interval == config.TIMEFRAME_EXEC:
+            self._prerender(symbol)
+
+    @contextmanager
+    def _timer(self, timings, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            timings[name] = round(elapsed, 1)
+            metrics.histogram(f"context_{name}_ms").observe(elapsed)
+
+    async def _timed(self, timings, name, func, *args):
+        with self._timer(timings, name):
+            return await func(*args)
+
+    async def build(self, symbol, order_book=None):
+        """
+        Args:
+            order_book: depth dari pre-screen main loop (dipakai ulang). Kosong -> di-fetch.
+        Returns:
+            dict: pattern, order_book, sentiment_data, onchain_data, sentiment_analysis, timings (ms)
+        """
+        timings = {}
+        started = time.perf_counter()
+        sources = [self._timed(timings, 'pattern', self.pattern_recognizer.analyze_pattern, symbol)]
+        if not order_book:
+            sources.append(self._timed(timings, 'order_book', self.market_data.get_order_book_depth, symbol))
+        pattern, *fetched = await asyncio.gather(*sources)
+        if fetched:
+            order_book = fetched[0]
+
+        with self._timer(timings, 'sentiment'):
+            sentiment_data = self.sentiment.get_latest(symbol)
+        with self._timer(timings, 'onchain'):
+            onchain_data = self.onchain.get_latest(symbol)
+        with self._timer(timings, 'sentiment_analysis'):
+            sentiment_analysis = self.sentiment.get_analysis()
+
+        total = (time.perf_counter() - started) * 1000
+        timings['total'] = round(total, 1)
+        metrics.histogram('context_total_ms').observe(total)
+        logger.debug(f"🧩 Context {symbol}: " + " | ".join(f"{k} {v:.0f}ms" for k, v in timings.items()))
+
+        return {
+            'pattern': pattern,
+            'order_book': order_book,
+            'sentiment_data': sentiment_data,
+            'onchain_data': onchain_data,
+            'sentiment_analysis': sentiment_analysis,
+            'timings': timings,
+        }
@@ -3,6 +3,7 @@ import time
 import ccxt.async_support as ccxt
 import config
 from src.utils.helper import logger, kirim_tele
+from src.utils import tracing
 
 # IMPORTS FROM IMPLEMENTATION MODULES
 from src.modules.executor_impl.tracker import TradeTracker
@@ -11,6 +12,7 @@ from src.modules.executor_impl.risk import RiskManager
 from src.modules.executor_impl.safety import SafetyManager
 from src.modules.executor_impl.orders import OrderManager
 from src.modules.executor_impl.sync import OrderSyncManager
+from src.modules.executor_impl.order_index import OrderStateIndex
 
 class OrderExecutor:
     """
@@ -23,11 +25,13 @@ class OrderExecutor:
         
         # Initialize Components
         self.tracker = TradeTracker()
+        self.order_index = OrderStateIndex()
+        self.order_index.seed_from_tracker(self.tracker.data)
         self.positions = PositionManager(exchange)
         self.risk = RiskManager(exchange, self.positions)
         self.safety = SafetyManager(exchange, self.tracker)
-        self.orders = OrderManager(exchange, self.tracker, self.risk)
-        self.sync = OrderSyncManager(exchange, self.tracker, self.positions)
+        self.orders = OrderManager(exchange, self.tracker, self.risk, self.order_index)
+        self.sync = OrderSyncManager(exchange, self.tracker, self.positions, self.order_index)
 
     # --- PROPERTIES (Backward Compatibility) ---
     @property
@@ -64,6 +68,7 @@ class OrderExecutor:
         await self.tracker.save()
 
     async def remove_from_tracker(self, symbol):
+        self.safety.trailing.remove(symbol)
         self.tracker.delete(symbol)
         await self.tracker.save()
         logger.info(f"🗑️ Tracker cleaned for {symbol}")
@@ -73,7 +78,8 @@ class OrderExecutor:
         return await self.positions.sync()
 
     def get_open_positions_count_by_category(self, target_category):
-        return self.positions.get_open_positions_count_by_category(target_category)
+        """Posisi terbuka + order entry pending (tracker) di kategori ini."""
+        return self.positions.get_open_positions_count_by_category(target_category, self.tracker)
     
     def has_active_or_pending_trade(self, symbol):
         """
@@ -99,6 +105,9 @@ class OrderExecutor:
     async def execute_entry(self, *args, **kwargs):
         return await self.orders.execute_entry(*args, **kwargs)
 
+    async def prepare_symbol(self, symbol, leverage):
+        return await self.orders.prepare_symbol(symbol, leverage)
+
     # --- SAFETY METHODS ---
     async def install_safety_orders(self, symbol, pos_data):
         return await self.safety.install_safety_orders(symbol, pos_data)
@@ -112,12 +121,38 @@ class OrderExecutor:
     async def update_trailing_sl(self, symbol, current_price):
         return await self.safety.update_trailing_sl(symbol, current_price)
 
+    async def flush_trailing(self):
+        return await self.safety.flush_trailing()
+
+    def release_trailing(self, symbol):
+        self.safety.release_trailing(symbol)
+
     async def _amend_sl_order(self, symbol, new_sl, side):
         return await self.safety._amend_sl_order(symbol, new_sl, side)
 
     async def install_native_trailing_stop(self, symbol, side, quantity, callback_rate, activation_price=None):
         return await self.safety.install_native_trailing_stop(symbol, side, quantity, callback_rate, activation_price)
 
+    # --- ORDER INDEX METHODS ---
+    def apply_order_event(self, order_payload):
+        """Feed payload 'o' dari ORDER_TRADE_UPDATE ke OrderStateIndex."""
+        return self.order_index.apply_event(order_payload)
+
+    def is_tracked_entry_order(self, symbol, client_id=None, order_id=None):
+        """
+        Cek apakah order (by clientOrderId / order id) adalah entry order bot untuk symbol ini.
+        Index dulu (O(1)), fallback ke tracker['entry_id'] untuk order lama.
+        """
+        if self.order_index.is_entry_order(symbol, client_id, order_id):
+            return True
+        tracker_data = self.tracker.get(symbol) or {}
+        return bool(order_id) and str(tracker_data.get('entry_id', '')) == str(order_id)
+
+    # --- TRACE METHODS ---
+    def mark_trace(self, symbol, stage, ts=None):
+        """Tambah mark latency ke trace order di tracker (jika ada)."""
+        return tracing.mark_tracker(self.tracker.get(symbol), stage, ts)
+
     # --- SYNC METHODS ---
     async def sync_pending_orders(self):
         """Delegates to OrderSyncManager."""
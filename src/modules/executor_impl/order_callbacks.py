@@ -11,6 +11,7 @@ from datetime import datetime
 
 import config
 from src.utils.helper import logger, kirim_tele, get_coin_leverage
+from src.utils import tracing
 
 
 class OrderUpdateHandler:
@@ -43,6 +44,9 @@ class OrderUpdateHandler:
         sym = o['s'].replace('USDT', '/USDT')
         status = o['X']
 
+        # Event-sourced order state (lifecycle per clientOrderId)
+        self.executor.apply_order_event(o)
+
         if status == 'CANCELED':
             await self._handle_order_cancelled(sym, o)
         elif status == 'EXPIRED':
@@ -56,6 +60,9 @@ class OrderUpdateHandler:
                 await self._handle_position_close(sym, o)
             else:
                 # Entry Fill (RP = 0)
+                # Catat waktu fill versi exchange (T = trade time ms) ke trace latency
+                trade_ts = float(o.get('T', 0) or 0) / 1000 or None
+                self.executor.mark_trace(sym, tracing.STAGE_FILL, trade_ts)
                 await self._handle_entry_fill(sym, o)
 
             # Trigger safety check immediately
@@ -69,11 +76,10 @@ class OrderUpdateHandler:
         """Handle CANCELED order dari WebSocket event."""
         order_id = str(o.get('i', ''))
 
-        # Check if this is our tracked order
+        # Check if this is our tracked entry order (O(1) via OrderStateIndex)
         tracker = self.executor.safety_orders_tracker.get(sym, {})
-        tracked_id = str(tracker.get('entry_id', ''))
 
-        if tracked_id == order_id:
+        if self.executor.is_tracked_entry_order(sym, client_id=o.get('c'), order_id=order_id):
             # This is our limit entry order - was cancelled manually
             logger.info(f"🗑️ Order CANCELED manually: {sym} (ID: {order_id})")
 
@@ -96,11 +102,10 @@ class OrderUpdateHandler:
         """Handle EXPIRED order dari WebSocket event."""
         order_id = str(o.get('i', ''))
 
-        # Check if this is our tracked order
+        # Check if this is our tracked entry order (O(1) via OrderStateIndex)
         tracker = self.executor.safety_orders_tracker.get(sym, {})
-        tracked_id = str(tracker.get('entry_id', ''))
 
-        if tracked_id == order_id:
+        if self.executor.is_tracked_entry_order(sym, client_id=o.get('c'), order_id=order_id):
             logger.info(f"⏰ Order EXPIRED/TIMEOUT: {sym} (ID: {order_id})")
 
             # Log to journal as TIMEOUT
@@ -166,6 +171,8 @@ class OrderUpdateHandler:
         await kirim_tele(msg)
 
         # --- RECORD TRADE TO JOURNAL ---
+        # Tulis state trailing terakhir dari engine ke tracker sebelum dibaca
+        self.executor.release_trailing(symbol)
         tracker = self.executor.safety_orders_tracker.get(symbol, {})
         strategy_tag = tracker.get('strategy', 'UNKNOWN')
         prompt_text = tracker.get('ai_prompt', '-')
@@ -223,6 +230,8 @@ class OrderUpdateHandler:
             'trailing_low': trailing_low,
             'activation_price': activation_price,
             'sl_price_initial': sl_price_initial,
+            'trace': tracker.get('trace', {}),
+            'ai_costs': tracker.get('ai_costs', {}),
         }
 
         if self.journal:
@@ -343,5 +352,7 @@ class OrderUpdateHandler:
             'setup_at': setup_at_str,
             'filled_at': '',  # Never filled
             'technical_data': tech_snapshot,
-            'config_snapshot': cfg_snapshot
+            'config_snapshot': cfg_snapshot,
+            'trace': tracker.get('trace', {}),
+            'ai_costs': tracker.get('ai_costs', {})
         }
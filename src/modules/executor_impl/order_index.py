@@ -0,0 +1,241 @@
+"""
+OrderStateIndex — Index status order in-memory yang di-feed oleh event ORDER_TRADE_UPDATE.
+
+Menggantikan rekonstruksi status dari `tracker['entry_id']` + polling `fetch_open_orders`.
+Setiap order disimpan dengan lifecycle-nya (NEW → PARTIALLY_FILLED → FILLED/CANCELED/EXPIRED)
+dan bisa dicari by clientOrderId, exchange order id, atau symbol dalam O(1).
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+
+import config
+
+# --- LIFECYCLE STATES (mengikuti status Binance Futures) ---
+STATE_NEW = 'NEW'
+STATE_PARTIALLY_FILLED = 'PARTIALLY_FILLED'
+STATE_FILLED = 'FILLED'
+STATE_CANCELED = 'CANCELED'
+STATE_EXPIRED = 'EXPIRED'
+STATE_REJECTED = 'REJECTED'
+
+TERMINAL_STATES = frozenset({STATE_FILLED, STATE_CANCELED, STATE_EXPIRED, STATE_REJECTED})
+
+# Urutan progres untuk menolak event yang datang out-of-order (misal NEW setelah PARTIALLY_FILLED)
+_STATE_RANK = {
+    STATE_NEW: 0,
+    STATE_PARTIALLY_FILLED: 1,
+    STATE_FILLED: 2,
+    STATE_CANCELED: 2,
+    STATE_EXPIRED: 2,
+    STATE_REJECTED: 2,
+}
+
+# Status Binance lain yang dipetakan ke state kanonik
+_STATUS_ALIASES = {
+    'EXPIRED_IN_MATCH': STATE_EXPIRED,
+    'CANCELLED': STATE_CANCELED,
+}
+
+ROLE_ENTRY = 'ENTRY'
+ROLE_UNKNOWN = 'UNKNOWN'
+
+
+def make_client_order_id(symbol, side, strategy_tag, signal_ts):
+    """
+    Buat clientOrderId deterministik dari parameter sinyal.
+    Sinyal yang sama (symbol, side, strategi, detik sinyal) selalu menghasilkan ID yang sama.
+    Binance hanya menolak clientOrderId yang sama dengan order yang masih open, jadi retry
+    selama order pertama masih open (LIMIT) ditolak exchange; setelah order final (mis. MARKET
+    filled) ID boleh dipakai ulang, dan order ganda dicegah oleh cek tracker/posisi.
+
+    Format: {PREFIX}-{BASE}-{B|S}-{hash16}  (maks 36 karakter, sesuai limit Binance)
+    """
+    prefix = getattr(config, 'ORDER_CLIENT_ID_PREFIX', 'EP')
+    base = symbol.split('/')[0].upper()[:10]
+    side_char = 'B' if str(side).lower() in ('buy', 'long') else 'S'
+    seed = f"{symbol}|{str(side).lower()}|{strategy_tag}|{int(signal_ts)}"
+    digest = hashlib.sha1(seed.encode('utf-8')).hexdigest()[:16]
+    return f"{prefix}-{base}-{side_char}-{digest}"[:36]
+
+
+def normalize_ws_symbol(raw_symbol):
+    """'BTCUSDT' -> 'BTC/USDT' (format yang dipakai tracker)."""
+    return raw_symbol.replace('USDT', '/USDT')
+
+
+class OrderStateIndex:
+    """
+    Index order in-memory.
+    - `_orders`       : clientOrderId -> record
+    - `_by_order_id`  : exchange order id -> clientOrderId
+    - `_active`       : symbol -> {clientOrderId: record} (hanya order non-final)
+    Order yang sudah final disimpan terbatas (ORDER_INDEX_MAX_TERMINAL) lalu dibuang FIFO.
+    """
+
+    def __init__(self, max_terminal=None):
+        self._orders = {}
+        self._by_order_id = {}
+        self._active = {}
+        self._terminal = OrderedDict()
+        if max_terminal is None:
+            max_terminal = getattr(config, 'ORDER_INDEX_MAX_TERMINAL', 500)
+        self.max_terminal = max_terminal
+        self.last_event_at = 0.0
+
+    # ------------------------------------------------------------------
+    # REGISTRATION
+    # ------------------------------------------------------------------
+
+    def register(self, client_id, symbol, side, order_type, role=ROLE_ENTRY, order_id=None):
+        """Daftarkan order yang akan/baru dikirim ke exchange (state awal NEW)."""
+        now = time.time()
+        record = self._orders.get(client_id)
+        if record is None:
+            record = {
+                'client_id': client_id,
+                'order_id': None,
+                'symbol': symbol,
+                'side': str(side).upper(),
+                'type': str(order_type).upper(),
+                'role': role,
+                'state': STATE_NEW,
+                'filled_qty': 0.0,
+                'avg_price': 0.0,
+                'created_at': now,
+                'updated_at': now,
+            }
+            self._orders[client_id] = record
+            self._active.setdefault(symbol, {})[client_id] = record
+        else:
+            record['role'] = role
+        if order_id is not None:
+            self.bind_order_id(client_id, order_id)
+        return record
+
+    def discard(self, client_id):
+        """Order yang gagal dikirim / ditolak sebelum ack exchange -> REJECTED, keluar dari index aktif."""
+        record = self._orders.get(client_id)
+        if record is None or record['order_id'] is not None or record['state'] in TERMINAL_STATES:
+            return
+        record['state'] = STATE_REJECTED
+        record['updated_at'] = time.time()
+        self._retire(record)
+
+    def bind_order_id(self, client_id, order_id):
+        """Hubungkan exchange order id (dari response REST) ke clientOrderId."""
+        record = self._orders.get(client_id)
+        if record is None or order_id is None:
+            return
+        record['order_id'] = str(order_id)
+        self._by_order_id[str(order_id)] = client_id
+
+    def seed_from_tracker(self, tracker_data):
+        """
+        Isi index dari tracker saat startup, agar order WAITING_ENTRY yang dibuat
+        sebelum restart tetap dikenali sebagai entry order.
+        """
+        for symbol, data in tracker_data.items():
+            if data.get('status') != 'WAITING_ENTRY':
+                continue
+            order_id = data.get('entry_id')
+            client_id = data.get('entry_client_id') or (f"legacy-{order_id}" if order_id else None)
+            if not client_id:
+                continue
+            self.register(client_id, symbol, data.get('side', 'UNKNOWN'),
+                          data.get('order_type', 'LIMIT'), role=ROLE_ENTRY, order_id=order_id)
+
+    # ------------------------------------------------------------------
+    # EVENT SOURCING
+    # ------------------------------------------------------------------
+
+    def apply_event(self, o):
+        """
+        Terapkan payload 'o' dari ORDER_TRADE_UPDATE ke index.
+        Return record yang ter-update (atau None jika event diabaikan).
+        """
+        status = _STATUS_ALIASES.get(o.get('X'), o.get('X'))
+        if status not in _STATE_RANK:
+            return None
+
+        client_id = o.get('c') or None
+        order_id = str(o.get('i', '')) or None
+        symbol = normalize_ws_symbol(o.get('s', ''))
+
+        # Resolve record: clientOrderId dulu, lalu exchange id
+        if client_id is None or client_id not in self._orders:
+            if order_id and order_id in self._by_order_id:
+                client_id = self._by_order_id[order_id]
+            elif client_id is None:
+                client_id = f"ex-{order_id}"
+
+        record = self._orders.get(client_id)
+        if record is None:
+            # Order yang tidak dibuat lewat execute_entry (SL/TP/manual) tetap di-index
+            record = self.register(client_id, symbol, o.get('S', ''), o.get('o', ''), role=ROLE_UNKNOWN)
+        if order_id and record['order_id'] is None:
+            self.bind_order_id(client_id, order_id)
+
+        self.last_event_at = time.time()
+
+        # Tolak transisi mundur / event setelah state final
+        if record['state'] in TERMINAL_STATES or _STATE_RANK[status] < _STATE_RANK[record['state']]:
+            return record
+
+        record['state'] = status
+        record['updated_at'] = self.last_event_at
+        try:
+            record['filled_qty'] = float(o.get('z', record['filled_qty']) or 0)
+            avg_price = float(o.get('ap', 0) or 0)
+            if avg_price > 0:
+                record['avg_price'] = avg_price
+        except (TypeError, ValueError):
+            pass
+
+        if status in TERMINAL_STATES:
+            self._retire(record)
+        return record
+
+    def _retire(self, record):
+        """Pindahkan order final dari index aktif ke buffer terminal (FIFO, bounded)."""
+        active = self._active.get(record['symbol'])
+        if active is not None:
+            active.pop(record['client_id'], None)
+            if not active:
+                del self._active[record['symbol']]
+
+        self._terminal[record['client_id']] = True
+        while len(self._terminal) > self.max_terminal:
+            old_id, _ = self._terminal.popitem(last=False)
+            old = self._orders.pop(old_id, None)
+            if old and old.get('order_id'):
+                self._by_order_id.pop(old['order_id'], None)
+
+    # ------------------------------------------------------------------
+    # LOOKUPS (O(1))
+    # ------------------------------------------------------------------
+
+    def get(self, client_id):
+        return self._orders.get(client_id)
+
+    def get_by_order_id(self, order_id):
+        client_id = self._by_order_id.get(str(order_id))
+        return self._orders.get(client_id) if client_id else None
+
+    def find(self, client_id=None, order_id=None):
+        """Cari record by clientOrderId, fallback ke exchange order id."""
+        record = self._orders.get(client_id) if client_id else None
+        if record is None and order_id:
+            record = self.get_by_order_id(order_id)
+        return record
+
+    def is_entry_order(self, symbol, client_id=None, order_id=None):
+        """True jika order (by clientOrderId/order id) adalah entry order milik bot untuk symbol ini."""
+        record = self.find(client_id, order_id)
+        return bool(record and record['role'] == ROLE_ENTRY and record['symbol'] == symbol)
+
+    def forget_symbol(self, symbol):
+        """Buang order aktif suatu symbol (dipakai saat tracker dibersihkan oleh reconciliation)."""
+        for record in list(self._active.get(symbol, {}).values()):
+            self._retire(record)
@@ -1,7 +1,10 @@
+import asyncio
 import time
 import ccxt.async_support as ccxt
 import config
-from src.utils.helper import logger, kirim_tele
+from src.utils.helper import logger, kirim_tele, fire_and_forget
+from src.modules.executor_impl.order_index import make_client_order_id, ROLE_ENTRY
+from src.utils import tracing, ai_ledger
 
 class OrderManager:
     """
@@ -10,15 +13,54 @@ class OrderManager:
     - Execute Market/Limit Orders.
     - Interact with RiskManager for Cooldowns.
     - Save initial state to TradeTracker.
+    - Register entry orders (deterministic clientOrderId) to OrderStateIndex.
     """
-    def __init__(self, exchange, tracker, risk_manager):
+    def __init__(self, exchange, tracker, risk_manager, order_index=None):
         self.exchange = exchange
         self.tracker = tracker
         self.risk = risk_manager
+        self.order_index = order_index
+        self._leverage_ready = {}  # symbol -> leverage yang sudah di-set di exchange
 
-    async def execute_entry(self, symbol, side, order_type, price, amount_usdt, leverage, strategy_tag, atr_value=0, ai_prompt=None, ai_reason=None, technical_data=None, config_snapshot=None):
+    async def prepare_symbol(self, symbol, leverage):
+        """
+        Set leverage & margin mode (paralel). Hasil di-cache per symbol sehingga
+        entry berikutnya dengan leverage sama tidak perlu round-trip lagi.
+        """
+        if self._leverage_ready.get(symbol) == leverage:
+            return
+
+        results = await asyncio.gather(
+            self.exchange.set_leverage(leverage, symbol),
+            self.exchange.set_margin_mode(config.DEFAULT_MARGIN_TYPE, symbol),
+            return_exceptions=True
+        )
+        ok = True
+        for res in results:
+            if isinstance(res, ccxt.BaseError):
+                err_msg = str(res).lower()
+                if "already set" not in err_msg and "no need to change" not in err_msg:
+                    logger.warning(f"⚠️ Leverage/Margin setup skipped for {symbol}: {res}")
+                    ok = False
+            elif isinstance(res, Exception):
+                raise res
+        if ok:
+            self._leverage_ready[symbol] = leverage
+
+    async def _notify(self, msg):
+        """Notifikasi entry: fast path = background (tidak menahan eksekusi)."""
+        if config.ENTRY_FAST_PATH:
+            fire_and_forget(kirim_tele(msg))
+        else:
+            await kirim_tele(msg)
+
+    async def execute_entry(self, symbol, side, order_type, price, amount_usdt, leverage, strategy_tag, atr_value=0, ai_prompt=None, ai_reason=None, technical_data=None, config_snapshot=None, trace=None, signal_ts=None):
         """
         Eksekusi open posisi (Market/Limit).
+        `trace` (TradeTrace) ditandai submit/ack lalu disimpan di tracker['trace'].
+        `signal_ts`: timestamp sinyal (candle yang dianalisa) -> seed clientOrderId, sehingga
+        sinyal yang sama di-submit ulang menghasilkan ID yang sama (ditolak exchange selama order
+        pertama masih open; ID order yang sudah final boleh dipakai ulang oleh Binance).
         """
         # 1. Cek Cooldown
         if self.risk.is_under_cooldown(symbol):
@@ -26,36 +68,51 @@ class OrderManager:
             logger.info(f"🛑 {symbol} is in Cooldown ({remaining}s remaining). Skip Entry.")
             return
 
-        try:
-            # 2. Set Leverage & Margin
-            try:
-                await self.exchange.set_leverage(leverage, symbol)
-                await self.exchange.set_margin_mode(config.DEFAULT_MARGIN_TYPE, symbol)
-            except ccxt.BaseError as e:
-                err_msg = str(e).lower()
-                if "already set" not in err_msg and "no need to change" not in err_msg:
-                    logger.warning(f"⚠️ Leverage/Margin setup skipped for {symbol}: {e}")
+        if trace is None:
+            trace = tracing.TradeTrace(symbol)
 
-            # 3. Hitung Qty
+        client_id = None
+        try:
+            # 2. Set Leverage & Margin (+ fetch harga jika perlu, paralel)
             if price is None or price == 0:
-                ticker = await self.exchange.fetch_ticker(symbol)
+                _, ticker = await asyncio.gather(
+                    self.prepare_symbol(symbol, leverage),
+                    self.exchange.fetch_ticker(symbol)
+                )
                 price_exec = ticker['last']
             else:
+                await self.prepare_symbol(symbol, leverage)
                 price_exec = price
 
+            # 3. Hitung Qty
+
             qty = (amount_usdt * leverage) / price_exec
             qty = self.exchange.amount_to_precision(symbol, qty)
 
             logger.info(f"🚀 EXECUTING: {symbol} | {side} | ${amount_usdt} | x{leverage} | ATR: {atr_value}")
 
+            # Deterministic clientOrderId -> dipakai OrderStateIndex untuk lookup event WS
+            if signal_ts is None:
+                # Tanpa signal_ts: pakai awal trace analisa (tetap sama untuk retry dalam satu analisa)
+                signal_ts = trace.marks.get(tracing.STAGE_ANALYSIS_START) or time.time()
+            client_id = make_client_order_id(symbol, side, strategy_tag, signal_ts)
+            order_params = {'newClientOrderId': client_id}
+            if self.order_index is not None:
+                self.order_index.register(client_id, symbol, side, order_type, role=ROLE_ENTRY)
+
             # 4. Create Order
             if order_type.lower() == 'limit':
-                order = await self.exchange.create_order(symbol, 'limit', side, qty, price_exec)
+                trace.mark(tracing.STAGE_SUBMIT)
+                order = await self.exchange.create_order(symbol, 'limit', side, qty, price_exec, order_params)
+                trace.mark(tracing.STAGE_ACK)
+                if self.order_index is not None:
+                    self.order_index.bind_order_id(client_id, order['id'])
                 
                 # Save to tracker as WAITING_ENTRY
                 self.tracker.set(symbol, {
                     "status": "WAITING_ENTRY",
                     "entry_id": str(order['id']),
+                    "entry_client_id": client_id,
                     "created_at": time.time(),
                     "expires_at": time.time() + config.LIMIT_ORDER_EXPIRY_SECONDS,
                     "strategy": strategy_tag,
@@ -64,16 +121,19 @@ class OrderManager:
                     "ai_prompt": ai_prompt,
                     "ai_reason": ai_reason,
                     "technical_data": technical_data or {},
-                    "config_snapshot": config_snapshot or {}
+                    "config_snapshot": config_snapshot or {},
+                    "trace": trace.to_dict(),
+                    "ai_costs": ai_ledger.trade_costs(trace.trace_id)
                 })
                 await self.tracker.save()
-                await kirim_tele(f"⏳ <b>LIMIT PLACED ({strategy_tag})</b>\n{symbol} {side} @ {price_exec:.4f}\n(Trap SL set by ATR: {atr_value:.4f})")
+                await self._notify(f"⏳ <b>LIMIT PLACED ({strategy_tag})</b>\n{symbol} {side} @ {price_exec:.4f}\n(Trap SL set by ATR: {atr_value:.4f})")
 
             else: # MARKET
                 # [FIX RACE CONDITION]
                 # Simpan metadata SEBELUM order dilempar
                 self.tracker.set(symbol, {
                     "status": "PENDING", 
+                    "entry_client_id": client_id,
                     "strategy": strategy_tag,
                     "order_type": order_type.upper(),
                     "atr_value": atr_value,
@@ -82,13 +142,23 @@ class OrderManager:
                     "ai_prompt": ai_prompt,
                     "ai_reason": ai_reason,
                     "technical_data": technical_data or {},
-                    "config_snapshot": config_snapshot or {}
+                    "config_snapshot": config_snapshot or {},
+                    "trace": trace.mark(tracing.STAGE_SUBMIT).to_dict(),
+                    "ai_costs": ai_ledger.trade_costs(trace.trace_id)
                 })
-                await self.tracker.save()
+                # Fast path: cukup di RAM (WS handler baca RAM), simpan ke disk setelah order terkirim
+                if not config.ENTRY_FAST_PATH:
+                    await self.tracker.save()
 
                 try:
-                    order = await self.exchange.create_order(symbol, 'market', side, qty)
-                    await kirim_tele(f"✅ <b>MARKET FILLED</b>\n{symbol} {side} (Size: ${amount_usdt*leverage:.2f})")
+                    order = await self.exchange.create_order(symbol, 'market', side, qty, None, order_params)
+                    # Fill event WS bisa datang sebelum ack REST -> mark langsung di tracker
+                    tracing.mark_tracker(self.tracker.get(symbol), tracing.STAGE_ACK)
+                    if self.order_index is not None:
+                        self.order_index.bind_order_id(client_id, order['id'])
+                    if config.ENTRY_FAST_PATH:
+                        fire_and_forget(self.tracker.save())
+                    await self._notify(f"✅ <b>MARKET FILLED</b>\n{symbol} {side} (Size: ${amount_usdt*leverage:.2f})")
                 except Exception as e:
                     # [ROLLBACK] Jika order gagal, hapus dari tracker
                     logger.error(f"❌ Market Order Failed {symbol}, rolling back tracker...")
@@ -97,5 +167,8 @@ class OrderManager:
                     raise e
 
         except Exception as e:
+            # Order tanpa ack exchange tidak boleh tertinggal sebagai NEW di index aktif
+            if self.order_index is not None and client_id is not None:
+                self.order_index.discard(client_id)
             logger.error(f"❌ Entry Failed {symbol}: {e}")
             await kirim_tele(f"❌ <b>ENTRY ERROR</b>\n{symbol}: {e}", alert=True)
@@ -76,8 +76,12 @@ class PositionManager:
         
         return False
 
-    def get_open_positions_count_by_category(self, target_category):
-        """Hitung jumlah posisi aktif di kategori tertentu"""
+    def get_open_positions_count_by_category(self, target_category, tracker=None):
+        """
+        Hitung jumlah posisi aktif di kategori tertentu.
+        Jika `tracker` diberikan, order yang belum masuk Position Cache (LIMIT WAITING_ENTRY,
+        MARKET PENDING yang belum tersinkron) ikut dihitung agar limit kategori tidak terlewati.
+        """
         count = 0
         cat_map = {c['symbol']: c['category'] for c in config.DAFTAR_KOIN}
         
@@ -86,4 +90,11 @@ class PositionManager:
             cat = cat_map.get(sym, 'UNKNOWN')
             if cat == target_category:
                 count += 1
+
+        if tracker is not None:
+            for sym, data in tracker.data.items():
+                if data.get('status') not in ('WAITING_ENTRY', 'PENDING') or self.has_position(sym):
+                    continue
+                if cat_map.get(sym, 'UNKNOWN') == target_category:
+                    count += 1
         return count
@@ -3,6 +3,8 @@ import time
 import ccxt.async_support as ccxt
 import config
 from src.utils.helper import logger, kirim_tele
+from src.utils import metrics, tracing
+from src.modules.executor_impl.trailing_engine import TrailingEngine, LastAmendView
 
 class SafetyManager:
     """
@@ -16,7 +18,13 @@ class SafetyManager:
         self.exchange = exchange
         self.tracker = tracker
         self._safety_lock = asyncio.Lock()
-        self._trailing_last_update = {} # Throttle for Trailing SL Update
+        self.trailing = TrailingEngine()  # State trailing semua posisi (numpy slots)
+        self._trailing_last_persist = 0.0
+
+    @property
+    def _trailing_last_update(self):
+        """Throttle state per symbol (waktu amend terakhir), dibaca dari TrailingEngine"""
+        return LastAmendView(self.trailing)
 
     # --- SAFETY ORDERS (SL/TP) ---
     async def install_safety_orders(self, symbol, pos_data):
@@ -24,8 +32,10 @@ class SafetyManager:
         Pasang SL dan TP untuk posisi yang sudah terbuka.
         """
         async with self._safety_lock:  # Prevent race condition
+            self.trailing.remove(symbol)  # SL/TP baru -> trailing di-reset
             entry_price = float(pos_data['entryPrice'])
             side = pos_data['side']
+            quantity = float(pos_data.get('contracts', 0) or 0)  # Dipakai amend SL (place-then-cancel)
             
             # 1. Cancel Old Orders
             try:
@@ -95,8 +105,10 @@ class SafetyManager:
                         "sl_order_id": str(sl_order['id']),
                         "tp_order_id": str(tp_order['id']),
                         "side": side,
+                        "quantity": quantity,
                         "trailing_active": False 
                     })
+                    self._complete_trace(symbol)
                     await self.tracker.save()
                 else:
                      # Create if not exists (e.g., manual position)
@@ -108,6 +120,7 @@ class SafetyManager:
                         "sl_order_id": str(sl_order['id']),
                         "tp_order_id": str(tp_order['id']),
                         "side": side,
+                        "quantity": quantity,
                         "trailing_active": False,
                         "created_at": time.time()
                     })
@@ -118,11 +131,26 @@ class SafetyManager:
                 logger.error(f"❌ Install Safety Failed {symbol}: {e}")
                 return False
 
+    def _complete_trace(self, symbol):
+        """Mark SL/TP terpasang -> trace lengkap, catat durasi tiap tahap ke metrics."""
+        tracker_data = self.tracker.get(symbol)
+        marks = (tracker_data.get('trace') or {}).get('marks') if tracker_data else None
+        if marks is None or tracing.STAGE_SAFETY in marks:
+            return
+        tracing.mark_tracker(tracker_data, tracing.STAGE_SAFETY)
+        durations = tracing.record(marks)
+        logger.info(f"⏱️ Trace {symbol}: {tracing.format_durations(durations)}")
+
     # --- TRAILING STOP LOSS LOGIC ---
     async def check_trailing_on_price(self, symbol, current_price):
         """
         Dipanggil setiap ada update harga dari WebSocket.
         """
+        # Fast path: posisi yang trailing-nya sudah aktif dievaluasi langsung di engine
+        if symbol in self.trailing:
+            await self.update_trailing_sl(symbol, current_price)
+            return
+
         tracker_data = self.tracker.get(symbol)
         if not tracker_data:
             return
@@ -177,6 +205,7 @@ class SafetyManager:
             'trailing_low': tracker_data.get('trailing_low')
         })
         await self.tracker.save()
+        self.trailing.load(symbol, side, current_price, new_sl, config.TRAILING_CALLBACK_RATE, last_amend=time.time())
         
         logger.info(f"🔄 Trailing Mode ACTIVATED for {symbol} @ {current_price} | SL: {new_sl:.4f}")
         await kirim_tele(f"🔄 <b>TRAILING ACTIVE</b>\n{symbol}\nPrice: {current_price}\nInitial SL: {new_sl:.4f} (Locked)")
@@ -185,104 +214,173 @@ class SafetyManager:
         await self._amend_sl_order(symbol, new_sl, side)
 
     async def update_trailing_sl(self, symbol, current_price):
+        """
+        Evaluasi tick di TrailingEngine (O(1), tanpa sentuh tracker).
+        Amend hanya dikirim jika SL membaik DAN cooldown habis; selama cooldown
+        kandidat terbaru disimpan sebagai pending (coalesced).
+        """
+        if symbol not in self.trailing and not self._load_trailing(symbol):
+            return False
+
+        now = time.time()
+        new_sl = self.trailing.on_tick(symbol, current_price, now, config.TRAILING_SL_UPDATE_COOLDOWN)
+        if new_sl is None:
+            await self._persist_trailing(now)
+            return False
+
+        return await self._apply_trailing_amend(symbol, new_sl)
+
+    def _load_trailing(self, symbol):
+        """Muat state trailing dari tracker ke engine (misal setelah restart)."""
         tracker_data = self.tracker.get(symbol)
-        if not tracker_data or not tracker_data.get('trailing_active'): return
+        if not tracker_data or not tracker_data.get('trailing_active'):
+            return False
 
         side = tracker_data.get('side', 'LONG')
-        current_sl = tracker_data.get('trailing_sl', 0)
-        
-        need_update = False
-        new_sl = current_sl
-        
-        # 1. Update Internal High/Low & Calculate Candidate SL
         if side == 'LONG':
-            trailing_high = tracker_data.get('trailing_high', 0)
-            
-            if current_price > trailing_high:
-                tracker_data['trailing_high'] = current_price
-                trailing_high = current_price
-
-            candidate_sl = trailing_high * (1 - config.TRAILING_CALLBACK_RATE)
+            watermark = tracker_data.get('trailing_high') or 0
+        else:
+            watermark = tracker_data.get('trailing_low') or float('inf')
+        self.trailing.load(symbol, side, watermark, tracker_data.get('trailing_sl', 0), config.TRAILING_CALLBACK_RATE)
+        return True
 
-            if candidate_sl > current_sl:
-                new_sl = candidate_sl
-                need_update = True
-                    
-        else: # SHORT
-            trailing_low = tracker_data.get('trailing_low', float('inf'))
-            
-            if current_price < trailing_low:
-                tracker_data['trailing_low'] = current_price
-                trailing_low = current_price
-                
-            candidate_sl = trailing_low * (1 + config.TRAILING_CALLBACK_RATE)
+    async def _apply_trailing_amend(self, symbol, new_sl):
+        tracker_data = self.tracker.get(symbol)
+        if not tracker_data or not tracker_data.get('trailing_active'):
+            # Posisi sudah ditutup / di-reset di luar engine
+            self.trailing.remove(symbol)
+            return False
 
-            if candidate_sl < current_sl:
-                new_sl = candidate_sl
-                need_update = True
+        old_sl = tracker_data.get('trailing_sl', 0)
+        # Update RAM saja, disk ikut tersimpan oleh _amend_sl_order / batch persist
+        self.tracker.update(symbol, self.trailing.get_state(symbol))
 
-        # 2. Execute Update (Throttled)
-        if need_update:
-            now = time.time()
-            last_update = self._trailing_last_update.get(symbol, 0)
+        logger.info(f"📈 Trailing SL Updated {symbol}: {old_sl:.4f} -> {new_sl:.4f}")
+        await self._amend_sl_order(symbol, new_sl, tracker_data.get('side', 'LONG'))
+        return True
 
-            if now - last_update < config.TRAILING_SL_UPDATE_COOLDOWN:
-                return False
+    async def _persist_trailing(self, now, force=False):
+        """Batch persist watermark/SL yang berubah ke tracker (maks sekali per TRAILING_PERSIST_INTERVAL)."""
+        if not force and now - self._trailing_last_persist < config.TRAILING_PERSIST_INTERVAL:
+            return
+        self._trailing_last_persist = now
 
-            self._trailing_last_update[symbol] = now
-            
-            # Update RAM & Disk
-            self.tracker.update(symbol, {
-                'trailing_sl': new_sl,
-                'trailing_high': tracker_data.get('trailing_high'),
-                'trailing_low': tracker_data.get('trailing_low')
-            })
+        updates = self.trailing.collect_dirty()
+        changed = False
+        for symbol, state in updates.items():
+            if self.tracker.exists(symbol):
+                self.tracker.update(symbol, state)
+                changed = True
+        if changed:
             await self.tracker.save()
-            
-            logger.info(f"📈 Trailing SL Updated {symbol}: {current_sl:.4f} -> {new_sl:.4f}")
-            await self._amend_sl_order(symbol, new_sl, side)
-            return True
 
-        return False
+    async def flush_trailing(self):
+        """
+        Dipanggil periodik (safety monitor): kirim SL pending yang cooldown-nya sudah habis
+        untuk posisi yang tidak menerima tick baru, lalu persist state trailing.
+        """
+        now = time.time()
+        for symbol, new_sl in self.trailing.due_amends(now, config.TRAILING_SL_UPDATE_COOLDOWN):
+            await self._apply_trailing_amend(symbol, new_sl)
+        await self._persist_trailing(now, force=True)
+
+    def release_trailing(self, symbol):
+        """Tulis state akhir trailing ke tracker (RAM) lalu lepas slot engine. Dipakai saat posisi close."""
+        state = self.trailing.get_state(symbol)
+        if state and self.tracker.exists(symbol):
+            self.tracker.update(symbol, state)
+        self.trailing.remove(symbol)
 
     async def _amend_sl_order(self, symbol, new_sl_price, side):
+        """
+        Geser SL tanpa celah posisi tanpa proteksi:
+        1. editOrder (SL_AMEND_MODE='edit' dan exchange mendukung modify).
+        2. Pasang SL baru dulu (reduceOnly + quantity), lalu cancel SL lama by id (retry).
+        3. Fallback legacy cancel -> create (closePosition) jika quantity tidak diketahui
+           atau exchange menolak SL kedua.
+        Latency tiap amend dicatat di histogram `sl_amend_latency_ms`.
+        """
+        started = time.perf_counter()
         try:
             tracker_data = self.tracker.get(symbol) or {}
-            sl_order_id = tracker_data.get('sl_order_id')
-            use_fallback = False
-
-            if sl_order_id:
-                try:
-                    await self.exchange.cancel_order(sl_order_id, symbol)
-                except Exception as e:
-                    logger.warning(f"⚠️ Fast Cancel Failed for {sl_order_id}: {e}. Falling back.")
-                    use_fallback = True
-            else:
-                use_fallback = True
-
-            if use_fallback:
-                orders = await self.exchange.fetch_open_orders(symbol)
-                for o in orders:
-                    if o['type'] in ['stop_market', 'STOP_MARKET']:
-                        try:
-                            await self.exchange.cancel_order(o['id'], symbol)
-                        except Exception as e:
-                            logger.warning(f"Failed to cancel old SL {o['id']}: {e}")
-            
+            old_id = tracker_data.get('sl_order_id')
+            quantity = float(tracker_data.get('quantity', 0) or 0)
             p_sl = self.exchange.price_to_precision(symbol, new_sl_price)
             side_api = 'sell' if side == 'LONG' else 'buy'
-             
-            new_order = await self.exchange.create_order(symbol, 'STOP_MARKET', side_api, None, None, {
-                'stopPrice': p_sl, 'closePosition': True, 'workingType': 'MARK_PRICE'
-            })
-             
+
+            new_order = None
+            if old_id and config.SL_AMEND_MODE == 'edit' and self.exchange.has.get('editOrder'):
+                new_order = await self._edit_sl_order(symbol, old_id, side_api, p_sl)
+            if new_order is None and quantity > 0:
+                new_order = await self._replace_sl_order(symbol, old_id, side_api, quantity, p_sl)
+            if new_order is None:
+                new_order = await self._cancel_then_create_sl(symbol, old_id, side_api, p_sl)
+
             if self.tracker.exists(symbol):
                 self.tracker.update(symbol, {'sl_order_id': str(new_order['id'])})
                 await self.tracker.save()
-             
+
+            metrics.histogram('sl_amend_latency_ms').observe((time.perf_counter() - started) * 1000)
+
         except Exception as e:
+            metrics.counter('sl_amend_failed').inc()
             logger.error(f"❌ Failed to Amend SL {symbol}: {e}")
 
+    async def _edit_sl_order(self, symbol, order_id, side_api, p_sl):
+        """Modify SL in-place (1 round-trip). Return None jika exchange menolak."""
+        try:
+            return await self.exchange.edit_order(order_id, symbol, 'STOP_MARKET', side_api, None, None, {
+                'stopPrice': p_sl, 'closePosition': True, 'workingType': 'MARK_PRICE'
+            })
+        except Exception as e:
+            logger.debug(f"editOrder SL {symbol} ditolak, pakai replace: {e}")
+            return None
+
+    async def _replace_sl_order(self, symbol, old_id, side_api, quantity, p_sl):
+        """Pasang SL baru dulu, baru cancel SL lama. Return None jika SL baru gagal dipasang."""
+        try:
+            new_order = await self.exchange.create_order(symbol, 'STOP_MARKET', side_api, quantity, None, {
+                'stopPrice': p_sl, 'reduceOnly': True, 'workingType': 'MARK_PRICE'
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Place-first SL {symbol} gagal: {e}. Fallback cancel -> create.")
+            return None
+
+        if old_id and not await self._cancel_with_retry(symbol, old_id):
+            await self._cancel_stale_stops(symbol, keep_id=str(new_order['id']))
+        return new_order
+
+    async def _cancel_then_create_sl(self, symbol, old_id, side_api, p_sl):
+        """Jalur lama: cancel SL lama lalu pasang SL closePosition baru."""
+        if not old_id or not await self._cancel_with_retry(symbol, old_id):
+            await self._cancel_stale_stops(symbol)
+        return await self.exchange.create_order(symbol, 'STOP_MARKET', side_api, None, None, {
+            'stopPrice': p_sl, 'closePosition': True, 'workingType': 'MARK_PRICE'
+        })
+
+    async def _cancel_with_retry(self, symbol, order_id):
+        """Cancel order by id dengan retry. OrderNotFound dianggap sukses (sudah hilang)."""
+        for attempt in range(config.ORDER_SLTP_RETRIES):
+            try:
+                await self.exchange.cancel_order(order_id, symbol)
+                return True
+            except ccxt.OrderNotFound:
+                return True
+            except Exception as e:
+                logger.warning(f"⚠️ Cancel SL {order_id} gagal (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(config.SL_AMEND_RETRY_DELAY * (attempt + 1))
+        return False
+
+    async def _cancel_stale_stops(self, symbol, keep_id=None):
+        """Last resort: cancel semua STOP_MARKET symbol ini kecuali SL yang baru dipasang."""
+        orders = await self.exchange.fetch_open_orders(symbol)
+        for o in orders:
+            if o['type'] in ['stop_market', 'STOP_MARKET'] and str(o['id']) != keep_id:
+                try:
+                    await self.exchange.cancel_order(o['id'], symbol)
+                except Exception as e:
+                    logger.warning(f"Failed to cancel old SL {o['id']}: {e}")
+
     # --- NATIVE TRAILING ---
     async def install_native_trailing_stop(self, symbol, side, quantity, callback_rate, activation_price=None):
         try:
@@ -11,11 +11,17 @@ class OrderSyncManager:
     - Detect manually cancelled orders.
     - Auto-cancel expired limit orders.
     - Update tracker state accordingly.
+
+    Status order utama datang dari OrderStateIndex (event ORDER_TRADE_UPDATE).
+    Polling `fetch_open_orders` hanya jadi safety net tiap ORDER_RECONCILE_INTERVAL,
+    atau saat order tidak dikenal oleh index (misal event terlewat saat WS putus).
     """
-    def __init__(self, exchange, tracker, positions):
+    def __init__(self, exchange, tracker, positions, order_index=None):
         self.exchange = exchange
         self.tracker = tracker
         self.positions = positions
+        self.order_index = order_index
+        self._last_reconcile = 0.0
 
     async def sync_pending_orders(self):
         """
@@ -31,29 +37,31 @@ class OrderSyncManager:
         if not symbols_to_check:
             return
 
+        # Full REST reconciliation hanya jika interval safety net sudah lewat
+        now = time.time()
+        reconcile_due = (now - self._last_reconcile) >= config.ORDER_RECONCILE_INTERVAL
+        if reconcile_due:
+            self._last_reconcile = now
+
         # 2. Check symbols in parallel
         sem = asyncio.Semaphore(getattr(config, 'CONCURRENCY_LIMIT', 10))
         
         # Run all checks and collect results
         results = await asyncio.gather(*[
-            self._check_symbol(sym, sem) for sym in symbols_to_check
+            self._check_symbol(sym, sem, reconcile_due) for sym in symbols_to_check
         ])
         
         # 3. Save tracker if any changes were made
         if any(results):
             await self.tracker.save()
 
-    async def _check_symbol(self, symbol: str, sem: asyncio.Semaphore) -> bool:
+    async def _check_symbol(self, symbol: str, sem: asyncio.Semaphore, reconcile_due: bool = True) -> bool:
         """
         Check status of a single symbol's pending order.
         Returns True if tracker was modified, False otherwise.
         """
         async with sem:
             try:
-                # Fetch Open Orders from Binance
-                open_orders = await self.exchange.fetch_open_orders(symbol)
-                open_order_ids = [str(o['id']) for o in open_orders]
-                
                 if not self.tracker.exists(symbol):
                     return False
 
@@ -74,6 +82,7 @@ class OrderSyncManager:
 
                     # Clean tracker
                     self.tracker.delete(symbol)
+                    self._forget(symbol)
                     
                     await kirim_tele(
                         f"⏰ <b>ORDER EXPIRED</b>\n"
@@ -81,12 +90,30 @@ class OrderSyncManager:
                         f"Tracker cleaned."
                     )
                     return True  # Skip further checks since we removed it
-                
-                if tracked_id not in open_order_ids:
+
+                # Event-sourced state: jika index sudah tahu order masih hidup, tidak perlu REST
+                record = None
+                if self.order_index is not None:
+                    record = self.order_index.find(tracker_data.get('entry_client_id'), tracked_id)
+
+                if record is not None and record['state'] in ('NEW', 'PARTIALLY_FILLED') and not reconcile_due:
+                    return False
+
+                if record is not None and record['state'] in ('NEW', 'PARTIALLY_FILLED'):
+                    is_open = await self._is_order_open(symbol, tracked_id)
+                elif record is not None:
+                    # State final sudah diketahui dari event WS
+                    is_open = False
+                else:
+                    # Order tidak dikenal index -> fallback polling
+                    is_open = await self._is_order_open(symbol, tracked_id)
+
+                if not is_open:
                     # Order is missing! Either Filled or Cancelled.
                     
-                    # Case A: Filled? (Check Position Cache)
-                    if self.positions.has_position(symbol):
+                    # Case A: Filled? (Check Position Cache / fill event dari index)
+                    filled_by_event = record is not None and record['state'] == 'FILLED'
+                    if filled_by_event or self.positions.has_position(symbol):
                         # It is filled! Update tracker.
                         logger.info(f"✅ Order {symbol} found filled during sync. Queuing for Safety Orders (PENDING).")
                         self.tracker.update(symbol, {
@@ -100,6 +127,7 @@ class OrderSyncManager:
                         # Not active, not in open orders -> Cancelled manually
                         logger.info(f"🗑️ Found Stale/Cancelled Order for {symbol}. Removing from tracker.")
                         self.tracker.delete(symbol)
+                        self._forget(symbol)
 
                         await kirim_tele(
                             f"🗑️ <b>ORDER SYNC</b>\n"
@@ -113,3 +141,12 @@ class OrderSyncManager:
             except Exception as e:
                 logger.error(f"⚠️ Sync Pending Error for {symbol}: {e}")
                 return False
+
+    async def _is_order_open(self, symbol: str, order_id: str) -> bool:
+        """REST safety net: cek apakah order masih ada di open orders exchange."""
+        open_orders = await self.exchange.fetch_open_orders(symbol)
+        return order_id in {str(o['id']) for o in open_orders}
+
+    def _forget(self, symbol: str) -> None:
+        if self.order_index is not None:
+            self.order_index.forget_symbol(symbol)
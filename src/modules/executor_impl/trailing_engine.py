@@ -0,0 +1,186 @@
+"""
+TrailingEngine — State trailing stop (software mode) untuk semua posisi dalam array numpy.
+
+Setiap posisi menempati satu slot: side, watermark (high/low), SL aktif, callback rate,
+waktu amend terakhir, dan SL pending. Evaluasi per tick O(1) tanpa menyentuh dict tracker.
+Amend di-coalesce: selama cooldown hanya SL terbaru yang disimpan sebagai pending,
+lalu dikirim sekali saat cooldown habis. Persistensi watermark dilakukan batch via `dirty`.
+"""
+
+import numpy as np
+
+SIDE_LONG = 1
+SIDE_SHORT = -1
+
+
+class TrailingEngine:
+
+    def __init__(self, capacity=32):
+        self._slots = {}                  # symbol -> slot index
+        self._symbols = [None] * capacity  # slot index -> symbol
+        self._free = list(range(capacity - 1, -1, -1))
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.watermark = np.zeros(capacity, dtype=np.float64)
+        self.sl = np.zeros(capacity, dtype=np.float64)
+        self.rate = np.zeros(capacity, dtype=np.float64)
+        self.last_amend = np.zeros(capacity, dtype=np.float64)
+        self.pending_sl = np.full(capacity, np.nan, dtype=np.float64)
+        self.dirty = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        """Gandakan kapasitas array (dipanggil hanya saat semua slot terisi)."""
+        size = len(self.side)
+        for name in ('side', 'watermark', 'sl', 'rate', 'last_amend', 'pending_sl', 'dirty'):
+            old = getattr(self, name)
+            fill = np.nan if name == 'pending_sl' else 0
+            grown = np.full(size * 2, fill, dtype=old.dtype)
+            grown[:size] = old
+            setattr(self, name, grown)
+        self._symbols.extend([None] * size)
+        self._free.extend(range(size * 2 - 1, size - 1, -1))
+
+    # ------------------------------------------------------------------
+    # SLOT MANAGEMENT
+    # ------------------------------------------------------------------
+
+    def __contains__(self, symbol):
+        return symbol in self._slots
+
+    def __len__(self):
+        return len(self._slots)
+
+    def symbols(self):
+        return list(self._slots)
+
+    def load(self, symbol, side, watermark, sl, rate, last_amend=0.0):
+        """Masukkan / reset posisi ke engine. side: 'LONG' atau 'SHORT'."""
+        idx = self._slots.get(symbol)
+        if idx is None:
+            if not self._free:
+                self._grow()
+            idx = self._free.pop()
+            self._slots[symbol] = idx
+            self._symbols[idx] = symbol
+        self.side[idx] = SIDE_LONG if side == 'LONG' else SIDE_SHORT
+        self.watermark[idx] = watermark
+        self.sl[idx] = sl
+        self.rate[idx] = rate
+        self.last_amend[idx] = last_amend
+        self.pending_sl[idx] = np.nan
+        self.dirty[idx] = False
+        return idx
+
+    def remove(self, symbol):
+        idx = self._slots.pop(symbol, None)
+        if idx is None:
+            return
+        self._symbols[idx] = None
+        self.side[idx] = 0
+        self.pending_sl[idx] = np.nan
+        self.dirty[idx] = False
+        self._free.append(idx)
+
+    def get_state(self, symbol):
+        """Snapshot state satu posisi dalam format field tracker."""
+        idx = self._slots.get(symbol)
+        if idx is None:
+            return None
+        state = {'trailing_sl': float(self.sl[idx])}
+        key = 'trailing_high' if self.side[idx] == SIDE_LONG else 'trailing_low'
+        state[key] = float(self.watermark[idx])
+        return state
+
+    def get_last_amend(self, symbol, default=0):
+        idx = self._slots.get(symbol)
+        return float(self.last_amend[idx]) if idx is not None else default
+
+    # ------------------------------------------------------------------
+    # TICK EVALUATION
+    # ------------------------------------------------------------------
+
+    def on_tick(self, symbol, price, now, cooldown):
+        """
+        Evaluasi satu tick harga. Return SL baru yang harus dikirim ke exchange,
+        atau None (tidak ada perubahan / masih dalam cooldown → disimpan sebagai pending).
+        """
+        idx = self._slots.get(symbol)
+        if idx is None:
+            return None
+
+        if self.side[idx] == SIDE_LONG:
+            if price > self.watermark[idx]:
+                self.watermark[idx] = price
+                self.dirty[idx] = True
+            candidate = self.watermark[idx] * (1 - self.rate[idx])
+            improved = candidate > self.sl[idx]
+        else:
+            if price < self.watermark[idx]:
+                self.watermark[idx] = price
+                self.dirty[idx] = True
+            candidate = self.watermark[idx] * (1 + self.rate[idx])
+            improved = candidate < self.sl[idx]
+
+        if not improved:
+            return None
+
+        if now - self.last_amend[idx] < cooldown:
+            # Coalesce: hanya simpan kandidat terbaru
+            self.pending_sl[idx] = candidate
+            return None
+
+        return self._commit(idx, candidate, now)
+
+    def _commit(self, idx, new_sl, now):
+        self.sl[idx] = new_sl
+        self.last_amend[idx] = now
+        self.pending_sl[idx] = np.nan
+        self.dirty[idx] = True
+        return float(new_sl)
+
+    def due_amends(self, now, cooldown):
+        """
+        Vectorized: ambil semua SL pending yang cooldown-nya sudah habis
+        (untuk posisi yang tidak menerima tick baru). Return list (symbol, new_sl).
+        """
+        mask = ~np.isnan(self.pending_sl) & ((now - self.last_amend) >= cooldown)
+        result = []
+        for idx in np.flatnonzero(mask):
+            symbol = self._symbols[idx]
+            if symbol is None:
+                continue
+            result.append((symbol, self._commit(idx, self.pending_sl[idx], now)))
+        return result
+
+    def collect_dirty(self):
+        """Ambil state semua slot yang berubah sejak persist terakhir, lalu reset flag dirty."""
+        updates = {}
+        for idx in np.flatnonzero(self.dirty):
+            symbol = self._symbols[idx]
+            if symbol is not None:
+                updates[symbol] = self.get_state(symbol)
+        self.dirty[:] = False
+        return updates
+
+
+class LastAmendView:
+    """Mapping read-only symbol -> waktu amend terakhir (kompatibilitas `_trailing_last_update`)."""
+
+    def __init__(self, engine):
+        self._engine = engine
+
+    def __getitem__(self, symbol):
+        if symbol not in self._engine:
+            raise KeyError(symbol)
+        return self._engine.get_last_amend(symbol)
+
+    def get(self, symbol, default=0):
+        return self._engine.get_last_amend(symbol, default)
+
+    def __contains__(self, symbol):
+        return symbol in self._engine
+
+    def __len__(self):
+        return len(self._engine)
+
+    def __iter__(self):
+        return iter(self._engine.symbols())
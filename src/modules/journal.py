@@ -3,6 +3,8 @@ import pandas as pd
 from datetime import datetime
 import json
 from src.utils.helper import logger
+from src.utils.tracing import compute_durations
+from src.utils import ai_ledger
 from src.modules.mongo_manager import MongoManager
 
 class TradeJournal:
@@ -66,6 +68,10 @@ class TradeJournal:
             except (TypeError, ValueError):
                 config_json = '{}'
 
+            # Latency trace lifecycle order (signal -> fill -> SL/TP)
+            trace = data.get('trace') or {}
+            trace_marks = trace.get('marks', {})
+
             # 3. Prepare Document
             timestamp = data.get('timestamp', datetime.now().isoformat())
             
@@ -96,13 +102,21 @@ class TradeJournal:
                 'trailing_low': float(data.get('trailing_low', 0)),
                 'activation_price': float(data.get('activation_price', 0)),
                 'sl_price_initial': float(data.get('sl_price_initial', 0)),
+                'trace_id': trace.get('trace_id', ''),
+                'stage_timestamps': trace_marks,
+                'stage_latency_ms': compute_durations(trace_marks),
             }
+            # Biaya AI (token & USD) dari panggilan yang menghasilkan trade ini:
+            # snapshot tracker saat entry (aman dari restart), ditimpa total in-memory jika masih ada
+            trade_doc.update(data.get('ai_costs') or {})
+            trade_doc.update(ai_ledger.trade_costs(trade_doc['trace_id']))
 
             # 3. Insert to MongoDB
             success = self.mongo.insert_trade(trade_doc)
             
             if success:
                 logger.info(f"📝 Trade Logged to MongoDB: {trade_doc.get('symbol')} ({result}) PnL: ${pnl_usdt:.2f}")
+                ai_ledger.link_trade(trade_doc)
                 return True
             else:
                 logger.error("❌ Failed to insert trade to MongoDB")
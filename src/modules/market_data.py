@@ -413,6 +413,8 @@ class MarketDataManager:
         self.lsr_data = {} # Top Trader Long/Short Ratio
         
         self.btc_trend = "NEUTRAL"
+        self.on_candle_close = None  # Callback sync (symbol, interval) saat kline close (mis. pre-render chart)
+        self.on_candle_open = None   # Callback sync (symbol, interval) saat candle baru pertama masuk store
         self.data_lock = asyncio.Lock()
         self.sem_slow_data = asyncio.Semaphore(config.CONCURRENCY_LIMIT)
         
@@ -732,6 +734,7 @@ class MarketDataManager:
         k = data['k']
         interval = k['i']
         new_candle = [int(k['t']), float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v'])]
+        opened = False
         
         async with self.data_lock:
             if sym in self.market_store:
@@ -741,6 +744,7 @@ class MarketDataManager:
                         target[-1] = new_candle
                     else:
                         target.append(new_candle)
+                        opened = True
                         # Deque handles popping automatically
                 else:
                     # Fallback for unexpected interval
@@ -750,6 +754,18 @@ class MarketDataManager:
         if sym == config.BTC_SYMBOL and interval == config.TIMEFRAME_TREND:
             self._update_btc_trend()
 
+        # Candle close -> trigger pekerjaan awal (render chart) sebelum scanner sampai ke simbol ini
+        if k.get('x') and self.on_candle_close:
+            try:
+                self.on_candle_close(sym, interval)
+            except Exception as e:
+                logger.debug(f"Candle close callback error {sym}: {e}")
+        if opened and self.on_candle_open:
+            try:
+                self.on_candle_open(sym, interval)
+            except Exception as e:
+                logger.debug(f"Candle open callback error {sym}: {e}")
+
     async def _handle_depth_update(self, payload):
         """
         Handle WebSocket Partial Depth Update (depth20)
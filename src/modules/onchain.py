@@ -1,102 +1,99 @@
 
 import time
-from datetime import datetime
 from typing import Optional
-import aiohttp
 import config
 from src.utils.helper import logger
+from src.utils import http_pool
+from src.utils.stablecoin_history import StablecoinHistory, format_inflows
+from src.utils.whale_flow import WhaleFlow, combine
 
 class OnChainAnalyzer:
     def __init__(self):
-        # Dict per-symbol: {"BTC/USDT": [...], "SOL/USDT": [...]}
-        self.whale_transactions: dict[str, list[str]] = {}
+        # Per-symbol: {"BTC/USDT": WhaleFlow, ...} (ring buffer (ts, side, notional) + agregat 5m/1h/4h)
+        self.whale_flows: dict[str, WhaleFlow] = {}
         self.stablecoin_inflow = "Neutral"  # Neutral, Positive, Negative
+        self.stablecoin_inflows = {}        # {'1d': pct, '7d': pct, '30d': pct}
+        self.stablecoin_history = StablecoinHistory()  # Cache history DefiLlama (disk + conditional GET)
         
         # De-duplication state per symbol
-        self._last_whale_key: dict[str, str] = {}
+        self._last_whale_key: dict[str, tuple] = {}
         self._last_whale_time: dict[str, float] = {}
         self._dedup_window_seconds: int = config.WHALE_DEDUP_WINDOW_SECONDS  # Skip transaksi identik dalam window
 
-    def detect_whale(self, symbol: str, size_usdt: float, side: str) -> None:
+    @property
+    def whale_transactions(self) -> dict[str, list[str]]:
+        """Pesan whale terakhir per simbol: {"BTC/USDT": [...]} (diformat saat diakses)."""
+        return {symbol: flow.messages() for symbol, flow in self.whale_flows.items()}
+
+    def detect_whale(self, symbol: str, size_usdt: float, side: str, ts: Optional[float] = None) -> None:
         """
         Called by WebSocket AggTrade or OrderUpdate to record big trades.
-        Stores whale activity per-symbol for filtered retrieval.
+        Stores whale activity per-symbol (ring buffer + rolling aggregates) for filtered retrieval.
         Includes de-duplication to prevent logging identical transactions.
         """
         if size_usdt >= config.WHALE_THRESHOLD_USDT:
-            current_time = time.time()
+            current_time = ts or time.time()
             
             # De-duplication: Skip jika transaksi identik dalam window waktu (per-symbol)
-            whale_key = f"{side}_{symbol}_{int(size_usdt)}"
-            last_key = self._last_whale_key.get(symbol)
-            last_time = self._last_whale_time.get(symbol, 0)
-            
-            if whale_key == last_key and (current_time - last_time) < self._dedup_window_seconds:
-                logger.debug(f"🐋 Skipped duplicate whale: {whale_key}")
+            whale_key = (side, int(size_usdt))
+            if whale_key == self._last_whale_key.get(symbol) and \
+                    (current_time - self._last_whale_time.get(symbol, 0)) < self._dedup_window_seconds:
+                logger.debug(f"🐋 Skipped duplicate whale: {side} {symbol} {int(size_usdt)}")
                 return  # Skip duplicate
             
             # Update de-duplication state
             self._last_whale_key[symbol] = whale_key
             self._last_whale_time[symbol] = current_time
             
-            # Format message dengan timestamp untuk clarity
-            timestamp = datetime.now().strftime("%H:%M")
-            msg = f"🐋 [{timestamp}] {side} {symbol} worth ${size_usdt:,.0f}"
-            
-            # Initialize list jika belum ada
-            if symbol not in self.whale_transactions:
-                self.whale_transactions[symbol] = []
-            
-            self.whale_transactions[symbol].append(msg)
-            
-            # Keep only last N transactions per symbol
-            limit = getattr(config, 'WHALE_HISTORY_LIMIT', 10)
-            if len(self.whale_transactions[symbol]) > limit:
-                self.whale_transactions[symbol].pop(0)
-            
-            #logger.info(f"🐋 Whale detected: {msg}")
-
+            flow = self.whale_flows.get(symbol)
+            if flow is None:
+                flow = self.whale_flows[symbol] = WhaleFlow(symbol)
+            flow.add(current_time, side, size_usdt)
 
+    def get_whale_flow(self, symbol: Optional[str] = None, now: Optional[float] = None) -> dict:
+        """
+        Net whale buy/sell notional & count per window (WHALE_FLOW_WINDOWS).
+        symbol=None -> gabungan semua simbol (untuk global sentiment).
+        """
+        now = now or time.time()
+        if symbol:
+            flow = self.whale_flows.get(symbol)
+            return flow.stats(now) if flow else {}
+        return combine(flow.stats(now) for flow in self.whale_flows.values())
 
     async def fetch_stablecoin_inflows(self):
         # Default fallback
         self.stablecoin_inflow = "Neutral"
+        history = self.stablecoin_history
         
         try:
-            url = config.DEFILLAMA_STABLECOIN_URL
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)) as resp:
-                    data = await resp.json()
-            
-            # Early return if data insufficient
-            if not data or len(data) <= 2:
-                logger.warning("CoinLlama Data Insufficient")
-                return
-            
-            # Get last two records
-            curr = data[-1]
-            prev = data[-2]
-            
-            # Extract values from 'totalCirculatingUSD' dict
-            curr_val = curr.get('totalCirculatingUSD', {}).get('peggedUSD', 0)
-            prev_val = prev.get('totalCirculatingUSD', {}).get('peggedUSD', 0)
-            
-            # Early return if values invalid
-            if not curr_val or not prev_val:
-                return
-            
-            change_pct = ((curr_val - prev_val) / prev_val) * 100
-            
-            # Determine inflow direction
-            if change_pct > config.STABLECOIN_INFLOW_THRESHOLD_PERCENT:
-                self.stablecoin_inflow = "Positive"
-            elif change_pct < -config.STABLECOIN_INFLOW_THRESHOLD_PERCENT:
-                self.stablecoin_inflow = "Negative"
-            
-            logger.info(f"🪙 Stablecoin Inflow: {self.stablecoin_inflow} ({change_pct:.2f}%)")
-                  
+            session = http_pool.get_aiohttp_session()
+            await history.refresh(session, config.DEFILLAMA_STABLECOIN_URL)
         except Exception as e:
             logger.error(f"❌ Failed fetch Stablecoin Inflow: {e}")
+            if not len(history):
+                return
+            # Network gagal: tetap hitung dari history cache (data harian)
+            
+        # Early return if data insufficient
+        if len(history) <= 2:
+            logger.warning("CoinLlama Data Insufficient")
+            return
+        
+        self.stablecoin_inflows = history.inflows()
+        change_pct = self.stablecoin_inflows.get('1d')
+        
+        # Early return if values invalid
+        if change_pct is None:
+            return
+        
+        # Determine inflow direction (titik terakhir vs hari sebelumnya)
+        if change_pct > config.STABLECOIN_INFLOW_THRESHOLD_PERCENT:
+            self.stablecoin_inflow = "Positive"
+        elif change_pct < -config.STABLECOIN_INFLOW_THRESHOLD_PERCENT:
+            self.stablecoin_inflow = "Negative"
+        
+        logger.info(f"🪙 Stablecoin Inflow: {format_inflows(self.stablecoin_inflow, self.stablecoin_inflows)}")
 
     def get_latest(self, symbol: Optional[str] = None) -> dict:
         """
@@ -107,15 +104,18 @@ class OnChainAnalyzer:
                     If None, returns empty whale list (untuk global sentiment).
         
         Returns:
-            dict with whale_activity (filtered) and stablecoin_inflow
+            dict with whale_activity (filtered), whale_flow (rolling net flow per window),
+            stablecoin_inflow and stablecoin_inflows (1d/7d/30d %)
         """
         whale_list = []
         
-        if symbol and symbol in self.whale_transactions:
-            whale_list = self.whale_transactions[symbol].copy()
+        if symbol and symbol in self.whale_flows:
+            whale_list = self.whale_flows[symbol].messages()
         
         return {
             "whale_activity": whale_list,
-            "stablecoin_inflow": self.stablecoin_inflow
+            "whale_flow": self.get_whale_flow(symbol),
+            "stablecoin_inflow": self.stablecoin_inflow,
+            "stablecoin_inflows": dict(self.stablecoin_inflows),
         }
 
@@ -1,28 +1,28 @@
-import io
-import base64
-import json
 import asyncio
-import pandas as pd
-import mplfinance as mpf
+import json
+import re
+import time
+from collections import OrderedDict
 from openai import AsyncOpenAI
-import httpx
 import config
-import matplotlib
-matplotlib.use('Agg') # Force non-interactive backend
-from src.utils.helper import logger
-from src.utils.prompt_builder import build_pattern_recognition_prompt
+from src.utils.helper import logger, fire_and_forget
+from src.utils import http_pool, ai_pool, ai_ledger, chart_renderer, metrics, pattern_detector
+from src.utils.prompt_builder import build_pattern_batch_prompt, build_pattern_recognition_prompt
 
 class PatternRecognizer:
     def __init__(self, market_data_manager):
         self.market_data = market_data_manager
         self.cache = {} # {symbol: {'candle_ts': 12345, 'analysis': "..."}}
+        self.chart_cache = OrderedDict() # {(symbol, candle_ts): {'rendered_at': ..., 'task': Task}} (pre-render chart, LRU)
+        self._batch = []           # Antrian batch Vision: [(symbol, candle_ts, img_base64, raw_stats, detected, future)]
+        self._batch_timer = None
         
         # Initialize AI Client for Vision
         if config.USE_PATTERN_RECOGNITION and config.AI_API_KEY:
             self.client = AsyncOpenAI(
                 base_url=config.AI_BASE_URL,
                 api_key=config.AI_API_KEY,
-                http_client=httpx.AsyncClient(),
+                http_client=http_pool.get_httpx_client('ai'),  # Share pool dengan AIBrain (host sama)
                 default_headers={
                     "HTTP-Referer": config.AI_APP_URL,
                     "X-Title": config.AI_APP_TITLE,
@@ -40,92 +40,61 @@ class PatternRecognizer:
 
     def generate_chart_image(self, symbol):
         """
-        Generate candlestick chart image using mplfinance AND extract raw stats.
+        Generate candlestick chart image (renderer dengan figure yang dipakai ulang) AND extract raw stats.
+        Render sinkron di proses ini; jalur utama memakai prerender_chart() (process pool).
         Returns (base64_string, raw_stats_dict).
         """
-        candles = self.get_setup_candles(symbol)
-        if not candles or len(candles) < config.MACD_SLOW: # Need at least MACD_SLOW
-            return None, None
-        
         try:
-            # Convert to DataFrame
-            df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-
-            # --- MACD Calculation ---
-            # append=True adds columns to df: MACD_12_26_9, MACDh_12_26_9, MACDs_12_26_9
-            import pandas_ta as ta
-            df.ta.macd(fast=config.MACD_FAST, slow=config.MACD_SLOW, signal=config.MACD_SIGNAL, append=True)
-            
-            # Clean NaN created by indicators
-            df.dropna(inplace=True)
+            return chart_renderer.render_chart(self.get_setup_candles(symbol))
+        except Exception as e:
+            logger.error(f"❌ Chart Generation Failed {symbol}: {e}")
+            return None, None
 
-            # --- EXTRACT RAW STATS (For AI Text Context) ---
-            last_row = df.iloc[-1]
-            macd_col = df.columns[-3] # MACD Line
-            hist_col = df.columns[-2] # Histogram
-            sig_col  = df.columns[-1] # Signal Line
-            
-            raw_stats = {
-                "close": last_row['close'],
-                "open": last_row['open'],
-                "high": last_row['high'],
-                "low": last_row['low'],
-                "volume": last_row['volume'],
-                "macd": last_row[macd_col],
-                "macd_signal": last_row[sig_col],
-                "macd_hist": last_row[hist_col],
-                "last_ts": str(df.index[-1])
-            }
+    async def _render_chart(self, symbol, candles):
+        try:
+            return await chart_renderer.render_async(candles)
+        except Exception as e:
+            logger.error(f"❌ Chart Generation Failed {symbol}: {e}")
+            return None, None
 
-            # Create Buffer
-            buf = io.BytesIO()
-            
-            # --- MACD Plot Configuration ---
-            # Use the same slice for main plot and addplots
-            plot_data = df.tail(60)
+    def prerender_chart(self, symbol):
+        """
+        Mulai render chart di process pool tanpa menunggu hasil (dipanggil saat candle open / close).
+        Render untuk candle setup yang sama (sedang berjalan / sudah selesai) dipakai ulang.
+        Cache ber-key (symbol, candle_ts), maks CHART_CACHE_MAX_ENTRIES (LRU).
+        Returns: asyncio.Task -> (base64_string, raw_stats_dict), atau None jika data kosong
+        / analisa Vision untuk candle ini sudah ada.
+        """
+        candles = self.get_setup_candles(symbol)
+        if not candles:
+            return None
+        key = (symbol, candles[-1][0])
 
-            # Determine Histogram Colors
-            colors = ['#26a69a' if v >= 0 else '#ef5350' for v in plot_data[hist_col]]
+        entry = self.chart_cache.get(key)
+        if entry and time.time() - entry['rendered_at'] <= config.PATTERN_PRERENDER_MAX_AGE:
+            self.chart_cache.move_to_end(key)
+            return entry['task']
+        cached = self.cache.get(symbol)
+        if cached and cached.get('candle_ts') == key[1]:
+            return None  # Analisa Vision candle ini sudah ada, chart tidak dibutuhkan lagi
 
-            macd_plots = [
-                mpf.make_addplot(plot_data[macd_col], panel=2, color='#2962FF', width=1.2, ylabel='MACD'),  # MACD Line
-                mpf.make_addplot(plot_data[sig_col],  panel=2, color='#FF6D00', width=1.2),               # Signal Line
-                mpf.make_addplot(plot_data[hist_col], panel=2, type='bar', color=colors, alpha=0.5),      # Histogram
-            ]
+        task = asyncio.ensure_future(self._render_chart(symbol, candles))
+        self.chart_cache[key] = {'rendered_at': time.time(), 'task': task}
+        self.chart_cache.move_to_end(key)
+        while len(self.chart_cache) > config.CHART_CACHE_MAX_ENTRIES:
+            self.chart_cache.popitem(last=False)
+        if config.CHART_ARCHIVE_ENABLED:
+            task.add_done_callback(lambda t: self._archive_chart(symbol, key[1], t))
+        return task
 
-            # Style & Plot
-            # rc params for dark mode
-            # Custom Market Colors: Up=Green, Down=Red
-            mc = mpf.make_marketcolors(
-                up='#00ff00', down='#ff0000',
-                edge='inherit',
-                wick='inherit',
-                volume='in',
-                ohlc='i'
-            )
-            s = mpf.make_mpf_style(base_mpf_style='nightclouds', marketcolors=mc, rc={'font.size': 8})
-            
-            mpf.plot(
-                plot_data, # Last 60 candles
-                type='candle',
-                style=s,
-                volume=True,
-                addplot=macd_plots,
-                panel_ratios=(6,2,2), # Price: 60%, Volume: 20%, MACD: 20%
-                savefig=dict(fname=buf, dpi=100, bbox_inches='tight', format='png'),
-                axisoff=True, 
-                tight_layout=True
-            )
-            
-            buf.seek(0)
-            img_str = base64.b64encode(buf.read()).decode('utf-8')
-            return img_str, raw_stats
-            
-        except Exception as e:
-            logger.error(f"❌ Chart Generation Failed {symbol}: {e}")
-            return None, None
+    @staticmethod
+    def _archive_chart(symbol, candle_ts, task):
+        """Salinan PNG + raw_stats ke CHART_ARCHIVE_DIR (audit / replay), ditulis di background."""
+        if task.cancelled() or task.exception() is not None:
+            return
+        img_base64, raw_stats = task.result()
+        if img_base64:
+            fire_and_forget(asyncio.to_thread(chart_renderer.archive_chart, symbol, candle_ts, img_base64, raw_stats))
 
     def _is_valid_analysis(self, analysis_text: str) -> bool:
         """
@@ -177,24 +146,52 @@ class PatternRecognizer:
             # Return cached analysis
             return cached['result']
 
+        # Detektor lokal (numpy, murah): jika konklusif, Vision tidak dipanggil
+        detected = pattern_detector.detect(candles) if config.PATTERN_DETECT_ENABLED else None
+        if detected and detected['conclusive'] and not config.PATTERN_VISION_ALWAYS:
+            result = {
+                'analysis': detected['summary'],
+                'raw_data': detected['raw_stats'],
+                'is_valid': True,
+                'source': 'local',
+                'detected': detected
+            }
+            self._store_result(symbol, last_ts, result)
+            metrics.counter('vision_skipped_local').inc()
+            logger.info(f"🧮 Pattern lokal konklusif {symbol}, Vision dilewati: {detected['summary'][:60]}...")
+            return result
+
         logger.info(f"👁️ Recognizing Pattern for {symbol} ({config.TIMEFRAME_SETUP})...")
         
         # Generate Image & Stats
-        # Run in thread executor to not block async loop (mplfinance is blocking)
-        result = await asyncio.to_thread(self.generate_chart_image, symbol)
+        # Pakai hasil pre-render (candle open / close) jika masih segar, selain itu render sekarang di process pool
+        result = await self.prerender_chart(symbol)
         img_base64, raw_stats = result
         
         if not img_base64:
+            self.chart_cache.pop((symbol, last_ts), None)  # Render gagal jangan di-cache
             return {"analysis": "Failed to generate chart.", "is_valid": False}
 
+        # Batch mode: kandidat yang datang bersamaan dianalisa dalam satu grid
+        if config.PATTERN_BATCH_ENABLED:
+            batched = await self._enqueue_batch(symbol, last_ts, img_base64, raw_stats, detected)
+            if batched is not None:
+                return batched
+        return await self._analyze_single(symbol, last_ts, img_base64, raw_stats, detected)
+
+    async def _analyze_single(self, symbol, last_ts, img_base64, raw_stats, detected=None):
+        """Satu chart per request, dengan retry jika output tidak valid. Hasil detektor lokal ikut di prompt."""
         # Retry Loop for AI Call
         for attempt in range(config.PATTERN_MAX_RETRIES + 1):
+            started, response = None, None
             try:
                 # Pass Raw Stats to Prompt Builder
-                prompt_text = build_pattern_recognition_prompt(symbol, config.TIMEFRAME_SETUP, raw_stats)
+                prompt_text = build_pattern_recognition_prompt(symbol, config.TIMEFRAME_SETUP, raw_stats, detected)
                 
                 logger.info(f"📤 Sending chart image to Vision AI for {symbol} (attempt {attempt + 1})...")
                 
+                await ai_pool.acquire(self.model)
+                started = time.perf_counter()
                 response = await self.client.chat.completions.create(
                     model=self.model,
                     messages=[
@@ -217,21 +214,25 @@ class PatternRecognizer:
                 )
                 
                 analysis_text = response.choices[0].message.content
+                is_valid = self._is_valid_analysis(analysis_text)
+                ai_ledger.record(
+                    'vision', self.model, usage=response.usage, started=started, retries=attempt,
+                    outcome={'is_valid': is_valid, 'analysis': analysis_text}, symbol=symbol
+                )
                 
                 # VALIDASI OUTPUT
-                if self._is_valid_analysis(analysis_text):
+                if is_valid:
                     # Output valid - gunakan
                     final_result = {
                         'analysis': analysis_text,
                         'raw_data': raw_stats,
-                        'is_valid': True
+                        'is_valid': True,
+                        'source': 'vision',
+                        'detected': detected
                     }
                     
                     # Update Cache
-                    self.cache[symbol] = {
-                        'candle_ts': last_ts,
-                        'result': final_result
-                    }
+                    self._store_result(symbol, last_ts, final_result)
                     logger.info(f"✅ Pattern Analysis Done {symbol} (attempt {attempt + 1}): {analysis_text[:50]}...")
                     return final_result
                 else:
@@ -243,6 +244,9 @@ class PatternRecognizer:
                 
             except Exception as e:
                 logger.error(f"❌ Vision AI Error {symbol} (attempt {attempt + 1}): {e}")
+                if started is not None:
+                    ai_ledger.record('vision', self.model, usage=getattr(response, 'usage', None),
+                                     started=started, retries=attempt, error=e, symbol=symbol)
                 if attempt < config.PATTERN_MAX_RETRIES:
                     await asyncio.sleep(1)
                     continue
@@ -253,6 +257,127 @@ class PatternRecognizer:
         return {
             'analysis': 'Pattern analysis failed after retries.',
             'raw_data': raw_stats if raw_stats else {},
-            'is_valid': False
+            'is_valid': False,
+            'detected': detected
+        }
+
+    def _store_result(self, symbol, last_ts, result):
+        self.cache[symbol] = {
+            'candle_ts': last_ts,
+            'result': result
         }
 
+    # ------------------------------------------------------------------
+    # BATCH VISION (grid beberapa chart dalam satu request)
+    # ------------------------------------------------------------------
+
+    async def _enqueue_batch(self, symbol, last_ts, img_base64, raw_stats, detected=None):
+        """
+        Masukkan chart ke antrian grid. Grid dikirim saat penuh (PATTERN_BATCH_MAX_PANELS)
+        atau setelah PATTERN_BATCH_WINDOW detik. Return hasil valid, atau None jika panel
+        ini harus dianalisa lewat jalur single (sendirian di batch / output panel tidak valid).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((symbol, last_ts, img_base64, raw_stats, detected, future))
+        if len(self._batch) >= config.PATTERN_BATCH_MAX_PANELS:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = loop.call_later(config.PATTERN_BATCH_WINDOW, self._flush_batch)
+        return await future
+
+    def _flush_batch(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        items, self._batch = self._batch, []
+        if len(items) == 1:
+            if not items[0][-1].done():
+                items[0][-1].set_result(None)  # Tidak ada teman batch -> jalur single
+        elif items:
+            fire_and_forget(self._run_batch(items))
+
+    async def _run_batch(self, items):
+        verdicts = {}
+        try:
+            verdicts = await self._analyze_grid(items)
+        except Exception as e:
+            logger.error(f"❌ Vision AI Batch Error ({len(items)} panels): {e}")
+        finally:
+            for symbol, last_ts, _, raw_stats, detected, future in items:
+                analysis_text = verdicts.get(symbol)
+                result = None
+                if self._is_valid_analysis(analysis_text):
+                    result = {'analysis': analysis_text, 'raw_data': raw_stats, 'is_valid': True,
+                              'source': 'vision', 'detected': detected}
+                    self._store_result(symbol, last_ts, result)
+                    logger.info(f"✅ Pattern Analysis Done {symbol} (batch): {analysis_text[:50]}...")
+                else:
+                    metrics.counter('vision_batch_fallback').inc()
+                    logger.warning(f"⚠️ Batch panel {symbol} tidak valid, fallback ke single chart.")
+                if not future.done():
+                    future.set_result(result)
+
+    async def _analyze_grid(self, items):
+        """Kirim grid berlabel ke Vision AI. Return {symbol: analysis_text} dari JSON per panel."""
+        symbols = [item[0] for item in items]
+        grid_base64 = await asyncio.to_thread(
+            chart_renderer.tile_charts, [item[2] for item in items],
+            [f"{i}. {symbol}" for i, symbol in enumerate(symbols, start=1)], config.PATTERN_BATCH_COLUMNS
+        )
+        prompt_text = build_pattern_batch_prompt([(item[0], item[3], item[4]) for item in items], config.TIMEFRAME_SETUP)
+        logger.info(f"📤 Sending chart grid to Vision AI: {', '.join(symbols)}...")
+
+        await ai_pool.acquire(self.model)
+        started = time.perf_counter()
+        response, verdicts, error = None, {}, None
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": prompt_text},
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:image/png;base64,{grid_base64}",
+                                    "detail": config.PATTERN_BATCH_IMAGE_DETAIL
+                                }
+                            }
+                        ]
+                    }
+                ],
+                max_tokens=config.AI_VISION_MAX_TOKENS * len(items),
+                temperature=config.AI_VISION_TEMPERATURE
+            )
+            verdicts = self._parse_batch_verdicts(response.choices[0].message.content, symbols)
+            metrics.counter('vision_batch_panels').inc(len(items))
+            return verdicts
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            ai_ledger.record(
+                'vision_batch', self.model, usage=getattr(response, 'usage', None), started=started, error=error,
+                outcome={'panels': len(items), 'parsed': len(verdicts)}, symbol='BATCH', panels=symbols
+            )
+
+    @staticmethod
+    def _parse_batch_verdicts(raw_text, symbols):
+        """JSON {"panels": [{"panel": n, "symbol": ..., "analysis": ...}]} -> {symbol: analysis}. Nomor panel diutamakan."""
+        match = re.search(r"\{.*\}", raw_text or "", re.DOTALL)
+        if not match:
+            raise ValueError(f"Batch output bukan JSON: {(raw_text or '')[:100]}")
+        verdicts = {}
+        for panel in json.loads(match.group(0)).get('panels', []):
+            if not isinstance(panel, dict):
+                continue
+            symbol = panel.get('symbol')
+            index = panel.get('panel')
+            if isinstance(index, int) and 1 <= index <= len(symbols):
+                symbol = symbols[index - 1]
+            if symbol in symbols and isinstance(panel.get('analysis'), str):
+                verdicts[symbol] = panel['analysis']
+        return verdicts
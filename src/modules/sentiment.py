@@ -1,20 +1,25 @@
 import requests
-import feedparser
-import random
 import asyncio
 import aiohttp
 import json
+import os
+import time
 import config
 from datetime import datetime, timezone
 from typing import Optional
-from src.utils.helper import logger
+from src.utils.helper import logger, parse_timeframe_to_seconds
+from src.utils import http_pool
+from src.utils.news_feed import FeedFetcher, NewsStore
+from src.utils.news_index import NewsIndex
 
 class SentimentAnalyzer:
     def __init__(self):
         self.fng_url = config.CMC_FNG_URL
         self.last_fng = {"value": 50, "classification": "Neutral"}
         self.last_news = []       # Backward compat: mixed news
-        self.raw_news = []        # Berita mentah (unfiltered)
+        self.raw_news = []        # Berita mentah (unfiltered), terbaru dulu: "Judul (Sumber)"
+        self.news_store = NewsStore()      # Headline unik (hash judul) + first_seen & sumber
+        self.feed_fetcher = FeedFetcher()  # ETag / Last-Modified per feed (conditional GET)
         self.macro_news_cache = [] # Cache khusus berita makro
 
         # Optimization: Pre-compute keyword lookups for O(1) access
@@ -39,6 +44,17 @@ class SentimentAnalyzer:
         
         # [NEW] Storage untuk hasil analisa AI (Cache)
         self.analyzed_result = None
+        self.data_updated_at = 0  # Epoch fetch F&G + headline terakhir
+
+    @property
+    def raw_news(self):
+        return self._raw_news
+
+    @raw_news.setter
+    def raw_news(self, value):
+        # raw_news selalu diganti utuh (bukan append) -> index berita ikut dibangun ulang
+        self._raw_news = value
+        self._news_index = None
 
     def save_analysis(self, result: dict):
         """Simpan hasil analisa AI yang sudah matang."""
@@ -50,6 +66,69 @@ class SentimentAnalyzer:
         """Ambil hasil analisa AI yang tersimpan."""
         return self.analyzed_result
 
+    # ------------------------------------------------------------------
+    # PERSISTENSI (reuse hasil saat restart, tanpa menunggu fetch & AI call)
+    # ------------------------------------------------------------------
+
+    def analysis_is_fresh(self) -> bool:
+        """Hasil analisa AI lebih muda dari SENTIMENT_ANALYSIS_INTERVAL?"""
+        if not self.analyzed_result:
+            return False
+        age = time.time() - self.analyzed_result.get('last_updated', 0)
+        return age < parse_timeframe_to_seconds(config.SENTIMENT_ANALYSIS_INTERVAL)
+
+    def data_is_fresh(self) -> bool:
+        """F&G & headline lebih muda dari SENTIMENT_UPDATE_INTERVAL?"""
+        return time.time() - self.data_updated_at < parse_timeframe_to_seconds(config.SENTIMENT_UPDATE_INTERVAL)
+
+    def restore(self) -> bool:
+        """Load state sentimen dari SENTIMENT_STATE_FILENAME. Return True jika ada state yang dipulihkan."""
+        if not config.SENTIMENT_PERSIST_ENABLED or not os.path.exists(config.SENTIMENT_STATE_FILENAME):
+            return False
+        try:
+            with open(config.SENTIMENT_STATE_FILENAME, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load sentiment state: {e}")
+            return False
+
+        if state.get('fng'):
+            self.last_fng = state['fng']
+        self.news_store.load_state(state.get('news_store'))
+        self.feed_fetcher.validators = state.get('feed_validators') or {}
+        self.feed_fetcher.parse_stats = state.get('feed_parse_stats') or {}
+        self.raw_news = self.news_store.headlines(config.NEWS_MAX_TOTAL) if len(self.news_store) else (state.get('raw_news') or [])
+        self._update_macro_cache()
+        self.build_news_index()
+        self.data_updated_at = state.get('data_updated_at', 0)
+        self.analyzed_result = state.get('analysis')
+        return True
+
+    async def persist(self):
+        """Async save state sentimen ke disk (non-blocking)."""
+        if not config.SENTIMENT_PERSIST_ENABLED:
+            return
+        try:
+            await asyncio.to_thread(self._persist_sync)
+        except Exception as e:
+            logger.error(f"⚠️ Gagal save sentiment state: {e}")
+
+    def _persist_sync(self):
+        state = {
+            'fng': self.last_fng,
+            'raw_news': self.raw_news,
+            'news_store': self.news_store.to_state(),
+            'feed_validators': self.feed_fetcher.validators,
+            'feed_parse_stats': self.feed_fetcher.parse_stats,
+            'data_updated_at': self.data_updated_at,
+            'analysis': self.analyzed_result,
+        }
+        # Tulis ke file sementara lalu rename: crash saat menulis tidak merusak state lama
+        tmp_path = f"{config.SENTIMENT_STATE_FILENAME}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, config.SENTIMENT_STATE_FILENAME)
+
     async def fetch_fng(self, session: aiohttp.ClientSession = None):
         """Fetch Fear & Greed Index from CoinMarketCap (Async)"""
         if not config.CMC_API_KEY:
@@ -62,11 +141,9 @@ class SentimentAnalyzer:
         }
         params = {}
         
-        own_session = session is None
-        
         try:
-            if own_session:
-                session = aiohttp.ClientSession()
+            if session is None:
+                session = http_pool.get_aiohttp_session()
             
             timeout = aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)
             
@@ -104,95 +181,111 @@ class SentimentAnalyzer:
             logger.warning(f"⚠️ Data parsing error in F&G response: {type(e).__name__}: {e}")
         except Exception as e:
             logger.warning(f"⚠️ Unexpected error fetching F&G: {type(e).__name__}: {e}")
-        finally:
-            if own_session and session:
-                await session.close()
 
     async def _fetch_single_rss(self, session: aiohttp.ClientSession, url: str, max_per_source: int, max_age_hours: int) -> list:
-        """Fetch single RSS feed secara async."""
+        """
+        Fetch single RSS feed (conditional GET) dan masukkan headline baru ke news_store.
+        Returns: list headline baru ([] jika kosong / gagal), None jika feed tidak berubah.
+        """
         news_items = []
         try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)) as response:
-                content = await response.read()
-                feed = await asyncio.to_thread(feedparser.parse, content)
-                
-                if not feed.entries:
-                    return []
+            items = await self.feed_fetcher.fetch(session, url)
+            if items is None:
+                return None  # Not modified -> tidak di-parse
+
+            now = time.time()
+            count = 0
+            for title, source_name, published in items:
+                if count >= max_per_source:
+                    break
+                if published and now - published > max_age_hours * 3600:
+                    continue
+
+                count += 1
+                title = title.replace('\n', ' ').strip()
+                if self.news_store.add(title, source_name, published=published, now=now):
+                    news_items.append(f"{title} ({source_name})")
 
-                source_name = feed.feed.get('title', 'Unknown Source')
-                
-                count = 0
-                for entry in feed.entries:
-                    if count >= max_per_source:
-                        break
-                    
-                    is_recent = True
-                    if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                        try:
-                            published_dt = datetime(*entry.published_parsed[:6])
-                            age_seconds = (datetime.now(timezone.utc) - published_dt.replace(tzinfo=timezone.utc)).total_seconds()
-                            if age_seconds > (max_age_hours * 3600):
-                                is_recent = False
-                        except Exception:
-                            pass
-                    
-                    if is_recent:
-                        title = entry.title
-                        # Clean title
-                        title = title.replace('\n', ' ').strip()
-                        news_items.append(f"{title} ({source_name})")
-                        count += 1
-                        
         except Exception as e:
             logger.warning(f"⚠️ Failed to fetch RSS {url}: {e}")
-        
+
         return news_items
 
-    async def fetch_news(self):
-        """Fetch Top News dari RSS Feeds secara concurrent dan simpan ke raw_news."""
+    async def fetch_news(self, poll: bool = False):
+        """
+        Poll RSS Feeds secara concurrent (conditional GET) dan update raw_news dari news_store.
+        poll=True (poll cepat): feed yang parse-nya lambat (di-demote) dilewati sampai refresh penuh.
+        Returns: jumlah headline baru.
+        """
         rss_urls = getattr(config, 'RSS_FEED_URLS', [])
         if not rss_urls:
             logger.warning("⚠️ No RSS URLs configured in config.")
-            return
+            return 0
 
         max_per_source = config.NEWS_MAX_PER_SOURCE
         max_age_hours = getattr(config, 'NEWS_MAX_AGE_HOURS', 24) 
         max_total = getattr(config, 'NEWS_MAX_TOTAL', 50)
+        if poll:
+            rss_urls = [url for url in rss_urls if not self.feed_fetcher.is_demoted(url)]
         
-        # Concurrent fetch dengan aiohttp
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self._fetch_single_rss(session, url, max_per_source, max_age_hours) 
-                for url in rss_urls
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Concurrent fetch dengan aiohttp (session keep-alive bersama)
+        session = http_pool.get_aiohttp_session()
+        tasks = [
+            self._fetch_single_rss(session, url, max_per_source, max_age_hours) 
+            for url in rss_urls
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        # Gabungkan hasil dari semua feeds
-        all_news = []
-        for result in results:
-            if isinstance(result, list):
-                all_news.extend(result)
-            # Skip exceptions (sudah di-log di _fetch_single_rss)
-        
-        # Shuffle biar variatif sumbernya
-        random.shuffle(all_news)
-        
-        # Simpan ke raw_news 
-        self.raw_news = all_news[:max_total]
+        new_count = sum(len(result) for result in results if isinstance(result, list))
+        not_modified = sum(1 for result in results if result is None)
+
+        # Headline kadaluarsa dibuang, raw_news = terbaru dulu (tanpa duplikat lintas sumber)
+        self.news_store.prune(max_age_hours)
+        self.raw_news = self.news_store.headlines(max_total)
         
-        # Update Macro Cache juga saat fetch
+        # Update Macro Cache & index berita per simbol juga saat fetch
         self._update_macro_cache()
+        self.build_news_index()
         
-        logger.info(f"📰 News Fetched: {len(self.raw_news)} headlines. (Macro: {len(self.macro_news_cache)})")
+        logger.info(
+            f"📰 News Polled: {new_count} new, {not_modified}/{len(rss_urls)} feeds not modified. "
+            f"{len(self.raw_news)} headlines. (Macro: {len(self.macro_news_cache)})"
+        )
+        return new_count
+
+    async def poll_news(self):
+        """Poll RSS cepat (NEWS_POLL_INTERVAL) di antara update_all; state disimpan jika ada headline baru."""
+        if await self.fetch_news(poll=True):
+            await self.persist()
+
+    # ------------------------------------------------------------------
+    # INDEX BERITA (tag keyword sekali per fetch, hasil per simbol di-memo)
+    # ------------------------------------------------------------------
+
+    def _btc_keywords(self) -> list:
+        for koin in config.DAFTAR_KOIN:
+            if 'BTC' in koin['symbol']:
+                return koin.get('keywords', ['bitcoin', 'btc']) or ['bitcoin', 'btc']
+        return ['bitcoin', 'btc']
+
+    def _get_news_index(self) -> NewsIndex:
+        if self._news_index is None:
+            keywords = list(getattr(config, 'MACRO_KEYWORDS', [])) + self._btc_keywords()
+            for koin in config.DAFTAR_KOIN:
+                keywords += self._get_coin_keywords(koin['symbol'])
+            self._news_index = NewsIndex(self.raw_news, keywords)
+        return self._news_index
+
+    def build_news_index(self):
+        """Tag semua headline & materialisasi hasil filter untuk tiap koin di DAFTAR_KOIN."""
+        for koin in config.DAFTAR_KOIN:
+            self.filter_news_by_relevance(koin['symbol'])
 
     def _update_macro_cache(self):
         """Filter dan simpan berita makro terbaru ke cache."""
         macro_keywords = getattr(config, 'MACRO_KEYWORDS', [])
-        found = []
-        for news in self.raw_news:
-            news_lower = news.lower()
-            if any(kw in news_lower for kw in macro_keywords):
-                found.append(f"[MACRO] {news}")
+        index = self._get_news_index()
+        found = [f"[MACRO] {news}" for i, news in enumerate(index.headlines) if index.has_any(i, macro_keywords)]
         
         # Ambil Top N Macro News (max limit)
         self.macro_news_cache = found[:getattr(config, 'NEWS_MACRO_MAX', 3)]
@@ -219,6 +312,19 @@ class SentimentAnalyzer:
             return [base_coin.lower()]
 
     def filter_news_by_relevance(self, symbol: str) -> list:
+        """
+        Berita relevan untuk simbol, dari index (dihitung sekali per raw_news, lalu lookup).
+        Lihat _select_news untuk aturan kategori.
+        """
+        if not self.raw_news:
+            return []
+        index = self._get_news_index()
+        result = index.results.get(symbol)
+        if result is None:
+            result = index.results[symbol] = self._select_news(index, symbol)
+        return list(result)
+
+    def _select_news(self, index: NewsIndex, symbol: str) -> list:
         """
         Filter berita dengan enforcement per kategori:
         1. Berita Makro (max NEWS_MACRO_MAX) → Priority 1
@@ -228,9 +334,6 @@ class SentimentAnalyzer:
         Returns:
             list: Berita terfilter dengan label kategori
         """
-        if not self.raw_news:
-            return []
-        
         base_coin = symbol.split('/')[0].upper()
         is_btc = base_coin == 'BTC'
         
@@ -244,27 +347,18 @@ class SentimentAnalyzer:
         target_keywords = self._get_coin_keywords(symbol)
         macro_keywords = getattr(config, 'MACRO_KEYWORDS', [])
         
-        btc_keywords = []
-        if not is_btc:
-            for koin in config.DAFTAR_KOIN:
-                if 'BTC' in koin['symbol']:
-                    btc_keywords = koin.get('keywords', ['bitcoin', 'btc'])
-                    break
-            if not btc_keywords:
-                btc_keywords = ['bitcoin', 'btc']
+        btc_keywords = [] if is_btc else self._btc_keywords()
         
         # Kategorisasi berita
         macro_news = []
         coin_news = []
         btc_news = []
         
-        for news in self.raw_news:
-            news_lower = news.lower()
-            
+        for i, news in enumerate(index.headlines):
             # Check macro first (priority)
-            is_macro = any(kw in news_lower for kw in macro_keywords)
-            is_coin = any(kw in news_lower for kw in target_keywords)
-            is_btc_rel = any(kw in news_lower for kw in btc_keywords) if not is_btc else False
+            is_macro = index.has_any(i, macro_keywords)
+            is_coin = index.has_any(i, target_keywords)
+            is_btc_rel = index.has_any(i, btc_keywords) if not is_btc else False
             
             # Categorize (allow overlap for coin-specific)
             if is_macro and len(macro_news) < macro_max:
@@ -324,8 +418,10 @@ class SentimentAnalyzer:
         }
 
     async def update_all(self):
-        """Update semua data sentiment secara concurrent."""
+        """Update semua data sentiment secara concurrent, lalu simpan ke disk."""
         await asyncio.gather(
             self.fetch_fng(),  # FnG now async with aiohttp
             self.fetch_news()  # RSS sudah async
         )
+        self.data_updated_at = time.time()
+        await self.persist()
@@ -0,0 +1,331 @@
+"""
+Ledger telemetri panggilan AI (append-only JSONL, satu baris per request).
+
+Tiap chat completion (keputusan, sentimen, vision) mencatat: model, token prompt /
+completion / reasoning, latency, retry ke-berapa, biaya, dan outcome ter-parse.
+Simbol & trace_id diambil dari context (bind() di awal pipeline per simbol), sehingga
+record bisa di-join ke trade journal lewat `trace_id`. Saat trade tercatat di journal,
+link_trade() menambah record kind='trade' (hasil & PnL), jadi analisa cost-to-PnL cukup
+dari file ledger saja (summarize()).
+
+Biaya: pakai `usage.cost` dari OpenRouter jika ada, selain itu AI_MODEL_PRICING
+(USD per 1 juta token input / output). Total per trace disalin ke tracker saat entry
+(lihat execute_entry), jadi biaya tetap tercatat di journal setelah restart / trace ter-evict.
+
+Penulisan file tidak memblokir event loop: baris di-buffer lalu ditulis batch via
+asyncio.to_thread (langsung jika tidak ada loop). flush() menulis sisa buffer (shutdown).
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import config
+from src.utils.helper import logger
+
+_context = contextvars.ContextVar('ai_ledger_context', default=None)
+
+_FIELDS = ('calls', 'errors', 'prompt_tokens', 'completion_tokens', 'reasoning_tokens', 'cost_usd', 'latency_ms')
+_totals = {'model': {}, 'symbol': {}}
+_by_trace = OrderedDict()   # trace_id -> totals (untuk link ke journal)
+_MAX_TRACES = 500
+_COST_FIELDS = ('ai_calls', 'ai_tokens', 'ai_cost_usd')
+_pending = []               # (path, row) yang belum ditulis ke file
+_write_lock = threading.Lock()
+_flush_task = None
+
+# Header section prompt keputusan: "ROLE:", "2. SETUP VALIDATION (...)", "[MOMENTUM]", "FINAL INSTRUCTIONS ..."
+_SECTION_RE = re.compile(r"^(ROLE|TASK|FINAL INSTRUCTIONS|\d\.\s+[A-Z][A-Z &/]+|\[[A-Z &/]+\])", re.MULTILINE)
+
+
+# ------------------------------------------------------------------
+# CONTEXT (simbol & trace aktif)
+# ------------------------------------------------------------------
+
+def bind(symbol, trace_id=None):
+    """Set simbol & trace_id untuk semua panggilan AI di task ini (dan task turunannya). Return token untuk unbind()."""
+    return _context.set({'symbol': symbol, 'trace_id': trace_id})
+
+
+def unbind(token):
+    _context.reset(token)
+
+
+def current():
+    return _context.get() or {}
+
+
+# ------------------------------------------------------------------
+# RECORD
+# ------------------------------------------------------------------
+
+def _num(value):
+    """Angka dari field usage (objek SDK / dict). Nilai non-numerik (mis. mock) -> 0."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return 0
+    return value
+
+
+def _field(obj, name):
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    value = getattr(obj, name, None)
+    if value is None:
+        extra = getattr(obj, 'model_extra', None)
+        if isinstance(extra, dict):
+            value = extra.get(name)
+    return value
+
+
+def usage_fields(usage, model):
+    """Normalisasi `completion.usage` -> token & biaya."""
+    prompt_tokens = _num(_field(usage, 'prompt_tokens'))
+    completion_tokens = _num(_field(usage, 'completion_tokens'))
+    reasoning_tokens = _num(_field(_field(usage, 'completion_tokens_details'), 'reasoning_tokens'))
+
+    cost = _num(_field(usage, 'cost'))
+    if not cost:
+        price_in, price_out = config.AI_MODEL_PRICING.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'reasoning_tokens': reasoning_tokens,
+        'cost_usd': round(cost, 8),
+    }
+
+
+def prompt_sections(prompt_text):
+    """Perkiraan token (~4 char/token) per section prompt, untuk atribusi biaya per bagian prompt."""
+    if not prompt_text or not isinstance(prompt_text, str):
+        return {}
+    matches = list(_SECTION_RE.finditer(prompt_text))
+    sections = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(prompt_text)
+        name = match.group(1).strip('[]').strip()
+        sections[name] = sections.get(name, 0) + (end - match.start()) // 4
+    return sections
+
+
+def compact_outcome(outcome):
+    """Simpan hanya field skalar (string dipotong) agar baris ledger tetap kecil."""
+    if not isinstance(outcome, dict):
+        return outcome
+    compact = {}
+    for key, value in outcome.items():
+        if isinstance(value, str):
+            compact[key] = value[:120]
+        elif isinstance(value, (int, float, bool)) or value is None:
+            compact[key] = value
+    return compact
+
+
+def _accumulate(bucket, key, row):
+    entry = bucket.setdefault(key, dict.fromkeys(_FIELDS, 0))
+    entry['calls'] += 1
+    entry['errors'] += 1 if row.get('error') else 0
+    for name in _FIELDS[2:]:
+        entry[name] += row.get(name, 0)
+
+
+def flush():
+    """Tulis semua baris yang di-buffer ke file ledger saat baris dicatat (blocking)."""
+    with _write_lock:
+        rows = _pending[:]
+        if not rows:
+            return
+        del _pending[:len(rows)]  # Baris yang masuk selama menulis tetap di buffer
+        batches = {}
+        for path, row in rows:
+            batches.setdefault(path, []).append(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+        for path, lines in batches.items():
+            try:
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write("".join(lines))
+            except OSError as e:
+                logger.warning(f"⚠️ AI ledger write failed: {e}")
+
+
+async def _flush_async():
+    global _flush_task
+    try:
+        await asyncio.to_thread(flush)
+    finally:
+        _flush_task = None
+
+
+def _append(row):
+    global _flush_task
+    _pending.append((config.AI_LEDGER_FILENAME, row))
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush()  # Tanpa event loop (script / test sync): tulis langsung
+        return
+    # done() / loop lain: task lama dibatalkan sebelum jalan (loop sudah ditutup)
+    if _flush_task is None or _flush_task.done() or _flush_task.get_loop() is not loop:
+        _flush_task = loop.create_task(_flush_async())
+
+
+def record(kind, model, usage=None, started=None, retries=0, outcome=None, error=None, prompt=None,
+           latency_ms=None, **extra):
+    """
+    Catat satu request AI. `started` = time.perf_counter() saat request dikirim
+    (atau `latency_ms` langsung, mis. time-to-decision pada streaming).
+    `error` (exception / string) menandai request gagal (termasuk JSON invalid & dibatalkan).
+    """
+    if not config.AI_LEDGER_ENABLED:
+        return None
+    ctx = current()
+    row = {
+        'ts': datetime.now().isoformat(),
+        'kind': kind,
+        'model': model,
+        'symbol': extra.pop('symbol', None) or ctx.get('symbol'),
+        'trace_id': ctx.get('trace_id'),
+        'latency_ms': latency_ms if latency_ms is not None else (
+            round((time.perf_counter() - started) * 1000, 1) if started else 0),
+        'retries': retries,
+        **usage_fields(usage, model),
+        'outcome': compact_outcome(outcome),
+        'error': f"{type(error).__name__}: {error}"[:200] if isinstance(error, BaseException) else error,
+    }
+    if prompt:
+        row['prompt_sections'] = prompt_sections(prompt)
+    row.update(extra)
+
+    _accumulate(_totals['model'], model, row)
+    if row['symbol']:
+        _accumulate(_totals['symbol'], row['symbol'], row)
+    if row['trace_id']:
+        _accumulate(_by_trace, row['trace_id'], row)
+        _by_trace.move_to_end(row['trace_id'])
+        while len(_by_trace) > _MAX_TRACES:
+            _by_trace.popitem(last=False)
+
+    _append(row)
+    return row
+
+
+def aggregates():
+    """Agregat in-memory sejak start: {'model': {...}, 'symbol': {...}}."""
+    return {scope: {k: dict(v) for k, v in entries.items()} for scope, entries in _totals.items()}
+
+
+def format_report():
+    lines = []
+    for model, t in sorted(_totals['model'].items()):
+        avg = t['latency_ms'] / t['calls'] if t['calls'] else 0
+        lines.append(
+            f"{model}: calls={t['calls']} err={t['errors']} tok={t['prompt_tokens']}+{t['completion_tokens']} "
+            f"(reason {t['reasoning_tokens']}) cost=${t['cost_usd']:.4f} avg={avg:.0f}ms"
+        )
+    return "\n".join(lines)
+
+
+# ------------------------------------------------------------------
+# LINK KE TRADE JOURNAL
+# ------------------------------------------------------------------
+
+def trade_costs(trace_id):
+    """Total biaya AI untuk trace ini (field tambahan dokumen journal)."""
+    totals = _by_trace.get(trace_id) if trace_id else None
+    if not totals:
+        return {}
+    return {
+        'ai_calls': totals['calls'],
+        'ai_tokens': totals['prompt_tokens'] + totals['completion_tokens'],
+        'ai_cost_usd': round(totals['cost_usd'], 8),
+    }
+
+
+def link_trade(trade_doc):
+    """Tulis record kind='trade' yang menghubungkan trace_id ledger dengan hasil trade di journal."""
+    trace_id = trade_doc.get('trace_id')
+    if not config.AI_LEDGER_ENABLED or not trace_id:
+        return None
+    row = {
+        'ts': datetime.now().isoformat(),
+        'kind': 'trade',
+        'trace_id': trace_id,
+        'symbol': trade_doc.get('symbol'),
+        'result': trade_doc.get('result'),
+        'pnl_usdt': trade_doc.get('pnl_usdt', 0.0),
+        # Trace sudah tidak di memori (restart / evict): pakai snapshot entry yang ada di trade_doc
+        **(trade_costs(trace_id) or {k: trade_doc[k] for k in _COST_FIELDS if k in trade_doc}),
+    }
+    _append(row)
+    return row
+
+
+# ------------------------------------------------------------------
+# ANALISA FILE LEDGER
+# ------------------------------------------------------------------
+
+def load(path=None):
+    path = path or config.AI_LEDGER_FILENAME
+    flush()
+    if not os.path.exists(path):
+        return []
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue  # Baris terpotong (crash saat menulis)
+    return rows
+
+
+def summarize(rows=None):
+    """
+    Agregat per model, simbol, dan section prompt, plus PnL trade yang ter-link
+    (via trace_id) dan rasio cost_to_pnl.
+    """
+    rows = load() if rows is None else rows
+    calls = [r for r in rows if r.get('kind') != 'trade']
+    trades = {r['trace_id']: r for r in rows if r.get('kind') == 'trade' and r.get('trace_id')}
+
+    scopes = {'model': {}, 'symbol': {}, 'section': {}}
+    traces_seen = {'model': {}, 'symbol': {}, 'section': {}}
+
+    def add_pnl(scope, key, trace_id):
+        seen = traces_seen[scope].setdefault(key, set())
+        if trace_id in trades and trace_id not in seen:
+            seen.add(trace_id)
+            entry = scopes[scope][key]
+            entry['trades'] += 1
+            entry['pnl_usdt'] += float(trades[trace_id].get('pnl_usdt') or 0)
+
+    for row in calls:
+        for scope, key in (('model', row.get('model')), ('symbol', row.get('symbol'))):
+            if not key:
+                continue
+            _accumulate(scopes[scope], key, row)
+            scopes[scope][key].setdefault('trades', 0)
+            scopes[scope][key].setdefault('pnl_usdt', 0.0)
+            add_pnl(scope, key, row.get('trace_id'))
+
+        sections = row.get('prompt_sections') or {}
+        total_est = sum(sections.values())
+        for name, est in sections.items():
+            entry = scopes['section'].setdefault(name, {'calls': 0, 'est_tokens': 0, 'cost_usd': 0.0, 'trades': 0, 'pnl_usdt': 0.0})
+            entry['calls'] += 1
+            entry['est_tokens'] += est
+            entry['cost_usd'] += row.get('cost_usd', 0) * est / total_est if total_est else 0
+            add_pnl('section', name, row.get('trace_id'))
+
+    for entries in scopes.values():
+        for entry in entries.values():
+            pnl = entry['pnl_usdt']
+            entry['cost_to_pnl'] = round(entry['cost_usd'] / pnl, 6) if pnl else None
+    return scopes
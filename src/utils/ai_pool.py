@@ -0,0 +1,179 @@
+"""
+Worker pool untuk pipeline analisa AI (Vision + Logic) beberapa simbol sekaligus.
+
+- AnalysisPool: N worker membaca antrian prioritas simbol (skor pre-screen tertinggi dulu),
+  satu simbol tidak pernah dianalisa ganda. Cakupan koin per candle naik sesuai
+  concurrency, bukan dibatasi latency AI (5-60 detik).
+- RateLimiter per provider (prefix model OpenRouter, mis. 'meta-llama' / 'arcee-ai'),
+  dipanggil tepat sebelum request chat completion.
+- CategoryGate: reservasi slot kategori selama analisa berjalan, sehingga keputusan
+  paralel tidak bisa melewati MAX_POSITIONS_PER_CATEGORY.
+"""
+
+import asyncio
+import itertools
+import time
+
+import config
+from src.utils import metrics
+from src.utils.helper import logger
+
+
+# ------------------------------------------------------------------
+# RATE LIMIT PER PROVIDER
+# ------------------------------------------------------------------
+
+class RateLimiter:
+    """Token bucket async: maksimal `per_minute` request per 60 detik (burst = per_minute)."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.per_minute or self.per_minute <= 0:
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                rate = self.per_minute / 60.0
+                self.tokens = min(self.per_minute, self.tokens + (now - self.updated) * rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+_limiters = {}
+
+
+def provider_of(model):
+    """'meta-llama/llama-4-maverick' -> 'meta-llama'."""
+    return str(model).split('/', 1)[0] if model else 'default'
+
+
+def get_limiter(model):
+    provider = provider_of(model)
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limits = config.AI_PROVIDER_RATE_LIMITS
+        limiter = RateLimiter(limits.get(provider, limits.get('default', 0)))
+        _limiters[provider] = limiter
+    return limiter
+
+
+async def acquire(model):
+    """Tunggu giliran request ke provider model ini (dipanggil sebelum chat completion)."""
+    waited = await get_limiter(model).acquire()
+    if waited > 0:
+        metrics.counter('ai_rate_limited').inc()
+        logger.debug(f"⏳ AI rate limit {provider_of(model)}: tunggu {waited:.1f}s")
+    return waited
+
+
+# ------------------------------------------------------------------
+# CATEGORY RESERVATION
+# ------------------------------------------------------------------
+
+class CategoryGate:
+    """Reservasi slot kategori untuk simbol yang sedang dianalisa / dieksekusi."""
+
+    def __init__(self):
+        self._reserved = {}  # symbol -> category
+
+    def reserved_count(self, category):
+        return sum(1 for cat in self._reserved.values() if cat == category)
+
+    def try_reserve(self, symbol, category, open_count):
+        """True jika slot tersedia (posisi terbuka + reservasi < limit) dan berhasil dipesan."""
+        if symbol in self._reserved:
+            return False
+        limit = config.MAX_POSITIONS_PER_CATEGORY
+        if limit > 0 and open_count + self.reserved_count(category) >= limit:
+            return False
+        self._reserved[symbol] = category
+        return True
+
+    def release(self, symbol):
+        self._reserved.pop(symbol, None)
+
+
+# ------------------------------------------------------------------
+# WORKER POOL
+# ------------------------------------------------------------------
+
+class AnalysisPool:
+    """
+    Pool worker async untuk job analisa per simbol.
+    `handler(job)` dipanggil untuk tiap job; error di satu job tidak menghentikan worker.
+    Antrian berupa priority queue (priority lebih besar diproses dulu); ukurannya otomatis
+    dibatasi jumlah simbol karena satu simbol hanya boleh ada satu job.
+    """
+
+    def __init__(self, handler, concurrency=None):
+        self.handler = handler
+        self.concurrency = max(1, concurrency or config.AI_WORKER_CONCURRENCY)
+        self._queue = None
+        self._seq = itertools.count()
+        self._workers = []
+        self._busy = set()   # simbol di antrian atau sedang diproses
+
+    @property
+    def running(self):
+        return any(not w.done() for w in self._workers)
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        logger.info(f"🧵 AI Analysis Pool started ({self.concurrency} workers)")
+
+    async def stop(self):
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def is_busy(self, symbol):
+        return symbol in self._busy
+
+    @property
+    def in_flight(self):
+        return len(self._busy)
+
+    @property
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, symbol, job, priority=0.0):
+        """
+        Antrikan job dengan prioritas (mis. skor pre-screen). Tidak pernah menunggu.
+        Return False jika simbol sudah di antrian / sedang dianalisa.
+        """
+        if symbol in self._busy:
+            return False
+        self._busy.add(symbol)
+        self._queue.put_nowait((-priority, next(self._seq), symbol, job))
+        return True
+
+    async def _worker(self, idx):
+        while True:
+            _, _, symbol, job = await self._queue.get()
+            started = time.perf_counter()
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ AI Worker-{idx} error {symbol}: {e}")
+            finally:
+                self._busy.discard(symbol)
+                self._queue.task_done()
+                metrics.histogram('ai_pipeline_ms').observe((time.perf_counter() - started) * 1000)
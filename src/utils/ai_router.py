@@ -0,0 +1,215 @@
+"""
+Router request keputusan AI lintas model / provider (failover + hedged request).
+
+- Endpoint: satu pasangan (base_url, model) berurutan prioritas. Latency sukses dicatat ke
+  histogram `ai_model_<model>_ms`, kegagalan ke counter `ai_model_<model>_errors`.
+- CircuitBreaker: AI_ROUTER_BREAKER_FAILURES kegagalan beruntun -> open (endpoint dilewati)
+  selama AI_ROUTER_BREAKER_COOLDOWN detik, lalu half-open (satu request percobaan).
+- ProviderRouter.call(request_fn):
+    'failover' = endpoint sehat dicoba berurutan, pindah ke berikutnya saat error / timeout.
+    'hedged'   = jika endpoint aktif belum menjawab dalam p90 latency-nya, request cadangan
+                 dikirim paralel. Jawaban valid pertama menang, sisanya dibatalkan.
+  Seluruh keputusan dibatasi AI_ROUTER_DEADLINE, sehingga insiden provider tidak membuat
+  bot menunggu tanpa batas. AI_ROUTER_TIMEOUT per request baru berjalan setelah `acquire(model)`
+  (rate limiter provider) memberi slot, jadi antrian rate limit tidak dihitung sebagai timeout.
+
+`request_fn(endpoint)` adalah coroutine yang mengembalikan hasil ter-parse (JSON valid)
+atau raise exception; parse gagal dihitung sebagai kegagalan endpoint.
+"""
+
+import asyncio
+import time
+
+import config
+from src.utils import metrics
+from src.utils.helper import logger
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold=None, cooldown=None):
+        self.failure_threshold = failure_threshold or config.AI_ROUTER_BREAKER_FAILURES
+        self.cooldown = cooldown if cooldown is not None else config.AI_ROUTER_BREAKER_COOLDOWN
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """True jika request boleh dikirim. Half-open hanya mengizinkan satu percobaan."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                logger.warning(f"🔌 AI circuit OPEN setelah {self.failures} kegagalan (cooldown {self.cooldown}s)")
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """Request dibatalkan (kalah hedge) -> slot percobaan half-open dikembalikan."""
+        self._probing = False
+
+
+class Endpoint:
+    """
+    Satu model di satu provider. `client=None` berarti pakai client default milik pemanggil
+    (AIBrain.client), sehingga endpoint utama ikut client yang sama.
+    """
+
+    def __init__(self, model, base_url=None, client=None):
+        self.model = model
+        self.base_url = base_url
+        self.client = client
+        self.breaker = CircuitBreaker()
+        self.latency = metrics.histogram(f"ai_model_{model}_ms")
+        self.errors = metrics.counter(f"ai_model_{model}_errors")
+
+    def hedge_delay(self):
+        """Waktu tunggu (detik) sebelum request cadangan: p90 latency model, di-clamp ke batas config."""
+        if self.latency.count < config.AI_ROUTER_HEDGE_MIN_SAMPLES:
+            delay_ms = config.AI_ROUTER_HEDGE_DEFAULT_MS
+        else:
+            delay_ms = self.latency.percentile(90)
+        delay_ms = min(max(delay_ms, config.AI_ROUTER_HEDGE_MIN_MS), config.AI_ROUTER_HEDGE_MAX_MS)
+        return delay_ms / 1000
+
+    def __repr__(self):
+        return f"Endpoint({self.model} @ {self.base_url or 'default'}, {self.breaker.state})"
+
+
+class ProviderRouter:
+    def __init__(self, endpoints, mode=None, acquire=None):
+        self.endpoints = list(endpoints)
+        self.mode = mode or config.AI_ROUTER_MODE
+        self.acquire = acquire  # async acquire(model): tunggu slot rate limit sebelum request
+
+    def health(self):
+        """Ringkasan status per model (untuk laporan)."""
+        return {
+            ep.model: {
+                'state': ep.breaker.state,
+                'p90_ms': round(ep.latency.percentile(90)),
+                'errors': ep.errors.value,
+            }
+            for ep in self.endpoints
+        }
+
+    async def call(self, request_fn):
+        """Return (endpoint, result) dari jawaban valid pertama. Raise jika semua gagal / deadline lewat."""
+        deadline = config.AI_ROUTER_DEADLINE
+        if not deadline:
+            return await self._run(request_fn)
+        task = asyncio.ensure_future(self._run(request_fn))
+        try:
+            done, _ = await asyncio.wait({task}, timeout=deadline)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if not done:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            metrics.counter('ai_router_deadline_exceeded').inc()
+            raise TimeoutError(f"AI router deadline {deadline}s terlewati")
+        return task.result()
+
+    async def _attempt(self, endpoint, request_fn):
+        try:
+            if self.acquire:
+                await self.acquire(endpoint.model)
+            started = time.perf_counter()
+            timeout = config.AI_ROUTER_TIMEOUT
+            if timeout:
+                result = await asyncio.wait_for(request_fn(endpoint), timeout)
+            else:
+                result = await request_fn(endpoint)
+        except asyncio.CancelledError:
+            endpoint.breaker.release()
+            raise
+        except Exception as e:
+            endpoint.errors.inc()
+            endpoint.breaker.record_failure()
+            logger.warning(f"⚠️ AI {endpoint.model} gagal: {type(e).__name__}: {e}")
+            raise
+        endpoint.latency.observe((time.perf_counter() - started) * 1000)
+        endpoint.breaker.record_success()
+        return result
+
+    async def _run(self, request_fn):
+        candidates = iter(self.endpoints)
+        pending = {}  # task -> endpoint
+
+        def launch_next():
+            for endpoint in candidates:
+                if endpoint.breaker.allow():
+                    pending[asyncio.create_task(self._attempt(endpoint, request_fn))] = endpoint
+                    return endpoint
+            return None
+
+        hedged = self.mode == 'hedged'
+        last = launch_next()
+        if last is None:
+            metrics.counter('ai_router_all_open').inc()
+            raise RuntimeError("Semua endpoint AI sedang circuit-open")
+
+        last_error = None
+        try:
+            while pending:
+                timeout = None
+                if hedged and len(pending) < config.AI_ROUTER_HEDGE_MAX_INFLIGHT:
+                    timeout = last.hedge_delay()
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Endpoint aktif lebih lambat dari p90-nya -> kirim request cadangan
+                    backup = launch_next()
+                    if backup is None:
+                        hedged = False
+                        continue
+                    metrics.counter('ai_router_hedged').inc()
+                    logger.info(f"🪁 AI hedge: {last.model} > {timeout:.1f}s, kirim cadangan ke {backup.model}")
+                    last = backup
+                    continue
+
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if task.exception() is None:
+                        if endpoint is not self.endpoints[0]:
+                            metrics.counter('ai_router_backup_wins').inc()
+                        return endpoint, task.result()
+                    last_error = task.exception()
+
+                # Semua yang selesai gagal -> failover ke endpoint berikutnya
+                if not pending or hedged:
+                    backup = launch_next()
+                    if backup is not None:
+                        metrics.counter('ai_router_failover').inc()
+                        logger.info(f"🔀 AI failover ke {backup.model}")
+                        last = backup
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        raise last_error or RuntimeError("Tidak ada endpoint AI yang menjawab")
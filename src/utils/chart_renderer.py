@@ -0,0 +1,265 @@
+"""
+Renderer chart candlestick + Volume + MACD untuk Vision AI (PatternRecognizer).
+
+- Figure, axes, style & artist (collection / line) dibuat sekali per worker lalu dipakai
+  ulang: tiap render hanya mengganti data artist dan menyimpan PNG (tanpa mpf.plot,
+  tanpa bbox_inches='tight' yang memaksa draw dua kali).
+- Render berjalan di process pool (CHART_RENDER_WORKERS) agar tidak berebut GIL dengan
+  kalkulasi indikator di event loop / thread pool. CHART_RENDER_WORKERS=0 -> thread.
+
+Tampilan mengikuti chart mplfinance sebelumnya: style gelap, candle hijau/merah,
+panel 6:2:2 (harga, volume, MACD), tanpa axis, 60 candle terakhir.
+"""
+
+import asyncio
+import base64
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import config
+
+import matplotlib
+matplotlib.use('Agg')  # Force non-interactive backend
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+
+CHART_CANDLES = 60
+CHART_FIGSIZE = (8, 5.75)
+CHART_DPI = 100
+
+_BG = '#0a0a0a'
+_UP, _DOWN = '#00ff00', '#ff0000'
+_HIST_UP, _HIST_DOWN = '#26a69a', '#ef5350'
+_MACD_COLOR, _SIGNAL_COLOR = '#2962FF', '#FF6D00'
+_BODY_WIDTH = 0.6
+
+
+def _bar_verts(x, bottom, top, width):
+    """Vertex persegi panjang (n, 4, 2) untuk body candle / bar volume / histogram."""
+    left, right = x - width / 2, x + width / 2
+    return np.stack([
+        np.column_stack([left, bottom]), np.column_stack([left, top]),
+        np.column_stack([right, top]), np.column_stack([right, bottom]),
+    ], axis=1)
+
+
+def _padded_limits(low, high, pad=0.05):
+    span = (high - low) or abs(high) or 1.0
+    return low - span * pad, high + span * pad
+
+
+class ChartRenderer:
+    """Figure & artist dibuat sekali; render() hanya update data lalu simpan PNG."""
+
+    def __init__(self, figsize=CHART_FIGSIZE):
+        self.fig = Figure(figsize=figsize, facecolor=_BG)
+        FigureCanvasAgg(self.fig)
+        grid = self.fig.add_gridspec(3, 1, height_ratios=(6, 2, 2), hspace=0.04,
+                                     left=0.01, right=0.99, top=0.99, bottom=0.01)
+        self.ax_price = self.fig.add_subplot(grid[0])
+        self.ax_volume = self.fig.add_subplot(grid[1], sharex=self.ax_price)
+        self.ax_macd = self.fig.add_subplot(grid[2], sharex=self.ax_price)
+        for ax in (self.ax_price, self.ax_volume, self.ax_macd):
+            ax.set_facecolor(_BG)
+            ax.set_axis_off()
+
+        self.wicks = LineCollection([], linewidths=0.8)
+        self.bodies = PolyCollection([], edgecolors='face')
+        self.volume = PolyCollection([], edgecolors='face')
+        self.hist = PolyCollection([], edgecolors='face', alpha=0.5)
+        self.ax_price.add_collection(self.wicks)
+        self.ax_price.add_collection(self.bodies)
+        self.ax_volume.add_collection(self.volume)
+        self.ax_macd.add_collection(self.hist)
+        self.macd_line, = self.ax_macd.plot([], [], color=_MACD_COLOR, linewidth=1.2)
+        self.signal_line, = self.ax_macd.plot([], [], color=_SIGNAL_COLOR, linewidth=1.2)
+
+    def render(self, opens, highs, lows, closes, volumes, macd, signal, hist, dpi=CHART_DPI):
+        """Array OHLCV + MACD (panjang sama) -> bytes PNG."""
+        opens, highs, lows, closes, volumes, macd, signal, hist = (
+            np.asarray(a, dtype=float) for a in (opens, highs, lows, closes, volumes, macd, signal, hist)
+        )
+        x = np.arange(len(closes), dtype=float)
+        colors = np.where(closes >= opens, _UP, _DOWN)
+
+        self.wicks.set_segments(np.stack([np.column_stack([x, lows]), np.column_stack([x, highs])], axis=1))
+        self.wicks.set_color(colors)
+        self.bodies.set_verts(_bar_verts(x, np.minimum(opens, closes), np.maximum(opens, closes), _BODY_WIDTH))
+        self.bodies.set_facecolor(colors)
+        self.volume.set_verts(_bar_verts(x, np.zeros_like(volumes), volumes, _BODY_WIDTH))
+        self.volume.set_facecolor(colors)
+        self.hist.set_verts(_bar_verts(x, np.zeros_like(hist), hist, _BODY_WIDTH))
+        self.hist.set_facecolor(np.where(hist >= 0, _HIST_UP, _HIST_DOWN))
+        self.macd_line.set_data(x, macd)
+        self.signal_line.set_data(x, signal)
+
+        self.ax_price.set_xlim(-1, len(x))
+        self.ax_price.set_ylim(*_padded_limits(lows.min(), highs.max()))
+        self.ax_volume.set_ylim(0, (volumes.max() or 1.0) * 1.05)
+        macd_values = np.concatenate([macd, signal, hist])
+        self.ax_macd.set_ylim(*_padded_limits(macd_values.min(), macd_values.max()))
+
+        buf = io.BytesIO()
+        self.fig.savefig(buf, format='png', dpi=dpi, facecolor=_BG)
+        return buf.getvalue()
+
+
+# ------------------------------------------------------------------
+# DATA CHART (dijalankan di worker)
+# ------------------------------------------------------------------
+
+def prepare_chart_data(candles):
+    """
+    Candle setup -> (DataFrame 60 candle terakhir + kolom MACD, raw_stats untuk prompt teks).
+    Return (None, None) jika data kurang.
+    """
+    if not candles or len(candles) < config.MACD_SLOW:  # Need at least MACD_SLOW
+        return None, None
+
+    import pandas as pd
+    import pandas_ta as ta  # noqa: F401 (registrasi accessor df.ta)
+
+    df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+
+    # append=True adds columns to df: MACD_12_26_9, MACDh_12_26_9, MACDs_12_26_9
+    df.ta.macd(fast=config.MACD_FAST, slow=config.MACD_SLOW, signal=config.MACD_SIGNAL, append=True)
+    df.dropna(inplace=True)
+    df.columns = ['open', 'high', 'low', 'close', 'volume', 'macd', 'macd_hist', 'macd_signal']
+
+    last_row = df.iloc[-1]
+    raw_stats = {
+        "close": last_row['close'],
+        "open": last_row['open'],
+        "high": last_row['high'],
+        "low": last_row['low'],
+        "volume": last_row['volume'],
+        "macd": last_row['macd'],
+        "macd_signal": last_row['macd_signal'],
+        "macd_hist": last_row['macd_hist'],
+        "last_ts": str(df.index[-1])
+    }
+    return df.tail(CHART_CANDLES), raw_stats
+
+
+_local = threading.local()
+
+
+def get_renderer():
+    """Renderer milik proses / thread ini (figure tidak thread-safe, jadi tidak dibagi antar thread)."""
+    renderer = getattr(_local, 'renderer', None)
+    if renderer is None:
+        renderer = _local.renderer = ChartRenderer()
+    return renderer
+
+
+def render_chart(candles):
+    """Candle setup -> (base64 PNG, raw_stats), atau (None, None) jika data kurang. Raise jika render gagal."""
+    plot_data, raw_stats = prepare_chart_data(candles)
+    if plot_data is None or plot_data.empty:
+        return None, None
+    png = get_renderer().render(
+        plot_data['open'], plot_data['high'], plot_data['low'], plot_data['close'], plot_data['volume'],
+        plot_data['macd'], plot_data['macd_signal'], plot_data['macd_hist']
+    )
+    return base64.b64encode(png).decode('utf-8'), raw_stats
+
+
+def archive_chart(symbol, candle_ts, img_base64, raw_stats):
+    """Simpan PNG + raw_stats (JSON) ke CHART_ARCHIVE_DIR: <SYMBOL>_<candle_ts>_<rendered_at>.png/.json."""
+    os.makedirs(config.CHART_ARCHIVE_DIR, exist_ok=True)
+    name = f"{symbol.replace('/', '-')}_{candle_ts}_{int(time.time())}"
+    path = os.path.join(config.CHART_ARCHIVE_DIR, name)
+    with open(f"{path}.png", 'wb') as f:
+        f.write(base64.b64decode(img_base64))
+    with open(f"{path}.json", 'w', encoding='utf-8') as f:
+        json.dump({'symbol': symbol, 'candle_ts': candle_ts, 'raw_stats': raw_stats}, f, default=str)
+
+
+def tile_charts(images_base64, labels, columns=2, panel_width=None):
+    """
+    Gabungkan beberapa chart (base64 PNG) jadi satu grid berlabel untuk batch Vision.
+    Label (mis. "1. BTC/USDT") ditulis di pojok kiri atas tiap panel. Return base64 PNG.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    panel_width = panel_width or config.PATTERN_BATCH_PANEL_WIDTH
+    panels = []
+    for img_base64 in images_base64:
+        img = Image.open(io.BytesIO(base64.b64decode(img_base64))).convert('RGB')
+        height = round(img.height * panel_width / img.width)
+        panels.append(img.resize((panel_width, height), Image.LANCZOS))
+
+    columns = max(1, min(columns, len(panels)))
+    rows = -(-len(panels) // columns)
+    cell_height = max(p.height for p in panels)
+    grid = Image.new('RGB', (columns * panel_width, rows * cell_height), _BG)
+    draw = ImageDraw.Draw(grid)
+    font = ImageFont.load_default(size=max(12, panel_width // 20))
+    for i, (panel, label) in enumerate(zip(panels, labels)):
+        x, y = (i % columns) * panel_width, (i // columns) * cell_height
+        grid.paste(panel, (x, y))
+        draw.rectangle([x, y, x + panel_width - 1, y + cell_height - 1], outline='#808080')
+        draw.text((x + 8, y + 6), label, fill='#ffffff', font=font, stroke_width=2, stroke_fill=_BG)
+
+    buf = io.BytesIO()
+    grid.save(buf, format='PNG', optimize=False)
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+# ------------------------------------------------------------------
+# PROCESS POOL
+# ------------------------------------------------------------------
+
+_pool = None
+
+
+def _warm_worker():
+    """Initializer worker: import library berat & bangun figure sebelum request pertama."""
+    import pandas_ta  # noqa: F401
+    get_renderer()
+
+
+def get_pool():
+    """Process pool render (lazy). None jika CHART_RENDER_WORKERS=0 (pakai thread)."""
+    global _pool
+    if _pool is None and config.CHART_RENDER_WORKERS > 0:
+        # spawn: worker tidak mewarisi state thread / event loop proses utama
+        _pool = ProcessPoolExecutor(
+            max_workers=config.CHART_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_worker,
+        )
+    return _pool
+
+
+async def render_async(candles):
+    """Render di process pool; jika pool rusak (worker crash) dibuat ulang sekali, lalu fallback ke thread."""
+    global _pool
+    loop = asyncio.get_running_loop()
+    candles = [list(c) for c in candles]  # Snapshot: store candle bisa berubah saat render
+    for _ in range(2):
+        pool = get_pool()
+        if pool is None:
+            break
+        try:
+            return await loop.run_in_executor(pool, render_chart, candles)
+        except BrokenProcessPool:
+            _pool = None
+    return await asyncio.to_thread(render_chart, candles)
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
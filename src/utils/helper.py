@@ -71,55 +71,109 @@ logger = setup_logger()
 # ==========================================
 # TELEGRAM NOTIFIER
 # ==========================================
+def _telegram_target(channel: str = 'default'):
+    """Tentukan (bot_token, chat_id, message_thread_id) berdasarkan channel."""
+    bot_token = config.TELEGRAM_TOKEN
+    chat_id = config.TELEGRAM_CHAT_ID
+    thread_id = config.TELEGRAM_MESSAGE_THREAD_ID if channel == 'default' else None
+
+    if channel == 'sentiment':
+        if config.TELEGRAM_TOKEN_SENTIMENT and config.TELEGRAM_CHAT_ID_SENTIMENT:
+            bot_token = config.TELEGRAM_TOKEN_SENTIMENT
+            chat_id = config.TELEGRAM_CHAT_ID_SENTIMENT
+            thread_id = config.TELEGRAM_MESSAGE_THREAD_ID_SENTIMENT
+        else:
+            # Fallback ke default channel agar info tidak hilang, tapi beri log warning.
+            logger.warning("⚠️ Credentials Sentiment Telegram kosong, menggunakan default channel.")
+    return bot_token, chat_id, thread_id
+
+
+async def post_telegram(text: str, channel: str = 'default'):
+    """
+    Kirim satu pesan langsung ke Telegram API (tanpa antrian).
+    Return (status, retry_after):
+      ('ok', None)      -> terkirim
+      ('retry', detik)  -> 429 / 5xx / error jaringan, boleh dicoba lagi (detik None = pakai backoff)
+      ('fatal', None)   -> error permanen (4xx), jangan retry
+    """
+    bot_token, chat_id, thread_id = _telegram_target(channel)
+    data = {
+        'chat_id': chat_id,
+        'text': text,
+        'parse_mode': 'HTML'
+    }
+    if thread_id:
+        data['message_thread_id'] = thread_id
+
+    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    try:
+        # Client keep-alive bersama (tanpa thread hop & TLS handshake per pesan)
+        from src.utils import http_pool
+        response = await http_pool.get_httpx_client('telegram').post(url, data=data, timeout=10)
+    except Exception as e:
+        logger.error(f"❌ Telegram Exception: {e}")
+        return 'retry', None
+
+    if response.status_code == 200:
+        return 'ok', None
+
+    error_details = response.text
+    if response.status_code == 429:
+        try:
+            retry_after = response.json().get('parameters', {}).get('retry_after')
+        except Exception:
+            retry_after = None
+        logger.warning(f"⏳ Telegram rate limited ({channel}), retry after {retry_after}s")
+        return 'retry', retry_after
+    if response.status_code >= 500:
+        logger.warning(f"⚠️ Telegram Server Error ({channel}) Status {response.status_code}")
+        return 'retry', None
+
+    logger.error(f"❌ Telegram Send Failed ({channel}) Status {response.status_code}: {error_details}")
+    # Additional Hint for User
+    if response.status_code == 400 and "chat not found" in error_details:
+        logger.warning(f"💡 HINT: Pastikan Bot Token '{str(bot_token)[:5]}...' sudah di-invite ke Chat ID '{chat_id}'!")
+    elif response.status_code == 401:
+        logger.warning(f"💡 HINT: Token Bot mungkin salah atau expired.")
+    return 'fatal', None
+
+
 async def kirim_tele(pesan: str, alert: bool = False, channel: str = 'default') -> None:
     """
     Kirim pesan ke Telegram.
+    Jika TelegramDispatcher sudah berjalan, pesan hanya di-enqueue (tidak pernah menahan caller);
+    jika belum (script/test), pesan dikirim langsung.
     :param channel: 'default' (Sinyal Utama) atau 'sentiment' (Analisa Berita)
     """
+    from src.utils import notifier
+    if notifier.dispatcher.running:
+        notifier.dispatcher.enqueue(pesan, alert=alert, channel=channel)
+        return
+
+    prefix = "⚠️ <b>SYSTEM ALERT</b>\n" if alert else ""
     try:
-        prefix = "⚠️ <b>SYSTEM ALERT</b>\n" if alert else ""
-        
-        # Tentukan Token & ChatID berdasarkan channel
-        bot_token = config.TELEGRAM_TOKEN
-        chat_id = config.TELEGRAM_CHAT_ID
-        
-        if channel == 'sentiment':
-            if config.TELEGRAM_TOKEN_SENTIMENT and config.TELEGRAM_CHAT_ID_SENTIMENT:
-                bot_token = config.TELEGRAM_TOKEN_SENTIMENT
-                chat_id = config.TELEGRAM_CHAT_ID_SENTIMENT
-            else:
-                # Fallback atau skip jika credentials sentimen tidak ada
-                logger.warning("⚠️ Credentials Sentiment Telegram kosong, menggunakan default channel.")
-                # Kita bisa memilih untuk tetap kirim ke default atau return.
-                # Sesuai request user: "beda untuk dikirimnya". Jika kosong, lebih aman tetap kirim (fallback) atau log error.
-                # Mari kita gunakan fallback ke default agar info tidak hilang, tapi beri log warning.
-        
-        data = {
-            'chat_id': chat_id, 
-            'text': f"{prefix}{pesan}", 
-            'parse_mode': 'HTML'
-        }
-        
-        # Message Thread ID logic
-        if channel == 'default' and config.TELEGRAM_MESSAGE_THREAD_ID:
-            data['message_thread_id'] = config.TELEGRAM_MESSAGE_THREAD_ID
-        elif channel == 'sentiment' and config.TELEGRAM_MESSAGE_THREAD_ID_SENTIMENT:
-            data['message_thread_id'] = config.TELEGRAM_MESSAGE_THREAD_ID_SENTIMENT
-            
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        response = await asyncio.to_thread(requests.post, url, data=data, timeout=10)
-        if response.status_code != 200:
-            error_details = response.text
-            logger.error(f"❌ Telegram Send Failed ({channel}) Status {response.status_code}: {error_details}")
-            
-            # Additional Hint for User
-            if response.status_code == 400 and "chat not found" in error_details:
-                logger.warning(f"💡 HINT: Pastikan Bot Token '{bot_token[:5]}...' sudah di-invite ke Chat ID '{chat_id}'!")
-            elif response.status_code == 401:
-                logger.warning(f"💡 HINT: Token Bot mungkin salah atau expired.")
+        await post_telegram(f"{prefix}{pesan}", channel)
     except Exception as e:
         logger.error(f"❌ Telegram Exception: {e}")
 
+_background_tasks = set()
+
+def fire_and_forget(coro):
+    """
+    Jalankan coroutine sebagai background task (side effect non-kritis: notifikasi, simpan file).
+    Referensi task disimpan agar tidak di-GC sebelum selesai; error hanya di-log.
+    """
+    task = asyncio.get_running_loop().create_task(coro)
+    _background_tasks.add(task)
+
+    def _done(t):
+        _background_tasks.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.error(f"❌ Background task error: {t.exception()}")
+
+    task.add_done_callback(_done)
+    return task
+
 def kirim_tele_sync(pesan):
     """
     Fungsi khusus untuk kirim notif saat bot mati/crash.
@@ -0,0 +1,158 @@
+"""
+HTTP Connection Pool bersama (keep-alive) untuk semua modul.
+
+- httpx.AsyncClient per profil ('ai' untuk OpenRouter chat & vision, 'telegram' untuk notifikasi).
+  Satu profil = satu pool koneksi, sehingga request berikutnya ke host yang sama
+  tidak perlu TCP + TLS handshake lagi.
+- aiohttp.ClientSession bersama untuk sentiment (RSS, F&G) dan on-chain (DefiLlama).
+  Session terikat ke event loop, jadi dibuat ulang otomatis jika loop berganti.
+  close_all() wajib di-await sebelum loop berhenti (shutdown main) agar socket tertutup.
+
+Reuse koneksi tercatat di metrics:
+  http_requests_total / http_connections_new / http_tls_handshakes  (httpx)
+  aiohttp_requests_total / aiohttp_connections_new / aiohttp_connections_reused
+"""
+
+import asyncio
+
+import aiohttp
+import httpx
+
+import config
+from src.utils import metrics
+from src.utils.helper import logger
+
+_httpx_clients = {}
+_aiohttp_session = None
+_aiohttp_loop = None
+
+
+# ------------------------------------------------------------------
+# HTTPX (OpenAI SDK, Telegram)
+# ------------------------------------------------------------------
+
+async def _httpx_trace(event_name, info):
+    """Callback trace httpcore: hitung koneksi baru & TLS handshake (koneksi yang tidak reuse)."""
+    if event_name == 'connection.connect_tcp.complete':
+        metrics.counter('http_connections_new').inc()
+    elif event_name == 'connection.start_tls.complete':
+        metrics.counter('http_tls_handshakes').inc()
+
+
+async def _on_httpx_request(request):
+    metrics.counter('http_requests_total').inc()
+    request.extensions['trace'] = _httpx_trace
+
+
+def _http2_enabled():
+    if not config.HTTP_POOL_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401  (optional dependency untuk HTTP/2)
+        return True
+    except ImportError:
+        logger.warning("⚠️ HTTP_POOL_HTTP2 aktif tapi package 'h2' tidak terinstall. Fallback ke HTTP/1.1.")
+        return False
+
+
+def _httpx_timeout(profile):
+    """
+    Timeout per profil. Profil 'ai' memakai AI_ROUTER_TIMEOUT (respons model bisa 5-60 detik);
+    OpenAI SDK mengadopsi timeout client ini, jadi API_REQUEST_TIMEOUT (10s) akan memutus request AI.
+    """
+    if profile == 'ai':
+        return httpx.Timeout(config.AI_ROUTER_TIMEOUT or None, connect=config.HTTP_POOL_CONNECT_TIMEOUT)
+    return httpx.Timeout(config.API_REQUEST_TIMEOUT, connect=config.HTTP_POOL_CONNECT_TIMEOUT)
+
+
+def get_httpx_client(profile='default'):
+    """Ambil (atau buat) httpx.AsyncClient long-lived untuk profil ini."""
+    client = _httpx_clients.get(profile)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=_http2_enabled(),
+            limits=httpx.Limits(
+                max_connections=config.HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=config.HTTP_POOL_KEEPALIVE_EXPIRY,
+            ),
+            timeout=_httpx_timeout(profile),
+            event_hooks={'request': [_on_httpx_request]},
+        )
+        _httpx_clients[profile] = client
+    return client
+
+
+# ------------------------------------------------------------------
+# AIOHTTP (Sentiment, On-Chain)
+# ------------------------------------------------------------------
+
+async def _on_aiohttp_request_start(session, ctx, params):
+    metrics.counter('aiohttp_requests_total').inc()
+
+
+async def _on_aiohttp_connection_create(session, ctx, params):
+    metrics.counter('aiohttp_connections_new').inc()
+
+
+async def _on_aiohttp_connection_reuse(session, ctx, params):
+    metrics.counter('aiohttp_connections_reused').inc()
+
+
+def get_aiohttp_session():
+    """
+    Ambil aiohttp.ClientSession bersama untuk event loop yang sedang berjalan.
+    Wajib dipanggil dari dalam coroutine. Jangan di-close oleh pemanggil.
+    """
+    global _aiohttp_session, _aiohttp_loop
+    loop = asyncio.get_running_loop()
+    if _aiohttp_session is None or _aiohttp_session.closed or _aiohttp_loop is not loop:
+        # Session loop lama tidak bisa di-close dari loop ini; tutup lewat close_all() sebelum loop berhenti
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(_on_aiohttp_request_start)
+        trace.on_connection_create_end.append(_on_aiohttp_connection_create)
+        trace.on_connection_reuseconn.append(_on_aiohttp_connection_reuse)
+
+        connector = aiohttp.TCPConnector(
+            limit=config.HTTP_POOL_MAX_CONNECTIONS,
+            limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=config.HTTP_POOL_KEEPALIVE_EXPIRY,
+            ttl_dns_cache=300,
+        )
+        _aiohttp_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT),
+            trace_configs=[trace],
+        )
+        _aiohttp_loop = loop
+    return _aiohttp_session
+
+
+# ------------------------------------------------------------------
+# LIFECYCLE & STATS
+# ------------------------------------------------------------------
+
+async def close_all():
+    """Tutup semua client & socket keep-alive (di-await di shutdown main, sebelum event loop berhenti)."""
+    global _aiohttp_session, _aiohttp_loop
+    for client in list(_httpx_clients.values()):
+        await client.aclose()
+    _httpx_clients.clear()
+    if _aiohttp_session is not None and not _aiohttp_session.closed:
+        await _aiohttp_session.close()
+    _aiohttp_session = None
+    _aiohttp_loop = None
+
+
+def reuse_stats():
+    """Rasio reuse koneksi (1.0 = semua request memakai koneksi keep-alive)."""
+    def ratio(requests_name, new_name):
+        total = metrics.counter(requests_name).value
+        new = metrics.counter(new_name).value
+        return round(1 - new / total, 3) if total else None
+
+    return {
+        'httpx_reuse_rate': ratio('http_requests_total', 'http_connections_new'),
+        'aiohttp_reuse_rate': ratio('aiohttp_requests_total', 'aiohttp_connections_new'),
+        'tls_handshakes': metrics.counter('http_tls_handshakes').value,
+    }
@@ -0,0 +1,72 @@
+"""
+Ekstraksi objek JSON secara incremental dari stream token AI.
+
+IncrementalJSONExtractor.feed(chunk) dipanggil untuk tiap potongan teks yang datang.
+Begitu objek JSON top-level pertama yang valid (dan berisi semua key wajib) tertutup,
+feed() mengembalikan dict-nya, jadi caller bisa berhenti menunggu sisa stream.
+Teks di luar objek (```json fence, kalimat pembuka) diabaikan.
+"""
+
+import json
+
+
+class IncrementalJSONExtractor:
+    def __init__(self, required=()):
+        self.required = tuple(required)
+        self.buffer = []        # Potongan teks objek yang sedang dibaca
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.result = None
+        self.chars_seen = 0
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def feed(self, chunk):
+        """Proses potongan teks. Return dict jika objek lengkap sudah ditemukan, selain itu None."""
+        if self.result is not None:
+            return self.result
+        if not chunk:
+            return None
+
+        for ch in chunk:
+            self.chars_seen += 1
+            if self.depth == 0:
+                if ch == '{':
+                    self.depth = 1
+                    self.buffer = ['{']
+                continue
+
+            self.buffer.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+
+            if ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}':
+                self.depth -= 1
+                if self.depth == 0 and self._try_complete():
+                    return self.result
+        return None
+
+    def _try_complete(self):
+        text = ''.join(self.buffer)
+        self.buffer = []
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            return False  # Bukan JSON valid (mis. kurung kurawal di teks biasa), lanjut cari objek berikutnya
+        if not isinstance(obj, dict) or any(k not in obj for k in self.required):
+            return False
+        self.result = obj
+        return True
@@ -0,0 +1,118 @@
+"""
+Metrics ringan in-process (tanpa dependency eksternal).
+- Histogram: bucket tetap + sample terbaru (bounded) untuk p50/p95/p99.
+- Counter: penghitung sederhana.
+Semua metric disimpan di registry global by name, dibaca via snapshot()/format_report().
+"""
+
+import math
+from collections import deque
+
+DEFAULT_LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    def __init__(self, name, buckets=DEFAULT_LATENCY_BUCKETS_MS, max_samples=1000):
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self._samples = deque(maxlen=max_samples)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)  # slot terakhir = +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples.clear()
+
+    def observe(self, value):
+        value = float(value)
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        self._samples.append(value)
+
+    def percentile(self, p):
+        """Nearest-rank percentile dari sample terbaru (0 jika belum ada data)."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'avg': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class Counter:
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def reset(self):
+        self.value = 0
+
+
+_histograms = {}
+_counters = {}
+
+
+def histogram(name, buckets=DEFAULT_LATENCY_BUCKETS_MS, max_samples=1000):
+    """Ambil (atau buat) histogram by name."""
+    hist = _histograms.get(name)
+    if hist is None:
+        hist = _histograms[name] = Histogram(name, buckets, max_samples)
+    return hist
+
+
+def counter(name):
+    """Ambil (atau buat) counter by name."""
+    cnt = _counters.get(name)
+    if cnt is None:
+        cnt = _counters[name] = Counter(name)
+    return cnt
+
+
+def snapshot():
+    return {
+        'histograms': {name: h.summary() for name, h in _histograms.items()},
+        'counters': {name: c.value for name, c in _counters.items()},
+    }
+
+
+def format_report(exclude=()):
+    """
+    Ringkasan semua metric dalam format teks (untuk log / Telegram).
+    `exclude`: prefix nama metric yang dilewati (sudah dilaporkan di tempat lain).
+    """
+    lines = []
+    for name, h in sorted(_histograms.items()):
+        if not h.count or name.startswith(tuple(exclude)):
+            continue
+        s = h.summary()
+        lines.append(
+            f"{name}: n={s['count']} p50={s['p50']:.0f} p95={s['p95']:.0f} "
+            f"p99={s['p99']:.0f} max={s['max']:.0f}"
+        )
+    for name, c in sorted(_counters.items()):
+        if name.startswith(tuple(exclude)):
+            continue
+        lines.append(f"{name}: {c.value}")
+    return "\n".join(lines)
@@ -0,0 +1,301 @@
+"""
+Fetch RSS hemat bandwidth + penyimpanan headline tanpa duplikat (dipakai SentimentAnalyzer).
+
+FeedFetcher : simpan ETag / Last-Modified per URL lalu kirim conditional GET
+              (If-None-Match / If-Modified-Since). 304 -> tanpa download & parse.
+              Server tanpa validator: body yang sama persis (hash) juga tidak di-parse ulang.
+              Parse di process pool (NEWS_PARSE_WORKERS, bebas GIL): parser ringan ElementTree untuk
+              RSS/Atom well-formed (via defusedxml; feed dengan deklarasi entity / XXE
+              ditolak), feedparser jika gagal. Hasil ringkas (title, source, published_ts)
+              + waktu parse per feed; feed yang rata-rata parse > NEWS_SLOW_PARSE_MS di-demote.
+NewsStore   : headline di-key dengan hash judul ternormalisasi (huruf kecil, tanpa tanda baca),
+              berisi judul, sumber, first_seen & waktu publish. Headline yang sama dari feed
+              lain / poll berikutnya tidak masuk dua kali. headlines() membatasi
+              NEWS_MAX_PER_SOURCE headline per sumber.
+"""
+
+import asyncio
+import calendar
+import hashlib
+import html
+import multiprocessing
+import re
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+from defusedxml.ElementTree import fromstring as _defused_fromstring
+
+import config
+from src.utils import metrics
+from src.utils.helper import logger
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_title(title):
+    """'Bitcoin  Hits $100K!' -> 'bitcoin hits 100k' (untuk dedup lintas sumber)."""
+    return _NON_WORD.sub(' ', html.unescape(title or '').lower()).strip()
+
+
+def title_key(title):
+    return hashlib.sha1(normalize_title(title).encode('utf-8')).hexdigest()[:16]
+
+
+class NewsStore:
+    """Headline unik: {key: {'title', 'source', 'first_seen', 'published'}}."""
+
+    def __init__(self, max_items=None):
+        self.max_items = max_items or config.NEWS_STORE_MAX_ITEMS
+        self.items = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, title, source, published=None, now=None):
+        """Tambah headline. Return True jika baru (belum pernah terlihat)."""
+        title = (title or '').replace('\n', ' ').strip()
+        key = title_key(title)
+        if not title or not normalize_title(title) or key in self.items:
+            return False
+        self.items[key] = {
+            'title': title,
+            'source': source,
+            'first_seen': now or time.time(),
+            'published': published,
+        }
+        return True
+
+    @staticmethod
+    def _timestamp(item):
+        return item.get('published') or item['first_seen']
+
+    def prune(self, max_age_hours, now=None):
+        """Buang headline lebih tua dari max_age_hours, lalu yang paling lama jika melebihi max_items."""
+        cutoff = (now or time.time()) - max_age_hours * 3600
+        self.items = {k: v for k, v in self.items.items() if self._timestamp(v) >= cutoff}
+        if len(self.items) > self.max_items:
+            newest = sorted(self.items.items(), key=lambda kv: self._timestamp(kv[1]), reverse=True)
+            self.items = dict(newest[:self.max_items])
+
+    def headlines(self, limit=None, per_source=None):
+        """
+        Format lama raw_news: ['Judul (Sumber)', ...], terbaru dulu.
+        Maks `per_source` (default NEWS_MAX_PER_SOURCE) headline per sumber, agar satu feed
+        yang ramai tidak memenuhi seluruh `limit`.
+        """
+        per_source = per_source or config.NEWS_MAX_PER_SOURCE
+        ordered = sorted(self.items.values(), key=self._timestamp, reverse=True)
+        counts = {}
+        result = []
+        for item in ordered:
+            if limit is not None and len(result) >= limit:
+                break
+            counts[item['source']] = counts.get(item['source'], 0) + 1
+            if counts[item['source']] <= per_source:
+                result.append(f"{item['title']} ({item['source']})")
+        return result
+
+    def to_state(self):
+        return self.items
+
+    def load_state(self, items):
+        self.items = dict(items or {})
+
+
+# ------------------------------------------------------------------
+# PARSER (dijalankan di worker process)
+# ------------------------------------------------------------------
+
+_ATOM = '{http://www.w3.org/2005/Atom}'
+_DC_DATE = '{http://purl.org/dc/elements/1.1/}date'
+
+
+def _parse_date(text):
+    """RFC 822 (RSS pubDate) / ISO 8601 (Atom, dc:date) -> epoch, None jika tidak terbaca."""
+    text = (text or '').strip()
+    if not text:
+        return None
+    try:
+        return parsedate_to_datetime(text).timestamp()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        dt = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        return dt.timestamp() if dt.tzinfo else calendar.timegm(dt.timetuple())
+    except ValueError:
+        return None
+
+
+def _text(node, *paths):
+    for path in paths:
+        found = node.find(path)
+        if found is not None and found.text:
+            return html.unescape(found.text).strip()  # Judul sering double-escaped (&amp;#8217;)
+    return None
+
+
+def _fromstring(content):
+    """ET.fromstring untuk konten tidak tepercaya: tanpa entity expansion / external entity."""
+    return _defused_fromstring(content)  # EntitiesForbidden (subclass ValueError) -> feedparser
+
+
+def parse_simple(content):
+    """
+    Parser ringan (ElementTree, C) untuk RSS 2.0 / Atom well-formed.
+    Return [(title, source, published_ts)]; raise ValueError jika format tidak dikenali.
+    """
+    root = _fromstring(content)
+    if root.tag == f"{_ATOM}feed":
+        source = _text(root, f"{_ATOM}title") or 'Unknown Source'
+        return [
+            (_text(entry, f"{_ATOM}title") or '', source,
+             _parse_date(_text(entry, f"{_ATOM}published", f"{_ATOM}updated")))
+            for entry in root.iter(f"{_ATOM}entry")
+        ]
+    channel = root.find('channel')
+    if channel is None:
+        raise ValueError(f"Unknown feed root <{root.tag}>")
+    source = _text(channel, 'title') or 'Unknown Source'
+    return [
+        (_text(item, 'title') or '', source, _parse_date(_text(item, 'pubDate', _DC_DATE)))
+        for item in channel.iter('item')
+    ]
+
+
+def parse_feedparser(content):
+    """feedparser (toleran HTML / feed rusak, tapi pure-Python & berat)."""
+    import feedparser
+    feed = feedparser.parse(content)
+    source = html.unescape(feed.feed.get('title', 'Unknown Source'))
+    items = []
+    for entry in feed.entries:
+        published = entry.get('published_parsed') or entry.get('updated_parsed')
+        items.append((html.unescape(entry.get('title', '')), source, calendar.timegm(published) if published else None))
+    return items
+
+
+def parse_feed(content, fast=True):
+    """Worker: bytes feed -> (items, parse_ms, parser). items = [(title, source, published_ts)]."""
+    started = time.perf_counter()
+    items, parser = None, 'feedparser'
+    if fast:
+        try:
+            items, parser = parse_simple(content), 'simple'
+        except (ET.ParseError, ValueError):
+            items = None
+    if not items:
+        items, parser = parse_feedparser(content), 'feedparser'
+    return items, (time.perf_counter() - started) * 1000, parser
+
+
+_pool = None
+
+
+def get_pool():
+    """Process pool parse RSS (lazy). None jika NEWS_PARSE_WORKERS=0 (pakai thread)."""
+    global _pool
+    if _pool is None and config.NEWS_PARSE_WORKERS > 0:
+        # spawn: worker tidak mewarisi state thread / event loop proses utama
+        _pool = ProcessPoolExecutor(
+            max_workers=config.NEWS_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _pool
+
+
+async def parse_async(content, fast=True):
+    """Parse di process pool; jika pool rusak dibuat ulang sekali, lalu fallback ke thread."""
+    global _pool
+    loop = asyncio.get_running_loop()
+    for _ in range(2):
+        pool = get_pool()
+        if pool is None:
+            break
+        try:
+            return await loop.run_in_executor(pool, parse_feed, content, fast)
+        except BrokenProcessPool:
+            _pool = None
+    return await asyncio.to_thread(parse_feed, content, fast)
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# ------------------------------------------------------------------
+# FETCHER
+# ------------------------------------------------------------------
+
+class FeedFetcher:
+    """
+    Conditional GET per URL. fetch() -> [(title, source, published_ts)], atau None jika feed tidak berubah.
+    parse_stats: {url: {'last_ms', 'avg_ms', 'count', 'parser'}} untuk cari feed lambat.
+    """
+
+    def __init__(self):
+        self.validators = {}  # {url: {'etag', 'last_modified', 'digest'}}
+        self.parse_stats = {}
+
+    def _conditional_headers(self, url):
+        cached = self.validators.get(url) or {}
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def is_demoted(self, url):
+        """Feed dengan rata-rata parse > NEWS_SLOW_PARSE_MS (hanya di-poll saat refresh penuh)."""
+        stats = self.parse_stats.get(url)
+        return bool(stats) and stats['avg_ms'] > config.NEWS_SLOW_PARSE_MS
+
+    def _record_parse(self, url, parse_ms, parser):
+        metrics.histogram('rss_parse_ms').observe(parse_ms)
+        stats = self.parse_stats.get(url)
+        if stats is None:
+            stats = self.parse_stats[url] = {'avg_ms': parse_ms, 'count': 0}
+        was_demoted = self.is_demoted(url)
+        stats['avg_ms'] += (parse_ms - stats['avg_ms']) * 0.3  # EWMA
+        stats.update(last_ms=round(parse_ms, 2), count=stats['count'] + 1, parser=parser)
+        stats['avg_ms'] = round(stats['avg_ms'], 2)
+        if self.is_demoted(url) and not was_demoted:
+            logger.warning(f"🐢 RSS parse lambat {url}: {stats['avg_ms']:.0f}ms ({parser}), di-demote dari poll cepat")
+
+    def slowest(self, limit=5):
+        """[(url, stats)] urut rata-rata parse terlama."""
+        return sorted(self.parse_stats.items(), key=lambda kv: kv[1]['avg_ms'], reverse=True)[:limit]
+
+    async def fetch(self, session, url):
+        timeout = aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)
+        async with session.get(url, headers=self._conditional_headers(url), timeout=timeout) as response:
+            if response.status == 304:
+                metrics.counter('rss_not_modified').inc()
+                return None
+            response.raise_for_status()
+            content = await response.read()
+            metrics.counter('rss_bytes').inc(len(content))
+
+            digest = hashlib.sha1(content).hexdigest()
+            previous = self.validators.get(url) or {}
+            self.validators[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'digest': digest,
+            }
+            if previous.get('digest') == digest:
+                metrics.counter('rss_unchanged_body').inc()
+                return None  # Server tanpa 304, tapi isi sama persis
+
+        metrics.counter('rss_parsed').inc()
+        items, parse_ms, parser = await parse_async(content, config.NEWS_PARSER_FAST)
+        self._record_parse(url, parse_ms, parser)
+        return items
@@ -0,0 +1,94 @@
+"""
+Index berita: tiap headline di-tag sekali (Aho-Corasick atas semua keyword makro / koin / BTC),
+lalu hasil filter per simbol disimpan. Dibangun ulang hanya saat raw_news berganti (tiap fetch),
+sehingga get_latest(symbol) di main loop cukup lookup.
+
+Matcher memakai pyahocorasick jika terpasang (opsional), selain itu implementasi Python murni.
+Semantik sama dengan `kw in headline.lower()` (substring, case-insensitive lewat lower()).
+"""
+
+from collections import deque
+
+try:
+    import ahocorasick  # optional dependency (pyahocorasick, C extension)
+except ImportError:
+    ahocorasick = None
+
+MATCHER = 'pyahocorasick' if ahocorasick else 'python'
+
+
+class AhoCorasick:
+    """Automaton multi-pattern: findall(text) -> set keyword yang muncul (termasuk yang overlap)."""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [set()]
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(set())
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.out[state].add(keyword)
+
+        # BFS: fail link ke suffix terpanjang yang juga prefix keyword lain
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.out[child] |= self.out[self.fail[child]]
+
+    def findall(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        state, found = 0, set()
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+def build_matcher(keywords):
+    """keywords -> fungsi text -> set keyword yang muncul."""
+    keywords = {kw for kw in keywords if kw}
+    if not keywords:
+        return lambda text: set()
+    if ahocorasick:
+        automaton = ahocorasick.Automaton()
+        for kw in keywords:
+            automaton.add_word(kw, kw)
+        automaton.make_automaton()
+        return lambda text: {kw for _, kw in automaton.iter(text)}
+    return AhoCorasick(keywords).findall
+
+
+class NewsIndex:
+    """Tag keyword per headline + memo hasil filter per simbol (`results`)."""
+
+    def __init__(self, headlines, keywords):
+        self.headlines = list(headlines)
+        self.keywords = {kw for kw in keywords if kw}
+        matcher = build_matcher(self.keywords)
+        self.tags = [matcher(headline.lower()) for headline in self.headlines]
+        self.results = {}
+
+    def has_any(self, i, keywords):
+        """Setara any(kw in headlines[i].lower() for kw in keywords)."""
+        tags = self.tags[i]
+        for kw in keywords:
+            if kw in tags:
+                return True
+            if kw not in self.keywords and kw in self.headlines[i].lower():
+                return True  # Keyword di luar index (simbol tidak terdaftar)
+        return False
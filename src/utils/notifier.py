@@ -0,0 +1,182 @@
+"""
+TelegramDispatcher: pengirim notifikasi Telegram di background.
+
+- Caller (kirim_tele) hanya enqueue, jadi Telegram lambat/down tidak pernah menahan trading.
+- Priority queue bounded: alert (prioritas 0) didahulukan dari pesan biasa (1).
+  Jika antrian penuh, pesan baru dibuang dan dicatat di counter `telegram_dropped`.
+- Coalescing: pesan dengan judul (baris pertama) sama yang masih antri digabung
+  menjadi satu pesan, mis. burst "ORDER SYNC" dari beberapa simbol.
+- Rate limit per chat: jeda minimal antar pesan + maksimal N pesan per 60 detik
+  (limit Telegram untuk group ~20 pesan/menit).
+- Retry dengan exponential backoff; `retry_after` dari respons 429 dihormati.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+
+import config
+from src.utils import metrics
+from src.utils.helper import logger, post_telegram
+
+PRIORITY_ALERT = 0
+PRIORITY_NORMAL = 1
+
+# Batas aman di bawah limit 4096 karakter per pesan Telegram
+MAX_MESSAGE_LEN = 3800
+ALERT_PREFIX = "⚠️ <b>SYSTEM ALERT</b>\n"
+
+
+class _Pending:
+    """Satu pesan di antrian (bisa berisi beberapa pesan yang sudah digabung)."""
+    __slots__ = ('key', 'channel', 'alert', 'title', 'bodies', 'created_at')
+
+    def __init__(self, key, channel, alert, title, body):
+        self.key = key
+        self.channel = channel
+        self.alert = alert
+        self.title = title
+        self.bodies = [body]
+        self.created_at = time.monotonic()
+
+    def size(self):
+        return len(self.title) + sum(len(b) + 3 for b in self.bodies)
+
+    def render(self):
+        prefix = ALERT_PREFIX if self.alert else ""
+        if len(self.bodies) == 1:
+            body = self.bodies[0]
+            return f"{prefix}{self.title}\n{body}" if body else f"{prefix}{self.title}"
+        merged = "\n➖➖➖\n".join(b for b in self.bodies if b)
+        return f"{prefix}{self.title} (x{len(self.bodies)})\n{merged}"
+
+
+class TelegramDispatcher:
+    def __init__(self, sender=None):
+        self._sender = sender or post_telegram
+        self._queue = None
+        self._task = None
+        self._seq = itertools.count()
+        self._open = {}       # key -> _Pending yang masih antri (bisa di-coalesce)
+        self._sent_at = {}    # channel -> deque timestamp kirim (monotonic)
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Jalankan worker di event loop yang sedang berjalan."""
+        if self.running:
+            return
+        self._queue = asyncio.PriorityQueue(maxsize=config.TELEGRAM_QUEUE_MAXSIZE)
+        self._open.clear()
+        self._task = asyncio.get_running_loop().create_task(self._worker())
+        logger.info("📨 Telegram Dispatcher started.")
+
+    async def stop(self, timeout=5.0):
+        """Kirim sisa antrian (maks `timeout` detik) lalu hentikan worker."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Telegram Dispatcher stop: {self._queue.qsize()} pesan tidak terkirim.")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def enqueue(self, pesan, alert=False, channel='default'):
+        """
+        Masukkan pesan ke antrian (non-blocking).
+        Return True jika diterima (baru / digabung), False jika dibuang karena antrian penuh.
+        """
+        title, _, body = str(pesan).partition("\n")
+        key = (channel, alert, title)
+
+        pending = self._open.get(key)
+        if pending is not None and pending.size() + len(body) + 3 <= MAX_MESSAGE_LEN:
+            pending.bodies.append(body)
+            metrics.counter('telegram_coalesced').inc()
+            return True
+
+        pending = _Pending(key, channel, alert, title, body)
+        priority = PRIORITY_ALERT if alert else PRIORITY_NORMAL
+        try:
+            self._queue.put_nowait((priority, next(self._seq), pending))
+        except asyncio.QueueFull:
+            metrics.counter('telegram_dropped').inc()
+            logger.warning(f"⚠️ Telegram queue penuh, pesan dibuang: {title[:60]}")
+            return False
+
+        self._open[key] = pending
+        metrics.counter('telegram_enqueued').inc()
+        return True
+
+    def qsize(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ------------------------------------------------------------------
+    # WORKER
+    # ------------------------------------------------------------------
+
+    async def _worker(self):
+        while True:
+            _, _, pending = await self._queue.get()
+            try:
+                await self._wait_rate_limit(pending.channel)
+                # Tutup coalescing tepat sebelum kirim: pesan sejenis yang masuk
+                # selama menunggu rate limit masih ikut tergabung.
+                if self._open.get(pending.key) is pending:
+                    del self._open[pending.key]
+                await self._deliver(pending)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Telegram Dispatcher error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _wait_rate_limit(self, channel):
+        sent = self._sent_at.setdefault(channel, deque())
+        now = time.monotonic()
+        while sent and now - sent[0] >= 60:
+            sent.popleft()
+
+        wait = 0.0
+        if sent:
+            wait = sent[-1] + config.TELEGRAM_MIN_INTERVAL - now
+        if len(sent) >= config.TELEGRAM_MAX_PER_MINUTE:
+            wait = max(wait, sent[0] + 60 - now)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _deliver(self, pending):
+        text = pending.render()
+        for attempt in range(config.TELEGRAM_MAX_RETRIES + 1):
+            status, retry_after = await self._sender(text, pending.channel)
+            self._sent_at.setdefault(pending.channel, deque()).append(time.monotonic())
+
+            if status == 'ok':
+                metrics.counter('telegram_sent').inc()
+                metrics.histogram('telegram_queue_delay_ms').observe(
+                    (time.monotonic() - pending.created_at) * 1000)
+                return True
+            if status == 'fatal':
+                break
+            if attempt < config.TELEGRAM_MAX_RETRIES:
+                delay = retry_after or min(config.TELEGRAM_RETRY_BASE_DELAY * (2 ** attempt),
+                                           config.TELEGRAM_RETRY_MAX_DELAY)
+                metrics.counter('telegram_retries').inc()
+                await asyncio.sleep(delay)
+
+        metrics.counter('telegram_failed').inc()
+        logger.error(f"❌ Telegram gagal terkirim setelah retry: {pending.title[:60]}")
+        return False
+
+
+# Instance global (dipakai kirim_tele & main)
+dispatcher = TelegramDispatcher()
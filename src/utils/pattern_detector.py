@@ -0,0 +1,231 @@
+"""
+Deteksi pattern chart lokal (numpy, tanpa AI) dari candle TIMEFRAME_SETUP yang sama dengan chart Vision.
+
+Detektor (tervektorisasi, jendela PATTERN_DETECT_LOOKBACK candle terakhir):
+  macd_divergence    : dua swing terakhir harga LL / HH tapi histogram MACD HL / LH
+  flag / pennant     : pole >= PATTERN_FLAG_POLE_MIN_ATR x ATR lalu konsolidasi sempit
+                       (channel sejajar melawan pole = flag, garis menyempit = pennant)
+  double_top/bottom  : dua swing high / low setara (PATTERN_DOUBLE_TOLERANCE_PCT) dengan neckline di antaranya
+  volume_climax      : volume >= PATTERN_VOLUME_CLIMAX_MULT x median di ujung trend (exhaustion)
+
+detect() -> dict: patterns, bias, confidence, conclusive, summary, raw_stats.
+Konklusif = ada pattern terkonfirmasi dengan confidence >= PATTERN_DETECT_MIN_CONFIDENCE dan semua
+pattern searah. Double top/bottom yang masih forming (neckline belum break) tidak bisa konklusif.
+PatternRecognizer hanya memanggil Vision jika hasil tidak konklusif (atau PATTERN_VISION_ALWAYS).
+"""
+
+import numpy as np
+import pandas as pd
+
+import config
+
+ATR_PERIOD = 14
+
+
+def _clamp(value):
+    return float(max(0.0, min(1.0, value)))
+
+
+def _ema(values, span):
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def _atr(highs, lows, closes, period=ATR_PERIOD):
+    prev_close = np.concatenate([[closes[0]], closes[:-1]])
+    true_range = np.maximum(highs - lows, np.maximum(abs(highs - prev_close), abs(lows - prev_close)))
+    return float(true_range[-period:].mean())
+
+
+def _swings(values, window, mode):
+    """Index swing high (mode='high') / swing low: nilai ekstrem di jendela +-window candle."""
+    if len(values) < 2 * window + 1:
+        return np.array([], dtype=int)
+    views = np.lib.stride_tricks.sliding_window_view(values, 2 * window + 1)
+    extreme = views.max(axis=1) if mode == 'high' else views.min(axis=1)
+    idx = np.flatnonzero(values[window:len(values) - window] == extreme) + window
+    if len(idx) > 1:
+        idx = idx[np.concatenate([[True], np.diff(idx) > window])]  # Plateau -> candle pertama saja
+    return idx
+
+
+def _pattern(name, bias, confidence, note, **detail):
+    return {'name': name, 'bias': bias, 'confidence': round(_clamp(confidence), 2), 'note': note, 'detail': detail}
+
+
+# ------------------------------------------------------------------
+# DETEKTOR
+# ------------------------------------------------------------------
+
+def detect_divergence(highs, lows, hist):
+    """Divergence harga vs histogram MACD pada dua swing terakhir (swing kedua harus baru)."""
+    window, n = config.PATTERN_DETECT_PIVOT_WINDOW, len(hist)
+    hist_span = float(np.ptp(hist)) or 1.0
+    patterns = []
+    for mode, price in (('low', lows), ('high', highs)):
+        idx = _swings(price, window, mode)
+        if len(idx) < 2:
+            continue
+        a, b = idx[-2], idx[-1]
+        if n - 1 - b > config.PATTERN_DETECT_RECENT_BARS:
+            continue
+        if mode == 'low' and price[b] < price[a] and hist[b] > hist[a]:
+            name, bias, same_side = 'bullish_divergence', 'BULLISH', hist[b] < 0
+        elif mode == 'high' and price[b] > price[a] and hist[b] < hist[a]:
+            name, bias, same_side = 'bearish_divergence', 'BEARISH', hist[b] > 0
+        else:
+            continue
+        strength = abs(hist[b] - hist[a]) / hist_span
+        note = f"{name.replace('_', ' ')} ({'LL' if mode == 'low' else 'HH'} price vs {'HL' if mode == 'low' else 'LH'} MACD hist, {b - a} bars apart)"
+        patterns.append(_pattern(name, bias, 0.4 + 0.4 * strength + (0.2 if same_side else 0), note,
+                                 bars_apart=int(b - a), bars_ago=int(n - 1 - b)))
+    return patterns
+
+
+def detect_flag(highs, lows, closes, atr):
+    """Pole kuat diikuti konsolidasi PATTERN_FLAG_BARS candle yang retrace < 50% pole."""
+    pole_bars, flag_bars = config.PATTERN_FLAG_POLE_BARS, config.PATTERN_FLAG_BARS
+    if len(closes) < pole_bars + flag_bars + 1 or atr <= 0:
+        return []
+    pole = closes[-flag_bars - 1] - closes[-flag_bars - pole_bars - 1]
+    pole_atr = abs(pole) / atr
+    if pole_atr < config.PATTERN_FLAG_POLE_MIN_ATR:
+        return []
+    flag_highs, flag_lows = highs[-flag_bars:], lows[-flag_bars:]
+    height = flag_highs.max() - flag_lows.min()
+    if height > abs(pole) * 0.5:
+        return []  # Retrace terlalu dalam -> bukan flag
+
+    x = np.arange(flag_bars)
+    upper_slope = np.polyfit(x, flag_highs, 1)[0] / atr  # Slope per candle dalam satuan ATR
+    lower_slope = np.polyfit(x, flag_lows, 1)[0] / atr
+    direction = 1 if pole > 0 else -1
+    side = 'bull' if direction > 0 else 'bear'
+    if upper_slope < 0 < lower_slope:
+        shape = 'pennant'
+    elif upper_slope * direction <= 0.05 and lower_slope * direction <= 0.05 and abs(upper_slope - lower_slope) <= 0.1:
+        shape = 'flag'  # Channel sejajar, datar / miring melawan pole
+    else:
+        return []
+
+    tightness = 1 - height / (abs(pole) * 0.5)
+    strength = _clamp(pole_atr / (2 * config.PATTERN_FLAG_POLE_MIN_ATR))
+    note = f"{side} {shape} (pole {pole_atr:.1f} ATR, {flag_bars}-bar consolidation {height / abs(pole):.0%} of pole)"
+    return [_pattern(f"{side}_{shape}", 'BULLISH' if direction > 0 else 'BEARISH', 0.4 + 0.3 * tightness + 0.3 * strength,
+                     note, pole_atr=round(pole_atr, 2), retrace=round(height / abs(pole), 3))]
+
+
+def detect_double(highs, lows, closes, atr):
+    """Double top / bottom: dua swing terakhir setara, neckline cukup dalam; konfirmasi jika close tembus neckline."""
+    window, n = config.PATTERN_DETECT_PIVOT_WINDOW, len(closes)
+    patterns = []
+    for mode, price in (('high', highs), ('low', lows)):
+        idx = _swings(price, window, mode)
+        if len(idx) < 2 or atr <= 0:
+            continue
+        a, b = idx[-2], idx[-1]
+        if b - a < config.PATTERN_DOUBLE_MIN_SEPARATION or n - 1 - b > config.PATTERN_DETECT_RECENT_BARS:
+            continue
+        level = (price[a] + price[b]) / 2
+        diff_pct = abs(price[a] - price[b]) / level * 100
+        if diff_pct > config.PATTERN_DOUBLE_TOLERANCE_PCT:
+            continue
+        if mode == 'high':
+            neckline = lows[a:b + 1].min()
+            depth, confirmed = level - neckline, closes[-1] < neckline
+            name, bias = 'double_top', 'BEARISH'
+        else:
+            neckline = highs[a:b + 1].max()
+            depth, confirmed = neckline - level, closes[-1] > neckline
+            name, bias = 'double_bottom', 'BULLISH'
+        if depth < config.PATTERN_DOUBLE_MIN_DEPTH_ATR * atr:
+            continue
+        match = 1 - diff_pct / config.PATTERN_DOUBLE_TOLERANCE_PCT
+        note = f"{name.replace('_', ' ')} {'confirmed (neckline broken)' if confirmed else 'forming'}, {b - a} bars apart"
+        patterns.append(_pattern(name, bias, 0.35 + 0.25 * match + (0.4 if confirmed else 0), note,
+                                 level=float(level), neckline=float(neckline), confirmed=bool(confirmed)))
+    return patterns
+
+
+def detect_volume_climax(opens, closes, volumes):
+    """Volume ekstrem di 3 candle terakhir searah trend sebelumnya -> exhaustion (buying / selling climax)."""
+    if len(volumes) < config.PATTERN_FLAG_POLE_BARS + 3:
+        return []
+    baseline = float(np.median(volumes[:-3])) or 1.0
+    recent = volumes[-3:]
+    ratio = recent.max() / baseline
+    if ratio < config.PATTERN_VOLUME_CLIMAX_MULT:
+        return []
+    i = len(volumes) - 3 + int(recent.argmax())
+    trend = closes[i] - closes[i - config.PATTERN_FLAG_POLE_BARS]
+    if closes[i] >= opens[i] and trend > 0:
+        name, bias = 'buying_climax', 'BEARISH'
+    elif closes[i] < opens[i] and trend < 0:
+        name, bias = 'selling_climax', 'BULLISH'
+    else:
+        return []  # Volume besar melawan trend: breakout / reversal awal, ambigu
+    note = f"{name.replace('_', ' ')} (volume {ratio:.1f}x median after {'up' if trend > 0 else 'down'}trend)"
+    # Maks 0.55: climax hanya pendukung, tidak pernah konklusif sendirian
+    confidence = min(0.55, 0.3 + 0.05 * (ratio - config.PATTERN_VOLUME_CLIMAX_MULT))
+    return [_pattern(name, bias, confidence, note, volume_ratio=round(ratio, 2))]
+
+
+# ------------------------------------------------------------------
+# ENTRY POINT
+# ------------------------------------------------------------------
+
+def detect(candles, timeframe=None):
+    """
+    Jalankan semua detektor pada candle [ts, o, h, l, c, v].
+    Return None jika data kurang (< PATTERN_DETECT_LOOKBACK + MACD_SLOW candle).
+    """
+    lookback = config.PATTERN_DETECT_LOOKBACK
+    if not candles or len(candles) < lookback + config.MACD_SLOW:
+        return None
+    data = np.asarray([list(c)[:6] for c in candles], dtype=float)
+    closes_all = data[:, 4]
+    macd = _ema(closes_all, config.MACD_FAST) - _ema(closes_all, config.MACD_SLOW)
+    signal = _ema(macd, config.MACD_SIGNAL)
+
+    tail = slice(-lookback, None)
+    opens, highs, lows, closes, volumes = (data[tail, i] for i in range(1, 6))
+    hist = (macd - signal)[tail]
+    atr = _atr(highs, lows, closes)
+
+    patterns = (detect_divergence(highs, lows, hist) + detect_flag(highs, lows, closes, atr)
+                + detect_double(highs, lows, closes, atr) + detect_volume_climax(opens, closes, volumes))
+    patterns.sort(key=lambda p: p['confidence'], reverse=True)
+
+    biases = {p['bias'] for p in patterns}
+    confidence = patterns[0]['confidence'] if patterns else 0.0
+    bias = biases.pop() if len(biases) == 1 else ('MIXED' if patterns else 'NEUTRAL')
+    decisive = [p for p in patterns if p['detail'].get('confirmed', True)]
+    conclusive = (bias != 'MIXED' and bool(decisive)
+                  and decisive[0]['confidence'] >= config.PATTERN_DETECT_MIN_CONFIDENCE)
+
+    if patterns:
+        found = "; ".join(f"{p['note']} conf {p['confidence']:.2f}" for p in patterns)
+        summary = f"{bias}. Local pattern detectors ({timeframe or config.TIMEFRAME_SETUP}): {found}."
+    else:
+        summary = f"NEUTRAL. Local pattern detectors ({timeframe or config.TIMEFRAME_SETUP}) found no pattern."
+
+    last = data[-1]
+    raw_stats = {
+        "close": last[4], "open": last[1], "high": last[2], "low": last[3], "volume": last[5],
+        "macd": float(macd[-1]), "macd_signal": float(signal[-1]), "macd_hist": float(macd[-1] - signal[-1]),
+        "last_ts": str(pd.to_datetime(int(last[0]), unit='ms')),
+    }
+    return {
+        'patterns': patterns,
+        'bias': bias,
+        'confidence': confidence,
+        'conclusive': conclusive,
+        'summary': summary,
+        'raw_stats': raw_stats,
+    }
+
+
+def format_patterns(detected):
+    """Ringkasan satu baris untuk prompt: 'bull_flag BULLISH 0.72, ...' atau 'none'."""
+    if not detected or not detected.get('patterns'):
+        return "none"
+    return ", ".join(f"{p['name']} {p['bias']} {p['confidence']:.2f}" for p in detected['patterns'])
@@ -0,0 +1,117 @@
+"""
+Pre-screening lokal (tanpa AI) untuk meranking kandidat sebelum masuk worker pool AI.
+
+score_candidate() memberi skor 0-100 dari output get_technical_data:
+  trend     : keselarasan posisi harga vs EMA dengan trend major (& BTC jika relevan)
+  rsi       : seberapa ekstrem RSI dari 50
+  wick      : kekuatan wick rejection terakhir
+  orderbook : besar imbalance order book (2% depth)
+  pivot     : kedekatan harga ke S1 / R1
+Bobot tiap komponen diatur di config.PRESCREEN_WEIGHTS.
+
+ScoreBoard mengumpulkan skor per candle dan menghasilkan ringkasan distribusi
+saat candle berganti, untuk tuning bobot.
+"""
+
+import statistics
+
+import config
+from src.utils import metrics
+
+COMPONENTS = ('trend', 'rsi', 'wick', 'orderbook', 'pivot')
+
+
+def _clamp(value):
+    return max(0.0, min(1.0, value))
+
+
+def _trend_component(tech_data, show_btc_context):
+    ema_pos = str(tech_data.get('price_vs_ema', '')).upper()
+    major = str(tech_data.get('trend_major', '')).upper()
+    direction = 'BULLISH' if ema_pos == 'ABOVE' else 'BEARISH' if ema_pos == 'BELOW' else None
+    if direction is None:
+        return 0.0
+
+    score = 1.0 if major == direction else 0.3
+    if show_btc_context:
+        btc = str(tech_data.get('btc_trend', 'NEUTRAL')).upper()
+        if btc == direction:
+            score = min(1.0, score + 0.2)
+        elif btc in ('BULLISH', 'BEARISH'):
+            score *= 0.5
+    return _clamp(score)
+
+
+def _pivot_component(tech_data):
+    pivots = tech_data.get('pivots')
+    price = tech_data.get('price', 0)
+    if not pivots or not price:
+        return 0.0
+    dists = [abs(price - level) / level * 100 for level in (pivots.get('S1'), pivots.get('R1')) if level]
+    if not dists:
+        return 0.0
+    return _clamp(1 - min(dists) / config.PRESCREEN_PIVOT_RANGE_PCT)
+
+
+def score_candidate(tech_data, show_btc_context=False):
+    """
+    Hitung skor pre-screen (0-100).
+    Returns:
+        tuple: (score: float, components: dict nilai 0-1 per komponen)
+    """
+    rsi = tech_data.get('rsi', 50) or 50
+    wick = tech_data.get('wick_rejection') or {}
+    ob = tech_data.get('order_book') or {}
+
+    components = {
+        'trend': _trend_component(tech_data, show_btc_context),
+        'rsi': _clamp(abs(rsi - 50) / 30),
+        'wick': 0.0 if wick.get('recent_rejection', 'NONE') in ('NONE', 'ERROR')
+                else _clamp(wick.get('rejection_strength', 0) / config.PRESCREEN_WICK_STRENGTH_MAX),
+        'orderbook': _clamp(abs(ob.get('imbalance_pct', 0)) / config.PRESCREEN_IMBALANCE_MAX_PCT),
+        'pivot': _pivot_component(tech_data),
+    }
+
+    weights = config.PRESCREEN_WEIGHTS
+    total_weight = sum(weights.get(name, 0) for name in COMPONENTS)
+    if total_weight <= 0:
+        return 0.0, components
+    score = sum(weights.get(name, 0) * components[name] for name in COMPONENTS) / total_weight * 100
+    return round(score, 1), components
+
+
+class ScoreBoard:
+    """Kumpulkan skor pre-screen per candle; ringkas distribusinya saat candle berganti."""
+
+    def __init__(self):
+        self.candle_ts = None
+        self.entries = {}  # symbol -> (score, components)
+
+    def record(self, candle_ts, symbol, score, components):
+        """
+        Catat skor simbol untuk candle ini.
+        Return ringkasan (str) candle sebelumnya jika candle baru dimulai, selain itu None.
+        """
+        summary = None
+        if self.candle_ts is not None and candle_ts > self.candle_ts:
+            summary = self.summary()
+            self.entries = {}
+        if self.candle_ts is None or candle_ts >= self.candle_ts:
+            self.candle_ts = candle_ts
+        self.entries[symbol] = (score, components)
+        metrics.histogram('prescreen_score').observe(score)
+        return summary
+
+    def summary(self, top=5):
+        if not self.entries:
+            return None
+        scores = sorted((s for s, _ in self.entries.values()), reverse=True)
+        ranked = sorted(self.entries.items(), key=lambda kv: kv[1][0], reverse=True)[:top]
+        comp_avg = {
+            name: round(statistics.fmean(c[name] for _, c in self.entries.values()), 2)
+            for name in COMPONENTS
+        }
+        top_str = ", ".join(f"{sym} {score:.0f}" for sym, (score, _) in ranked)
+        return (f"candle {self.candle_ts} n={len(scores)} "
+                f"min={scores[-1]:.0f} p50={statistics.median(scores):.0f} max={scores[0]:.0f} | "
+                f"top: {top_str} | avg komponen: {comp_avg}")
@@ -1,6 +1,9 @@
 
 import config
 import re
+from src.utils.pattern_detector import format_patterns
+from src.utils.stablecoin_history import format_inflows
+from src.utils.whale_flow import format_flow
 
 def sanitize_prompt_input(text: str, max_length: int = 1000) -> str:
     """
@@ -120,6 +123,129 @@ def get_trend_narrative(price: float, ema_fast: float, ema_slow: float) -> tuple
     
     return trend_narrative, ema_alignment
 
+def _bucket(value, size):
+    """Diskretisasi nilai numerik ke batas bawah bucket (mis. RSI 47 / size 5 -> 45)."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not size or size <= 0:
+        return round(value, 4)
+    return int(value // size * size)
+
+
+def build_market_features(symbol, tech_data, sentiment_data, pattern_analysis=None, show_btc_context=True, sentiment_analysis=None):
+    """
+    Ringkasan fitur ter-bucket dari input build_market_prompt, untuk cache keputusan AI.
+    Dua state pasar dengan fitur identik dianggap "sama" sehingga keputusan AI lama boleh dipakai ulang.
+    Ukuran bucket diatur via config.AI_DECISION_CACHE_*_BUCKET.
+    """
+    if not tech_data or tech_data.get('price', 0) == 0:
+        return None
+
+    price = tech_data.get('price', 0)
+    trend_narrative, ema_alignment = get_trend_narrative(price, tech_data.get('ema_fast', 0), tech_data.get('ema_slow', 0))
+
+    # Posisi harga terhadap pivot (zona, bukan jarak persis)
+    pivot_side = "N/A"
+    pivots = tech_data.get('pivots')
+    if pivots:
+        if price > pivots['R1']:
+            pivot_side = "ABOVE_R1"
+        elif price < pivots['S1']:
+            pivot_side = "BELOW_S1"
+        else:
+            pivot_side = "MID_RANGE"
+
+    vol_ma = tech_data.get('vol_ma', 0)
+    vol_spike = vol_ma > 0 and tech_data.get('volume', 0) / vol_ma >= config.VOLUME_SPIKE_MULTIPLIER
+
+    # Verdict pattern Vision (keyword pertama yang muncul)
+    pattern_verdict = "NONE"
+    if pattern_analysis and pattern_analysis.get('is_valid', True):
+        text = str(pattern_analysis.get('analysis', '')).upper()
+        found = [(text.find(k), k) for k in config.PATTERN_REQUIRED_KEYWORDS if k in text]
+        if found:
+            pattern_verdict = min(found)[1]
+
+    sentiment_data = sentiment_data or {}
+    features = {
+        'symbol': symbol,
+        'rsi': _bucket(tech_data.get('rsi', 50), config.AI_DECISION_CACHE_RSI_BUCKET),
+        'stoch_k': _bucket(tech_data.get('stoch_k', 50), config.AI_DECISION_CACHE_RSI_BUCKET * 2),
+        'trend': trend_narrative.split(' - ')[0],
+        'ema_alignment': ema_alignment.split(' ')[0],
+        'trend_major': tech_data.get('trend_major', 'UNKNOWN'),
+        'structure': tech_data.get('market_structure', 'UNKNOWN'),
+        'pivot_side': pivot_side,
+        'wick': (tech_data.get('wick_rejection') or {}).get('recent_rejection', 'NONE'),
+        'volume_spike': bool(vol_spike),
+        'ob_imbalance': _bucket((tech_data.get('order_book') or {}).get('imbalance_pct', 0), config.AI_DECISION_CACHE_IMBALANCE_BUCKET),
+        'fng': _bucket(sentiment_data.get('fng_value', 50), config.AI_DECISION_CACHE_SENTIMENT_BUCKET),
+        'pattern': pattern_verdict,
+    }
+    if show_btc_context:
+        features['btc_trend'] = tech_data.get('btc_trend', 'NEUTRAL')
+    if sentiment_analysis and isinstance(sentiment_analysis, dict):
+        features['sentiment'] = _bucket(sentiment_analysis.get('sentiment_score', 50), config.AI_DECISION_CACHE_SENTIMENT_BUCKET)
+    return features
+
+
+# Aturan protokol keputusan (statis, dipakai prompt legacy & PromptCompiler)
+DECISION_PROTOCOL_RULES = """2. ZONE ANALYSIS:
+   - Identify if Price is testing key levels (Pivot S1 or R1).
+   - If Price is strictly between S1 and R1 -> "MID_RANGE" (INSIDE_RANGE).
+
+3. INTERPRET REACTION (Zone Reaction):
+   - WICK_REJECTION: Wick penetrates level, Body closes back inside range. (Signal: Reversal)
+   - BREAKOUT_CLOSE: Candle Body closes BEYOND the level with volume. (Signal: Breakout/Continuation)
+   - TESTING: Price hovering at level without clear resolution. (Signal: Wait)
+
+4. STRATEGY MAPPING:
+   - REJECTION at S1 -> Validates LIQUIDITY_REVERSAL_MASTER (Long)
+   - REJECTION at R1 -> Validates LIQUIDITY_REVERSAL_MASTER (Short)
+   - BREAKOUT below S1 -> Validates BREAKDOWN_FOLLOW (Short)
+   - BREAKOUT above R1 -> Validates BREAKDOWN_FOLLOW (Long)
+   - STRONG TREND + PULLBACK in MID_RANGE -> Validates PULLBACK_CONTINUATION
+
+5. NO-TRADE CONDITIONS:
+   - MID_RANGE with no clear trend or pullback.
+   - Trend Lock active and Setup contradicts major trend (and no exception met).
+"""
+
+
+def render_strategy_list():
+    """Daftar strategi dari config.AVAILABLE_STRATEGIES (placeholder {config.X} di-format)."""
+    strategies = ["AVAILABLE STRATEGIES:"]
+    for name, desc in config.AVAILABLE_STRATEGIES.items():
+        # [MODIFIED] Dynamically format description to replace placeholders like {config.TIMEFRAME_TREND}
+        try:
+            formatted_desc = desc.format(config=config)
+        except Exception:
+            formatted_desc = desc
+        strategies.append(f"[{name}]: {formatted_desc}")
+    return "\n".join(strategies)
+
+
+def render_strategy_instruction():
+    """Blok 6-7 (pemilihan strategi & mode eksekusi)."""
+    execution_mode_text = '- Market Order: Available for confirmed setups' if config.ENABLE_MARKET_ORDERS else 'pass'
+    return config.PROMPT_STRATEGY_SELECTION.format(
+        volume_spike=config.VOLUME_SPIKE_MULTIPLIER,
+        adx_period=config.ADX_PERIOD,
+        ema_fast=config.EMA_FAST,
+        ema_slow=config.EMA_SLOW,
+        execution_mode_text=execution_mode_text
+    )
+
+
+def render_output_format():
+    execution_mode_json = '{ "MARKET" | "LIMIT" }' if config.ENABLE_MARKET_ORDERS else '"LIMIT"'
+    return config.PROMPT_MARKET_ANALYSIS_OUTPUT_FORMAT.format(
+        execution_mode_json=execution_mode_json
+    )
+
+
 def build_market_prompt(symbol, tech_data, sentiment_data, onchain_data, pattern_analysis=None, dual_scenarios=None, show_btc_context=True, sentiment_analysis=None):
     """
     Menyusun prompt untuk AI berdasarkan data teknikal, sentimen, dan on-chain.
@@ -218,6 +344,9 @@ def build_market_prompt(symbol, tech_data, sentiment_data, onchain_data, pattern
     long_pct = float(lsr_data.get('longAccount', 0)) * 100 if lsr_data.get('longAccount') else 0
     short_pct = float(lsr_data.get('shortAccount', 0)) * 100 if lsr_data.get('shortAccount') else 0
 
+    # Whale flow simbol ini (agregat rolling 5m/1h/4h dari aggTrade)
+    whale_flow_str = format_flow((onchain_data or {}).get('whale_flow')) or "No whale trades"
+
     # [NEW] Parsing Last Candle for Sweep Validation
     last_candle = tech_data.get('last_candle', {})
     last_open = last_candle.get('open', 0)
@@ -258,7 +387,7 @@ def build_market_prompt(symbol, tech_data, sentiment_data, onchain_data, pattern
     else:
         # [FALLBACK] Use Raw Data (Mini Mode)
         # Hemat token: Cuma F&G + Stablecoin Inflow, tanpa list berita panjang
-        inflow_status = onchain_data.get('stablecoin_inflow', 'Neutral')
+        inflow_status = format_inflows(onchain_data.get('stablecoin_inflow', 'Neutral'), onchain_data.get('stablecoin_inflows'))
         sentiment_section_str = (
             f"- Fear & Greed Index: {fng_value} ({fng_text})\n"
             f"- Stablecoin Inflow: {inflow_status}\n"
@@ -270,20 +399,7 @@ def build_market_prompt(symbol, tech_data, sentiment_data, onchain_data, pattern
     # ==========================================
     
     # Strategy List
-    strategies = ["AVAILABLE STRATEGIES:"]
-    for name, desc in config.AVAILABLE_STRATEGIES.items():
-        # [MODIFIED] Dynamically format description to replace placeholders like {config.TIMEFRAME_TREND}
-        try:
-            formatted_desc = desc.format(config=config)
-        except Exception:
-            formatted_desc = desc
-        strategies.append(f"[{name}]: {formatted_desc}")
-    
-    # Additional Context
-    # strategies.append("\nADDITIONAL RULES:")
-    # Additional Context
-    
-    strat_str = "\n".join(strategies)
+    strat_str = render_strategy_list()
 
     # Dynamic BTC Warning
     btc_instruction = ""
@@ -348,6 +464,8 @@ SCENARIO B: Sell/Short Setup
     pattern_section_content = f"- Chart Pattern Analysis: {pattern_text}\n"
     if raw_stats_str:
         pattern_section_content += f"{raw_stats_str}\n"
+    if isinstance(pattern_analysis, dict) and pattern_analysis.get('detected'):
+        pattern_section_content += f"- [LOCAL PATTERNS] {format_patterns(pattern_analysis['detected'])}\n"
     
 
 
@@ -398,15 +516,7 @@ SCENARIO B: Sell/Short Setup
 
     # [LOGIC: STRATEGY INSTRUCTION - LIQUIDITY HUNT PROTOCOL]
     # [LOGIC: STRATEGY INSTRUCTION - LIQUIDITY HUNT PROTOCOL]
-    execution_mode_text = '- Market Order: Available for confirmed setups' if config.ENABLE_MARKET_ORDERS else 'pass'
-    
-    strategy_instruction = config.PROMPT_STRATEGY_SELECTION.format(
-        volume_spike=config.VOLUME_SPIKE_MULTIPLIER,
-        adx_period=config.ADX_PERIOD,
-        ema_fast=config.EMA_FAST,
-        ema_slow=config.EMA_SLOW,
-        execution_mode_text=execution_mode_text
-    )
+    strategy_instruction = render_strategy_instruction()
 
     prompt = f"""
 ROLE: {config.AI_SYSTEM_ROLE}
@@ -452,6 +562,7 @@ TASK: Analyze market data for {symbol} using the Multi-Timeframe logic below. De
 - Funding Rate: {funding_rate:.6f}%
 - Open Interest: {open_interest}
 - Top Trader L/S Ratio: {lsr_val} (Longs: {long_pct:.1f}% / Shorts: {short_pct:.1f}%)
+- Whale Flow: {whale_flow_str}
 --------------------------------------------------
 
 --------------------------------------------------
@@ -471,36 +582,13 @@ FINAL INSTRUCTIONS (STRATEGY SELECTION PROTOCOL):
 
 REMINDER: Adhere strictly to the TREND LOCK GATE defined in your system role.
 
-2. ZONE ANALYSIS:
-   - Identify if Price is testing key levels (Pivot S1 or R1).
-   - If Price is strictly between S1 and R1 -> "MID_RANGE" (INSIDE_RANGE).
-
-3. INTERPRET REACTION (Zone Reaction):
-   - WICK_REJECTION: Wick penetrates level, Body closes back inside range. (Signal: Reversal)
-   - BREAKOUT_CLOSE: Candle Body closes BEYOND the level with volume. (Signal: Breakout/Continuation)
-   - TESTING: Price hovering at level without clear resolution. (Signal: Wait)
-
-4. STRATEGY MAPPING:
-   - REJECTION at S1 -> Validates LIQUIDITY_REVERSAL_MASTER (Long)
-   - REJECTION at R1 -> Validates LIQUIDITY_REVERSAL_MASTER (Short)
-   - BREAKOUT below S1 -> Validates BREAKDOWN_FOLLOW (Short)
-   - BREAKOUT above R1 -> Validates BREAKDOWN_FOLLOW (Long)
-   - STRONG TREND + PULLBACK in MID_RANGE -> Validates PULLBACK_CONTINUATION
-
-5. NO-TRADE CONDITIONS:
-   - MID_RANGE with no clear trend or pullback.
-   - Trend Lock active and Setup contradicts major trend (and no exception met).
-
+{DECISION_PROTOCOL_RULES}
 {strategy_instruction}
 
 8. DECISION: Return WAIT if no setup confirmed OR trend filter disqualifies all scenarios.
 """
 
-    execution_mode_json = '{ "MARKET" | "LIMIT" }' if config.ENABLE_MARKET_ORDERS else '"LIMIT"'
-    
-    output_format_prompt = config.PROMPT_MARKET_ANALYSIS_OUTPUT_FORMAT.format(
-        execution_mode_json=execution_mode_json
-    )
+    output_format_prompt = render_output_format()
 
     prompt += output_format_prompt
     return prompt
@@ -528,15 +616,17 @@ def build_sentiment_prompt(sentiment_data, onchain_data):
         news_str = "No major news."
     
     whale_activity = onchain_data.get('whale_activity', [])
+    whale_flow = format_flow(onchain_data.get('whale_flow'))
     
     # Sanitize whale activity data (external API data)
+    whale_lines = [f"- Net whale flow {whale_flow}"] if whale_flow else []
     if whale_activity:
         sanitized_whales = [sanitize_prompt_input(str(w), max_length=500) for w in whale_activity]
-        whale_str = "\n".join([f"- {w}" for w in sanitized_whales])
-    else:
-        whale_str = "No significant whale activity detected."
+        whale_lines += [f"- {w}" for w in sanitized_whales]
+    whale_str = "\n".join(whale_lines) if whale_lines else "No significant whale activity detected."
     
-    inflow_status = onchain_data.get('stablecoin_inflow', 'Neutral')
+    # Arah inflow + perubahan supply stablecoin multi-window (1d/7d/30d)
+    inflow_status = format_inflows(onchain_data.get('stablecoin_inflow', 'Neutral'), onchain_data.get('stablecoin_inflows'))
 
     # 2. Prompt Construction
     # Note: Sanitized data is wrapped in <external_data> tags by the prompt template
@@ -549,9 +639,10 @@ def build_sentiment_prompt(sentiment_data, onchain_data):
     )
     return prompt
 
-def build_pattern_recognition_prompt(symbol, timeframe, raw_data=None):
+def build_pattern_recognition_prompt(symbol, timeframe, raw_data=None, detected=None):
     """
     Menyusun prompt untuk Vision AI Pattern Recognition.
+    detected: hasil pattern_detector.detect() (ikut sebagai konteks numerik untuk diverifikasi Vision).
     """
     raw_info = ""
     if raw_data:
@@ -562,6 +653,12 @@ def build_pattern_recognition_prompt(symbol, timeframe, raw_data=None):
             f"- MACD (12,26,9): Line={raw_data.get('macd', 0):.4f}, Signal={raw_data.get('macd_signal', 0):.4f}, Histogram={raw_data.get('macd_hist', 0):.4f}\n"
             f"- Volume: {raw_data.get('volume', 0)}\n"
         )
+    if detected and detected.get('patterns'):
+        raw_info += (
+            f"\n[LOCAL DETECTORS] Numeric detectors flagged (inconclusive, verify on the chart):\n"
+            + "\n".join(f"- {p['note']} -> {p['bias']} (conf {p['confidence']:.2f})" for p in detected['patterns'])
+            + "\n"
+        )
 
     prompt_text = config.PROMPT_PATTERN_RECOGNITION.format(
         timeframe=timeframe,
@@ -570,3 +667,22 @@ def build_pattern_recognition_prompt(symbol, timeframe, raw_data=None):
     )
     return prompt_text
 
+
+def build_pattern_batch_prompt(panels, timeframe):
+    """
+    Prompt Vision AI untuk grid beberapa chart.
+    panels: list (symbol, raw_data[, detected]) urut sesuai nomor panel di gambar.
+    """
+    lines = []
+    for i, (symbol, raw_data, *rest) in enumerate(panels, start=1):
+        raw_data = raw_data or {}
+        line = (
+            f"{i}. {symbol}: O={raw_data.get('open')} H={raw_data.get('high')} L={raw_data.get('low')} "
+            f"C={raw_data.get('close')} | MACD={raw_data.get('macd', 0):.4f} Signal={raw_data.get('macd_signal', 0):.4f} "
+            f"Hist={raw_data.get('macd_hist', 0):.4f} | Vol={raw_data.get('volume', 0)}"
+        )
+        detected = rest[0] if rest else None
+        if detected and detected.get('patterns'):
+            line += f" | Local detectors: {format_patterns(detected)}"
+        lines.append(line)
+    return config.PROMPT_PATTERN_BATCH.format(count=len(panels), timeframe=timeframe, panels="\n".join(lines))
@@ -0,0 +1,337 @@
+"""
+PromptCompiler: prompt keputusan dengan bagian statis dirender sekali + bagian dinamis ringkas.
+
+- Bagian statis (AI_SYSTEM_ROLE, daftar strategi, protokol 2-8, format output JSON) dirender
+  sekali saat start dan dikirim sebagai system message. Isinya identik di tiap panggilan,
+  sehingga provider dengan prompt caching (prefix cache otomatis, atau `cache_control` jika
+  AI_PROMPT_CACHE_CONTROL=True) tidak memproses ulang bagian ini.
+- Bagian dinamis per simbol memakai encoding tabel ringkas: baris header kolom lalu baris nilai.
+- count_tokens() (tiktoken jika terinstall, selain itu estimasi) menegakkan AI_PROMPT_TOKEN_BUDGET:
+  section prioritas rendah (sentimen/berita, market data, order book, pattern) diringkas dulu,
+  lalu dibuang, sampai total token muat. Section dengan prioritas >= AI_PROMPT_REQUIRED_PRIORITY
+  tidak pernah dipangkas.
+"""
+
+import re
+import time
+
+import config
+from src.utils import metrics
+from src.utils.pattern_detector import format_patterns
+from src.utils.prompt_builder import (
+    DECISION_PROTOCOL_RULES,
+    format_price,
+    get_trend_narrative,
+    render_output_format,
+    render_strategy_instruction,
+    render_strategy_list,
+)
+from src.utils.stablecoin_history import format_inflows
+from src.utils.whale_flow import format_flow
+
+try:
+    import tiktoken  # optional dependency untuk hitung token akurat
+    _ENCODING = tiktoken.get_encoding('o200k_base')
+    TOKENIZER = 'tiktoken'
+except Exception:  # Tidak terinstall / file BPE tidak bisa diunduh
+    _ENCODING = None
+    TOKENIZER = 'heuristic'
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_TOKEN_BUCKETS = (250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000)
+
+
+def count_tokens(text):
+    """Jumlah token prompt. Tanpa tiktoken: tiap kata/angka/simbol ~1 token, kata panjang dipecah per 6 char."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return sum(1 + len(tok) // 6 for tok in _TOKEN_RE.findall(text))
+
+
+def _table(title, columns):
+    """[TITLE] lalu header kolom & nilai dipisah '|'."""
+    header = "|".join(name for name, _ in columns)
+    values = "|".join(str(value) for _, value in columns)
+    return f"[{title}]\n{header}\n{values}"
+
+
+def _first_sentence(text, max_len=160):
+    text = str(text).strip()
+    cut = text.find('. ')
+    if 0 < cut < max_len:
+        return text[:cut + 1]
+    return text[:max_len]
+
+
+class PromptSection:
+    def __init__(self, name, text, priority, short=None):
+        self.name = name
+        self.text = text
+        self.priority = priority
+        self.short = short
+        self.tokens = count_tokens(text)
+
+    def shorten(self):
+        self.text, self.short = self.short, None
+        self.tokens = count_tokens(self.text)
+
+    def drop(self):
+        self.text, self.short, self.tokens = '', None, 0
+
+
+class CompiledPrompt:
+    def __init__(self, system_message, user_text, static_tokens, dynamic_tokens, trimmed):
+        self.messages = [system_message, {"role": "user", "content": user_text}]
+        self.text = user_text   # Bagian dinamis (untuk log & journal)
+        self.static_tokens = static_tokens
+        self.dynamic_tokens = dynamic_tokens
+        self.trimmed = trimmed
+
+    @property
+    def total_tokens(self):
+        return self.static_tokens + self.dynamic_tokens
+
+
+class PromptCompiler:
+    def __init__(self, budget=None):
+        self.budget = config.AI_PROMPT_TOKEN_BUDGET if budget is None else budget
+        self.static_text = self.render_static()
+        self.static_tokens = count_tokens(self.static_text)
+        if config.AI_PROMPT_CACHE_CONTROL:
+            content = [{"type": "text", "text": self.static_text, "cache_control": {"type": "ephemeral"}}]
+        else:
+            content = self.static_text
+        self.system_message = {"role": "system", "content": content}
+
+    @staticmethod
+    def render_static():
+        return (
+            f"ROLE: {config.AI_SYSTEM_ROLE}\n"
+            f"{render_strategy_list()}\n\n"
+            "DECISION PROTOCOL (step 1 MACRO CONTEXT is given per request in FINAL INSTRUCTIONS):\n"
+            f"{DECISION_PROTOCOL_RULES}"
+            f"{render_strategy_instruction()}\n"
+            "8. DECISION: Return WAIT if no setup confirmed OR trend filter disqualifies all scenarios.\n\n"
+            "DATA ENCODING: each [SECTION] is a table, first row = column names, next rows = values.\n"
+            "INTERPRETATION NOTES:\n"
+            "- PRICE ACTION Wick5: Strong rejection (>2x body) near S1/R1 suggests potential reversal.\n"
+            "- ORDER BOOK DEPTH Imb%: Significant Imbalance (>20%) suggests potential Liquidity Hunt or Breakout.\n"
+            f"{render_output_format()}"
+        )
+
+    def compile(self, symbol, tech_data, sentiment_data, onchain_data, pattern_analysis=None,
+                dual_scenarios=None, show_btc_context=True, sentiment_analysis=None):
+        """Return CompiledPrompt (messages system + user), atau None jika data teknikal tidak valid."""
+        if not tech_data or tech_data.get('price', 0) == 0:
+            return None
+        started = time.perf_counter()
+        sections = build_sections(symbol, tech_data, sentiment_data, onchain_data, pattern_analysis,
+                                  dual_scenarios, show_btc_context, sentiment_analysis)
+        trimmed = self._fit(sections)
+        user_text = "\n\n".join(s.text for s in sections if s.text)
+        dynamic_tokens = sum(s.tokens for s in sections)
+        compiled = CompiledPrompt(self.system_message, user_text, self.static_tokens, dynamic_tokens, trimmed)
+
+        metrics.histogram('prompt_compile_ms').observe((time.perf_counter() - started) * 1000)
+        metrics.histogram('prompt_tokens', buckets=_TOKEN_BUCKETS).observe(compiled.total_tokens)
+        if trimmed:
+            metrics.counter('prompt_sections_trimmed').inc(len(trimmed))
+        return compiled
+
+    def _fit(self, sections):
+        """Pangkas section prioritas rendah sampai total token <= budget. Return daftar 'NAMA:short|drop'."""
+        if not self.budget:
+            return []
+        limit = self.budget - self.static_tokens
+        total = sum(s.tokens for s in sections)
+        trimmed = []
+        candidates = sorted(
+            (s for s in sections if s.priority < config.AI_PROMPT_REQUIRED_PRIORITY),
+            key=lambda s: s.priority
+        )
+        for stage in ('short', 'drop'):
+            for section in candidates:
+                if total <= limit:
+                    return trimmed
+                if not section.text or (stage == 'short' and section.short is None):
+                    continue
+                before = section.tokens
+                section.shorten() if stage == 'short' else section.drop()
+                total -= before - section.tokens
+                trimmed.append(f"{section.name}:{stage}")
+        return trimmed
+
+
+# ------------------------------------------------------------------
+# SECTION DINAMIS (encoding tabel)
+# ------------------------------------------------------------------
+
+def build_sections(symbol, tech_data, sentiment_data, onchain_data, pattern_analysis=None,
+                   dual_scenarios=None, show_btc_context=True, sentiment_analysis=None):
+    price = tech_data.get('price', 0)
+    market_struct = tech_data.get('market_structure', 'UNKNOWN')
+    btc_trend = tech_data.get('btc_trend', 'NEUTRAL')
+    btc_corr = tech_data.get('btc_correlation', 0)
+    sections = [PromptSection('TASK', (
+        f"TASK: Analyze {symbol} with the protocol in the system message. Decide BUY, SELL, or WAIT.\n"
+        f"Timeframes: trend={config.TIMEFRAME_TREND} setup={config.TIMEFRAME_SETUP} exec={config.TIMEFRAME_EXEC}"
+    ), 100)]
+
+    # --- MACRO ---
+    pivots = tech_data.get('pivots') or {}
+    macro = []
+    if show_btc_context:
+        macro += [('BTC_Trend', btc_trend), ('BTC_Corr', f"{btc_corr:.2f}")]
+    macro += [
+        ('Structure', market_struct),
+        ('Global_1D', tech_data.get('global_trend_1d', 'N/A')),
+        ('P', format_price(pivots.get('P', 'N/A'))),
+        ('S1', format_price(pivots.get('S1', 'N/A'))),
+        ('R1', format_price(pivots.get('R1', 'N/A'))),
+    ]
+    sections.append(PromptSection('MACRO', _table('MACRO', macro), 90))
+
+    # --- SETUP (Vision) ---
+    if isinstance(pattern_analysis, dict):
+        pattern_text = pattern_analysis.get('analysis', 'Not Available')
+        raw = pattern_analysis.get('raw_data') or {}
+    else:
+        pattern_text = pattern_analysis or 'Not Available'
+        raw = {}
+    setup = f"[SETUP]\npattern: {pattern_text}"
+    local = ""
+    if isinstance(pattern_analysis, dict) and pattern_analysis.get('detected'):
+        local = f"\nlocal: {format_patterns(pattern_analysis['detected'])}"
+    if raw:
+        setup += "\n" + "\n".join(_table('x', [
+            ('O', format_price(raw.get('open'))), ('H', format_price(raw.get('high'))),
+            ('L', format_price(raw.get('low'))), ('C', format_price(raw.get('close'))),
+            ('MACD', f"{raw.get('macd', 0):.4f}"), ('Sig', f"{raw.get('macd_signal', 0):.4f}"),
+            ('Hist', f"{raw.get('macd_hist', 0):.4f}"), ('Vol', f"{raw.get('volume', 0):.1f}"),
+        ]).split("\n")[1:])
+    sections.append(PromptSection('SETUP', setup + local, 65,
+                                  short=f"[SETUP]\npattern: {_first_sentence(pattern_text)}{local}"))
+
+    # --- EXECUTION DATA ---
+    ema_fast = tech_data.get('ema_fast', 0)
+    ema_slow = tech_data.get('ema_slow', 0)
+    trend_narrative, ema_alignment = get_trend_narrative(price, ema_fast, ema_slow)
+    sections.append(PromptSection('MOMENTUM', _table('MOMENTUM', [
+        (f"RSI{config.RSI_PERIOD}", f"{tech_data.get('rsi', 50):.2f}"),
+        ('StochK', f"{tech_data.get('stoch_k', 50):.2f}"),
+        ('StochD', f"{tech_data.get('stoch_d', 50):.2f}"),
+        (f"ADX{config.ADX_PERIOD}", f"{tech_data.get('adx', 0):.2f}"),
+    ]), 85))
+    sections.append(PromptSection('TREND', _table('TREND', [
+        ('Price', format_price(price)),
+        (f"EMA{config.EMA_FAST}", format_price(ema_fast)),
+        (f"EMA{config.EMA_SLOW}", format_price(ema_slow)),
+        ('Alignment', ema_alignment),
+    ]) + f"\nsignal: {trend_narrative}", 90))
+
+    last = tech_data.get('last_candle', {})
+    dist = {}
+    for level in ('S1', 'R1'):
+        ref = pivots.get(level, 0)
+        dist[level] = f"{(price - ref) / ref * 100:+.2f}%" if ref else 'N/A'
+    wick = tech_data.get('wick_rejection', {})
+    wick_signal = wick.get('recent_rejection', 'NONE')
+    wick_str = f"{wick_signal} {wick.get('rejection_strength', 0):.1f}x" if wick_signal != 'NONE' else 'NONE'
+    sections.append(PromptSection('PRICE ACTION', _table('PRICE ACTION', [
+        ('O', format_price(last.get('open', 0))), ('H', format_price(last.get('high', 0))),
+        ('L', format_price(last.get('low', 0))), ('C', format_price(last.get('close', 0))),
+        ('vsS1', dist['S1']), ('vsR1', dist['R1']), ('Wick5', wick_str),
+    ]), 85))
+
+    volume = tech_data.get('volume', 0)
+    vol_ma = tech_data.get('vol_ma', 0)
+    vol_ratio = (volume / vol_ma) if vol_ma > 0 else 0
+    spike = 'SPIKE' if vol_ratio >= config.VOLUME_SPIKE_MULTIPLIER else 'NORMAL'
+    sections.append(PromptSection('VOLATILITY & VOLUME', _table('VOLATILITY & VOLUME', [
+        ('BB_Up', format_price(tech_data.get('bb_upper', 0))),
+        ('BB_Low', format_price(tech_data.get('bb_lower', 0))),
+        ('ATR', f"{tech_data.get('atr', 0):.5f}"),
+        ('Vol', f"{volume:.0f}"), ('VolMA', f"{vol_ma:.0f}"),
+        ('Ratio', f"{vol_ratio:.2f}x {spike}"),
+    ]), 70))
+
+    ob = tech_data.get('order_book') or {}
+    if ob:
+        sections.append(PromptSection('ORDER BOOK DEPTH', _table('ORDER BOOK DEPTH', [
+            ('Bids$K', f"{ob.get('bids_vol_usdt', 0) / 1000:.1f}"),
+            ('Asks$K', f"{ob.get('asks_vol_usdt', 0) / 1000:.1f}"),
+            ('Imb%', f"{ob.get('imbalance_pct', 0):+.1f}"),
+        ]), 55))
+
+    lsr = tech_data.get('lsr', {}) or {}
+    long_pct = float(lsr.get('longAccount', 0)) * 100 if lsr.get('longAccount') else 0
+    short_pct = float(lsr.get('shortAccount', 0)) * 100 if lsr.get('shortAccount') else 0
+    market = _table('MARKET DATA', [
+        ('Funding%', f"{tech_data.get('funding_rate', 0):.6f}"),
+        ('OI', tech_data.get('open_interest', 'N/A')),
+        ('LSR', lsr.get('longShortRatio', 'N/A')),
+        ('Long%', f"{long_pct:.1f}"), ('Short%', f"{short_pct:.1f}"),
+    ])
+    whale_flow = format_flow((onchain_data or {}).get('whale_flow'), sep="; ")
+    if whale_flow:
+        market += f"\nwhale_flow: {whale_flow}"
+    sections.append(PromptSection('MARKET DATA', market, 45))
+
+    # --- SENTIMENT (prioritas terendah: ringkasan berita dipangkas dulu) ---
+    fng = f"{sentiment_data.get('fng_value', 50)} {sentiment_data.get('fng_text', 'Neutral')}"
+    if sentiment_analysis and isinstance(sentiment_analysis, dict):
+        table = _table('SENTIMENT', [
+            ('Score', sentiment_analysis.get('sentiment_score', 50)),
+            ('Status', sentiment_analysis.get('overall_sentiment', 'NEUTRAL')),
+            ('Phase', sentiment_analysis.get('market_phase', 'UNKNOWN')),
+            ('SmartMoney', sentiment_analysis.get('smart_money_activity', 'UNKNOWN')),
+            ('Retail', sentiment_analysis.get('retail_sentiment', 'UNKNOWN')),
+            ('F&G', fng),
+            ('Risk', sentiment_analysis.get('risk_assessment', 'UNKNOWN')),
+        ])
+        drivers = ", ".join(sentiment_analysis.get('key_drivers') or []) or 'None'
+        summary = " ".join(str(sentiment_analysis.get('summary', 'No summary available.')).split())
+        sections.append(PromptSection('SENTIMENT', f"{table}\ndrivers: {drivers}\ncontext: {summary}", 30, short=table))
+    else:
+        sections.append(PromptSection('SENTIMENT', _table('SENTIMENT', [
+            ('F&G', fng),
+            ('StableInflow', format_inflows(onchain_data.get('stablecoin_inflow', 'Neutral'),
+                                            onchain_data.get('stablecoin_inflows'))),
+        ]), 30))
+
+    # --- EXECUTION SCENARIOS ---
+    if dual_scenarios:
+        rows = []
+        for sid, side, key in (('A', 'LONG', 'long'), ('B', 'SHORT', 'short')):
+            scen = dual_scenarios.get(key, {})
+            modes = (('1', 'MARKET', 'market'), ('2', 'LIMIT', 'liquidity_hunt')) if config.ENABLE_MARKET_ORDERS \
+                else (('', 'LIMIT', 'liquidity_hunt'),)
+            for suffix, mode, mkey in modes:
+                s = scen.get(mkey, {})
+                rows.append(f"{sid}{suffix}|{side}|{mode}|{format_price(s.get('entry', 0))}|"
+                            f"{format_price(s.get('sl', 0))}|{format_price(s.get('tp', 0))}|1:{s.get('rr', 0)}")
+        sections.append(PromptSection('EXECUTION SCENARIOS',
+                                      "[EXECUTION SCENARIOS]\nID|Side|Mode|Entry|SL|TP|RR\n" + "\n".join(rows), 95))
+
+    # --- FINAL INSTRUCTIONS (macro context step 1, tergantung data) ---
+    if show_btc_context:
+        btc_instruction = ""
+        if btc_corr >= config.CORRELATION_THRESHOLD_BTC:
+            btc_instruction = f"IMPORTANT: High BTC Correlation ({btc_corr:.2f}). Do NOT open positions against BTC Trend ({btc_trend})."
+        macro_rules = config.PROMPT_BTC_WITH_CONTEXT.format(
+            market_struct=market_struct, btc_trend=btc_trend, btc_instruction=btc_instruction,
+            rsi_oversold=config.RSI_DEEP_OVERSOLD, rsi_overbought=config.RSI_DEEP_OVERBOUGHT
+        )
+    else:
+        macro_rules = config.PROMPT_BTC_NO_CONTEXT.format(
+            timeframe_trend=config.TIMEFRAME_TREND, market_struct=market_struct,
+            rsi_oversold=config.RSI_DEEP_OVERSOLD, volume_spike=config.VOLUME_SPIKE_MULTIPLIER,
+            rsi_overbought=config.RSI_DEEP_OVERBOUGHT
+        )
+    sections.append(PromptSection('FINAL INSTRUCTIONS', (
+        f"FINAL INSTRUCTIONS (STRATEGY SELECTION PROTOCOL):{macro_rules.rstrip()}\n"
+        "Then apply steps 2-8 and the TREND LOCK GATE from the system message. Reply with the JSON output format only."
+    ), 95))
+    return sections
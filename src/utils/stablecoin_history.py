@@ -0,0 +1,176 @@
+"""
+Cache lokal history market cap stablecoin (DefiLlama `stablecoincharts/all`).
+
+Endpoint hanya menyediakan seluruh history (bertahun-tahun data harian, tanpa parameter range),
+jadi yang disimpan cukup {tanggal: peggedUSD} dan payload penuh tidak diunduh tiap refresh:
+- Load sekali dari STABLECOIN_HISTORY_FILENAME (persist antar restart).
+- Dalam STABLECOIN_REVALIDATE_INTERVAL refresh = baca cache (tanpa request).
+- Revalidasi pakai conditional GET (ETag / Last-Modified); body identik (hash) tidak di-parse.
+- Merge incremental: hanya ekor data (titik >= tanggal terakhir cache - STABLECOIN_MERGE_OVERLAP_DAYS)
+  yang diterapkan, history dibatasi STABLECOIN_HISTORY_MAX_DAYS.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+import aiohttp
+
+import config
+from src.utils import metrics
+from src.utils.helper import logger, parse_timeframe_to_seconds
+
+DAY_SECONDS = 86400
+
+
+def format_inflows(status, inflows=None):
+    """'Positive (1d +0.12%, 7d +0.80%, 30d +2.10%)'. Window tanpa history dilewati."""
+    windows = ", ".join(f"{k} {v:+.2f}%" for k, v in (inflows or {}).items() if v is not None)
+    return f"{status} ({windows})" if windows else status
+
+
+class StablecoinHistory:
+    """Series harian total stablecoin peggedUSD: points {day_ts: value} + validator HTTP."""
+
+    def __init__(self, path=None):
+        self.path = path or config.STABLECOIN_HISTORY_FILENAME
+        self.points = {}
+        self.validators = {}  # {'etag', 'last_modified', 'digest'}
+        self.checked_at = 0   # Revalidasi network terakhir (epoch)
+        self._loaded = False
+
+    def __len__(self):
+        return len(self.points)
+
+    # ------------------------------------------------------------------
+    # PERSISTENSI
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Load cache dari disk (sekali)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load stablecoin history: {e}")
+            return
+        self.points = {int(day): value for day, value in (state.get('points') or {}).items()}
+        self.validators = state.get('validators') or {}
+        self.checked_at = state.get('checked_at', 0)
+
+    def save(self):
+        state = {
+            'points': {str(day): value for day, value in sorted(self.points.items())},
+            'validators': self.validators,
+            'checked_at': self.checked_at,
+        }
+        # Tulis ke file sementara lalu rename: crash saat menulis tidak merusak cache lama
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    # ------------------------------------------------------------------
+    # MERGE & METRIK
+    # ------------------------------------------------------------------
+
+    def merge(self, data):
+        """Terapkan ekor payload DefiLlama ke cache. Return jumlah titik baru / berubah."""
+        cutoff = max(self.points) - config.STABLECOIN_MERGE_OVERLAP_DAYS * DAY_SECONDS if self.points else None
+        changed = 0
+        for entry in reversed(data):
+            day = int(entry.get('date', 0))
+            if cutoff is not None and day < cutoff:
+                break  # Sisa payload = history lama yang sudah ada di cache
+            value = (entry.get('totalCirculatingUSD') or {}).get('peggedUSD')
+            if day and value and self.points.get(day) != value:
+                self.points[day] = value
+                changed += 1
+
+        if len(self.points) > config.STABLECOIN_HISTORY_MAX_DAYS:
+            keep = sorted(self.points)[-config.STABLECOIN_HISTORY_MAX_DAYS:]
+            self.points = {day: self.points[day] for day in keep}
+        return changed
+
+    def change_pct(self, days):
+        """Perubahan % titik terakhir vs titik <= `days` hari sebelumnya. None jika history kurang."""
+        if len(self.points) < 2:
+            return None
+        ordered = sorted(self.points)
+        last = ordered[-1]
+        target = last - days * DAY_SECONDS
+        base = None
+        for day in reversed(ordered[:-1]):
+            if day <= target:
+                base = day
+                break
+        if base is None or not self.points[base]:
+            return None
+        return (self.points[last] - self.points[base]) / self.points[base] * 100
+
+    def inflows(self, windows=None):
+        """{'1d': pct, '7d': pct, '30d': pct} dari series cache (None jika history kurang)."""
+        windows = windows or config.STABLECOIN_INFLOW_WINDOWS
+        return {f"{days}d": self.change_pct(days) for days in windows}
+
+    # ------------------------------------------------------------------
+    # FETCH
+    # ------------------------------------------------------------------
+
+    def is_fresh(self, now=None):
+        interval = parse_timeframe_to_seconds(config.STABLECOIN_REVALIDATE_INTERVAL)
+        return bool(self.points) and (now or time.time()) - self.checked_at < interval
+
+    def _conditional_headers(self):
+        headers = {}
+        if self.validators.get('etag'):
+            headers['If-None-Match'] = self.validators['etag']
+        if self.validators.get('last_modified'):
+            headers['If-Modified-Since'] = self.validators['last_modified']
+        return headers
+
+    async def refresh(self, session, url, force=False):
+        """
+        Update cache jika perlu. Return jumlah titik baru / berubah
+        (0 jika cache masih fresh, 304, atau body tidak berubah).
+        """
+        self.load()
+        if not force and self.is_fresh():
+            metrics.counter('stablecoin_cache_hit').inc()
+            return 0
+
+        timeout = aiohttp.ClientTimeout(total=config.API_REQUEST_TIMEOUT)
+        async with session.get(url, headers=self._conditional_headers(), timeout=timeout) as resp:
+            if resp.status == 304:
+                metrics.counter('stablecoin_not_modified').inc()
+                self.checked_at = time.time()  # Cache tervalidasi: TTL dimulai ulang (juga setelah restart)
+                await asyncio.to_thread(self.save)
+                return 0
+            resp.raise_for_status()
+            self.checked_at = time.time()
+            content = await resp.read()
+            metrics.counter('stablecoin_bytes').inc(len(content))
+
+            digest = hashlib.sha1(content).hexdigest()
+            unchanged = self.validators.get('digest') == digest
+            self.validators = {
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+                'digest': digest,
+            }
+
+        changed = 0
+        if unchanged:
+            metrics.counter('stablecoin_unchanged_body').inc()
+        else:
+            data = await asyncio.to_thread(json.loads, content)
+            changed = self.merge(data or [])
+        await asyncio.to_thread(self.save)
+        return changed
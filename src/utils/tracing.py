@@ -0,0 +1,99 @@
+"""
+Trace latency lifecycle order: sinyal AI -> submit -> ack exchange -> fill -> SL/TP terpasang.
+
+TradeTrace dibuat saat analisa AI dimulai, dibawa ke execute_entry, lalu disimpan di
+tracker (`tracker['trace']`) supaya handler WebSocket & SafetyManager bisa menambah mark.
+Saat trace selesai, durasi tiap tahap dicatat ke histogram `trace_<tahap>_ms`.
+"""
+
+import time
+import uuid
+
+from src.utils import metrics
+
+# Urutan mark (timestamp epoch detik)
+STAGE_ANALYSIS_START = 'analysis_start'
+STAGE_AI_REQUEST = 'ai_request'
+STAGE_AI_RESPONSE = 'ai_response'
+STAGE_SUBMIT = 'submit'
+STAGE_ACK = 'ack'
+STAGE_FILL = 'fill'
+STAGE_SAFETY = 'safety_installed'
+
+# (nama durasi, mark awal, mark akhir)
+DURATIONS = (
+    ('context', STAGE_ANALYSIS_START, STAGE_AI_REQUEST),
+    ('ai_decision', STAGE_AI_REQUEST, STAGE_AI_RESPONSE),
+    ('prepare', STAGE_AI_RESPONSE, STAGE_SUBMIT),
+    ('exchange_ack', STAGE_SUBMIT, STAGE_ACK),
+    ('fill_wait', STAGE_SUBMIT, STAGE_FILL),
+    ('protect', STAGE_FILL, STAGE_SAFETY),
+    ('total', STAGE_ANALYSIS_START, STAGE_SAFETY),
+)
+
+
+class TradeTrace:
+    def __init__(self, symbol, trace_id=None, marks=None):
+        self.symbol = symbol
+        self.trace_id = trace_id or uuid.uuid4().hex[:12]
+        self.marks = dict(marks or {})
+
+    def mark(self, stage, ts=None):
+        self.marks[stage] = ts if ts is not None else time.time()
+        return self
+
+    def to_dict(self):
+        return {'trace_id': self.trace_id, 'marks': dict(self.marks)}
+
+    @classmethod
+    def from_dict(cls, symbol, data):
+        return cls(symbol, data.get('trace_id'), data.get('marks'))
+
+
+def compute_durations(marks):
+    """Durasi per tahap (ms) untuk mark yang tersedia."""
+    result = {}
+    for name, start, end in DURATIONS:
+        if start in marks and end in marks:
+            result[name] = round((marks[end] - marks[start]) * 1000, 1)
+    return result
+
+
+def mark_tracker(tracker_entry, stage, ts=None, overwrite=False):
+    """
+    Tambah mark ke trace yang tersimpan di entry tracker (dict).
+    Return dict marks, atau None jika entry tidak punya trace.
+    """
+    if not tracker_entry:
+        return None
+    trace = tracker_entry.get('trace')
+    if not trace:
+        return None
+    marks = trace.setdefault('marks', {})
+    if overwrite or stage not in marks:
+        marks[stage] = ts if ts is not None else time.time()
+    return marks
+
+
+def record(marks):
+    """Masukkan durasi trace yang sudah lengkap ke histogram metrics."""
+    durations = compute_durations(marks)
+    for name, value in durations.items():
+        metrics.histogram(f"trace_{name}_ms").observe(value)
+    return durations
+
+
+def format_durations(durations):
+    return " | ".join(f"{name} {value:.0f}ms" for name, value in durations.items())
+
+
+def format_report():
+    """Ringkasan p50/p95/p99 per tahap dari semua trace yang sudah selesai."""
+    lines = []
+    for name, _, _ in DURATIONS:
+        hist = metrics.histogram(f"trace_{name}_ms")
+        if not hist.count:
+            continue
+        s = hist.summary()
+        lines.append(f"{name:<12} n={s['count']:<4} p50={s['p50']:.0f}ms p95={s['p95']:.0f}ms p99={s['p99']:.0f}ms")
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+"""
+Agregator whale flow per simbol (dipakai OnChainAnalyzer.detect_whale di rate aggTrade).
+
+Tiap transaksi whale disimpan sebagai tuple (ts, side, notional), tanpa format string:
+- events   : ring buffer WHALE_HISTORY_LIMIT transaksi terakhir (deque maxlen).
+- windows  : per window (WHALE_FLOW_WINDOWS, mis. 5m/1h/4h) deque + running sum buy/sell notional & count.
+             Tambah = O(1), transaksi kadaluarsa dikurangi dari sum saat keluar window (amortized O(1)).
+Pesan "🐋 [HH:MM] BUY BTC/USDT worth $1,500,000" baru diformat saat diminta (prompt), lalu di-memo.
+"""
+
+from collections import deque
+from datetime import datetime
+
+import config
+from src.utils.helper import parse_timeframe_to_seconds
+
+
+def window_seconds():
+    """{'5m': 300, '1h': 3600, '4h': 14400} dari WHALE_FLOW_WINDOWS."""
+    return {label: parse_timeframe_to_seconds(label) for label in config.WHALE_FLOW_WINDOWS}
+
+
+class _Window:
+    __slots__ = ('seconds', 'events', 'buy', 'sell', 'buy_count', 'sell_count')
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.events = deque()
+        self.buy = self.sell = 0.0
+        self.buy_count = self.sell_count = 0
+
+    def _apply(self, side, notional, sign):
+        if side == 'BUY':
+            self.buy += sign * notional
+            self.buy_count += sign
+        else:
+            self.sell += sign * notional
+            self.sell_count += sign
+
+    def add(self, event):
+        self.events.append(event)
+        self._apply(event[1], event[2], 1)
+        if len(self.events) > config.WHALE_WINDOW_MAX_EVENTS:
+            self._drop()
+
+    def _drop(self):
+        _, side, notional = self.events.popleft()
+        self._apply(side, notional, -1)
+
+    def expire(self, now):
+        cutoff = now - self.seconds
+        while self.events and self.events[0][0] < cutoff:
+            self._drop()
+        if not self.events:
+            self.buy = self.sell = 0.0  # Reset drift float dari penjumlahan berulang
+
+    def stats(self):
+        return {
+            'buy': self.buy,
+            'sell': self.sell,
+            'net': self.buy - self.sell,
+            'buy_count': self.buy_count,
+            'sell_count': self.sell_count,
+        }
+
+
+class WhaleFlow:
+    """Ring buffer transaksi whale satu simbol + agregat rolling per window."""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.events = deque(maxlen=config.WHALE_HISTORY_LIMIT)
+        self.windows = {label: _Window(seconds) for label, seconds in window_seconds().items()}
+        self._messages = None  # Memo format pesan (None = perlu format ulang)
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, ts, side, notional):
+        event = (ts, side, notional)
+        self.events.append(event)
+        for window in self.windows.values():
+            window.add(event)
+        self._messages = None
+
+    def stats(self, now):
+        """{'5m': {'buy', 'sell', 'net', 'buy_count', 'sell_count'}, ...} per window."""
+        result = {}
+        for label, window in self.windows.items():
+            window.expire(now)
+            result[label] = window.stats()
+        return result
+
+    def messages(self):
+        """Transaksi terakhir dalam format teks (diformat hanya saat diminta)."""
+        if self._messages is None:
+            self._messages = [
+                f"🐋 [{datetime.fromtimestamp(ts).strftime('%H:%M')}] {side} {self.symbol} worth ${notional:,.0f}"
+                for ts, side, notional in self.events
+            ]
+        return list(self._messages)
+
+
+def combine(stats_list):
+    """Jumlahkan stats() beberapa simbol (flow whale global)."""
+    total = {}
+    for stats in stats_list:
+        for label, values in stats.items():
+            bucket = total.setdefault(label, dict.fromkeys(values, 0))
+            for key, value in values.items():
+                bucket[key] += value
+    return total
+
+
+def _usd(value):
+    sign = '-' if value < 0 else '+'
+    value = abs(value)
+    if value >= 1e9:
+        return f"{sign}${value / 1e9:.2f}B"
+    return f"{sign}${value / 1e6:.1f}M"
+
+
+def format_flow(stats, sep=" | "):
+    """'5m: net +$3.2M (buy 4 / sell 1) | 1h: ...'. String kosong jika tidak ada transaksi."""
+    parts = [
+        f"{label}: net {_usd(values['net'])} (buy {values['buy_count']} / sell {values['sell_count']})"
+        for label, values in (stats or {}).items()
+        if values['buy_count'] or values['sell_count']
+    ]
+    return sep.join(parts)
@@ -0,0 +1,139 @@
+"""
+Benchmark: render chart Vision AI.
+1. Jalur lama (mpf.plot dari nol: style, figure, axes, addplot, bbox tight) vs ChartRenderer (figure dipakai ulang).
+2. Throughput render_async: process pool (CHART_RENDER_WORKERS) vs thread, dengan event loop tetap sibuk.
+
+Jalankan: python tests/benchmark_chart_renderer.py
+"""
+import asyncio
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(repo_root)
+sys.path.append(os.path.join(repo_root, 'src'))
+
+import config
+from src.utils import chart_renderer
+
+
+def _synthetic_candles(count=200, seed=7):
+    rng = np.random.default_rng(seed)
+    now = int(time.time() * 1000)
+    price, candles = 50000.0, []
+    for i in range(count):
+        change = rng.uniform(-100, 100)
+        open_p, close_p = price, price + change
+        candles.append([now - (count - i) * 3_600_000, open_p, max(open_p, close_p) + rng.uniform(0, 50),
+                        min(open_p, close_p) - rng.uniform(0, 50), close_p, rng.uniform(10, 100)])
+        price = close_p
+    return candles
+
+
+def _plot_frame(candles):
+    """Data plot identik untuk kedua jalur (MACD via ewm, hanya untuk benchmark render)."""
+    df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    fast = df['close'].ewm(span=config.MACD_FAST, adjust=False).mean()
+    slow = df['close'].ewm(span=config.MACD_SLOW, adjust=False).mean()
+    df['macd'] = fast - slow
+    df['macd_signal'] = df['macd'].ewm(span=config.MACD_SIGNAL, adjust=False).mean()
+    df['macd_hist'] = df['macd'] - df['macd_signal']
+    return df.tail(chart_renderer.CHART_CANDLES)
+
+
+def legacy_render(plot_data):
+    """Jalur lama PatternRecognizer.generate_chart_image (mpf.plot per panggilan)."""
+    import mplfinance as mpf
+    buf = io.BytesIO()
+    colors = ['#26a69a' if v >= 0 else '#ef5350' for v in plot_data['macd_hist']]
+    macd_plots = [
+        mpf.make_addplot(plot_data['macd'], panel=2, color='#2962FF', width=1.2, ylabel='MACD'),
+        mpf.make_addplot(plot_data['macd_signal'], panel=2, color='#FF6D00', width=1.2),
+        mpf.make_addplot(plot_data['macd_hist'], panel=2, type='bar', color=colors, alpha=0.5),
+    ]
+    mc = mpf.make_marketcolors(up='#00ff00', down='#ff0000', edge='inherit', wick='inherit', volume='in', ohlc='i')
+    s = mpf.make_mpf_style(base_mpf_style='nightclouds', marketcolors=mc, rc={'font.size': 8})
+    mpf.plot(plot_data, type='candle', style=s, volume=True, addplot=macd_plots, panel_ratios=(6, 2, 2),
+             savefig=dict(fname=buf, dpi=100, bbox_inches='tight', format='png'), axisoff=True, tight_layout=True)
+    import matplotlib.pyplot as plt
+    plt.close('all')
+    return buf.getvalue()
+
+
+def reused_render(renderer, plot_data):
+    return renderer.render(plot_data['open'], plot_data['high'], plot_data['low'], plot_data['close'],
+                           plot_data['volume'], plot_data['macd'], plot_data['macd_signal'], plot_data['macd_hist'])
+
+
+def _renders_per_sec(func, loops):
+    func()  # Warm-up
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return loops / (time.perf_counter() - start)
+
+
+async def _throughput(workers, jobs=16):
+    """Render `jobs` chart bersamaan sambil event loop menjalankan kerja CPU ringan (simulasi indikator)."""
+    config.CHART_RENDER_WORKERS = workers
+    chart_renderer.shutdown()
+    candles = _synthetic_candles()
+    await chart_renderer.render_async(candles)  # Warm-up pool / import
+
+    ticks = 0
+
+    async def busy_loop(stop):
+        nonlocal ticks
+        while not stop.is_set():
+            np.convolve(np.arange(2000.0), np.ones(50), 'valid')
+            ticks += 1
+            await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    busy = asyncio.create_task(busy_loop(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(chart_renderer.render_async(candles) for _ in range(jobs)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await busy
+    chart_renderer.shutdown()
+    return jobs / elapsed, ticks / elapsed
+
+
+def benchmark():
+    plot_data = _plot_frame(_synthetic_candles())
+    print("--- Chart Renderer Benchmark ---")
+
+    renderer = chart_renderer.ChartRenderer()
+    reused = _renders_per_sec(lambda: reused_render(renderer, plot_data), loops=30)
+    try:
+        legacy = _renders_per_sec(lambda: legacy_render(plot_data), loops=10)
+        print(f"mpf.plot (legacy) : {legacy:6.1f} renders/s")
+    except ImportError:
+        legacy = None
+        print("mpf.plot (legacy) : skipped (mplfinance not installed)")
+    print(f"ChartRenderer     : {reused:6.1f} renders/s" + (f"  ({reused / legacy:.1f}x)" if legacy else ""))
+
+    try:
+        import pandas_ta  # noqa: F401
+    except ImportError:
+        print("\nrender_async throughput: skipped (pandas_ta not installed)")
+        return
+    original_workers = config.CHART_RENDER_WORKERS
+    workers = max(2, original_workers)
+    thread_rps, thread_ticks = asyncio.run(_throughput(0))
+    pool_rps, pool_ticks = asyncio.run(_throughput(workers))
+    config.CHART_RENDER_WORKERS = original_workers
+    print(f"\nrender_async thread       : {thread_rps:6.1f} renders/s | event loop {thread_ticks:8.0f} ticks/s")
+    print(f"render_async pool ({workers} proc): {pool_rps:6.1f} renders/s | event loop {pool_ticks:8.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    benchmark()
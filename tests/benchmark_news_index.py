@@ -0,0 +1,96 @@
+"""
+Benchmark: filter berita per simbol.
+Legacy  : scan semua headline x keyword (any(kw in news_lower)) di setiap get_latest(symbol).
+Index   : tag headline sekali per fetch (Aho-Corasick), get_latest(symbol) = lookup.
+
+Jalankan: python tests/benchmark_news_index.py [jumlah_headline] [jumlah_koin]
+"""
+import os
+import random
+import sys
+import time
+from unittest.mock import patch
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(repo_root)
+sys.path.append(os.path.join(repo_root, 'src'))
+
+import config
+from src.modules.sentiment import SentimentAnalyzer
+from src.utils import news_index
+
+BASES = ['bitcoin', 'ethereum', 'solana', 'ripple', 'cardano', 'dogecoin', 'avalanche', 'chainlink', 'polkadot',
+         'litecoin', 'uniswap', 'aptos', 'arbitrum', 'optimism', 'near', 'sui', 'pepe', 'injective', 'render', 'toncoin']
+WORDS = "price rally drops whale exchange inflow outflow traders market analysts record weekly high low".split()
+
+
+def _headlines(count, rng):
+    macro = config.MACRO_KEYWORDS or ['fed']
+    news = []
+    for i in range(count):
+        words = rng.sample(WORDS, 6) + [rng.choice(BASES)] + ([rng.choice(macro)] if rng.random() < 0.2 else [])
+        rng.shuffle(words)
+        news.append(f"{' '.join(words).capitalize()} {i} (Source{i % 12})")
+    return news
+
+
+def legacy_filter(analyzer, symbol):
+    """Salinan filter_news_by_relevance sebelum index (scan penuh tiap panggilan)."""
+    is_btc = symbol.split('/')[0].upper() == 'BTC'
+    target_keywords = analyzer._get_coin_keywords(symbol)
+    macro_keywords = config.MACRO_KEYWORDS
+    btc_keywords = [] if is_btc else analyzer._btc_keywords()
+    macro_news, coin_news, btc_news = [], [], []
+    for news in analyzer.raw_news:
+        news_lower = news.lower()
+        is_macro = any(kw in news_lower for kw in macro_keywords)
+        is_coin = any(kw in news_lower for kw in target_keywords)
+        is_btc_rel = any(kw in news_lower for kw in btc_keywords) if not is_btc else False
+        if is_macro and len(macro_news) < config.NEWS_MACRO_MAX:
+            macro_news.append(f"[MACRO] {news}")
+        if is_coin:
+            coin_news.append(news)
+        elif is_btc_rel and len(btc_news) < config.NEWS_BTC_MAX:
+            btc_news.append(f"[BTC-CORR] {news}")
+    result = macro_news[:config.NEWS_MACRO_MAX]
+    result += coin_news[:config.NEWS_RETENTION_LIMIT - len(result)]
+    remaining = config.NEWS_RETENTION_LIMIT - len(result)
+    if remaining > 0 and not is_btc:
+        result += btc_news[:min(remaining, config.NEWS_BTC_MAX)]
+    return result
+
+
+def benchmark(headlines=200, coins=20, loops=50):
+    rng = random.Random(5)
+    daftar = [{'symbol': f"{'BTC' if i == 0 else base[:4].upper()}/USDT",
+               'keywords': [base, base[:4]] if i else ['bitcoin', 'btc']} for i, base in enumerate(BASES[:coins])]
+    with patch.object(config, 'DAFTAR_KOIN', daftar):
+        analyzer = SentimentAnalyzer()
+        analyzer.raw_news = _headlines(headlines, rng)
+        symbols = [c['symbol'] for c in daftar]
+
+        start = time.perf_counter()
+        for _ in range(loops):
+            legacy = [legacy_filter(analyzer, s) for s in symbols]
+        legacy_ms = (time.perf_counter() - start) * 1000 / loops
+
+        start = time.perf_counter()
+        analyzer.build_news_index()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(loops):
+            indexed = [analyzer.filter_news_by_relevance(s) for s in symbols]
+        lookup_ms = (time.perf_counter() - start) * 1000 / loops
+
+    assert indexed == legacy, "Hasil index harus identik dengan scan legacy"
+    print("--- News Index Benchmark ---")
+    print(f"{headlines} headlines | {coins} coins | matcher {news_index.MATCHER}\n")
+    print(f"legacy scan per main-loop iteration : {legacy_ms:8.3f} ms")
+    print(f"index build (once per fetch)        : {build_ms:8.3f} ms")
+    print(f"index lookup per main-loop iteration: {lookup_ms:8.3f} ms  ({legacy_ms / lookup_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    benchmark(*args)
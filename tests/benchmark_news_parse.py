@@ -0,0 +1,92 @@
+"""
+Benchmark: parse RSS.
+feedparser : parser lama (pure-Python, memegang GIL -> event loop tersendat walau di to_thread).
+simple     : parser ringan ElementTree untuk RSS/Atom well-formed.
+pool       : parse_async di process pool (NEWS_PARSE_WORKERS) vs thread, diukur dari lag event loop.
+
+Jalankan: python tests/benchmark_news_parse.py [jumlah_feed] [item_per_feed]
+"""
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import patch
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(repo_root)
+sys.path.append(os.path.join(repo_root, 'src'))
+
+import config
+from src.utils import news_feed
+
+
+def _feed(source, items):
+    entries = "".join(
+        f"<item><title>{source} headline {i}: bitcoin &amp; ethereum markets move</title>"
+        f"<link>https://example.com/{source}/{i}</link>"
+        f"<description>&lt;p&gt;Summary paragraph {i} with &lt;b&gt;markup&lt;/b&gt; and more text.&lt;/p&gt;</description>"
+        f"<pubDate>Wed, 01 May 2024 {i % 24:02d}:00:00 GMT</pubDate></item>"
+        for i in range(items)
+    )
+    return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>{source}</title>'
+            f'{entries}</channel></rss>').encode()
+
+
+async def _loop_lag(coro):
+    """Jalankan coro sambil mengukur lag maks event loop (tick 5ms)."""
+    lag, done = 0.0, False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - start - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    result = await coro
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return result, elapsed * 1000, lag * 1000
+
+
+async def _parse_all(feeds):
+    return await asyncio.gather(*(news_feed.parse_async(content, False) for content in feeds))
+
+
+def benchmark(feeds=12, items=30):
+    contents = [_feed(f"Source{n}", items) for n in range(feeds)]
+
+    results = {}
+    for fast in (False, True):
+        start = time.perf_counter()
+        parsed = [news_feed.parse_feed(content, fast) for content in contents]
+        results[fast] = ((time.perf_counter() - start) * 1000 / feeds, parsed)
+    slow_items = [[(s, p) for _, s, p in items] for items, _, _ in results[False][1]]
+    fast_items = [[(s, p) for _, s, p in items] for items, _, _ in results[True][1]]
+    assert slow_items == fast_items, "Parser ringan harus menghasilkan source & published yang sama"
+
+    lags = {}
+    for workers in (0, 2):
+        with patch.object(config, 'NEWS_PARSE_WORKERS', workers):
+            if workers:
+                for future in [news_feed.get_pool().submit(news_feed.parse_feed, contents[0], False) for _ in range(workers)]:
+                    future.result()  # Warm-up: spawn worker + import feedparser
+            _, elapsed, lag = asyncio.run(_loop_lag(_parse_all(contents)))
+            news_feed.shutdown()
+        lags['thread' if not workers else f'pool x{workers}'] = (elapsed, lag)
+
+    print("--- RSS Parse Benchmark ---")
+    print(f"{feeds} feeds x {items} items\n")
+    print(f"feedparser per feed : {results[False][0]:8.2f} ms")
+    print(f"simple per feed     : {results[True][0]:8.2f} ms  ({results[False][0] / results[True][0]:.0f}x)")
+    print("\nfeedparser, semua feed concurrent (wall / lag maks event loop):")
+    for name, (elapsed, lag) in lags.items():
+        print(f"  {name:<10}: {elapsed:8.1f} ms / {lag:6.1f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    benchmark(*args)
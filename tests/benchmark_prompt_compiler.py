@@ -0,0 +1,124 @@
+"""
+Benchmark: prompt legacy (build_market_prompt) vs PromptCompiler (static system message + section ringkas).
+Input di bawah direkam dari log `📝 AI PROMPT INPUT` (tech_data, sentimen, pattern, skenario).
+
+Jalankan: python tests/benchmark_prompt_compiler.py
+"""
+import os
+import sys
+import time
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(repo_root)
+sys.path.append(os.path.join(repo_root, 'src'))
+
+import config
+from src.utils.calc import calculate_dual_scenarios
+from src.utils.prompt_builder import build_market_prompt
+from src.utils.prompt_compiler import TOKENIZER, PromptCompiler, count_tokens
+
+_SOL_TECH = {
+    'price': 142.37, 'rsi': 38.42, 'adx': 27.9, 'ema_fast': 143.12, 'ema_slow': 145.88,
+    'vol_ma': 81234.5, 'volume': 152310.2, 'bb_upper': 148.02, 'bb_lower': 139.71,
+    'stoch_k': 18.3, 'stoch_d': 24.6, 'atr': 1.2841, 'price_vs_ema': 'Below', 'trend_major': 'Bearish',
+    'pivots': {'P': 144.1, 'S1': 141.9, 'R1': 146.35},
+    'market_structure': 'BEARISH', 'global_trend_1d': 'BEARISH',
+    'wick_rejection': {'recent_rejection': 'BULLISH_REJECTION', 'rejection_strength': 2.7},
+    'last_candle': {'open': 142.9, 'high': 143.05, 'low': 141.62, 'close': 142.37},
+    'btc_trend': 'BEARISH', 'btc_correlation': 0.83,
+    'order_book': {'bids_vol_usdt': 412000.0, 'asks_vol_usdt': 298500.0, 'imbalance_pct': 15.97},
+    'funding_rate': 0.0041, 'open_interest': 1843211.4,
+    'lsr': {'longShortRatio': '1.84', 'longAccount': '0.648', 'shortAccount': '0.352'},
+}
+
+_SENTIMENT_ANALYSIS = {
+    'overall_sentiment': 'BEARISH', 'sentiment_score': 34, 'market_phase': 'DISTRIBUTION',
+    'smart_money_activity': 'SELLING', 'retail_sentiment': 'GREED',
+    'key_drivers': ['ETF outflow 3 hari berturut-turut', 'Unlock token SOL minggu depan', 'Funding positif di mayoritas altcoin'],
+    'risk_assessment': 'HIGH - Divergensi retail greed vs whale distribusi',
+    'summary': (
+        "Retail masih optimis setelah rebound singkat, namun arus stablecoin ke exchange melemah dan beberapa "
+        "wallet whale memindahkan SOL ke exchange. Berita utama didominasi outflow ETF dan kekhawatiran unlock "
+        "token. Kombinasi ini mengarah ke fase distribusi; rally jangka pendek cenderung dijual.\n\n"
+        "Waspadai likuidasi long jika BTC kehilangan support harian; sentimen bisa berbalik cepat ke fear."
+    ),
+}
+
+_PATTERN = {
+    'analysis': (
+        "BEARISH. Price formed a rising wedge on the 1h chart and broke the lower trendline with increasing "
+        "volume. MACD histogram printed a lower high while price made a marginal higher high (bearish "
+        "divergence). Expect continuation toward the 140 area unless 145 is reclaimed."
+    ),
+    'raw_data': {'open': 143.4, 'high': 143.9, 'low': 141.6, 'close': 142.37,
+                 'macd': -0.4123, 'macd_signal': -0.2011, 'macd_hist': -0.2112, 'volume': 61234.0},
+    'is_valid': True,
+}
+
+_ETH_TECH = dict(_SOL_TECH, price=3312.5, rsi=61.2, ema_fast=3290.1, ema_slow=3244.7, atr=21.43,
+                 price_vs_ema='Above', trend_major='Bullish', market_structure='BULLISH',
+                 pivots={'P': 3288.0, 'S1': 3250.2, 'R1': 3341.9},
+                 wick_rejection={'recent_rejection': 'NONE', 'rejection_strength': 0},
+                 last_candle={'open': 3301.0, 'high': 3318.4, 'low': 3297.2, 'close': 3312.5},
+                 btc_trend='BULLISH', btc_correlation=0.91)
+
+RECORDED_INPUTS = [
+    {
+        'symbol': 'SOL/USDT', 'tech_data': _SOL_TECH,
+        'sentiment_data': {'fng_value': 71, 'fng_text': 'Greed'},
+        'onchain_data': {'stablecoin_inflow': 'Negative'},
+        'pattern_analysis': _PATTERN, 'show_btc_context': True,
+        'sentiment_analysis': _SENTIMENT_ANALYSIS,
+    },
+    {
+        'symbol': 'ETH/USDT', 'tech_data': _ETH_TECH,
+        'sentiment_data': {'fng_value': 55, 'fng_text': 'Neutral'},
+        'onchain_data': {'stablecoin_inflow': 'Positive'},
+        'pattern_analysis': {'analysis': 'NEUTRAL. Range between 3280-3340, no clear pattern.', 'is_valid': True},
+        'show_btc_context': False, 'sentiment_analysis': None,
+    },
+]
+
+
+def _scenarios(rec):
+    return calculate_dual_scenarios(price=rec['tech_data']['price'], atr=rec['tech_data']['atr'])
+
+
+def _time_it(func, loops=200):
+    start = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return (time.perf_counter() - start) / loops * 1000
+
+
+def benchmark():
+    compiler = PromptCompiler()
+    print("--- Prompt Compiler Benchmark ---")
+    print(f"Token counter: {TOKENIZER} | "
+          f"Budget: {config.AI_PROMPT_TOKEN_BUDGET} | Static system: {compiler.static_tokens} tok (rendered once)\n")
+    print(f"{'symbol':<10} {'legacy tok':>10} {'compact tok':>11} {'dynamic tok':>11} {'legacy ms':>9} {'compact ms':>10}  trimmed")
+
+    for rec in RECORDED_INPUTS:
+        scenarios = _scenarios(rec)
+        args = (rec['symbol'], rec['tech_data'], rec['sentiment_data'], rec['onchain_data'], rec['pattern_analysis'], scenarios)
+        kwargs = {'show_btc_context': rec['show_btc_context'], 'sentiment_analysis': rec['sentiment_analysis']}
+
+        legacy = build_market_prompt(*args, **kwargs)
+        compiled = compiler.compile(*args, **kwargs)
+        legacy_ms = _time_it(lambda: build_market_prompt(*args, **kwargs))
+        compact_ms = _time_it(lambda: compiler.compile(*args, **kwargs))
+
+        print(f"{rec['symbol']:<10} {count_tokens(legacy):>10} {compiled.total_tokens:>11} {compiled.dynamic_tokens:>11} "
+              f"{legacy_ms:>9.3f} {compact_ms:>10.3f}  {','.join(compiled.trimmed) or '-'}")
+
+    # Budget ketat: section prioritas rendah (sentimen / berita) dipangkas dulu
+    rec = RECORDED_INPUTS[0]
+    tight = PromptCompiler(budget=compiler.static_tokens + 300)
+    compiled = tight.compile(rec['symbol'], rec['tech_data'], rec['sentiment_data'], rec['onchain_data'],
+                             rec['pattern_analysis'], _scenarios(rec), show_btc_context=True,
+                             sentiment_analysis=rec['sentiment_analysis'])
+    print(f"\nTight budget ({tight.budget}): {compiled.total_tokens} tok, trimmed={compiled.trimmed}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,138 @@
+"""
+Benchmark: Vision AI single chart vs grid batch per candle setup.
+Provider disimulasikan (latency = overhead request + waktu generate per token), token gambar
+dihitung dengan rumus OpenAI (low = 85, high = 85 + 170 per tile 512px), biaya dari ai_ledger.
+
+Jalankan: python tests/benchmark_vision_batch.py [jumlah_simbol]
+"""
+import asyncio
+import base64
+import io
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(repo_root)
+sys.path.append(os.path.join(repo_root, 'src'))
+
+import config
+from src.modules.pattern_recognizer import PatternRecognizer
+from src.utils import ai_ledger, chart_renderer
+
+REQUEST_OVERHEAD = 1.2      # Detik per request (antrian provider, TTFT, upload gambar)
+SECONDS_PER_TOKEN = 0.004   # Kecepatan generate
+COMPLETION_TOKENS = 70      # Token output per panel
+PRICE = (0.15, 0.60)        # USD per 1M token (input, output), contoh model vision murah
+ANALYSIS = "BULLISH. Price holds above the flag support and MACD histogram turns positive."
+
+
+def image_tokens(b64, detail):
+    if detail == 'low':
+        return 85
+    w, h = Image.open(io.BytesIO(base64.b64decode(b64))).size
+    scale = min(1.0, 2048 / max(w, h))
+    w, h = w * scale, h * scale
+    scale = min(1.0, 768 / min(w, h))
+    w, h = w * scale, h * scale
+    return 85 + 170 * math.ceil(w / 512) * math.ceil(h / 512)
+
+
+class FakeVisionProvider:
+    def __init__(self):
+        self.requests = 0
+
+    async def create(self, model, messages, max_tokens, temperature):
+        self.requests += 1
+        text, image = messages[0]['content']
+        text, url = text['text'], image['image_url']
+        img_b64 = url['url'].split(',', 1)[1]
+        symbols = re.findall(r'^\d+\. (\S+?):', text, re.M)  # Baris panel prompt batch
+        panels = max(1, len(symbols))
+        prompt_tokens = len(text) // 4 + image_tokens(img_b64, url['detail'])
+        completion_tokens = COMPLETION_TOKENS * panels
+        await asyncio.sleep(REQUEST_OVERHEAD + completion_tokens * SECONDS_PER_TOKEN)
+
+        if panels > 1:
+            content = json.dumps({'panels': [{'panel': i, 'symbol': s, 'analysis': ANALYSIS}
+                                             for i, s in enumerate(symbols, 1)]})
+        else:
+            content = ANALYSIS
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens}
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))], usage=usage)
+
+
+def _chart_png(seed):
+    rng = np.random.default_rng(seed)
+    n = chart_renderer.CHART_CANDLES
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    opens = closes + rng.normal(0, 0.5, n)
+    macd = rng.normal(0, 0.2, n)
+    png = chart_renderer.ChartRenderer().render(opens, np.maximum(opens, closes) + 0.3, np.minimum(opens, closes) - 0.3,
+                                                closes, rng.uniform(10, 100, n), macd, macd * 0.8, macd * 0.2)
+    return base64.b64encode(png).decode()
+
+
+async def _one_candle(symbols, charts, batch, detail):
+    market_data = MagicMock()
+    market_data.market_store = {s: {config.TIMEFRAME_SETUP: [[1000, 1, 2, 0.5, 1.5, 10]]} for s in symbols}
+    recognizer = PatternRecognizer(market_data)
+    provider = FakeVisionProvider()
+    recognizer.client = MagicMock()
+    recognizer.client.chat.completions.create = provider.create
+
+    async def render(candles, _it=iter(charts)):
+        return next(_it), {'close': 1.5, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'macd': 0.1,
+                           'macd_signal': 0.05, 'macd_hist': 0.05, 'volume': 10}
+
+    # AnalysisPool: maks AI_WORKER_CONCURRENCY simbol dianalisa bersamaan
+    gate = asyncio.Semaphore(config.AI_WORKER_CONCURRENCY)
+
+    async def worker(symbol):
+        async with gate:
+            return await recognizer.analyze_pattern(symbol)
+
+    with patch.object(config, 'PATTERN_BATCH_ENABLED', batch), \
+         patch.object(config, 'PATTERN_BATCH_IMAGE_DETAIL', detail), \
+         patch.object(chart_renderer, 'render_async', render):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(worker(s) for s in symbols))
+        elapsed = time.perf_counter() - start
+    assert all(r['is_valid'] for r in results)
+    return elapsed, provider.requests
+
+
+def benchmark(count=6):
+    symbols = [f"C{i}/USDT" for i in range(count)]
+    charts = [_chart_png(i) for i in range(count)]
+    print("--- Vision Batch Benchmark (simulated provider) ---")
+    print(f"{count} symbols | concurrency {config.AI_WORKER_CONCURRENCY} | max panels {config.PATTERN_BATCH_MAX_PANELS} "
+          f"| window {config.PATTERN_BATCH_WINDOW}s\n")
+    print(f"{'mode':<12} {'requests':>8} {'wall s':>7} {'prompt tok':>10} {'compl tok':>9} {'cost $':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(config, 'AI_API_KEY', 'dummy'), \
+         patch.object(config, 'USE_PATTERN_RECOGNITION', True), \
+         patch.object(config, 'AI_LEDGER_ENABLED', True), \
+         patch.object(config, 'AI_PROVIDER_RATE_LIMITS', {'default': 0}), \
+         patch.object(config, 'AI_MODEL_PRICING', {config.AI_VISION_MODEL: PRICE}):
+        for mode, batch, detail in (('single', False, 'low'), ('batch/high', True, 'high'), ('batch/low', True, 'low')):
+            with patch.object(config, 'AI_LEDGER_FILENAME', os.path.join(tmp, f"{mode.replace('/', '_')}.jsonl")):
+                elapsed, requests = asyncio.run(_one_candle(symbols, charts, batch, detail))
+                rows = ai_ledger.load()
+            prompt = sum(r['prompt_tokens'] for r in rows)
+            completion = sum(r['completion_tokens'] for r in rows)
+            cost = sum(r['cost_usd'] for r in rows)
+            print(f"{mode:<12} {requests:>8} {elapsed:>7.2f} {prompt:>10} {completion:>9} {cost:>9.6f}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 6)
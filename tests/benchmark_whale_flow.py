@@ -0,0 +1,83 @@
+"""
+Benchmark: ingest transaksi whale di rate aggTrade.
+Legacy : format string + list.pop(0) per transaksi, dedup pakai key string.
+Ring   : (ts, side, notional) ke ring buffer + running sum 5m/1h/4h, format hanya saat prompt meminta.
+
+Jalankan: python tests/benchmark_whale_flow.py [jumlah_transaksi] [jumlah_koin]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(repo_root)
+sys.path.append(os.path.join(repo_root, 'src'))
+
+import config
+from src.modules.onchain import OnChainAnalyzer
+
+
+class LegacyWhales:
+    """Salinan detect_whale sebelum ring buffer."""
+
+    def __init__(self):
+        self.whale_transactions = {}
+        self._last_whale_key = {}
+        self._last_whale_time = {}
+
+    def detect_whale(self, symbol, size_usdt, side):
+        if size_usdt >= config.WHALE_THRESHOLD_USDT:
+            current_time = time.time()
+            whale_key = f"{side}_{symbol}_{int(size_usdt)}"
+            if whale_key == self._last_whale_key.get(symbol) and \
+                    (current_time - self._last_whale_time.get(symbol, 0)) < config.WHALE_DEDUP_WINDOW_SECONDS:
+                return
+            self._last_whale_key[symbol] = whale_key
+            self._last_whale_time[symbol] = current_time
+            timestamp = datetime.now().strftime("%H:%M")
+            msg = f"🐋 [{timestamp}] {side} {symbol} worth ${size_usdt:,.0f}"
+            if symbol not in self.whale_transactions:
+                self.whale_transactions[symbol] = []
+            self.whale_transactions[symbol].append(msg)
+            if len(self.whale_transactions[symbol]) > config.WHALE_HISTORY_LIMIT:
+                self.whale_transactions[symbol].pop(0)
+
+
+def benchmark(trades=200_000, coins=20):
+    rng = random.Random(11)
+    symbols = [f"COIN{i}/USDT" for i in range(coins)]
+    stream = [(rng.choice(symbols), rng.uniform(1, 30) * 1e6, rng.choice(('BUY', 'SELL'))) for _ in range(trades)]
+
+    legacy = LegacyWhales()
+    start = time.perf_counter()
+    for symbol, size, side in stream:
+        legacy.detect_whale(symbol, size, side)
+    legacy_us = (time.perf_counter() - start) * 1e6 / trades
+
+    onchain = OnChainAnalyzer()
+    start = time.perf_counter()
+    for symbol, size, side in stream:
+        onchain.detect_whale(symbol, size, side)
+    ring_us = (time.perf_counter() - start) * 1e6 / trades
+
+    start = time.perf_counter()
+    for symbol in symbols:
+        onchain.get_latest(symbol)
+    onchain.get_latest()
+    prompt_ms = (time.perf_counter() - start) * 1000
+
+    assert onchain.whale_transactions.keys() == legacy.whale_transactions.keys()
+    assert [len(v) for v in onchain.whale_transactions.values()] == [len(v) for v in legacy.whale_transactions.values()]
+
+    print("--- Whale Flow Benchmark ---")
+    print(f"{trades} whale trades | {coins} coins | windows {config.WHALE_FLOW_WINDOWS}\n")
+    print(f"legacy ingest (format + list.pop(0))   : {legacy_us:6.2f} us/trade")
+    print(f"ring buffer ingest (+ rolling sums)    : {ring_us:6.2f} us/trade  ({legacy_us / ring_us:.1f}x)")
+    print(f"get_latest semua koin + global (prompt): {prompt_ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    benchmark(*args)
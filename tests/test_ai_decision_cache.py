@@ -0,0 +1,124 @@
+"""
+Test suite untuk cache keputusan AI (AIBrain.analyze_market + build_market_features).
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch, AsyncMock
+import sys
+import os
+import asyncio
+
+# Adjust path to include src and root
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+
+from src.modules.ai_brain import AIBrain
+from src.utils.prompt_builder import build_market_features
+from src.utils import metrics
+import config
+
+
+def _tech(**overrides):
+    data = {
+        'price': 100.0, 'rsi': 47.0, 'stoch_k': 30.0, 'ema_fast': 99.0, 'ema_slow': 95.0,
+        'trend_major': 'BULLISH', 'market_structure': 'HH/HL', 'btc_trend': 'BULLISH',
+        'pivots': {'P': 98.0, 'S1': 90.0, 'R1': 110.0},
+        'volume': 100, 'vol_ma': 100, 'order_book': {'imbalance_pct': 5.0},
+    }
+    data.update(overrides)
+    return data
+
+
+class TestMarketFeatures(unittest.TestCase):
+
+    def test_small_moves_inside_bucket_keep_same_hash(self):
+        a = build_market_features('BTC/USDT', _tech(rsi=46.0, price=100.0), {'fng_value': 52})
+        b = build_market_features('BTC/USDT', _tech(rsi=49.5, price=101.0), {'fng_value': 58})
+        self.assertEqual(AIBrain.feature_hash(a), AIBrain.feature_hash(b))
+
+    def test_state_change_changes_hash(self):
+        base = build_market_features('BTC/USDT', _tech(), {'fng_value': 50})
+        rsi_moved = build_market_features('BTC/USDT', _tech(rsi=51.0), {'fng_value': 50})
+        broke_r1 = build_market_features('BTC/USDT', _tech(price=111.0), {'fng_value': 50})
+        other_pattern = build_market_features('BTC/USDT', _tech(), {'fng_value': 50},
+                                              {'analysis': 'Bearish flag, BEARISH bias', 'is_valid': True})
+        hashes = {AIBrain.feature_hash(f) for f in (base, rsi_moved, broke_r1, other_pattern)}
+        self.assertEqual(len(hashes), 4)
+        self.assertEqual(broke_r1['pivot_side'], 'ABOVE_R1')
+        self.assertEqual(other_pattern['pattern'], 'BEARISH')
+
+    def test_bucket_size_is_configurable(self):
+        with patch.object(config, 'AI_DECISION_CACHE_RSI_BUCKET', 10):
+            a = build_market_features('BTC/USDT', _tech(rsi=41.0), {})
+            b = build_market_features('BTC/USDT', _tech(rsi=49.0), {})
+        self.assertEqual(a['rsi'], b['rsi'])
+
+
+class TestDecisionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.patchers = [
+            patch.object(config, 'AI_API_KEY', 'dummy_key'),
+            patch.object(config, 'AI_MODEL_NAME', 'test-model'),
+            patch.object(config, 'AI_DECISION_CACHE_ENABLED', True),
+            patch.object(config, 'AI_DECISION_CACHE_TTL', 3600),
+            patch.object(config, 'AI_DECISION_CACHE_MAX_SIZE', 2),
+        ]
+        for p in self.patchers:
+            p.start()
+        metrics.counter('ai_decision_cache_hit').reset()
+        metrics.counter('ai_decision_cache_miss').reset()
+
+        self.brain = AIBrain()
+        message = MagicMock(content='{"decision": "BUY", "confidence": 80}', reasoning=None)
+        self.create = AsyncMock(return_value=MagicMock(choices=[MagicMock(message=message)]))
+        self.brain.client = MagicMock()
+        self.brain.client.chat.completions.create = self.create
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def test_same_features_skip_model_call(self):
+        features = {'symbol': 'BTC/USDT', 'rsi': 45}
+        first = asyncio.run(self.brain.analyze_market("prompt 1", features=features))
+        second = asyncio.run(self.brain.analyze_market("prompt 2", features=dict(features)))
+
+        self.assertEqual(self.create.await_count, 1)
+        self.assertEqual(second['decision'], 'BUY')
+        self.assertTrue(second['cached'])
+        self.assertNotIn('cached', first)
+        self.assertEqual(self.brain.cache_stats()['hits'], 1)
+        self.assertEqual(self.brain.cache_stats()['misses'], 1)
+
+    def test_ttl_expiry_calls_model_again(self):
+        features = {'symbol': 'BTC/USDT', 'rsi': 45}
+        with patch('src.modules.ai_brain.time.time', return_value=1000.0):
+            asyncio.run(self.brain.analyze_market("p", features=features))
+        with patch('src.modules.ai_brain.time.time', return_value=1000.0 + 3601):
+            asyncio.run(self.brain.analyze_market("p", features=features))
+        self.assertEqual(self.create.await_count, 2)
+
+    def test_lru_eviction(self):
+        for sym in ('A', 'B', 'C'):
+            asyncio.run(self.brain.analyze_market("p", features={'symbol': sym}))
+        self.assertEqual(len(self.brain.decision_cache), 2)
+        # 'A' paling lama tidak dipakai -> sudah dibuang
+        asyncio.run(self.brain.analyze_market("p", features={'symbol': 'A'}))
+        self.assertEqual(self.create.await_count, 4)
+
+    def test_ai_error_is_not_cached(self):
+        self.create.side_effect = Exception("timeout")
+        features = {'symbol': 'BTC/USDT'}
+        asyncio.run(self.brain.analyze_market("p", features=features))
+        asyncio.run(self.brain.analyze_market("p", features=features))
+        self.assertEqual(self.create.await_count, 2)
+        self.assertEqual(len(self.brain.decision_cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+"""
+Test suite untuk ledger telemetri AI (src/utils/ai_ledger.py):
+token/biaya per request, context simbol & trace, link ke journal, dan summarize().
+"""
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.utils import ai_ledger
+from src.modules.ai_brain import AIBrain
+
+
+def _usage(prompt=1000, completion=200, reasoning=50, cost=None):
+    details = MagicMock(reasoning_tokens=reasoning)
+    usage = MagicMock(prompt_tokens=prompt, completion_tokens=completion,
+                      completion_tokens_details=details, model_extra={})
+    usage.cost = cost
+    return usage
+
+
+class TestAILedger(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'ledger.jsonl')
+        self.patchers = [
+            patch.object(config, 'AI_LEDGER_ENABLED', True),
+            patch.object(config, 'AI_LEDGER_FILENAME', self.path),
+            patch.object(config, 'AI_MODEL_PRICING', {'paid/model': (2.0, 10.0)}),
+        ]
+        for p in self.patchers:
+            p.start()
+        ai_ledger._totals['model'].clear()
+        ai_ledger._totals['symbol'].clear()
+        ai_ledger._by_trace.clear()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_record_usage_cost_and_context(self):
+        token = ai_ledger.bind('BTC/USDT', 'trace-1')
+        try:
+            row = ai_ledger.record('decision', 'paid/model', usage=_usage(), latency_ms=850.0,
+                                   retries=1, outcome={'decision': 'BUY', 'confidence': 80, 'extra': [1, 2]})
+        finally:
+            ai_ledger.unbind(token)
+
+        # 1000 * $2/1M + 200 * $10/1M
+        self.assertAlmostEqual(row['cost_usd'], 0.004)
+        self.assertEqual(row['reasoning_tokens'], 50)
+        self.assertEqual(row['symbol'], 'BTC/USDT')
+        self.assertEqual(row['trace_id'], 'trace-1')
+        self.assertEqual(row['outcome'], {'decision': 'BUY', 'confidence': 80})
+
+        stored = ai_ledger.load(self.path)
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(stored[0]['retries'], 1)
+        self.assertEqual(ai_ledger.aggregates()['symbol']['BTC/USDT']['calls'], 1)
+
+    def test_provider_cost_overrides_pricing(self):
+        row = ai_ledger.record('vision', 'paid/model', usage=_usage(cost=0.0123))
+        self.assertEqual(row['cost_usd'], 0.0123)
+
+    def test_mock_usage_does_not_break_record(self):
+        row = ai_ledger.record('decision', 'free/model', usage=MagicMock(), error=ValueError("bad json"))
+        self.assertEqual(row['prompt_tokens'], 0)
+        self.assertEqual(row['error'], 'ValueError: bad json')
+        self.assertEqual(ai_ledger.aggregates()['model']['free/model']['errors'], 1)
+
+    def test_prompt_sections_split_on_headers(self):
+        prompt = "ROLE: x\nTASK: y\n[MOMENTUM]\n" + "r" * 400 + "\n[ORDER BOOK DEPTH]\nabc\n"
+        sections = ai_ledger.prompt_sections(prompt)
+        self.assertEqual(set(sections), {'ROLE', 'TASK', 'MOMENTUM', 'ORDER BOOK DEPTH'})
+        self.assertGreater(sections['MOMENTUM'], sections['ORDER BOOK DEPTH'])
+
+    def test_trade_link_and_cost_to_pnl_summary(self):
+        token = ai_ledger.bind('SOL/USDT', 'trace-2')
+        try:
+            ai_ledger.record('vision', 'paid/model', usage=_usage(prompt=500, completion=100))
+            ai_ledger.record('decision', 'paid/model', usage=_usage(), prompt="[TREND]\nabc\n[MOMENTUM]\nabc")
+        finally:
+            ai_ledger.unbind(token)
+        # Panggilan tanpa trade
+        ai_ledger.record('sentiment', 'paid/model', usage=_usage(), symbol='MARKET')
+
+        costs = ai_ledger.trade_costs('trace-2')
+        self.assertEqual(costs['ai_calls'], 2)
+        self.assertAlmostEqual(costs['ai_cost_usd'], 0.006)
+
+        link = ai_ledger.link_trade({'trace_id': 'trace-2', 'symbol': 'SOL/USDT', 'result': 'WIN', 'pnl_usdt': 3.0})
+        self.assertEqual(link['kind'], 'trade')
+
+        summary = ai_ledger.summarize(ai_ledger.load(self.path))
+        model = summary['model']['paid/model']
+        self.assertEqual(model['calls'], 3)
+        self.assertEqual(model['trades'], 1)
+        self.assertEqual(model['pnl_usdt'], 3.0)
+        self.assertAlmostEqual(model['cost_to_pnl'], 0.01 / 3.0, places=6)
+        self.assertEqual(summary['symbol']['SOL/USDT']['trades'], 1)
+        self.assertIsNone(summary['symbol']['MARKET']['cost_to_pnl'])
+        self.assertEqual(summary['section']['TREND']['trades'], 1)
+
+    def test_record_in_event_loop_writes_off_loop(self):
+        async def scenario():
+            with patch.object(ai_ledger, 'flush', wraps=ai_ledger.flush) as flush:
+                ai_ledger.record('decision', 'paid/model', usage=_usage())
+                ai_ledger.record('vision', 'paid/model', usage=_usage())
+                flush.assert_not_called()  # Tidak ada file I/O di event loop
+                self.assertFalse(os.path.exists(self.path))
+                await asyncio.sleep(0.2)
+                return flush.call_count
+
+        calls = asyncio.run(scenario())
+        self.assertEqual(calls, 1)  # Dua baris ditulis dalam satu batch
+        self.assertEqual([r['kind'] for r in ai_ledger.load(self.path)], ['decision', 'vision'])
+
+    def test_rows_left_by_closed_loop_keep_their_file(self):
+        async def scenario():
+            ai_ledger.record('decision', 'paid/model', usage=_usage())  # Loop selesai sebelum flush jalan
+
+        asyncio.run(scenario())
+        other = os.path.join(self.tmp.name, 'other.jsonl')
+        with patch.object(config, 'AI_LEDGER_FILENAME', other):
+            ai_ledger.record('vision', 'paid/model', usage=_usage())
+
+        self.assertEqual([r['kind'] for r in ai_ledger.load(self.path)], ['decision'])
+        self.assertEqual([r['kind'] for r in ai_ledger.load(other)], ['vision'])
+
+    def test_journal_keeps_entry_snapshot_after_trace_evicted(self):
+        token = ai_ledger.bind('BTC/USDT', 'trace-3')
+        try:
+            ai_ledger.record('decision', 'paid/model', usage=_usage())
+        finally:
+            ai_ledger.unbind(token)
+        snapshot = ai_ledger.trade_costs('trace-3')  # Disalin ke tracker saat entry
+        ai_ledger._by_trace.clear()                  # Restart / trace ter-evict
+
+        # Import lazy: journal tidak tertinggal di sys.modules untuk test yang mem-patch MongoManager sebelum import
+        if 'src.modules.journal' not in sys.modules:
+            self.addCleanup(sys.modules.pop, 'src.modules.journal', None)
+        from src.modules.journal import TradeJournal
+        with patch('src.modules.journal.MongoManager'):
+            journal = TradeJournal()
+        journal.mongo.insert_trade.return_value = True
+        journal.log_trade({'symbol': 'BTC/USDT', 'pnl_usdt': 1.0, 'size_usdt': 100,
+                           'trace': {'trace_id': 'trace-3', 'marks': {}}, 'ai_costs': snapshot})
+
+        stored = journal.mongo.insert_trade.call_args[0][0]
+        self.assertEqual(stored['ai_calls'], 1)
+        self.assertAlmostEqual(stored['ai_cost_usd'], 0.004)
+        self.assertEqual(ai_ledger.load(self.path)[-1]['ai_calls'], 1)  # Record link trade ikut snapshot
+
+    def test_analyze_market_records_each_attempt(self):
+        with patch.object(config, 'AI_API_KEY', 'dummy_key'), \
+             patch.object(config, 'AI_STREAMING_ENABLED', False), \
+             patch.object(config, 'AI_ROUTER_MODE', 'failover'), \
+             patch.object(config, 'AI_ROUTER_BACKUPS', [{'model': 'backup/model'}]):
+            brain = AIBrain()
+            brain.client = MagicMock()
+
+            async def create(**kwargs):
+                content = '{"decision": "SELL", "confidence": 70}' if kwargs['model'] == 'backup/model' else 'oops'
+                msg = MagicMock(content=content, reasoning=None, reasoning_content=None, model_extra={})
+                return MagicMock(choices=[MagicMock(message=msg)], usage=_usage(prompt=300, completion=20))
+
+            brain.client.chat.completions.create = AsyncMock(side_effect=create)
+            asyncio.run(brain.analyze_market("prompt"))
+
+        rows = ai_ledger.load(self.path)
+        self.assertEqual([r['model'] for r in rows], [config.AI_MODEL_NAME, 'backup/model'])
+        self.assertEqual([r['retries'] for r in rows], [0, 1])
+        self.assertIsNotNone(rows[0]['error'])
+        self.assertEqual(rows[1]['outcome']['decision'], 'SELL')
+        self.assertEqual(rows[1]['prompt_tokens'], 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
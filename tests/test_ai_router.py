@@ -0,0 +1,193 @@
+"""
+Test suite untuk router model AI (src/utils/ai_router.py): failover, hedged request,
+circuit breaker, dan deadline total.
+"""
+import sys
+import os
+import time
+import asyncio
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.utils import ai_router, metrics
+from src.modules.ai_brain import AIBrain
+
+
+def _fake_request(behaviour):
+    """behaviour: model -> (delay detik, hasil atau Exception)."""
+    calls = []
+
+    async def request_fn(endpoint):
+        calls.append(endpoint.model)
+        delay, outcome = behaviour[endpoint.model]
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return request_fn, calls
+
+
+class TestProviderRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.patchers = [
+            patch.object(config, 'AI_ROUTER_TIMEOUT', 5),
+            patch.object(config, 'AI_ROUTER_DEADLINE', 5),
+            patch.object(config, 'AI_ROUTER_HEDGE_MIN_SAMPLES', 1000),
+            patch.object(config, 'AI_ROUTER_HEDGE_DEFAULT_MS', 50),
+            patch.object(config, 'AI_ROUTER_HEDGE_MIN_MS', 10),
+            patch.object(config, 'AI_ROUTER_HEDGE_MAX_INFLIGHT', 2),
+            patch.object(config, 'AI_ROUTER_BREAKER_FAILURES', 2),
+            patch.object(config, 'AI_ROUTER_BREAKER_COOLDOWN', 60),
+        ]
+        for p in self.patchers:
+            p.start()
+        for name in ('ai_router_hedged', 'ai_router_failover', 'ai_router_deadline_exceeded'):
+            metrics.counter(name).reset()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def _router(self, mode, *models):
+        return ai_router.ProviderRouter([ai_router.Endpoint(m) for m in models], mode=mode)
+
+    def test_failover_to_backup_on_error(self):
+        router = self._router('failover', 'primary', 'backup')
+        request_fn, calls = _fake_request({
+            'primary': (0, RuntimeError("502")),
+            'backup': (0, {'decision': 'BUY'}),
+        })
+        endpoint, result = asyncio.run(router.call(request_fn))
+        self.assertEqual(endpoint.model, 'backup')
+        self.assertEqual(result, {'decision': 'BUY'})
+        self.assertEqual(calls, ['primary', 'backup'])
+        self.assertEqual(metrics.counter('ai_router_failover').value, 1)
+
+    def test_hedge_fires_after_delay_and_fast_backup_wins(self):
+        router = self._router('hedged', 'slow', 'fast')
+        request_fn, calls = _fake_request({
+            'slow': (1.0, {'decision': 'SELL'}),
+            'fast': (0.02, {'decision': 'BUY'}),
+        })
+        start = time.perf_counter()
+        endpoint, result = asyncio.run(router.call(request_fn))
+        elapsed = time.perf_counter() - start
+
+        # hedge delay 50ms + backup 20ms, tidak menunggu primary 1s
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(endpoint.model, 'fast')
+        self.assertEqual(result['decision'], 'BUY')
+        self.assertEqual(metrics.counter('ai_router_hedged').value, 1)
+        # Primary yang kalah dibatalkan -> tidak dihitung error
+        self.assertEqual(router.endpoints[0].errors.value, 0)
+
+    def test_fast_primary_does_not_hedge(self):
+        router = self._router('hedged', 'quick', 'spare')
+        request_fn, calls = _fake_request({
+            'quick': (0, {'decision': 'WAIT'}),
+            'spare': (0, {'decision': 'BUY'}),
+        })
+        endpoint, _ = asyncio.run(router.call(request_fn))
+        self.assertEqual(endpoint.model, 'quick')
+        self.assertEqual(calls, ['quick'])
+
+    def test_hedge_delay_uses_p90_latency(self):
+        endpoint = ai_router.Endpoint('p90-model')
+        endpoint.latency.reset()
+        for ms in range(100, 1100, 100):
+            endpoint.latency.observe(ms)
+        with patch.object(config, 'AI_ROUTER_HEDGE_MIN_SAMPLES', 5), \
+             patch.object(config, 'AI_ROUTER_HEDGE_MAX_MS', 30000):
+            self.assertAlmostEqual(endpoint.hedge_delay(), 0.9)
+
+    def test_circuit_opens_and_skips_endpoint(self):
+        router = self._router('failover', 'flaky', 'stable')
+        request_fn, calls = _fake_request({
+            'flaky': (0, RuntimeError("timeout")),
+            'stable': (0, {'decision': 'BUY'}),
+        })
+
+        async def run():
+            for _ in range(3):
+                await router.call(request_fn)
+
+        asyncio.run(run())
+        # 2 kegagalan -> circuit open, panggilan ke-3 langsung ke 'stable'
+        self.assertEqual(calls, ['flaky', 'stable', 'flaky', 'stable', 'stable'])
+        self.assertEqual(router.endpoints[0].breaker.state, ai_router.CircuitBreaker.OPEN)
+
+    def test_half_open_success_closes_circuit(self):
+        breaker = ai_router.CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, ai_router.CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # hanya satu percobaan
+        breaker.record_success()
+        self.assertEqual(breaker.state, ai_router.CircuitBreaker.CLOSED)
+
+    def test_deadline_bounds_total_latency(self):
+        router = self._router('failover', 'stuck')
+        request_fn, _ = _fake_request({'stuck': (2.0, {'decision': 'BUY'})})
+
+        with patch.object(config, 'AI_ROUTER_DEADLINE', 0.1):
+            start = time.perf_counter()
+            with self.assertRaises(TimeoutError):
+                asyncio.run(router.call(request_fn))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(metrics.counter('ai_router_deadline_exceeded').value, 1)
+
+    def test_timeout_starts_after_rate_limit_slot(self):
+        acquired = []
+
+        async def slow_acquire(model):
+            await asyncio.sleep(0.15)  # Antri di rate limiter provider
+            acquired.append(model)
+
+        router = ai_router.ProviderRouter([ai_router.Endpoint('primary')], mode='failover', acquire=slow_acquire)
+        request_fn, calls = _fake_request({'primary': (0.05, {'decision': 'SELL'})})
+
+        with patch.object(config, 'AI_ROUTER_TIMEOUT', 0.1):
+            endpoint, result = asyncio.run(router.call(request_fn))
+        self.assertEqual(result, {'decision': 'SELL'})
+        self.assertEqual((acquired, calls), (['primary'], ['primary']))
+        self.assertLess(endpoint.latency.percentile(90), 100)  # Waktu antri tidak masuk latency model
+
+
+class TestAIBrainRouting(unittest.TestCase):
+
+    def _completion(self, content):
+        msg = MagicMock(content=content, reasoning=None, reasoning_content=None, model_extra={})
+        return MagicMock(choices=[MagicMock(message=msg)])
+
+    def test_invalid_json_from_primary_fails_over_to_backup(self):
+        with patch.object(config, 'AI_API_KEY', 'dummy_key'), \
+             patch.object(config, 'AI_STREAMING_ENABLED', False), \
+             patch.object(config, 'AI_ROUTER_MODE', 'failover'), \
+             patch.object(config, 'AI_ROUTER_BACKUPS', [{'model': 'backup/model'}]):
+            brain = AIBrain()
+            brain.client = MagicMock()
+
+            async def create(**kwargs):
+                if kwargs['model'] == 'backup/model':
+                    return self._completion('{"decision": "BUY", "confidence": 70}')
+                return self._completion('not json at all')
+
+            brain.client.chat.completions.create = AsyncMock(side_effect=create)
+            decision = asyncio.run(brain.analyze_market("prompt"))
+
+        self.assertEqual(decision['decision'], 'BUY')
+        models = [c.kwargs['model'] for c in brain.client.chat.completions.create.call_args_list]
+        self.assertEqual(models, [config.AI_MODEL_NAME, 'backup/model'])
+
+
+if __name__ == '__main__':
+    unittest.main()
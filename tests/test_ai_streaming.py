@@ -0,0 +1,132 @@
+"""
+Test suite untuk streaming response AI + ekstraksi JSON incremental.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch, AsyncMock
+import sys
+import os
+import time
+import asyncio
+
+# Adjust path to include src and root
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+if root_path not in sys.path:
+    sys.path.insert(0, root_path)
+
+from src.modules.ai_brain import AIBrain
+from src.utils.json_stream import IncrementalJSONExtractor
+import config
+
+
+class TestIncrementalJSONExtractor(unittest.TestCase):
+
+    def test_object_split_across_chunks(self):
+        ex = IncrementalJSONExtractor(required=('decision', 'confidence'))
+        chunks = ['```json\n{"deci', 'sion": "BUY", ', '"reason": "breakout {R1}", ', '"confidence": 7', '5}\n```']
+        results = [ex.feed(c) for c in chunks]
+        self.assertEqual(results[:-1], [None] * 4)
+        self.assertEqual(results[-1], {'decision': 'BUY', 'reason': 'breakout {R1}', 'confidence': 75})
+
+    def test_escaped_quote_and_nested_object(self):
+        ex = IncrementalJSONExtractor()
+        result = ex.feed('{"reason": "say \\"hi\\" }", "meta": {"a": 1}}')
+        self.assertEqual(result['meta'], {'a': 1})
+        self.assertEqual(result['reason'], 'say "hi" }')
+
+    def test_skips_non_json_braces_and_incomplete_objects(self):
+        ex = IncrementalJSONExtractor(required=('decision',))
+        self.assertIsNone(ex.feed('Thinking {not json} then {"confidence": 10} '))
+        self.assertEqual(ex.feed('{"decision": "WAIT"}'), {'decision': 'WAIT'})
+
+
+class _FakeStream:
+    """Meniru AsyncStream OpenAI: reasoning dulu, lalu JSON, lalu ekor yang lambat."""
+
+    def __init__(self, pieces, tail_delay):
+        self.pieces = pieces
+        self.tail_delay = tail_delay
+        self.closed = False
+
+    def _chunk(self, content=None, reasoning=None):
+        delta = MagicMock(content=content, reasoning=reasoning, reasoning_content=None, model_extra={})
+        return MagicMock(choices=[MagicMock(delta=delta)])
+
+    async def _gen(self):
+        for kind, text in self.pieces:
+            await asyncio.sleep(0)
+            yield self._chunk(**{kind: text})
+        await asyncio.sleep(self.tail_delay)
+        yield self._chunk(content="\nDone.")
+
+    def __aiter__(self):
+        if not hasattr(self, '_it'):
+            self._it = self._gen()
+        return self._it
+
+    async def close(self):
+        self.closed = True
+
+
+class TestStreamingDecision(unittest.TestCase):
+
+    def setUp(self):
+        self.patchers = [
+            patch.object(config, 'AI_API_KEY', 'dummy_key'),
+            patch.object(config, 'AI_STREAMING_ENABLED', True),
+            patch.object(config, 'AI_LOG_REASONING', True),
+            patch.object(config, 'AI_STREAM_DRAIN_TIMEOUT', 2),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def test_returns_before_stream_finishes_and_logs_reasoning(self):
+        stream = _FakeStream([
+            ('reasoning', 'Price at S1, '),
+            ('reasoning', 'wick rejection.'),
+            ('content', '{"decision": "BUY", '),
+            ('content', '"confidence": 80}'),
+        ], tail_delay=0.5)
+
+        brain = AIBrain()
+        brain.client = MagicMock()
+        brain.client.chat.completions.create = AsyncMock(return_value=stream)
+
+        async def run():
+            with patch('src.modules.ai_brain.logger') as mock_logger:
+                start = time.perf_counter()
+                decision = await brain.analyze_market("prompt")
+                elapsed = time.perf_counter() - start
+                await asyncio.sleep(0.7)  # biarkan background drain selesai
+                return decision, elapsed, mock_logger
+
+        decision, elapsed, mock_logger = asyncio.run(run())
+        self.assertEqual(decision['decision'], 'BUY')
+        self.assertEqual(decision['confidence'], 80)
+        self.assertLess(elapsed, 0.3)
+        self.assertTrue(stream.closed)
+        self.assertTrue(brain.client.chat.completions.create.call_args.kwargs['stream'])
+
+        logged = " ".join(str(c) for c in mock_logger.info.call_args_list)
+        self.assertIn("Price at S1, wick rejection.", logged)
+
+    def test_falls_back_to_full_text_parse(self):
+        stream = _FakeStream([('content', 'Answer: {"decision": "SELL"}')], tail_delay=0)
+        brain = AIBrain()
+        brain.client = MagicMock()
+        brain.client.chat.completions.create = AsyncMock(return_value=stream)
+
+        decision = asyncio.run(brain.analyze_market("prompt"))
+        self.assertEqual(decision['decision'], 'SELL')
+        self.assertEqual(decision['confidence'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Test suite untuk cache pre-render chart PatternRecognizer:
+key (symbol, candle_ts), eviction LRU, skip jika analisa Vision sudah ada, dan arsip ke disk.
+"""
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.modules.pattern_recognizer import PatternRecognizer
+from src.utils import chart_renderer
+
+IMG = 'iVBORw0KGgo='  # base64 header PNG
+
+
+def _recognizer(store):
+    market_data = MagicMock()
+    market_data.market_store = store
+    with patch.object(config, 'AI_API_KEY', None):
+        return PatternRecognizer(market_data)
+
+
+def _candles(last_ts):
+    return [[last_ts - 3_600_000, 1, 2, 0.5, 1.5, 10], [last_ts, 1.5, 2.5, 1, 2, 12]]
+
+
+class TestChartCache(unittest.TestCase):
+
+    def setUp(self):
+        self.store = {s: {config.TIMEFRAME_SETUP: _candles(1000 * 3_600_000)} for s in ('A/USDT', 'B/USDT', 'C/USDT')}
+        self.recognizer = _recognizer(self.store)
+        self.render = AsyncMock(return_value=(IMG, {'close': 2}))
+        self.patchers = [
+            patch.object(chart_renderer, 'render_async', self.render),
+            patch.object(config, 'CHART_CACHE_MAX_ENTRIES', 2),
+            patch.object(config, 'CHART_ARCHIVE_ENABLED', False),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def test_render_reused_per_symbol_and_candle(self):
+        async def scenario():
+            first = self.recognizer.prerender_chart('A/USDT')
+            self.assertIs(self.recognizer.prerender_chart('A/USDT'), first)
+            result = await first
+
+            # Candle setup baru -> key baru -> render baru
+            self.store['A/USDT'][config.TIMEFRAME_SETUP].append([1001 * 3_600_000, 2, 3, 1, 2.5, 9])
+            second = self.recognizer.prerender_chart('A/USDT')
+            await second
+            return result, first, second
+
+        result, first, second = asyncio.run(scenario())
+        self.assertEqual(result, (IMG, {'close': 2}))
+        self.assertIsNot(first, second)
+        self.assertEqual(self.render.await_count, 2)
+        self.assertEqual(list(self.recognizer.chart_cache),
+                         [('A/USDT', 1000 * 3_600_000), ('A/USDT', 1001 * 3_600_000)])
+
+    def test_lru_eviction(self):
+        async def scenario():
+            await self.recognizer.prerender_chart('A/USDT')
+            await self.recognizer.prerender_chart('B/USDT')
+            await self.recognizer.prerender_chart('A/USDT')  # A jadi paling baru
+            await self.recognizer.prerender_chart('C/USDT')  # B dibuang
+
+        asyncio.run(scenario())
+        self.assertEqual([key[0] for key in self.recognizer.chart_cache], ['A/USDT', 'C/USDT'])
+
+    def test_skip_when_vision_analysis_cached(self):
+        self.recognizer.cache['A/USDT'] = {'candle_ts': 1000 * 3_600_000, 'result': {}}
+        self.assertIsNone(self.recognizer.prerender_chart('A/USDT'))
+        self.render.assert_not_called()
+
+    def test_archive_copy_written(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+             patch.object(config, 'CHART_ARCHIVE_ENABLED', True), \
+             patch.object(config, 'CHART_ARCHIVE_DIR', tmp):
+            async def scenario():
+                await self.recognizer.prerender_chart('B/USDT')
+                for _ in range(50):  # Tunggu penulisan di background thread
+                    if len(os.listdir(tmp)) == 2:
+                        break
+                    await asyncio.sleep(0.01)
+
+            asyncio.run(scenario())
+            files = sorted(os.listdir(tmp))
+            self.assertEqual(len(files), 2)
+            self.assertTrue(files[0].startswith(f"B-USDT_{1000 * 3_600_000}_"))
+            with open(os.path.join(tmp, files[0])) as f:
+                self.assertEqual(json.load(f)['raw_stats'], {'close': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
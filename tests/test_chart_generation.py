@@ -72,7 +72,7 @@ def test_chart_generation():
     recognizer = PatternRecognizer(mock_manager)
     
     # Generate Chart
-    img_base64 = recognizer.generate_chart_image(symbol)
+    img_base64, raw_stats = recognizer.generate_chart_image(symbol)
     
     if img_base64:
         print("✅ Chart generated successfully!")
@@ -0,0 +1,86 @@
+"""
+Test suite untuk ChartRenderer (src/utils/chart_renderer.py):
+figure dipakai ulang antar render, PNG valid, dan render_async tanpa process pool.
+"""
+import sys
+import os
+import base64
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.utils import chart_renderer
+
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+
+
+def _series(n, seed=1):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    opens = closes + rng.normal(0, 0.5, n)
+    highs = np.maximum(opens, closes) + 0.3
+    lows = np.minimum(opens, closes) - 0.3
+    volumes = rng.uniform(10, 100, n)
+    macd = rng.normal(0, 0.2, n)
+    signal = macd * 0.8
+    return opens, highs, lows, closes, volumes, macd, signal, macd - signal
+
+
+class TestChartRenderer(unittest.TestCase):
+
+    def test_render_reuses_figure_and_artists(self):
+        renderer = chart_renderer.ChartRenderer()
+        fig, bodies = renderer.fig, renderer.bodies
+
+        first = renderer.render(*_series(60))
+        second = renderer.render(*_series(40, seed=2))  # Jumlah candle berbeda
+
+        self.assertTrue(first.startswith(PNG_MAGIC))
+        self.assertTrue(second.startswith(PNG_MAGIC))
+        self.assertNotEqual(first, second)
+        self.assertIs(renderer.fig, fig)
+        self.assertIs(renderer.bodies, bodies)
+        self.assertEqual(len(renderer.bodies.get_paths()), 40)
+        self.assertEqual(len(renderer.ax_price.collections), 2)
+        self.assertEqual(len(renderer.ax_macd.lines), 2)
+
+    def test_flat_series_does_not_break_limits(self):
+        renderer = chart_renderer.ChartRenderer()
+        flat = [np.full(30, 5.0)] * 4 + [np.zeros(30)] * 4
+        self.assertTrue(renderer.render(*flat).startswith(PNG_MAGIC))
+
+    def test_renderer_is_per_thread(self):
+        main_renderer = chart_renderer.get_renderer()
+        self.assertIs(chart_renderer.get_renderer(), main_renderer)
+        other = asyncio.run(asyncio.to_thread(chart_renderer.get_renderer))
+        self.assertIsNot(other, main_renderer)
+
+    def test_render_async_without_pool_uses_thread(self):
+        png = base64.b64encode(PNG_MAGIC).decode()
+        candles = [[0, 1, 2, 0.5, 1.5, 10]] * 5
+
+        with patch.object(config, 'CHART_RENDER_WORKERS', 0), \
+             patch.object(chart_renderer, 'render_chart', return_value=(png, {'close': 1.5})) as render:
+            result = asyncio.run(chart_renderer.render_async(candles))
+            self.assertIsNone(chart_renderer.get_pool())
+
+        self.assertEqual(result, (png, {'close': 1.5}))
+        sent = render.call_args.args[0]
+        self.assertEqual(sent, candles)
+        self.assertIsNot(sent, candles)  # Snapshot, bukan list store yang bisa berubah
+
+    def test_insufficient_candles_returns_none(self):
+        self.assertEqual(chart_renderer.render_chart([]), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
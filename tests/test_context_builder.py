@@ -0,0 +1,102 @@
+"""
+Test suite untuk MarketContextBuilder (src/modules/context_builder.py).
+Sumber data diganti fake async/sync, jadi tidak butuh exchange / model Vision.
+"""
+import sys
+import os
+import time
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.modules.context_builder import MarketContextBuilder
+from src.utils import metrics
+
+
+def _make_builder(delay=0.1):
+    async def slow_pattern(symbol):
+        await asyncio.sleep(delay)
+        return {'analysis': 'BULLISH flag', 'is_valid': True}
+
+    async def slow_ob(symbol):
+        await asyncio.sleep(delay)
+        return {'imbalance_pct': 12.0}
+
+    pattern = MagicMock()
+    pattern.analyze_pattern = slow_pattern
+    market_data = MagicMock()
+    market_data.get_order_book_depth = slow_ob
+    sentiment = MagicMock()
+    sentiment.get_latest = MagicMock(return_value={'fng_value': 55})
+    sentiment.get_analysis = MagicMock(return_value={'sentiment_score': 60})
+    onchain = MagicMock()
+    onchain.get_latest = MagicMock(return_value={'stablecoin_inflow': 'Positive'})
+    return MarketContextBuilder(market_data, pattern, sentiment, onchain), pattern
+
+
+class TestMarketContextBuilder(unittest.TestCase):
+
+    def test_sources_are_gathered_concurrently(self):
+        builder, _ = _make_builder(delay=0.1)
+        start = time.perf_counter()
+        ctx = asyncio.run(builder.build('BTC/USDT'))
+        elapsed = time.perf_counter() - start
+
+        # Vision & order book masing-masing 0.1s -> paralel ~0.1s (serial 0.2s)
+        self.assertLess(elapsed, 0.18)
+        self.assertEqual(ctx['order_book'], {'imbalance_pct': 12.0})
+        self.assertEqual(ctx['sentiment_data']['fng_value'], 55)
+        self.assertEqual(ctx['sentiment_analysis']['sentiment_score'], 60)
+        self.assertTrue(ctx['pattern']['is_valid'])
+
+    def test_per_source_timings_recorded(self):
+        builder, _ = _make_builder(delay=0.05)
+        metrics.histogram('context_pattern_ms').reset()
+        ctx = asyncio.run(builder.build('BTC/USDT'))
+
+        self.assertEqual(set(ctx['timings']),
+                         {'pattern', 'order_book', 'sentiment', 'onchain', 'sentiment_analysis', 'total'})
+        self.assertGreaterEqual(ctx['timings']['pattern'], 45)
+        self.assertEqual(metrics.histogram('context_pattern_ms').count, 1)
+
+    def test_prescreen_order_book_reused(self):
+        builder, _ = _make_builder(delay=0.01)
+        builder.market_data.get_order_book_depth = MagicMock(side_effect=AssertionError("fetched twice"))
+        ctx = asyncio.run(builder.build('BTC/USDT', order_book={'imbalance_pct': -30.0}))
+
+        self.assertEqual(ctx['order_book'], {'imbalance_pct': -30.0})
+        self.assertNotIn('order_book', ctx['timings'])
+        builder.onchain.get_latest.assert_called_once_with('BTC/USDT')
+
+    def test_candle_close_prerenders_only_exec_timeframe(self):
+        builder, pattern = _make_builder()
+        symbol = config.DAFTAR_KOIN[0]['symbol']
+        pattern.client = object()
+
+        builder.on_candle_close(symbol, config.TIMEFRAME_TREND)
+        pattern.prerender_chart.assert_not_called()
+        builder.on_candle_close(symbol, config.TIMEFRAME_EXEC)
+        pattern.prerender_chart.assert_called_once_with(symbol)
+        builder.on_candle_close('UNKNOWN/USDT', config.TIMEFRAME_EXEC)
+        pattern.prerender_chart.assert_called_once()
+
+    def test_new_setup_candle_prerenders(self):
+        builder, pattern = _make_builder()
+        symbol = config.DAFTAR_KOIN[0]['symbol']
+        pattern.client = object()
+
+        builder.on_candle_open(symbol, config.TIMEFRAME_TREND)
+        pattern.prerender_chart.assert_not_called()
+        builder.on_candle_open(symbol, config.TIMEFRAME_SETUP)
+        pattern.prerender_chart.assert_called_once_with(symbol)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,9 @@ import config
 config.TRACKER_FILENAME = "dummy_tracker.json"
 config.LOG_FILENAME = "test_bot.log"
 config.DAFTAR_KOIN = []
+config.ORDER_CLIENT_ID_PREFIX = 'EP'
+config.ORDER_RECONCILE_INTERVAL = 300
+config.ORDER_INDEX_MAX_TERMINAL = 500
 
 from src.modules.executor import OrderExecutor
 
@@ -0,0 +1,130 @@
+"""
+Test suite untuk Entry Fast Path (OrderManager).
+Memvalidasi cache leverage/margin, prerequisite paralel, dan notifikasi
+Telegram yang tidak menahan eksekusi order.
+"""
+import pytest
+import sys
+import os
+import time
+import asyncio
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# 1. Setup Path to Project Root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import ccxt.async_support as ccxt
+from src.modules.executor_impl import orders
+from src.modules.executor_impl.orders import OrderManager
+
+# Patch config yang benar-benar dibaca modul yang dites (bukan config mock dari test lain)
+config = orders.config
+
+
+@pytest.fixture(autouse=True)
+def entry_config():
+    with patch.object(config, 'ENTRY_FAST_PATH', True), \
+         patch.object(config, 'ORDER_CLIENT_ID_PREFIX', 'EP'), \
+         patch.object(config, 'LIMIT_ORDER_EXPIRY_SECONDS', 3600), \
+         patch.object(config, 'DEFAULT_MARGIN_TYPE', 'isolated'):
+        yield
+
+
+def _make_manager(delay=0.0):
+    data = {}
+    tracker = MagicMock()
+    tracker.get = lambda s: data.get(s)
+    tracker.set = lambda s, v: data.__setitem__(s, v)
+    tracker.delete = lambda s: data.pop(s, None)
+    tracker.save = AsyncMock()
+
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(delay)
+
+    async def slow_ticker(symbol):
+        await asyncio.sleep(delay)
+        return {'last': 60000}
+
+    exchange = MagicMock()
+    exchange.set_leverage = AsyncMock(side_effect=slow)
+    exchange.set_margin_mode = AsyncMock(side_effect=slow)
+    exchange.fetch_ticker = AsyncMock(side_effect=slow_ticker)
+    exchange.amount_to_precision = MagicMock(return_value='0.01')
+    exchange.create_order = AsyncMock(return_value={'id': '1'})
+    risk = MagicMock()
+    risk.is_under_cooldown = MagicMock(return_value=False)
+    return OrderManager(exchange, tracker, risk), exchange, tracker
+
+
+def test_prepare_symbol_is_cached_per_leverage():
+    manager, exchange, _ = _make_manager()
+
+    async def run():
+        await manager.prepare_symbol('BTC/USDT', 10)
+        await manager.prepare_symbol('BTC/USDT', 10)
+        await manager.prepare_symbol('BTC/USDT', 20)
+
+    asyncio.run(run())
+    assert exchange.set_leverage.await_count == 2
+
+
+def test_prepare_symbol_benign_error_still_cached():
+    manager, exchange, _ = _make_manager()
+    exchange.set_margin_mode.side_effect = ccxt.ExchangeError('No need to change margin type.')
+
+    async def run():
+        await manager.prepare_symbol('BTC/USDT', 10)
+        await manager.prepare_symbol('BTC/USDT', 10)
+
+    asyncio.run(run())
+    assert exchange.set_leverage.await_count == 1
+
+
+def test_prerequisites_run_concurrently():
+    manager, exchange, _ = _make_manager(delay=0.1)
+
+    async def run():
+        with patch.object(orders, 'kirim_tele', new_callable=AsyncMock):
+            start = time.perf_counter()
+            await manager.execute_entry('BTC/USDT', 'buy', 'market', None, 10, 10, 'AI_TEST')
+            return time.perf_counter() - start
+
+    elapsed = asyncio.run(run())
+    # leverage, margin, ticker masing-masing 0.1s -> paralel ~0.1s (serial 0.3s)
+    assert elapsed < 0.25
+    exchange.create_order.assert_awaited_once()
+
+
+def test_slow_telegram_does_not_delay_entry():
+    manager, exchange, tracker = _make_manager()
+
+    async def slow_tele(*args, **kwargs):
+        await asyncio.sleep(1.0)
+
+    async def run():
+        with patch.object(orders, 'kirim_tele', side_effect=slow_tele):
+            start = time.perf_counter()
+            await manager.execute_entry('BTC/USDT', 'buy', 'market', 60000, 10, 10, 'AI_TEST')
+            return time.perf_counter() - start
+
+    assert asyncio.run(run()) < 0.5
+    exchange.create_order.assert_awaited_once()
+
+
+def test_client_order_id_seeded_by_signal_ts():
+    manager, exchange, tracker = _make_manager()
+
+    async def run(signal_ts):
+        with patch.object(orders, 'kirim_tele', new_callable=AsyncMock):
+            await manager.execute_entry('BTC/USDT', 'buy', 'market', 60000, 10, 10, 'AI_TEST', signal_ts=signal_ts)
+        return exchange.create_order.await_args.args[-1]['newClientOrderId']
+
+    first = asyncio.run(run(1700000000000))
+    time.sleep(1.1)
+    retry = asyncio.run(run(1700000000000))  # Sinyal sama di-submit ulang sedetik kemudian
+    other = asyncio.run(run(1700000900000))
+    assert first == retry
+    assert first != other
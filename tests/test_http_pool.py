@@ -0,0 +1,121 @@
+"""
+Test suite untuk HTTP Connection Pool bersama (src/utils/http_pool.py).
+Memakai server aiohttp lokal untuk memverifikasi koneksi keep-alive benar-benar di-reuse.
+"""
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from aiohttp import web
+import config
+from src.utils import http_pool, metrics
+from src.modules.ai_brain import AIBrain
+from src.modules.pattern_recognizer import PatternRecognizer
+
+
+async def _start_server():
+    async def handler(request):
+        return web.json_response({'ok': True})
+
+    app = web.Application()
+    app.router.add_get('/ping', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/ping"
+
+
+def _reset_counters():
+    for name in ('http_requests_total', 'http_connections_new', 'http_tls_handshakes',
+                 'aiohttp_requests_total', 'aiohttp_connections_new', 'aiohttp_connections_reused'):
+        metrics.counter(name).reset()
+
+
+class TestHttpPool(unittest.TestCase):
+
+    def setUp(self):
+        _reset_counters()
+
+    def test_httpx_client_is_shared_per_profile(self):
+        a = http_pool.get_httpx_client('ai')
+        b = http_pool.get_httpx_client('ai')
+        c = http_pool.get_httpx_client('telegram')
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+
+    def test_ai_clients_keep_router_read_timeout(self):
+        async def run():
+            try:
+                with patch.object(config, 'AI_API_KEY', 'dummy_key'), \
+                     patch.object(config, 'USE_PATTERN_RECOGNITION', True), \
+                     patch.object(config, 'AI_ROUTER_TIMEOUT', 60):
+                    brain = AIBrain()
+                    vision = PatternRecognizer(MagicMock())
+                return brain.client.timeout, vision.client.timeout
+            finally:
+                await http_pool.close_all()
+
+        for timeout in asyncio.run(run()):
+            # OpenAI SDK mengadopsi timeout client bersama; API_REQUEST_TIMEOUT (10s) terlalu pendek untuk AI
+            self.assertEqual(timeout.read, 60)
+            self.assertEqual(timeout.connect, config.HTTP_POOL_CONNECT_TIMEOUT)
+
+    def test_httpx_reuses_connection(self):
+        async def run():
+            runner, url = await _start_server()
+            try:
+                client = http_pool.get_httpx_client('test')
+                for _ in range(3):
+                    resp = await client.get(url)
+                    self.assertEqual(resp.status_code, 200)
+            finally:
+                await http_pool.close_all()
+                await runner.cleanup()
+
+        asyncio.run(run())
+        self.assertEqual(metrics.counter('http_requests_total').value, 3)
+        self.assertEqual(metrics.counter('http_connections_new').value, 1)
+
+    def test_aiohttp_session_reused_within_loop(self):
+        async def run():
+            runner, url = await _start_server()
+            try:
+                session = http_pool.get_aiohttp_session()
+                self.assertIs(session, http_pool.get_aiohttp_session())
+                for _ in range(3):
+                    async with session.get(url) as resp:
+                        await resp.json()
+            finally:
+                await http_pool.close_all()
+                await runner.cleanup()
+
+        asyncio.run(run())
+        self.assertEqual(metrics.counter('aiohttp_requests_total').value, 3)
+        self.assertEqual(metrics.counter('aiohttp_connections_new').value, 1)
+        self.assertEqual(http_pool.reuse_stats()['aiohttp_reuse_rate'], round(1 - 1 / 3, 3))
+
+    def test_aiohttp_session_recreated_for_new_loop(self):
+        async def get_and_close():
+            session = http_pool.get_aiohttp_session()
+            await http_pool.close_all()  # Seperti shutdown main: socket ditutup sebelum loop berhenti
+            return session
+
+        first = asyncio.run(get_and_close())
+        second = asyncio.run(get_and_close())
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertTrue(second.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
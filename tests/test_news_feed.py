@@ -0,0 +1,258 @@
+"""
+Test suite untuk RSS conditional GET (FeedFetcher), parser feed (ringan / feedparser / process pool)
+& dedup headline (NewsStore), termasuk integrasi SentimentAnalyzer.fetch_news dengan server RSS lokal.
+"""
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aiohttp import web
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.modules.sentiment import SentimentAnalyzer
+from src.utils import http_pool
+from src.utils import news_feed
+from src.utils.news_feed import FeedFetcher, NewsStore, parse_feed, title_key
+
+
+def _rss(source, titles):
+    items = "".join(f"<item><title>{t}</title></item>" for t in titles)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>{source}</title>{items}</channel></rss>'
+
+
+class FeedServer:
+    """Server RSS lokal: /etag/<name> pakai ETag (304), /plain/<name> tanpa validator."""
+
+    def __init__(self, feeds):
+        self.feeds = feeds  # {name: (source, [titles])}
+        self.requests = []
+
+    async def handle(self, request):
+        mode, name = request.match_info['mode'], request.match_info['name']
+        self.requests.append((request.path, dict(request.headers)))
+        body = _rss(*self.feeds[name])
+        etag = f'"{hash(body) & 0xffff}"'
+        if mode == 'etag' and request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304)
+        headers = {'ETag': etag} if mode == 'etag' else {}
+        return web.Response(text=body, content_type='application/rss+xml', headers=headers)
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/{mode}/{name}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await http_pool.close_all()
+        await self.runner.cleanup()
+
+
+class TestNewsStore(unittest.TestCase):
+
+    def test_title_normalization_dedups(self):
+        self.assertEqual(title_key("Bitcoin Hits $100K!"), title_key("  bitcoin hits 100k "))
+        store = NewsStore(max_items=10)
+        self.assertTrue(store.add("Bitcoin Hits $100K!", "CoinDesk", now=100))
+        self.assertFalse(store.add("bitcoin hits 100K", "Decrypt", now=200))
+        self.assertEqual(store.headlines(), ["Bitcoin Hits $100K! (CoinDesk)"])
+
+    def test_prune_and_newest_first(self):
+        store = NewsStore(max_items=2)
+        store.add("Old story", "A", published=1_000, now=10_000)
+        store.add("Middle story", "B", now=9_000)
+        store.add("New story", "C", published=9_500, now=10_000)
+        store.add("Newest story", "D", now=9_800)
+
+        store.prune(max_age_hours=1, now=10_000)
+
+        self.assertEqual(store.headlines(), ["Newest story (D)", "New story (C)"])
+
+    def test_headlines_capped_per_source(self):
+        store = NewsStore(max_items=100)
+        for i in range(10):
+            store.add(f"Busy story {i}", "Busy", now=1_000 + i)
+        store.add("Quiet story", "Quiet", now=500)
+
+        with patch.object(config, 'NEWS_MAX_PER_SOURCE', 3):
+            headlines = store.headlines(5)
+        self.assertEqual(headlines, ["Busy story 9 (Busy)", "Busy story 8 (Busy)", "Busy story 7 (Busy)",
+                                     "Quiet story (Quiet)"])
+        self.assertEqual(len(store.headlines(5, per_source=10)), 5)
+
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>The Block</title>
+<entry><title>ETF flows turn positive</title><updated>2024-05-01T10:00:00Z</updated></entry>
+<entry><title>Miners &amp; hashrate</title><published>2024-05-01T09:30:00+00:00</published></entry>
+</feed>"""
+
+RSS_DATED = """<?xml version="1.0"?><rss version="2.0"><channel><title>CoinDesk</title>
+<item><title>Bitcoin
+ steadies</title><pubDate>Wed, 01 May 2024 10:00:00 GMT</pubDate></item>
+<item><title>No date</title></item></channel></rss>"""
+
+
+class TestFeedParser(unittest.TestCase):
+
+    def test_simple_parser_rss_and_atom(self):
+        items, parse_ms, parser = parse_feed(RSS_DATED.encode())
+        self.assertEqual(parser, 'simple')
+        self.assertGreaterEqual(parse_ms, 0)
+        self.assertEqual(items, [("Bitcoin\n steadies", 'CoinDesk', 1714557600.0), ('No date', 'CoinDesk', None)])
+
+        items, _, parser = parse_feed(ATOM.encode())
+        self.assertEqual(parser, 'simple')
+        self.assertEqual(items, [('ETF flows turn positive', 'The Block', 1714557600.0),
+                                 ('Miners & hashrate', 'The Block', 1714555800.0)])
+
+    def test_matches_feedparser(self):
+        for content in (RSS_DATED, ATOM):
+            fast, _, _ = parse_feed(content.encode())
+            slow, _, parser = parse_feed(content.encode(), fast=False)
+            self.assertEqual(parser, 'feedparser')
+            self.assertEqual([(s, p) for _, s, p in fast], [(s, p) for _, s, p in slow])
+
+    def test_malformed_falls_back_to_feedparser(self):
+        broken = _rss('Decrypt', ['Story & more', 'Second']).replace('</channel></rss>', '')
+        items, _, parser = parse_feed(broken.encode())
+        self.assertEqual(parser, 'feedparser')
+        self.assertEqual([t for t, _, _ in items], ['Story & more', 'Second'])
+        self.assertEqual(items[0][1], 'Decrypt')
+
+    def test_entity_declarations_rejected_by_simple_parser(self):
+        bomb = ('<?xml version="1.0"?><!DOCTYPE rss [<!ENTITY a "aaaaaaaaaa">'
+                '<!ENTITY b "&a;&a;&a;&a;&a;&a;&a;&a;&a;&a;">]>'
+                '<rss version="2.0"><channel><title>Evil</title><item><title>&b;</title></item></channel></rss>')
+        with self.assertRaises(ValueError):  # defusedxml: EntitiesForbidden (subclass ValueError)
+            news_feed.parse_simple(bomb.encode())
+        _, _, parser = parse_feed(bomb.encode())
+        self.assertEqual(parser, 'feedparser')
+
+    def test_titles_html_unescaped(self):
+        content = _rss('Crypto &amp;amp; Co', ['Bitcoin&amp;#8217;s rally &amp;amp; ETF flows']).encode()
+        for fast in (True, False):
+            items, _, _ = parse_feed(content, fast=fast)
+            self.assertEqual(items, [("Bitcoin’s rally & ETF flows", 'Crypto & Co', None)])
+
+
+class TestConditionalFetch(unittest.TestCase):
+
+    def setUp(self):
+        self.workers = patch.object(config, 'NEWS_PARSE_WORKERS', 0)
+        self.workers.start()
+
+    def tearDown(self):
+        self.workers.stop()
+
+    def test_not_modified_skips_parse(self):
+        async def scenario():
+            async with FeedServer({'a': ('CoinDesk', ['Story one']), 'b': ('Decrypt', ['Story two'])}) as server:
+                fetcher = FeedFetcher()
+                session = http_pool.get_aiohttp_session()
+                first = [await fetcher.fetch(session, f"{server.base}/{m}") for m in ('etag/a', 'plain/b')]
+                with patch.object(news_feed, 'parse_feed') as parse:
+                    second = [await fetcher.fetch(session, f"{server.base}/{m}") for m in ('etag/a', 'plain/b')]
+                return server, fetcher, first, second, parse
+
+        server, fetcher, first, second, parse = asyncio.run(scenario())
+        self.assertEqual(first, [[('Story one', 'CoinDesk', None)], [('Story two', 'Decrypt', None)]])
+        self.assertEqual(second, [None, None])
+        parse.assert_not_called()
+        self.assertIn('If-None-Match', server.requests[2][1])  # Request ke-2 feed ETag bersyarat
+        self.assertIsNone(fetcher.validators[f"{server.base}/plain/b"]['etag'])
+        self.assertEqual(fetcher.parse_stats[f"{server.base}/etag/a"]['parser'], 'simple')
+
+    def test_slow_feed_demoted_from_poll(self):
+        feeds = {'a': ('CoinDesk', ['Story one']), 'b': ('Decrypt', ['Story two'])}
+
+        async def scenario():
+            async with FeedServer(feeds) as server:
+                urls = [f"{server.base}/plain/a", f"{server.base}/plain/b"]
+                with patch.object(config, 'RSS_FEED_URLS', urls):
+                    analyzer = SentimentAnalyzer()
+                    await analyzer.fetch_news()
+                    analyzer.feed_fetcher._record_parse(urls[1], config.NEWS_SLOW_PARSE_MS * 10, 'feedparser')
+                    server.requests.clear()
+                    await analyzer.fetch_news(poll=True)
+                    polled = [path for path, _ in server.requests]
+                    await analyzer.fetch_news()
+                    full = [path for path, _ in server.requests[len(polled):]]
+                return analyzer, polled, full, urls
+
+        analyzer, polled, full, urls = asyncio.run(scenario())
+        self.assertTrue(analyzer.feed_fetcher.is_demoted(urls[1]))
+        self.assertEqual(polled, ['/plain/a'])
+        self.assertEqual(sorted(full), ['/plain/a', '/plain/b'])  # Refresh penuh tetap ambil feed lambat
+        self.assertEqual(analyzer.feed_fetcher.slowest(1)[0][0], urls[1])
+
+    def test_process_pool_parse(self):
+        async def scenario():
+            try:
+                async with FeedServer({'a': ('CoinDesk', ['Story one', 'Story two'])}) as server:
+                    fetcher = FeedFetcher()
+                    return await fetcher.fetch(http_pool.get_aiohttp_session(), f"{server.base}/plain/a")
+            finally:
+                news_feed.shutdown()
+
+        with patch.object(config, 'NEWS_PARSE_WORKERS', 1):
+            items = asyncio.run(scenario())
+        self.assertEqual(items, [('Story one', 'CoinDesk', None), ('Story two', 'CoinDesk', None)])
+
+
+class TestSentimentNewsPolling(unittest.TestCase):
+
+    def test_poll_dedups_and_persists_validators(self):
+        feeds = {
+            'a': ('CoinDesk', ['Fed holds rates steady', 'Bitcoin ETF sees record inflow']),
+            'b': ('Decrypt', ['Bitcoin ETF Sees Record Inflow!', 'Solana upgrade ships']),
+        }
+
+        async def scenario(state_path):
+            async with FeedServer(feeds) as server:
+                urls = [f"{server.base}/etag/a", f"{server.base}/etag/b"]
+                with patch.object(config, 'RSS_FEED_URLS', urls), \
+                     patch.object(config, 'NEWS_PARSE_WORKERS', 0), \
+                     patch.object(config, 'SENTIMENT_STATE_FILENAME', state_path):
+                    analyzer = SentimentAnalyzer()
+                    first = await analyzer.fetch_news()
+                    second = await analyzer.fetch_news()
+                    await analyzer.persist()
+
+                    restored = SentimentAnalyzer()
+                    restored.restore()
+                    third = await restored.fetch_news()
+                return analyzer, restored, first, second, third, server
+
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer, restored, first, second, third, server = asyncio.run(scenario(os.path.join(tmp, 'state.json')))
+            with open(os.path.join(tmp, 'state.json')) as f:
+                state = json.load(f)
+
+        self.assertEqual(first, 3)  # Headline ETF dari Decrypt duplikat
+        self.assertEqual((second, third), (0, 0))
+        self.assertEqual(len(analyzer.raw_news), 3)
+        self.assertEqual(sorted(restored.raw_news), sorted(analyzer.raw_news))
+        self.assertEqual(len(state['feed_validators']), 2)
+        self.assertEqual(set(restored.feed_fetcher.parse_stats), set(state['feed_validators']))
+        conditional = [h for path, h in server.requests if 'If-None-Match' in h]
+        self.assertEqual(len(conditional), 4)  # Poll ke-2 & poll setelah restore
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Test suite untuk index berita (src/utils/news_index.py) dan lookup per simbol di SentimentAnalyzer.
+"""
+import sys
+import os
+import random
+import unittest
+from unittest.mock import patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.modules.sentiment import SentimentAnalyzer
+from src.utils import news_index
+from src.utils.news_index import AhoCorasick, NewsIndex
+
+COINS = [
+    {"symbol": "BTC/USDT", "keywords": ["bitcoin", "btc"]},
+    {"symbol": "SOL/USDT", "keywords": ["solana", "sol"]},
+    {"symbol": "ETH/USDT", "keywords": ["ethereum", "eth", "ether"]},
+]
+NEWS = [
+    "Fed holds rates as inflation cools (Reuters)",
+    "Bitcoin ETF inflows hit record (CoinDesk)",
+    "Solana DEX volume tops Ethereum (Decrypt)",
+    "Tether mints $1B USDT (TheBlock)",
+    "BTC miners sell after halving (U.Today)",
+    "SEC delays ether ETF decision (CryptoSlate)",
+]
+
+
+class TestAhoCorasick(unittest.TestCase):
+
+    def test_matches_substring_semantics(self):
+        keywords = ['sol', 'solana', 'eth', 'ether', 'ethereum', 'he', 'she', 'hers', 'btc']
+        automaton = AhoCorasick(keywords)
+        rng = random.Random(3)
+        alphabet = 'solanethrbc '
+        for _ in range(500):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            self.assertEqual(automaton.findall(text), {kw for kw in keywords if kw in text}, text)
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(AhoCorasick(['ether', 'ethereum', 'her']).findall('ethereum'), {'ether', 'ethereum', 'her'})
+
+    def test_keyword_outside_index_falls_back(self):
+        index = NewsIndex(["Dogecoin pumps"], ['bitcoin'])
+        self.assertTrue(index.has_any(0, ['doge']))
+        self.assertFalse(index.has_any(0, ['bitcoin']))
+
+
+class TestSentimentNewsIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.patchers = [
+            patch.object(config, 'DAFTAR_KOIN', COINS),
+            patch.object(config, 'MACRO_KEYWORDS', ['fed', 'inflation', 'sec', 'tether']),
+        ]
+        for p in self.patchers:
+            p.start()
+        self.analyzer = SentimentAnalyzer()
+        self.analyzer.raw_news = list(NEWS)
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def test_build_materializes_every_coin(self):
+        self.analyzer.build_news_index()
+        index = self.analyzer._news_index
+        self.assertEqual(set(index.results), {c['symbol'] for c in COINS})
+
+        with patch.object(news_index.NewsIndex, 'has_any', side_effect=AssertionError('rescan')):
+            result = self.analyzer.get_latest('SOL/USDT')['news']  # Lookup, tanpa scan ulang
+
+        self.assertIn("Solana DEX volume tops Ethereum (Decrypt)", result)
+        self.assertIn("[BTC-CORR] Bitcoin ETF inflows hit record (CoinDesk)", result)
+        self.assertEqual(result[0], "[MACRO] Fed holds rates as inflation cools (Reuters)")
+
+    def test_result_is_copy_and_rebuilt_on_new_news(self):
+        first = self.analyzer.filter_news_by_relevance('ETH/USDT')
+        first.append('mutated')
+        self.assertNotIn('mutated', self.analyzer.filter_news_by_relevance('ETH/USDT'))
+
+        self.analyzer.raw_news = ["Ethereum upgrade goes live (Decrypt)"]
+        self.assertEqual(self.analyzer.filter_news_by_relevance('ETH/USDT'), ["Ethereum upgrade goes live (Decrypt)"])
+
+    def test_unlisted_symbol_uses_base_keyword(self):
+        self.analyzer.raw_news = ["Doge rallies 20% (NewsBTC)", "Bitcoin flat (CoinDesk)"]
+        result = self.analyzer.filter_news_by_relevance('DOGE/USDT')
+        self.assertEqual(result[0], "Doge rallies 20% (NewsBTC)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@ sys.path.append(project_root)
 sys.path.append(os.path.join(project_root, 'src'))
 
 from src.modules.sentiment import SentimentAnalyzer
+from src.utils import http_pool
 import logging
 
 # Configure logging to stdout
@@ -32,7 +33,13 @@ class TestNewsRetrieval(unittest.TestCase):
         analyzer = SentimentAnalyzer()
         
         print("Fetching news... (this might take a few seconds)")
-        asyncio.run(analyzer.fetch_news())  # Async call
+        async def fetch():
+            try:
+                await analyzer.fetch_news()
+            finally:
+                await http_pool.close_all()
+
+        asyncio.run(fetch())  # Async call
         
         # Versi terbaru menggunakan get_latest() untuk mengambil berita yang sudah terfilter/diformalisasi
         sentiment_data = analyzer.get_latest()
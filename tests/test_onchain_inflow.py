@@ -2,8 +2,10 @@
 import unittest
 from unittest.mock import patch, MagicMock, AsyncMock
 import asyncio
+import json
 import sys
 import os
+import tempfile
 
 # --- SETUP PATHS ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,17 +16,37 @@ sys.path.insert(0, project_root)
 sys.path.insert(0, src_dir)
 
 from src.modules.onchain import OnChainAnalyzer
+from src.utils import http_pool, stablecoin_history
 import config
 
+
+def _mock_response(mock_get, data):
+    """Response DefiLlama palsu (async context manager, body bytes)."""
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.headers = {}
+    mock_response.raise_for_status = MagicMock()
+    mock_response.read.return_value = json.dumps(data).encode()
+    mock_get.return_value.__aenter__ = AsyncMock(return_value=mock_response)
+    mock_get.return_value.__aexit__ = AsyncMock(return_value=None)
+    return mock_response
+
+
 class TestOnChainInflow(unittest.TestCase):
     
     def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history_file = patch.object(stablecoin_history.config, 'STABLECOIN_HISTORY_FILENAME', os.path.join(self.tmp.name, 'history.json'))
+        self.history_file.start()
         self.analyzer = OnChainAnalyzer()
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
         
     def tearDown(self):
+        self.loop.run_until_complete(http_pool.close_all())
         self.loop.close()
+        self.history_file.stop()
+        self.tmp.cleanup()
         
     def async_test(coro):
         def wrapper(*args, **kwargs):
@@ -46,10 +68,7 @@ class TestOnChainInflow(unittest.TestCase):
         ]
         
         # Setup Mock for async context manager
-        mock_response = AsyncMock()
-        mock_response.json.return_value = mock_data
-        mock_get.return_value.__aenter__ = AsyncMock(return_value=mock_response)
-        mock_get.return_value.__aexit__ = AsyncMock(return_value=None)
+        _mock_response(mock_get, mock_data)
         
         # Eksekusi
         await self.analyzer.fetch_stablecoin_inflows()
@@ -71,10 +90,7 @@ class TestOnChainInflow(unittest.TestCase):
              {'date': 1600086400, 'totalCirculatingUSD': {'peggedUSD': 900.0}}
         ]
         
-        mock_response = AsyncMock()
-        mock_response.json.return_value = mock_data
-        mock_get.return_value.__aenter__ = AsyncMock(return_value=mock_response)
-        mock_get.return_value.__aexit__ = AsyncMock(return_value=None)
+        _mock_response(mock_get, mock_data)
         
         await self.analyzer.fetch_stablecoin_inflows()
         
@@ -94,10 +110,7 @@ class TestOnChainInflow(unittest.TestCase):
              {'date': 1600086400, 'totalCirculatingUSD': {'peggedUSD': 1000.1}}
         ]
         
-        mock_response = AsyncMock()
-        mock_response.json.return_value = mock_data
-        mock_get.return_value.__aenter__ = AsyncMock(return_value=mock_response)
-        mock_get.return_value.__aexit__ = AsyncMock(return_value=None)
+        _mock_response(mock_get, mock_data)
         
         await self.analyzer.fetch_stablecoin_inflows()
         
@@ -0,0 +1,192 @@
+"""
+Test suite untuk OrderStateIndex (event-sourced order state).
+Memvalidasi lifecycle NEW → PARTIALLY_FILLED → FILLED/CANCELED/EXPIRED,
+lookup O(1) by clientOrderId / order id / symbol, dan clientOrderId deterministik.
+"""
+import pytest
+import sys
+import os
+import time
+import asyncio
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# 1. Setup Path to Project Root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from src.modules.executor_impl import sync as sync_module
+from src.modules.executor_impl.order_index import (
+    OrderStateIndex, make_client_order_id, ROLE_ENTRY, ROLE_UNKNOWN
+)
+from src.modules.executor_impl import orders
+from src.modules.executor_impl.orders import OrderManager
+from src.modules.executor_impl.sync import OrderSyncManager
+
+# Patch config yang benar-benar dibaca modul yang dites (bukan config mock dari test lain)
+config = sync_module.config
+
+
+@pytest.fixture(autouse=True)
+def order_config():
+    with patch.object(config, 'ORDER_CLIENT_ID_PREFIX', 'EP'), \
+         patch.object(config, 'ORDER_RECONCILE_INTERVAL', 300), \
+         patch.object(config, 'ORDER_INDEX_MAX_TERMINAL', 3), \
+         patch.object(config, 'CONCURRENCY_LIMIT', 5):
+        yield
+
+
+def _event(status, client_id='', order_id='111', symbol='BTCUSDT', filled='0', avg='0', side='BUY', otype='LIMIT'):
+    return {'s': symbol, 'c': client_id, 'i': order_id, 'X': status, 'z': filled, 'ap': avg, 'S': side, 'o': otype}
+
+
+class TestClientOrderId:
+
+    def test_deterministic_for_same_signal(self):
+        ts = 1700000000.7
+        a = make_client_order_id('BTC/USDT', 'buy', 'AI_TEST', ts)
+        b = make_client_order_id('BTC/USDT', 'buy', 'AI_TEST', ts)
+        assert a == b
+        assert a.startswith('EP-BTC-B-')
+        assert len(a) <= 36
+
+    def test_differs_per_side_and_time(self):
+        ts = 1700000000
+        assert make_client_order_id('BTC/USDT', 'buy', 'X', ts) != make_client_order_id('BTC/USDT', 'sell', 'X', ts)
+        assert make_client_order_id('BTC/USDT', 'buy', 'X', ts) != make_client_order_id('BTC/USDT', 'buy', 'X', ts + 1)
+
+
+class TestLifecycle:
+
+    def test_new_partial_filled(self):
+        idx = OrderStateIndex()
+        idx.register('cid-1', 'BTC/USDT', 'buy', 'limit', role=ROLE_ENTRY, order_id='111')
+
+        idx.apply_event(_event('NEW', 'cid-1'))
+        assert idx.get('cid-1')['state'] == 'NEW'
+
+        idx.apply_event(_event('PARTIALLY_FILLED', 'cid-1', filled='0.5', avg='60000'))
+        rec = idx.get('cid-1')
+        assert rec['state'] == 'PARTIALLY_FILLED'
+        assert rec['filled_qty'] == 0.5
+        assert idx._active['BTC/USDT'] == {'cid-1': rec}
+
+        idx.apply_event(_event('FILLED', 'cid-1', filled='1.0', avg='60010'))
+        assert rec['state'] == 'FILLED'
+        assert rec['avg_price'] == 60010
+        # Order final keluar dari index aktif
+        assert 'BTC/USDT' not in idx._active
+        assert idx.get_by_order_id('111') is rec
+
+    def test_out_of_order_and_terminal_events_ignored(self):
+        idx = OrderStateIndex()
+        idx.register('cid-2', 'ETH/USDT', 'sell', 'limit', order_id='222')
+        idx.apply_event(_event('PARTIALLY_FILLED', 'cid-2', order_id='222', symbol='ETHUSDT'))
+        idx.apply_event(_event('NEW', 'cid-2', order_id='222', symbol='ETHUSDT'))
+        assert idx.get('cid-2')['state'] == 'PARTIALLY_FILLED'
+
+        idx.apply_event(_event('CANCELED', 'cid-2', order_id='222', symbol='ETHUSDT'))
+        idx.apply_event(_event('FILLED', 'cid-2', order_id='222', symbol='ETHUSDT'))
+        assert idx.get('cid-2')['state'] == 'CANCELED'
+
+    def test_lookup_by_exchange_id_when_client_id_missing(self):
+        idx = OrderStateIndex()
+        idx.register('cid-3', 'BTC/USDT', 'buy', 'limit', order_id='333')
+        idx.apply_event(_event('EXPIRED', client_id='', order_id='333'))
+        assert idx.get('cid-3')['state'] == 'EXPIRED'
+
+    def test_unknown_orders_are_indexed_as_non_entry(self):
+        idx = OrderStateIndex()
+        rec = idx.apply_event(_event('NEW', 'sl-x', order_id='999', otype='STOP_MARKET'))
+        assert rec['role'] == ROLE_UNKNOWN
+        assert not idx.is_entry_order('BTC/USDT', client_id='sl-x')
+
+    def test_is_entry_order_checks_symbol(self):
+        idx = OrderStateIndex()
+        idx.register('cid-4', 'BTC/USDT', 'buy', 'limit', order_id='444')
+        assert idx.is_entry_order('BTC/USDT', client_id='cid-4')
+        assert idx.is_entry_order('BTC/USDT', order_id='444')
+        assert not idx.is_entry_order('ETH/USDT', client_id='cid-4')
+
+    def test_terminal_buffer_is_bounded(self):
+        idx = OrderStateIndex(max_terminal=2)
+        for i in range(4):
+            idx.register(f'c{i}', 'BTC/USDT', 'buy', 'limit', order_id=str(i))
+            idx.apply_event(_event('CANCELED', f'c{i}', order_id=str(i)))
+        assert idx.get('c0') is None and idx.get('c1') is None
+        assert idx.get_by_order_id('0') is None
+        assert idx.get('c3')['state'] == 'CANCELED'
+
+    def test_rejected_entry_leaves_active_index(self):
+        idx = OrderStateIndex()
+        exchange = MagicMock()
+        exchange.set_leverage = AsyncMock()
+        exchange.set_margin_mode = AsyncMock()
+        exchange.amount_to_precision = MagicMock(return_value='0.01')
+        exchange.create_order = AsyncMock(side_effect=Exception('Margin is insufficient'))
+        risk = MagicMock()
+        risk.is_under_cooldown = MagicMock(return_value=False)
+        manager = OrderManager(exchange, MagicMock(save=AsyncMock()), risk, order_index=idx)
+
+        with patch.object(orders, 'kirim_tele', new_callable=AsyncMock):
+            asyncio.run(manager.execute_entry('BTC/USDT', 'buy', 'limit', 60000, 10, 10, 'AI_TEST', signal_ts=1700000000))
+
+        client_id = exchange.create_order.await_args.args[-1]['newClientOrderId']
+        assert idx.get(client_id)['state'] == 'REJECTED'
+        assert 'BTC/USDT' not in idx._active
+
+    def test_seed_from_tracker(self):
+        idx = OrderStateIndex()
+        idx.seed_from_tracker({
+            'BTC/USDT': {'status': 'WAITING_ENTRY', 'entry_id': '555', 'entry_client_id': 'cid-5'},
+            'ETH/USDT': {'status': 'SECURED', 'entry_id': '666'},
+            'SOL/USDT': {'status': 'WAITING_ENTRY', 'entry_id': '777'},
+        })
+        assert idx.is_entry_order('BTC/USDT', client_id='cid-5')
+        assert idx.is_entry_order('SOL/USDT', order_id='777')
+        assert idx.get_by_order_id('666') is None
+
+
+class TestSyncSafetyNet:
+
+    def _make_sync(self, tracker_data, idx, has_position=False):
+        tracker = MagicMock()
+        tracker.data = tracker_data
+        tracker.exists = lambda s: s in tracker_data
+        tracker.get = lambda s: tracker_data.get(s)
+        tracker.update = lambda s, u: tracker_data[s].update(u)
+        tracker.delete = lambda s: tracker_data.pop(s, None)
+        tracker.save = AsyncMock()
+        positions = MagicMock()
+        positions.has_position = MagicMock(return_value=has_position)
+        exchange = MagicMock()
+        exchange.fetch_open_orders = AsyncMock(return_value=[{'id': '111'}])
+        return OrderSyncManager(exchange, tracker, positions, idx), exchange
+
+    def test_live_order_skips_rest_between_reconciles(self):
+        idx = OrderStateIndex()
+        idx.register('cid-1', 'BTC/USDT', 'buy', 'limit', order_id='111')
+        data = {'BTC/USDT': {'status': 'WAITING_ENTRY', 'entry_id': '111', 'entry_client_id': 'cid-1',
+                             'expires_at': time.time() + 1000}}
+        sync, exchange = self._make_sync(data, idx)
+
+        asyncio.run(sync.sync_pending_orders())   # reconcile pertama -> REST
+        assert exchange.fetch_open_orders.await_count == 1
+
+        asyncio.run(sync.sync_pending_orders())   # dalam interval -> pakai index saja
+        assert exchange.fetch_open_orders.await_count == 1
+
+    def test_fill_event_marks_pending_without_rest(self):
+        idx = OrderStateIndex()
+        idx.register('cid-1', 'BTC/USDT', 'buy', 'limit', order_id='111')
+        idx.apply_event(_event('FILLED', 'cid-1', filled='1', avg='60000'))
+        data = {'BTC/USDT': {'status': 'WAITING_ENTRY', 'entry_id': '111', 'entry_client_id': 'cid-1',
+                             'expires_at': time.time() + 1000}}
+        sync, exchange = self._make_sync(data, idx, has_position=False)
+
+        with patch.object(sync_module, 'kirim_tele', new_callable=AsyncMock):
+            asyncio.run(sync.sync_pending_orders())
+
+        exchange.fetch_open_orders.assert_not_called()
+        assert data['BTC/USDT']['status'] == 'PENDING'
@@ -0,0 +1,103 @@
+"""
+Test suite untuk trace latency lifecycle order (signal -> submit -> ack -> fill -> SL/TP).
+"""
+import pytest
+import sys
+import os
+import asyncio
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# 1. Setup Path to Project Root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from src.modules.executor_impl import orders, safety as safety_module
+from src.utils import tracing, metrics
+from src.modules.executor_impl.orders import OrderManager
+from src.modules.executor_impl.safety import SafetyManager
+
+# Patch config yang benar-benar dibaca modul yang dites (bukan config mock dari test lain)
+config = orders.config
+
+
+@pytest.fixture(autouse=True)
+def order_config():
+    with patch.object(config, 'ENTRY_FAST_PATH', False), \
+         patch.object(config, 'ORDER_CLIENT_ID_PREFIX', 'EP'), \
+         patch.object(config, 'ORDER_INDEX_MAX_TERMINAL', 500), \
+         patch.object(config, 'LIMIT_ORDER_EXPIRY_SECONDS', 3600), \
+         patch.object(config, 'DEFAULT_MARGIN_TYPE', 'isolated'), \
+         patch.object(config, 'DEFAULT_SL_PERCENT', 0.015), \
+         patch.object(config, 'DEFAULT_TP_PERCENT', 0.025), \
+         patch.object(safety_module, 'kirim_tele', new_callable=AsyncMock):
+        yield
+
+
+def _dict_tracker(data):
+    tracker = MagicMock()
+    tracker.data = data
+    tracker.get = lambda s: data.get(s)
+    tracker.exists = lambda s: s in data
+    tracker.set = lambda s, v: data.__setitem__(s, v)
+    tracker.update = lambda s, u: data[s].update(u)
+    tracker.delete = lambda s: data.pop(s, None)
+    tracker.save = AsyncMock()
+    return tracker
+
+
+def test_compute_durations_only_for_present_marks():
+    marks = {'analysis_start': 100.0, 'ai_request': 100.5, 'ai_response': 102.0, 'submit': 102.1}
+    d = tracing.compute_durations(marks)
+    assert d == {'context': 500.0, 'ai_decision': 1500.0, 'prepare': 100.0}
+
+
+def test_mark_tracker_does_not_overwrite():
+    entry = {'trace': {'trace_id': 'x', 'marks': {'fill': 10.0}}}
+    tracing.mark_tracker(entry, 'fill', 20.0)
+    assert entry['trace']['marks']['fill'] == 10.0
+    assert tracing.mark_tracker({'status': 'SECURED'}, 'fill') is None
+
+
+def test_execute_entry_limit_stores_submit_and_ack():
+    data = {}
+    exchange = MagicMock()
+    exchange.set_leverage = AsyncMock()
+    exchange.set_margin_mode = AsyncMock()
+    exchange.amount_to_precision = MagicMock(return_value='0.01')
+    exchange.create_order = AsyncMock(return_value={'id': '123'})
+    risk = MagicMock()
+    risk.is_under_cooldown = MagicMock(return_value=False)
+
+    manager = OrderManager(exchange, _dict_tracker(data), risk)
+    trace = tracing.TradeTrace('BTC/USDT').mark(tracing.STAGE_ANALYSIS_START)
+
+    with patch.object(orders, 'kirim_tele', new_callable=AsyncMock):
+        asyncio.run(manager.execute_entry('BTC/USDT', 'buy', 'limit', 60000, 10, 10, 'AI_TEST', trace=trace))
+
+    stored = data['BTC/USDT']['trace']
+    assert stored['trace_id'] == trace.trace_id
+    assert {'analysis_start', 'submit', 'ack'} <= set(stored['marks'])
+    assert stored['marks']['ack'] >= stored['marks']['submit']
+
+
+def test_safety_install_completes_trace_once():
+    data = {'BTC/USDT': {'status': 'PENDING', 'trace': {'trace_id': 't1', 'marks': {
+        'analysis_start': 1.0, 'ai_request': 1.2, 'ai_response': 2.0, 'submit': 2.1, 'ack': 2.2, 'fill': 2.3}}}}
+    exchange = MagicMock()
+    exchange.fapiPrivateDeleteAllOpenOrders = AsyncMock()
+    exchange.price_to_precision = MagicMock(side_effect=lambda s, p: f"{p:.2f}")
+    exchange.create_order = AsyncMock(return_value={'id': 'o1'})
+    safety = SafetyManager(exchange, _dict_tracker(data))
+    metrics.histogram('trace_exchange_ack_ms').reset()
+
+    pos = {'entryPrice': 60000, 'side': 'LONG', 'contracts': 0.01}
+    asyncio.run(safety.install_safety_orders('BTC/USDT', pos))
+    asyncio.run(safety.install_safety_orders('BTC/USDT', pos))
+
+    assert 'safety_installed' in data['BTC/USDT']['trace']['marks']
+    hist = metrics.histogram('trace_exchange_ack_ms')
+    assert hist.count == 1
+    assert hist.percentile(50) == pytest.approx(100.0)
+    assert 'exchange_ack' in tracing.format_report()
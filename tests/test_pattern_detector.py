@@ -0,0 +1,166 @@
+"""
+Test suite untuk detektor pattern lokal (src/utils/pattern_detector.py)
+dan gating Vision AI di PatternRecognizer.
+"""
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+import numpy as np
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.modules.pattern_recognizer import PatternRecognizer
+from src.utils import chart_renderer, pattern_detector
+from src.utils.prompt_builder import build_pattern_recognition_prompt
+
+VALID = "BULLISH. Price formed a bull flag above EMA with rising volume and MACD crossing up."
+
+
+def _candles(closes, volumes=None):
+    """Close -> candle [ts, o, h, l, c, v]; open = close sebelumnya, wick 0.2 di atas/bawah body."""
+    closes = np.asarray(closes, dtype=float)
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    volumes = np.full(len(closes), 100.0) if volumes is None else volumes
+    return [[i * 3_600_000, o, max(o, c) + 0.2, min(o, c) - 0.2, c, v]
+            for i, (o, c, v) in enumerate(zip(opens, closes, volumes))]
+
+
+def _series(*legs, start=100.0, flat=60):
+    """Gabungan segmen linear: legs = [(target, jumlah_candle), ...] setelah `flat` candle datar."""
+    closes = [start] * flat
+    for target, bars in legs:
+        closes += list(np.linspace(closes[-1], target, bars + 1))[1:]
+    return closes
+
+
+BULL_FLAG = list(100 + 0.3 * np.sin(np.arange(80) / 3)) + list(100 + 2 * np.arange(1, 9)) + list(116 - 0.1 * np.arange(1, 13))
+DOUBLE_TOP = _series((110, 59), (104, 7), (110, 7), (103, 8), flat=30)
+DOUBLE_TOP_FORMING = _series((110, 59), (104, 7), (110, 7), (106, 4), flat=30)
+BULL_DIVERGENCE = _series((90, 5), (94, 10), (89.5, 15), (91, 3))
+UPTREND = list(100 + 0.1 * np.arange(100))
+
+
+class TestPatternDetector(unittest.TestCase):
+
+    def test_bull_flag(self):
+        detected = pattern_detector.detect(_candles(BULL_FLAG))
+        self.assertEqual([p['name'] for p in detected['patterns']], ['bull_flag'])
+        self.assertEqual(detected['bias'], 'BULLISH')
+        self.assertTrue(detected['conclusive'])
+
+    def test_double_top_confirmed(self):
+        detected = pattern_detector.detect(_candles(DOUBLE_TOP))
+        top = detected['patterns'][0]
+        self.assertEqual(top['name'], 'double_top')
+        self.assertTrue(top['detail']['confirmed'])
+        self.assertEqual(detected['bias'], 'BEARISH')
+        self.assertTrue(detected['conclusive'])
+
+    def test_forming_double_top_is_not_conclusive(self):
+        detected = pattern_detector.detect(_candles(DOUBLE_TOP_FORMING))
+        top = detected['patterns'][0]
+        self.assertEqual(top['name'], 'double_top')
+        self.assertFalse(top['detail']['confirmed'])
+        self.assertGreaterEqual(top['confidence'], config.PATTERN_DETECT_MIN_CONFIDENCE)
+        self.assertFalse(detected['conclusive'])  # Neckline belum break -> tetap verifikasi Vision
+
+    def test_bullish_divergence(self):
+        detected = pattern_detector.detect(_candles(BULL_DIVERGENCE))
+        self.assertIn('bullish_divergence', [p['name'] for p in detected['patterns']])
+        self.assertTrue(detected['conclusive'])
+
+    def test_volume_climax_alone_is_not_conclusive(self):
+        volumes = np.full(100, 100.0)
+        volumes[-1] = 1000
+        detected = pattern_detector.detect(_candles(list(100 + 0.5 * np.arange(100)), volumes))
+        self.assertEqual(detected['patterns'][0]['name'], 'buying_climax')
+        self.assertFalse(detected['conclusive'])
+
+    def test_no_pattern_and_short_history(self):
+        detected = pattern_detector.detect(_candles(UPTREND))
+        self.assertEqual(detected['patterns'], [])
+        self.assertFalse(detected['conclusive'])
+        self.assertEqual(pattern_detector.format_patterns(detected), 'none')
+        self.assertIsNone(pattern_detector.detect(_candles(UPTREND[:50])))
+
+    def test_summary_passes_vision_validation(self):
+        detected = pattern_detector.detect(_candles(BULL_FLAG))
+        with patch.object(config, 'AI_API_KEY', None):
+            recognizer = PatternRecognizer(MagicMock())
+        self.assertTrue(recognizer._is_valid_analysis(detected['summary']))
+        self.assertTrue(detected['summary'].startswith('BULLISH'))
+
+
+class TestVisionGating(unittest.TestCase):
+
+    def setUp(self):
+        self.store = {}
+        market_data = MagicMock()
+        market_data.market_store = self.store
+        with patch.object(config, 'AI_API_KEY', 'dummy_key'), \
+             patch.object(config, 'USE_PATTERN_RECOGNITION', True):
+            self.recognizer = PatternRecognizer(market_data)
+        self.create = AsyncMock(return_value=MagicMock(
+            choices=[MagicMock(message=MagicMock(content=VALID))], usage=None))
+        self.recognizer.client = MagicMock()
+        self.recognizer.client.chat.completions.create = self.create
+        self.render = AsyncMock(return_value=('iVBORw0KGgo=', {'close': 116}))
+        self.patchers = [
+            patch.object(config, 'USE_PATTERN_RECOGNITION', True),
+            patch.object(config, 'PATTERN_DETECT_ENABLED', True),
+            patch.object(config, 'PATTERN_BATCH_ENABLED', False),
+            patch.object(config, 'AI_LEDGER_ENABLED', False),
+            patch.object(chart_renderer, 'render_async', self.render),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def _analyze(self, closes):
+        self.store['X/USDT'] = {config.TIMEFRAME_SETUP: _candles(closes)}
+        return asyncio.run(self.recognizer.analyze_pattern('X/USDT'))
+
+    def test_conclusive_local_skips_vision(self):
+        result = self._analyze(BULL_FLAG)
+
+        self.assertEqual(result['source'], 'local')
+        self.assertTrue(result['is_valid'])
+        self.assertEqual(result['detected']['bias'], 'BULLISH')
+        self.assertIn('macd_hist', result['raw_data'])
+        self.create.assert_not_awaited()
+        self.render.assert_not_awaited()
+        self.assertIs(self.recognizer.cache['X/USDT']['result'], result)
+
+    def test_inconclusive_calls_vision(self):
+        result = self._analyze(UPTREND)
+
+        self.assertEqual(result['source'], 'vision')
+        self.assertEqual(self.create.await_count, 1)
+        self.assertEqual(result['detected']['patterns'], [])
+
+    def test_vision_always_flag(self):
+        with patch.object(config, 'PATTERN_VISION_ALWAYS', True):
+            result = self._analyze(BULL_FLAG)
+
+        self.assertEqual(result['source'], 'vision')
+        prompt = self.create.call_args.kwargs['messages'][0]['content'][0]['text']
+        self.assertIn('[LOCAL DETECTORS]', prompt)
+        self.assertIn('bull flag', prompt)
+
+    def test_prompt_without_detections_unchanged(self):
+        self.assertNotIn('LOCAL DETECTORS', build_pattern_recognition_prompt('X/USDT', '1h', {'close': 1}, {'patterns': []}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Test suite untuk pre-screening lokal kandidat AI (src/utils/prescreen.py).
+"""
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.utils import prescreen
+
+
+def _tech(**overrides):
+    data = {
+        'price': 100.0, 'rsi': 50.0, 'price_vs_ema': 'Above', 'trend_major': 'Bullish',
+        'btc_trend': 'BULLISH', 'pivots': {'P': 100.0, 'S1': 80.0, 'R1': 120.0},
+        'wick_rejection': {'recent_rejection': 'NONE', 'rejection_strength': 0.0},
+        'order_book': {'imbalance_pct': 0.0},
+    }
+    data.update(overrides)
+    return data
+
+
+class TestScoreCandidate(unittest.TestCase):
+
+    def test_strong_setup_beats_quiet_setup(self):
+        quiet, _ = prescreen.score_candidate(_tech())
+        strong, comps = prescreen.score_candidate(_tech(
+            price=80.2, rsi=22.0,
+            wick_rejection={'recent_rejection': 'BULLISH_REJECTION', 'rejection_strength': 5.0},
+            order_book={'imbalance_pct': -35.0},
+        ))
+        self.assertGreater(strong, quiet)
+        self.assertEqual(comps['wick'], 1.0)
+        self.assertGreater(comps['pivot'], 0.7)
+        self.assertTrue(0 <= strong <= 100)
+
+    def test_trend_conflict_lowers_score(self):
+        aligned, _ = prescreen.score_candidate(_tech(), show_btc_context=True)
+        conflict, _ = prescreen.score_candidate(_tech(btc_trend='BEARISH', trend_major='Bearish'),
+                                                show_btc_context=True)
+        self.assertGreater(aligned, conflict)
+
+    def test_weights_are_configurable(self):
+        tech = _tech(rsi=20.0)
+        with patch.object(config, 'PRESCREEN_WEIGHTS', {'rsi': 1.0}):
+            score, _ = prescreen.score_candidate(tech)
+        self.assertEqual(score, 100.0)
+
+    def test_missing_fields_do_not_crash(self):
+        score, comps = prescreen.score_candidate({'price': 1.0})
+        self.assertEqual(comps['pivot'], 0.0)
+        self.assertGreaterEqual(score, 0)
+
+
+class TestScoreBoard(unittest.TestCase):
+
+    def test_summary_emitted_when_candle_changes(self):
+        board = prescreen.ScoreBoard()
+        comps = {name: 0.5 for name in prescreen.COMPONENTS}
+        self.assertIsNone(board.record(1000, 'BTC', 70.0, comps))
+        self.assertIsNone(board.record(1000, 'ETH', 30.0, comps))
+        summary = board.record(2000, 'BTC', 50.0, comps)
+        self.assertIn('candle 1000 n=2', summary)
+        self.assertIn('top: BTC 70, ETH 30', summary)
+        self.assertEqual(list(board.entries), ['BTC'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Test suite untuk PromptCompiler (src/utils/prompt_compiler.py):
+system message statis, encoding ringkas, budget token, dan pengiriman messages ke AIBrain.
+"""
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.utils.prompt_builder import build_market_prompt
+from src.utils.prompt_compiler import PromptCompiler, count_tokens
+from src.modules.ai_brain import AIBrain
+from tests.benchmark_prompt_compiler import RECORDED_INPUTS, _scenarios
+
+
+def _compile(compiler, rec):
+    return compiler.compile(rec['symbol'], rec['tech_data'], rec['sentiment_data'], rec['onchain_data'],
+                            rec['pattern_analysis'], _scenarios(rec), show_btc_context=rec['show_btc_context'],
+                            sentiment_analysis=rec['sentiment_analysis'])
+
+
+class TestPromptCompiler(unittest.TestCase):
+
+    def test_static_system_message_shared_across_calls(self):
+        with patch.object(config, 'AI_PROMPT_CACHE_CONTROL', True):
+            compiler = PromptCompiler(budget=0)
+        first = _compile(compiler, RECORDED_INPUTS[0])
+        second = _compile(compiler, RECORDED_INPUTS[1])
+
+        self.assertIs(first.messages[0], second.messages[0])
+        part = first.messages[0]['content'][0]
+        self.assertEqual(part['cache_control'], {'type': 'ephemeral'})
+        self.assertIn(config.AI_SYSTEM_ROLE, part['text'])
+        self.assertIn('OUTPUT FORMAT (JSON ONLY)', part['text'])
+        # Data dinamis hanya di pesan user
+        self.assertEqual(first.messages[1]['role'], 'user')
+        self.assertIn('SOL/USDT', first.text)
+        self.assertNotIn('SOL/USDT', part['text'])
+
+    def test_compact_dynamic_part_smaller_than_legacy(self):
+        compiler = PromptCompiler(budget=0)
+        for rec in RECORDED_INPUTS:
+            compiled = _compile(compiler, rec)
+            legacy = build_market_prompt(rec['symbol'], rec['tech_data'], rec['sentiment_data'], rec['onchain_data'],
+                                         rec['pattern_analysis'], _scenarios(rec), show_btc_context=rec['show_btc_context'],
+                                         sentiment_analysis=rec['sentiment_analysis'])
+            self.assertLess(compiled.dynamic_tokens, count_tokens(legacy) / 2)
+            self.assertIn('[EXECUTION SCENARIOS]', compiled.text)
+            self.assertEqual(compiled.trimmed, [])
+
+    def test_budget_trims_low_priority_sections_first(self):
+        rec = RECORDED_INPUTS[0]
+        full = _compile(PromptCompiler(budget=0), rec)
+        sentiment_tokens = count_tokens(full.text[full.text.index('[SENTIMENT]'):full.text.index('[EXECUTION SCENARIOS]')])
+
+        compiler = PromptCompiler(budget=full.total_tokens - sentiment_tokens // 2)
+        compiled = _compile(compiler, rec)
+        self.assertEqual(compiled.trimmed, ['SENTIMENT:short'])
+        self.assertIn('[SENTIMENT]', compiled.text)
+        self.assertNotIn('context:', compiled.text)
+        self.assertLessEqual(compiled.total_tokens, compiler.budget)
+
+        # Budget mustahil: semua section opsional dibuang, section wajib tetap ada
+        compiled = _compile(PromptCompiler(budget=1), rec)
+        for name in ('[SENTIMENT]', '[MARKET DATA]', '[SETUP]'):
+            self.assertNotIn(name, compiled.text)
+        for name in ('[TREND]', '[MOMENTUM]', '[EXECUTION SCENARIOS]', 'FINAL INSTRUCTIONS'):
+            self.assertIn(name, compiled.text)
+
+    def test_default_budget_keeps_legacy_notes_and_sections(self):
+        compiler = PromptCompiler()
+        self.assertIn('Strong rejection (>2x body) near S1/R1', compiler.static_text)
+        self.assertIn('Significant Imbalance (>20%)', compiler.static_text)
+        # Prompt normal tidak dipangkas dengan budget default
+        for rec in RECORDED_INPUTS:
+            self.assertEqual(_compile(compiler, rec).trimmed, [])
+
+    def test_invalid_price_returns_none(self):
+        rec = RECORDED_INPUTS[1]
+        compiler = PromptCompiler()
+        self.assertIsNone(compiler.compile(rec['symbol'], {'price': 0}, rec['sentiment_data'], rec['onchain_data']))
+
+    def test_analyze_market_sends_messages_list(self):
+        compiled = _compile(PromptCompiler(budget=0), RECORDED_INPUTS[1])
+        with patch.object(config, 'AI_API_KEY', 'dummy_key'), \
+             patch.object(config, 'AI_STREAMING_ENABLED', False), \
+             patch.object(config, 'AI_LEDGER_ENABLED', False):
+            brain = AIBrain()
+            brain.client = MagicMock()
+            msg = MagicMock(content='{"decision": "BUY", "confidence": 80}', reasoning=None,
+                            reasoning_content=None, model_extra={})
+            brain.client.chat.completions.create = AsyncMock(return_value=MagicMock(choices=[MagicMock(message=msg)]))
+
+            result = asyncio.run(brain.analyze_market(compiled.messages))
+
+        self.assertEqual(result['decision'], 'BUY')
+        sent = brain.client.chat.completions.create.call_args.kwargs['messages']
+        self.assertEqual([m['role'] for m in sent], ['system', 'user'])
+        self.assertIn('ROLE:', AIBrain._flatten_prompt(sent))
+
+
+if __name__ == '__main__':
+    unittest.main()
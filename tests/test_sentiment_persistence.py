@@ -0,0 +1,84 @@
+"""
+Test suite untuk persistensi state sentimen (SentimentAnalyzer.persist/restore):
+F&G, headline & hasil analisa AI dipakai ulang saat restart selama masih fresh.
+"""
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from src.modules import sentiment
+from src.modules.sentiment import SentimentAnalyzer
+
+# Patch config yang benar-benar dibaca modul sentiment (bukan config mock dari test lain)
+config = sentiment.config
+
+
+class TestSentimentPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.patchers = [
+            patch.object(config, 'SENTIMENT_PERSIST_ENABLED', True),
+            patch.object(config, 'SENTIMENT_STATE_FILENAME', os.path.join(self.tmp.name, 'sentiment_state.json')),
+            patch.object(config, 'SENTIMENT_ANALYSIS_INTERVAL', '1h'),
+            patch.object(config, 'SENTIMENT_UPDATE_INTERVAL', '1h'),
+            patch.object(config, 'MACRO_KEYWORDS', ['fed']),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        self.tmp.cleanup()
+
+    def _saved_analyzer(self, age_seconds=0):
+        analyzer = SentimentAnalyzer()
+        analyzer.last_fng = {'value': 72, 'classification': 'Greed'}
+        analyzer.raw_news = ['Fed holds rates (Reuters)', 'Bitcoin ETF inflow (CoinDesk)']
+        analyzer.data_updated_at = time.time() - age_seconds
+        analyzer.save_analysis({'overall_sentiment': 'BULLISH', 'sentiment_score': 66})
+        analyzer.analyzed_result['last_updated'] -= age_seconds
+        asyncio.run(analyzer.persist())
+        return analyzer
+
+    def test_persist_and_restore_round_trip(self):
+        self._saved_analyzer()
+
+        restored = SentimentAnalyzer()
+        self.assertTrue(restored.restore())
+        self.assertEqual(restored.last_fng['value'], 72)
+        self.assertEqual(restored.get_analysis()['sentiment_score'], 66)
+        self.assertEqual(restored.macro_news_cache, ['[MACRO] Fed holds rates (Reuters)'])
+        self.assertTrue(restored.analysis_is_fresh())
+        self.assertTrue(restored.data_is_fresh())
+        self.assertFalse(os.path.exists(config.SENTIMENT_STATE_FILENAME + '.tmp'))
+
+    def test_stale_state_is_not_fresh(self):
+        self._saved_analyzer(age_seconds=2 * 3600)
+        restored = SentimentAnalyzer()
+        self.assertTrue(restored.restore())
+        self.assertFalse(restored.analysis_is_fresh())
+        self.assertFalse(restored.data_is_fresh())
+
+    def test_missing_or_corrupt_state(self):
+        analyzer = SentimentAnalyzer()
+        self.assertFalse(analyzer.restore())
+        with open(config.SENTIMENT_STATE_FILENAME, 'w') as f:
+            f.write('{"fng": ')
+        self.assertFalse(analyzer.restore())
+        self.assertIsNone(analyzer.get_analysis())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Test suite untuk amend SL (SafetyManager._amend_sl_order).
+Memvalidasi urutan place-then-cancel, retry cancel by id, fallback legacy,
+jalur editOrder, dan pencatatan histogram latency.
+"""
+import pytest
+import sys
+import os
+import asyncio
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# 1. Setup Path to Project Root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import ccxt.async_support as ccxt
+from src.modules.executor_impl import safety as safety_module
+from src.modules.executor_impl.safety import SafetyManager
+from src.utils import metrics
+
+# Patch config yang benar-benar dibaca modul yang dites (bukan config mock dari test lain)
+config = safety_module.config
+
+
+@pytest.fixture(autouse=True)
+def amend_config():
+    with patch.object(config, 'SL_AMEND_MODE', 'replace'), \
+         patch.object(config, 'SL_AMEND_RETRY_DELAY', 0), \
+         patch.object(config, 'ORDER_SLTP_RETRIES', 3):
+        yield
+
+
+@pytest.fixture
+def setup():
+    calls = []
+    exchange = MagicMock()
+    exchange.has = {'editOrder': True}
+    exchange.price_to_precision = MagicMock(side_effect=lambda s, p: f"{float(p):.2f}")
+
+    async def create_order(*args, **kwargs):
+        calls.append(('create', args))
+        return {'id': 'sl_new'}
+
+    async def cancel_order(order_id, symbol):
+        calls.append(('cancel', order_id))
+
+    exchange.create_order = AsyncMock(side_effect=create_order)
+    exchange.cancel_order = AsyncMock(side_effect=cancel_order)
+    exchange.fetch_open_orders = AsyncMock(return_value=[])
+    exchange.edit_order = AsyncMock(return_value={'id': 'sl_edited'})
+
+    data = {'BTC/USDT': {'status': 'SECURED', 'side': 'LONG', 'sl_order_id': 'sl_old', 'quantity': 0.5}}
+    tracker = MagicMock()
+    tracker.get = lambda s: data.get(s)
+    tracker.exists = lambda s: s in data
+    tracker.update = lambda s, u: data[s].update(u)
+    tracker.save = AsyncMock()
+
+    metrics.histogram('sl_amend_latency_ms').reset()
+    return SafetyManager(exchange, tracker), exchange, data, calls
+
+
+def test_places_new_sl_before_cancelling_old(setup):
+    safety, exchange, data, calls = setup
+    asyncio.run(safety._amend_sl_order('BTC/USDT', 60000, 'LONG'))
+
+    assert [c[0] for c in calls] == ['create', 'cancel']
+    args = calls[0][1]
+    assert args[3] == 0.5                      # quantity, bukan closePosition
+    assert args[5]['reduceOnly'] is True
+    assert calls[1][1] == 'sl_old'
+    assert data['BTC/USDT']['sl_order_id'] == 'sl_new'
+    exchange.fetch_open_orders.assert_not_called()
+    assert metrics.histogram('sl_amend_latency_ms').count == 1
+
+
+def test_cancel_retry_then_succeeds(setup):
+    safety, exchange, data, calls = setup
+    exchange.cancel_order.side_effect = [ccxt.NetworkError('timeout'), None]
+
+    asyncio.run(safety._amend_sl_order('BTC/USDT', 60000, 'LONG'))
+
+    assert exchange.cancel_order.await_count == 2
+    exchange.fetch_open_orders.assert_not_called()
+
+
+def test_cancel_exhausted_cleans_stale_stops_but_keeps_new(setup):
+    safety, exchange, data, calls = setup
+    exchange.cancel_order.side_effect = ccxt.NetworkError('down')
+    exchange.fetch_open_orders.return_value = [
+        {'id': 'sl_old', 'type': 'stop_market'},
+        {'id': 'sl_new', 'type': 'stop_market'},
+    ]
+
+    asyncio.run(safety._amend_sl_order('BTC/USDT', 60000, 'LONG'))
+
+    cancelled = [c.args[0] for c in exchange.cancel_order.await_args_list]
+    assert 'sl_new' not in cancelled
+    assert data['BTC/USDT']['sl_order_id'] == 'sl_new'
+
+
+def test_order_not_found_counts_as_cancelled(setup):
+    safety, exchange, data, calls = setup
+    exchange.cancel_order.side_effect = ccxt.OrderNotFound('gone')
+
+    asyncio.run(safety._amend_sl_order('BTC/USDT', 60000, 'LONG'))
+
+    assert exchange.cancel_order.await_count == 1
+    exchange.fetch_open_orders.assert_not_called()
+
+
+def test_legacy_path_without_quantity(setup):
+    safety, exchange, data, calls = setup
+    del data['BTC/USDT']['quantity']
+
+    asyncio.run(safety._amend_sl_order('BTC/USDT', 60000, 'LONG'))
+
+    assert [c[0] for c in calls] == ['cancel', 'create']
+    assert calls[1][1][5]['closePosition'] is True
+
+
+def test_edit_mode_uses_edit_order(setup):
+    safety, exchange, data, calls = setup
+    with patch.object(config, 'SL_AMEND_MODE', 'edit'):
+        asyncio.run(safety._amend_sl_order('BTC/USDT', 60000, 'LONG'))
+
+    exchange.edit_order.assert_awaited_once()
+    exchange.create_order.assert_not_called()
+    assert data['BTC/USDT']['sl_order_id'] == 'sl_edited'
+
+
+def test_histogram_percentiles():
+    hist = metrics.Histogram('test_latency')
+    for v in range(1, 101):
+        hist.observe(v)
+    s = hist.summary()
+    assert s['count'] == 100
+    assert s['p50'] == 50
+    assert s['p95'] == 95
+    assert s['p99'] == 99
+    assert s['max'] == 100
+
+
+def test_report_includes_sl_amend_latency(setup):
+    safety, exchange, data, calls = setup
+    metrics.histogram('trace_total_ms').observe(5)
+
+    asyncio.run(safety._amend_sl_order('BTC/USDT', 60000, 'LONG'))
+
+    report = metrics.format_report(exclude=('trace_',))  # Dicetak safety_monitor_loop tiap TRACE_REPORT_INTERVAL
+    assert 'sl_amend_latency_ms: n=1' in report
+    assert 'trace_total_ms' not in report
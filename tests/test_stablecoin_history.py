@@ -0,0 +1,182 @@
+"""
+Test suite untuk cache history stablecoin (src/utils/stablecoin_history.py):
+merge incremental, inflow multi-window, revalidasi conditional GET & persistensi.
+"""
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from aiohttp import web
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.modules.onchain import OnChainAnalyzer
+from src.utils import http_pool, stablecoin_history
+from src.utils.prompt_builder import build_sentiment_prompt
+from src.utils.stablecoin_history import DAY_SECONDS, StablecoinHistory
+
+START = 1_700_006_400  # 00:00 UTC
+
+
+def _chart(values):
+    return [{'date': str(START + i * DAY_SECONDS), 'totalCirculatingUSD': {'peggedUSD': v, 'peggedEUR': 1.0}}
+            for i, v in enumerate(values)]
+
+
+class ChartServer:
+    """Server DefiLlama lokal dengan ETag (304 jika If-None-Match cocok)."""
+
+    def __init__(self, values):
+        self.values = values
+        self.requests = []
+
+    async def handle(self, request):
+        body = json.dumps(_chart(self.values))
+        etag = f'"{len(self.values)}-{self.values[-1]}"'
+        self.requests.append(dict(request.headers))
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304)
+        return web.Response(text=body, content_type='application/json', headers={'ETag': etag})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get('/stablecoincharts/all', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/stablecoincharts/all"
+        return self
+
+    async def __aexit__(self, *exc):
+        await http_pool.close_all()
+        await self.runner.cleanup()
+
+
+class TestStablecoinHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'history.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_merge_only_applies_tail(self):
+        history = StablecoinHistory(self.path)
+        self.assertEqual(history.merge(_chart([100.0, 101.0, 102.0, 103.0])), 4)
+
+        chart = _chart([100.0, 101.0, 102.5, 104.0, 105.0])
+        chart[0]['totalCirculatingUSD']['peggedUSD'] = 1.0  # History lama di luar overlap tidak disentuh
+        self.assertEqual(history.merge(chart), 3)  # Revisi hari ke-3 & 4, titik baru hari ke-5
+        self.assertEqual([history.points[day] for day in sorted(history.points)], [100.0, 101.0, 102.5, 104.0, 105.0])
+
+    def test_history_trimmed(self):
+        history = StablecoinHistory(self.path)
+        with patch.object(config, 'STABLECOIN_HISTORY_MAX_DAYS', 10):
+            history.merge(_chart([float(100 + i) for i in range(40)]))
+        self.assertEqual(len(history), 10)
+        self.assertEqual(min(history.points), START + 30 * DAY_SECONDS)
+
+    def test_multi_window_inflows(self):
+        history = StablecoinHistory(self.path)
+        history.merge(_chart([100.0 + i for i in range(31)]))
+        inflows = history.inflows([1, 7, 30, 90])
+        self.assertAlmostEqual(inflows['1d'], (130 - 129) / 129 * 100)
+        self.assertAlmostEqual(inflows['7d'], (130 - 123) / 123 * 100)
+        self.assertAlmostEqual(inflows['30d'], 30.0)
+        self.assertIsNone(inflows['90d'])
+
+    def test_revalidate_and_persist(self):
+        values = [100.0 + i for i in range(31)]
+
+        async def scenario():
+            async with ChartServer(values) as server:
+                session = http_pool.get_aiohttp_session()
+                history = StablecoinHistory(self.path)
+                first = await history.refresh(session, server.url)
+                cached = await history.refresh(session, server.url)  # Masih fresh: tanpa request
+                not_modified = await history.refresh(session, server.url, force=True)
+
+                values.append(140.0)
+                restored = StablecoinHistory(self.path)
+                newer = await restored.refresh(session, server.url, force=True)
+                return server, restored, (first, cached, not_modified, newer)
+
+        server, restored, results = asyncio.run(scenario())
+        self.assertEqual(results, (31, 0, 0, 1))
+        self.assertEqual(len(server.requests), 3)
+        self.assertNotIn('If-None-Match', server.requests[0])
+        self.assertIn('If-None-Match', server.requests[1])
+        self.assertIn('If-None-Match', server.requests[2])  # Validator dari disk
+        self.assertEqual(len(restored), 32)
+
+    def test_not_modified_restarts_ttl_on_disk(self):
+        values = [100.0 + i for i in range(31)]
+
+        async def scenario():
+            async with ChartServer(values) as server:
+                session = http_pool.get_aiohttp_session()
+                history = StablecoinHistory(self.path)
+                await history.refresh(session, server.url)
+                history.checked_at = 0  # Cache basi (juga di disk) -> revalidasi berikutnya dapat 304
+                history.save()
+                await history.refresh(session, server.url)
+                # Restart: checked_at dari 304 tersimpan, cache masih fresh tanpa request
+                await StablecoinHistory(self.path).refresh(session, server.url)
+                return server
+
+        server = asyncio.run(scenario())
+        self.assertEqual(len(server.requests), 2)
+        restored = StablecoinHistory(self.path)
+        restored.load()
+        self.assertTrue(restored.is_fresh())
+
+
+class TestOnChainCachedInflow(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.history_file = patch.object(stablecoin_history.config, 'STABLECOIN_HISTORY_FILENAME', os.path.join(self.tmp.name, 'h.json'))
+        self.history_file.start()
+
+    def tearDown(self):
+        self.history_file.stop()
+        self.tmp.cleanup()
+
+    def test_network_failure_uses_cached_history(self):
+        values = [100.0] * 29 + [100.0, 101.0]
+
+        async def scenario():
+            async with ChartServer(values) as server:
+                with patch.object(config, 'DEFILLAMA_STABLECOIN_URL', server.url):
+                    await OnChainAnalyzer().fetch_stablecoin_inflows()
+            analyzer = OnChainAnalyzer()  # History dari disk, server sudah mati
+            with patch.object(config, 'DEFILLAMA_STABLECOIN_URL', server.url), \
+                 patch.object(config, 'STABLECOIN_REVALIDATE_INTERVAL', '0s'):
+                await analyzer.fetch_stablecoin_inflows()
+            await http_pool.close_all()
+            return analyzer
+
+        analyzer = asyncio.run(scenario())
+        latest = analyzer.get_latest()
+        self.assertEqual(latest['stablecoin_inflow'], 'Positive')
+        self.assertAlmostEqual(latest['stablecoin_inflows']['1d'], 1.0)
+        self.assertAlmostEqual(latest['stablecoin_inflows']['30d'], 1.0)
+
+        prompt = build_sentiment_prompt({'fng_value': 50, 'fng_text': 'Neutral', 'news': []}, latest)
+        self.assertIn("- Stablecoin Inflow: Positive (1d +1.00%, 7d +1.00%, 30d +1.00%)", prompt)
+
+
+if __name__ == '__main__':
+    unittest.main()
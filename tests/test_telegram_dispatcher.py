@@ -0,0 +1,141 @@
+"""
+Test suite untuk TelegramDispatcher (src/utils/notifier.py).
+Sender Telegram diganti fungsi lokal, jadi tidak ada request ke API sungguhan.
+"""
+import sys
+import os
+import time
+import asyncio
+import unittest
+from unittest.mock import patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.utils import notifier, metrics
+
+
+class FakeSender:
+    def __init__(self, results=None, delay=0.0):
+        self.results = list(results or [])
+        self.delay = delay
+        self.sent = []
+
+    async def __call__(self, text, channel='default'):
+        await asyncio.sleep(self.delay)
+        self.sent.append((time.monotonic(), channel, text))
+        return self.results.pop(0) if self.results else ('ok', None)
+
+
+class TestTelegramDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        for name in ('telegram_dropped', 'telegram_coalesced', 'telegram_retries', 'telegram_failed'):
+            metrics.counter(name).reset()
+        self.patches = [
+            patch.object(config, 'TELEGRAM_QUEUE_MAXSIZE', 5),
+            patch.object(config, 'TELEGRAM_MIN_INTERVAL', 0.0),
+            patch.object(config, 'TELEGRAM_MAX_PER_MINUTE', 20),
+            patch.object(config, 'TELEGRAM_MAX_RETRIES', 3),
+            patch.object(config, 'TELEGRAM_RETRY_BASE_DELAY', 0.01),
+            patch.object(config, 'TELEGRAM_RETRY_MAX_DELAY', 0.05),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def _run(self, sender, scenario):
+        async def run():
+            d = notifier.TelegramDispatcher(sender=sender)
+            d.start()
+            await scenario(d)
+            await d.stop(timeout=2)
+        asyncio.run(run())
+
+    def test_enqueue_does_not_wait_for_slow_sender(self):
+        sender = FakeSender(delay=0.5)
+
+        async def scenario(d):
+            start = time.perf_counter()
+            self.assertTrue(d.enqueue("🚀 <b>ENTRY</b>\nBTC"))
+            self.assertLess(time.perf_counter() - start, 0.01)
+
+        self._run(sender, scenario)
+        self.assertEqual(len(sender.sent), 1)
+
+    def test_burst_of_similar_messages_is_coalesced(self):
+        sender = FakeSender()
+
+        async def scenario(d):
+            for sym in ('BTC/USDT', 'ETH/USDT', 'SOL/USDT'):
+                d.enqueue(f"🗑️ <b>ORDER SYNC</b>\nOrder for {sym} was cancelled.")
+
+        self._run(sender, scenario)
+        self.assertEqual(len(sender.sent), 1)
+        text = sender.sent[0][2]
+        self.assertIn("ORDER SYNC</b> (x3)", text)
+        self.assertIn("SOL/USDT", text)
+        self.assertEqual(metrics.counter('telegram_coalesced').value, 2)
+
+    def test_alert_is_sent_before_normal_messages(self):
+        sender = FakeSender()
+
+        async def scenario(d):
+            d.enqueue("info 1")
+            d.enqueue("info 2")
+            d.enqueue("API error", alert=True)
+
+        self._run(sender, scenario)
+        self.assertIn("SYSTEM ALERT", sender.sent[0][2])
+
+    def test_full_queue_drops_message(self):
+        sender = FakeSender()
+
+        async def scenario(d):
+            results = [d.enqueue(f"msg {i}") for i in range(7)]
+            self.assertEqual(results.count(False), 2)
+
+        self._run(sender, scenario)
+        self.assertEqual(metrics.counter('telegram_dropped').value, 2)
+
+    def test_retry_after_and_fatal(self):
+        sender = FakeSender(results=[('retry', 0.05), ('retry', None), ('ok', None), ('fatal', None)])
+
+        async def scenario(d):
+            d.enqueue("first")
+            await asyncio.sleep(0.2)
+            d.enqueue("second")
+
+        self._run(sender, scenario)
+        self.assertEqual(len(sender.sent), 4)
+        self.assertGreaterEqual(sender.sent[1][0] - sender.sent[0][0], 0.05)
+        self.assertEqual(metrics.counter('telegram_retries').value, 2)
+        self.assertEqual(metrics.counter('telegram_failed').value, 1)
+
+    def test_per_chat_min_interval(self):
+        sender = FakeSender()
+
+        async def scenario(d):
+            d.enqueue("a")
+            d.enqueue("b")
+            d.enqueue("c", channel='sentiment')
+
+        with patch.object(config, 'TELEGRAM_MIN_INTERVAL', 0.1):
+            self._run(sender, scenario)
+
+        default_ts = [ts for ts, ch, _ in sender.sent if ch == 'default']
+        self.assertGreaterEqual(default_ts[1] - default_ts[0], 0.09)
+        # Channel lain tidak ikut menunggu jeda channel default
+        sentiment_ts = [ts for ts, ch, _ in sender.sent if ch == 'sentiment'][0]
+        self.assertLess(sentiment_ts - default_ts[1], 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Test suite untuk TrailingEngine (software trailing stop berbasis array).
+Memvalidasi evaluasi tick, coalescing amend selama cooldown,
+batch persist watermark, dan integrasi dengan SafetyManager.
+"""
+import pytest
+import sys
+import os
+import asyncio
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# 1. Setup Path to Project Root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+from src.modules.executor_impl.trailing_engine import TrailingEngine
+from src.modules.executor_impl import safety as safety_module
+from src.modules.executor_impl.safety import SafetyManager
+
+# Patch config yang benar-benar dibaca modul yang dites (bukan config mock dari test lain)
+config = safety_module.config
+
+
+@pytest.fixture(autouse=True)
+def trailing_config():
+    with patch.object(config, 'TRAILING_CALLBACK_RATE', 0.01), \
+         patch.object(config, 'TRAILING_SL_UPDATE_COOLDOWN', 3), \
+         patch.object(config, 'TRAILING_PERSIST_INTERVAL', 10):
+        yield
+
+
+class TestTrailingEngine:
+
+    def test_long_tick_and_coalescing(self):
+        engine = TrailingEngine(capacity=4)
+        engine.load('BTC/USDT', 'LONG', 58000, 57420, 0.01)
+
+        # Amend pertama langsung lolos (last_amend = 0)
+        assert engine.on_tick('BTC/USDT', 60000, now=100, cooldown=3) == pytest.approx(59400)
+
+        # Dalam cooldown: dua tick naik hanya menyimpan kandidat terbaru
+        assert engine.on_tick('BTC/USDT', 60500, now=101, cooldown=3) is None
+        assert engine.on_tick('BTC/USDT', 61000, now=102, cooldown=3) is None
+        assert engine.pending_sl[engine._slots['BTC/USDT']] == pytest.approx(60390)
+
+        # Cooldown habis -> satu amend dengan SL terbaru
+        due = engine.due_amends(now=104, cooldown=3)
+        assert due == [('BTC/USDT', pytest.approx(60390))]
+        assert engine.due_amends(now=105, cooldown=3) == []
+
+    def test_short_watermark(self):
+        engine = TrailingEngine()
+        engine.load('ETH/USDT', 'SHORT', 3500, 3535, 0.01)
+        assert engine.on_tick('ETH/USDT', 3400, now=10, cooldown=3) == pytest.approx(3434)
+        # Harga naik tidak menggeser watermark/SL
+        assert engine.on_tick('ETH/USDT', 3450, now=20, cooldown=3) is None
+        assert engine.get_state('ETH/USDT') == {'trailing_sl': pytest.approx(3434), 'trailing_low': 3400}
+
+    def test_grow_keeps_existing_slots(self):
+        engine = TrailingEngine(capacity=2)
+        for i in range(5):
+            engine.load(f'C{i}/USDT', 'LONG', 100 + i, 90, 0.01)
+        assert len(engine) == 5
+        assert engine.get_state('C0/USDT')['trailing_high'] == 100
+        assert engine.get_state('C4/USDT')['trailing_high'] == 104
+
+        engine.remove('C2/USDT')
+        assert 'C2/USDT' not in engine
+        assert engine.on_tick('C2/USDT', 200, now=1, cooldown=0) is None
+
+    def test_collect_dirty_resets_flags(self):
+        engine = TrailingEngine()
+        engine.load('BTC/USDT', 'LONG', 100, 90, 0.01)
+        engine.load('ETH/USDT', 'LONG', 100, 90, 0.01)
+        engine.on_tick('BTC/USDT', 105, now=1, cooldown=0)
+        assert list(engine.collect_dirty()) == ['BTC/USDT']
+        assert engine.collect_dirty() == {}
+
+
+def _make_safety(tracker_data):
+    tracker = MagicMock()
+    tracker.data = tracker_data
+    tracker.get = lambda s: tracker_data.get(s)
+    tracker.exists = lambda s: s in tracker_data
+    tracker.update = lambda s, u: tracker_data[s].update(u)
+    tracker.save = AsyncMock()
+    safety = SafetyManager(MagicMock(), tracker)
+    safety._amend_sl_order = AsyncMock()
+    return safety, tracker
+
+
+class TestSafetyIntegration:
+
+    def test_throttled_ticks_do_not_touch_tracker(self):
+        data = {'BTC/USDT': {'status': 'SECURED', 'side': 'LONG', 'trailing_active': True,
+                             'trailing_high': 58000, 'trailing_sl': 57420}}
+        safety, tracker = _make_safety(data)
+
+        with patch('time.time', return_value=100):
+            asyncio.run(safety.check_trailing_on_price('BTC/USDT', 60000))
+        assert safety._amend_sl_order.await_count == 1
+        saves_after_amend = tracker.save.await_count
+
+        # Tick dalam cooldown & dalam interval persist: tracker tidak disentuh
+        safety._trailing_last_persist = 100
+        with patch('time.time', return_value=101):
+            asyncio.run(safety.check_trailing_on_price('BTC/USDT', 61000))
+        assert safety._amend_sl_order.await_count == 1
+        assert data['BTC/USDT']['trailing_high'] == 60000
+        assert tracker.save.await_count == saves_after_amend
+
+        # Flush periodik: kirim SL pending + persist watermark dalam satu save
+        with patch('time.time', return_value=105):
+            asyncio.run(safety.flush_trailing())
+        assert safety._amend_sl_order.await_count == 2
+        assert data['BTC/USDT']['trailing_high'] == 61000
+        assert data['BTC/USDT']['trailing_sl'] == pytest.approx(60390)
+        assert tracker.save.await_count == saves_after_amend + 1
+
+    def test_closed_position_releases_slot(self):
+        data = {'BTC/USDT': {'status': 'SECURED', 'side': 'LONG', 'trailing_active': True,
+                             'trailing_high': 58000, 'trailing_sl': 57420}}
+        safety, _ = _make_safety(data)
+
+        with patch('time.time', return_value=100):
+            asyncio.run(safety.check_trailing_on_price('BTC/USDT', 60000))
+        safety.release_trailing('BTC/USDT')
+        assert 'BTC/USDT' not in safety.trailing
+        assert data['BTC/USDT']['trailing_high'] == 60000
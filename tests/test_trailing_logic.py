@@ -31,10 +31,17 @@ config.DEFAULT_TP_PERCENT = 0.025
 config.LIMIT_ORDER_EXPIRY_SECONDS = 3600
 config.DEFAULT_MARGIN_TYPE = 'isolated'
 config.TRAILING_SL_UPDATE_COOLDOWN = 3
+config.TRAILING_PERSIST_INTERVAL = 10
+config.SL_AMEND_MODE = 'replace'
+config.SL_AMEND_RETRY_DELAY = 0
+config.ORDER_SLTP_RETRIES = 3
 config.NATIVE_TRAILING_MIN_RATE = 0.1
 config.NATIVE_TRAILING_MAX_RATE = 5.0
 config.TRAILING_ACTIVATION_DELAY = 60
 config.USE_NATIVE_TRAILING = True
+config.ORDER_CLIENT_ID_PREFIX = 'EP'
+config.ORDER_RECONCILE_INTERVAL = 300
+config.ORDER_INDEX_MAX_TERMINAL = 500
 
 # 4. Import Module Under Test
 from src.modules.executor import OrderExecutor
@@ -0,0 +1,133 @@
+"""
+Test suite untuk batch Vision PatternRecognizer:
+grid berlabel, JSON per panel dipecah ke cache per simbol, validasi per panel & fallback single.
+"""
+import sys
+import os
+import io
+import json
+import base64
+import asyncio
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+import numpy as np
+from PIL import Image
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.modules.pattern_recognizer import PatternRecognizer
+from src.utils import chart_renderer
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
+VALID = "BULLISH. Price formed a bull flag above EMA with rising volume and MACD crossing up."
+
+
+def _chart_png():
+    renderer = chart_renderer.ChartRenderer(figsize=(4, 3))
+    n = 30
+    closes = 100 + np.cumsum(np.ones(n))
+    png = renderer.render(closes - 0.5, closes + 1, closes - 1, closes, np.full(n, 10.0),
+                          np.zeros(n), np.zeros(n), np.zeros(n), dpi=50)
+    return base64.b64encode(png).decode()
+
+
+def _response(content):
+    msg = MagicMock(content=content)
+    return MagicMock(choices=[MagicMock(message=msg)], usage=None)
+
+
+class TestVisionBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.img = _chart_png()
+
+    def setUp(self):
+        market_data = MagicMock()
+        market_data.market_store = {s: {config.TIMEFRAME_SETUP: [[1000, 1, 2, 0.5, 1.5, 10]]} for s in SYMBOLS}
+        with patch.object(config, 'AI_API_KEY', 'dummy_key'), \
+             patch.object(config, 'USE_PATTERN_RECOGNITION', True):
+            self.recognizer = PatternRecognizer(market_data)
+        self.recognizer.client = MagicMock()
+        self.patchers = [
+            patch.object(config, 'USE_PATTERN_RECOGNITION', True),
+            patch.object(config, 'PATTERN_BATCH_ENABLED', True),
+            patch.object(config, 'PATTERN_BATCH_MAX_PANELS', 3),
+            patch.object(config, 'PATTERN_BATCH_WINDOW', 0.05),
+            patch.object(config, 'PATTERN_BATCH_PANEL_WIDTH', 200),
+            patch.object(config, 'PATTERN_MAX_RETRIES', 0),
+            patch.object(config, 'AI_LEDGER_ENABLED', False),
+            patch.object(chart_renderer, 'render_async', AsyncMock(return_value=(self.img, {'close': 1.5, 'macd': 0.1}))),
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+
+    def _run(self, symbols):
+        async def scenario():
+            return await asyncio.gather(*(self.recognizer.analyze_pattern(s) for s in symbols))
+        return asyncio.run(scenario())
+
+    def test_tile_charts_builds_grid(self):
+        grid = chart_renderer.tile_charts([self.img] * 3, ['1. A', '2. B', '3. C'], columns=2, panel_width=200)
+        image = Image.open(io.BytesIO(base64.b64decode(grid)))
+        panel = Image.open(io.BytesIO(base64.b64decode(self.img)))
+        self.assertEqual(image.size, (400, 2 * round(panel.height * 200 / panel.width)))
+
+    def test_grid_verdicts_split_per_symbol(self):
+        verdicts = {"panels": [{"panel": i, "symbol": s, "analysis": VALID} for i, s in enumerate(SYMBOLS, 1)]}
+        create = AsyncMock(return_value=_response(json.dumps(verdicts)))
+        self.recognizer.client.chat.completions.create = create
+
+        results = self._run(SYMBOLS)
+
+        self.assertEqual(create.await_count, 1)
+        self.assertTrue(all(r['is_valid'] for r in results))
+        self.assertEqual(set(self.recognizer.cache), set(SYMBOLS))
+        content = create.call_args.kwargs['messages'][0]['content']
+        self.assertIn('3. SOL/USDT', content[0]['text'])
+        self.assertEqual(content[1]['image_url']['detail'], config.PATTERN_BATCH_IMAGE_DETAIL)
+
+    def test_invalid_panel_falls_back_to_single(self):
+        verdicts = {"panels": [
+            {"panel": 1, "symbol": "BTC/USDT", "analysis": VALID},
+            {"panel": 2, "symbol": "ETH/USDT", "analysis": "BULLISH but trunc"},  # Terpotong
+            {"panel": 3, "symbol": "SOL/USDT", "analysis": VALID},
+        ]}
+        create = AsyncMock(side_effect=[_response(json.dumps(verdicts)), _response(VALID)])
+        self.recognizer.client.chat.completions.create = create
+
+        results = self._run(SYMBOLS)
+
+        self.assertEqual(create.await_count, 2)
+        self.assertTrue(all(r['is_valid'] for r in results))
+        single = create.call_args_list[1].kwargs['messages'][0]['content'][0]['text']
+        self.assertIn('ETH/USDT', single)
+
+    def test_single_candidate_uses_single_path(self):
+        create = AsyncMock(return_value=_response(VALID))
+        self.recognizer.client.chat.completions.create = create
+
+        result, = self._run(['BTC/USDT'])
+
+        self.assertTrue(result['is_valid'])
+        self.assertEqual(create.await_count, 1)
+        self.assertEqual(create.call_args.kwargs['messages'][0]['content'][1]['image_url']['detail'], 'low')
+
+    def test_parse_prefers_panel_number(self):
+        raw = 'Sure: {"panels": [{"panel": 2, "symbol": "WRONG", "analysis": "x."}, {"symbol": "BTC/USDT", "analysis": "y."}]}'
+        self.assertEqual(PatternRecognizer._parse_batch_verdicts(raw, SYMBOLS),
+                         {'ETH/USDT': 'x.', 'BTC/USDT': 'y.'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Test suite untuk agregator whale flow (src/utils/whale_flow.py) & integrasi OnChainAnalyzer / prompt sentimen.
+"""
+import sys
+import os
+import random
+import time
+import unittest
+from unittest.mock import patch
+
+# --- SETUP PATHS ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'src'))
+
+import config
+from src.modules.onchain import OnChainAnalyzer
+from src.utils import whale_flow
+from src.utils.prompt_builder import build_market_prompt, build_sentiment_prompt
+from src.utils.prompt_compiler import PromptCompiler
+from src.utils.whale_flow import WhaleFlow, format_flow
+from tests.benchmark_prompt_compiler import RECORDED_INPUTS
+
+NOW = 1_700_000_000
+M = 1_000_000
+
+
+class TestWhaleFlow(unittest.TestCase):
+
+    def test_rolling_windows_match_brute_force(self):
+        rng = random.Random(7)
+        flow = WhaleFlow('BTC/USDT')
+        events = []
+        ts = NOW
+        for _ in range(2000):
+            ts += rng.uniform(0, 30)
+            event = (ts, rng.choice(['BUY', 'SELL']), rng.uniform(1, 20) * M)
+            events.append(event)
+            flow.add(*event)
+            if rng.random() < 0.05:
+                now = ts  # Waktu query monoton (seperti time.time())
+                for label, values in flow.stats(now).items():
+                    cutoff = now - whale_flow.window_seconds()[label]
+                    inside = [e for e in events if e[0] >= cutoff]
+                    buy = sum(n for _, side, n in inside if side == 'BUY')
+                    sell = sum(n for _, side, n in inside if side == 'SELL')
+                    self.assertAlmostEqual(values['net'], buy - sell, delta=1)
+                    self.assertEqual(values['buy_count'], sum(1 for e in inside if e[1] == 'BUY'))
+                    self.assertEqual(values['sell_count'], sum(1 for e in inside if e[1] == 'SELL'))
+
+    def test_window_cap_and_history_ring(self):
+        with patch.object(config, 'WHALE_WINDOW_MAX_EVENTS', 5), patch.object(config, 'WHALE_HISTORY_LIMIT', 3):
+            flow = WhaleFlow('SOL/USDT')
+            for i in range(8):
+                flow.add(NOW + i, 'BUY', 2 * M)
+        stats = flow.stats(NOW + 10)
+        self.assertEqual(stats['5m']['buy_count'], 5)
+        self.assertAlmostEqual(stats['4h']['buy'], 10 * M)
+        self.assertEqual(len(flow), 3)
+
+    def test_messages_formatted_lazily(self):
+        flow = WhaleFlow('BTC/USDT')
+        with patch.object(whale_flow, 'datetime') as dt:
+            for i in range(50):
+                flow.add(NOW + i, 'SELL', 1_500_000)
+            dt.fromtimestamp.assert_not_called()  # Ingest tanpa format string
+            dt.fromtimestamp.return_value.strftime.return_value = '10:00'
+            messages = flow.messages()
+            flow.messages()  # Memo: tidak diformat ulang
+        self.assertEqual(dt.fromtimestamp.call_count, config.WHALE_HISTORY_LIMIT)
+        self.assertEqual(messages[-1], "🐋 [10:00] SELL BTC/USDT worth $1,500,000")
+
+    def test_format_flow(self):
+        flow = WhaleFlow('BTC/USDT')
+        flow.add(NOW - 1800, 'BUY', 4 * M)
+        flow.add(NOW - 60, 'SELL', 1.5 * M)
+        self.assertEqual(format_flow(flow.stats(NOW)),
+                         "5m: net -$1.5M (buy 0 / sell 1) | 1h: net +$2.5M (buy 1 / sell 1) | "
+                         "4h: net +$2.5M (buy 1 / sell 1)")
+        self.assertEqual(format_flow(flow.stats(NOW + 86400)), "")
+
+
+class TestOnChainWhaleFlow(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = OnChainAnalyzer()
+
+    def test_dedup_and_per_symbol_flow(self):
+        self.analyzer.detect_whale("BTC/USDT", 1_500_000, "BUY", ts=NOW)
+        self.analyzer.detect_whale("BTC/USDT", 1_500_000, "BUY", ts=NOW + 1)  # Duplikat dalam window
+        self.analyzer.detect_whale("BTC/USDT", 3_000_000, "SELL", ts=NOW + 2)
+        self.analyzer.detect_whale("SOL/USDT", 2_000_000, "BUY", ts=NOW + 3)
+        self.analyzer.detect_whale("SOL/USDT", 500_000, "BUY", ts=NOW + 4)  # Di bawah threshold
+
+        btc = self.analyzer.get_whale_flow("BTC/USDT", now=NOW + 5)['1h']
+        self.assertEqual((btc['buy_count'], btc['sell_count'], btc['net']), (1, 1, -1_500_000))
+
+        total = self.analyzer.get_whale_flow(now=NOW + 5)['5m']
+        self.assertEqual((total['buy_count'], total['sell_count'], total['net']), (2, 1, 500_000))
+        self.assertEqual(self.analyzer.get_whale_flow("ETH/USDT"), {})
+
+    def test_global_flow_reaches_sentiment_prompt(self):
+        now = time.time()
+        self.analyzer.detect_whale("BTC/USDT", 5_000_000, "BUY", ts=now)
+        data = self.analyzer.get_latest()
+        self.assertEqual(data['whale_activity'], [])
+
+        prompt = build_sentiment_prompt({'fng_value': 20, 'fng_text': 'Fear', 'news': []}, data)
+
+        self.assertIn("- Net whale flow 5m: net +$5.0M (buy 1 / sell 0)", prompt)
+        self.assertNotIn("No significant whale activity", prompt)
+
+    def test_symbol_flow_reaches_market_prompt(self):
+        now = time.time()
+        rec = RECORDED_INPUTS[0]
+        self.analyzer.detect_whale(rec['symbol'], 2_000_000, "SELL", ts=now)
+        self.analyzer.detect_whale("BTC/USDT", 9_000_000, "BUY", ts=now)  # Simbol lain tidak ikut
+        onchain_data = self.analyzer.get_latest(rec['symbol'])
+
+        legacy = build_market_prompt(rec['symbol'], rec['tech_data'], rec['sentiment_data'], onchain_data)
+        self.assertIn("- Whale Flow: 5m: net -$2.0M (buy 0 / sell 1) | 1h: net -$2.0M", legacy)
+
+        compiled = PromptCompiler(budget=0).compile(rec['symbol'], rec['tech_data'], rec['sentiment_data'], onchain_data)
+        market = compiled.text[compiled.text.index('[MARKET DATA]'):]
+        self.assertIn("whale_flow: 5m: net -$2.0M (buy 0 / sell 1); 1h: net -$2.0M", market)
+        self.assertNotIn("+$9.0M", compiled.text)
+
+
+if __name__ == '__main__':
+    unittest.main()